@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { prisma } from '@/lib/prisma';
 import { parameterizePath } from '@/lib/path-parameterization';
+import { invalidateExecutorApiCache } from '@/lib/executor-cache';
 
 export const dynamic = 'force-dynamic';
 
@@ -265,6 +266,7 @@ export async function PUT(
       where: { id },
       data: filteredUpdateData,
     });
+    await invalidateExecutorApiCache([id]);
 
     // 如果提供了标签，更新标签关联
     if (tags && Array.isArray(tags)) {
@@ -404,6 +406,7 @@ export async function DELETE(
     await prisma.api.delete({
       where: { id },
     });
+    await invalidateExecutorApiCache([id]);
 
     return NextResponse.json({
       success: true,
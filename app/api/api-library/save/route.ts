@@ -5,6 +5,7 @@ import { CapturedApi } from '@/types/har';
 import { safeJsonStringify } from '@/lib/json-utils';
 import { parameterizePath } from '@/lib/path-parameterization';
 import { filterHeadersByWhitelist } from '@/lib/header-filter';
+import { invalidateExecutorApiCache } from '@/lib/executor-cache';
 
 export const dynamic = 'force-dynamic';
 
@@ -190,6 +191,12 @@ export async function POST(request: NextRequest) {
       }));
 
     console.log(`📊 [保存结果] 成功: ${savedApis.length}, 失败: ${failedApis.length}`);
+
+    // 覆盖模式更新了已有API，通知执行器刷新缓存
+    const overwrittenIds = apis
+      .filter((api: any) => api._overwrite && api.id)
+      .map((api: any) => api.id as string);
+    await invalidateExecutorApiCache(overwrittenIds);
     
     if (failedApis.length > 0) {
       console.error('❌ [失败详情]', failedApis);
@@ -1,6 +1,15 @@
 import { NextRequest, NextResponse } from "next/server";
 import { prisma } from "@/lib/prisma";
 
+/**
+ * 本地日期 YYYY-MM-DD（与执行器写入 SuiteDailyStats.day 的日期口径一致）
+ */
+function localDay(date: Date): string {
+  const month = String(date.getMonth() + 1).padStart(2, "0");
+  const day = String(date.getDate()).padStart(2, "0");
+  return `${date.getFullYear()}-${month}-${day}`;
+}
+
 /**
  * 获取仪表盘统计数据
  * GET /api/dashboard/stats
@@ -92,18 +101,17 @@ export async function GET(request: NextRequest) {
         }
       }),
 
-      // 6. 执行趋势数据（最近30天）
-      prisma.testSuiteExecution.findMany({
+      // 6. 执行趋势数据（最近30天，读取执行器维护的每日统计物化表）
+      prisma.suiteDailyStats.groupBy({
+        by: ["day"],
         where: {
-          createdAt: { gte: thirtyDaysAgo },
-          status: { in: ["completed", "failed"] }
+          day: { gte: localDay(thirtyDaysAgo) }
         },
-        orderBy: { createdAt: "asc" },
-        select: {
-          createdAt: true,
+        orderBy: { day: "asc" },
+        _sum: {
+          caseCount: true,
           passedCases: true,
-          failedCases: true,
-          totalCases: true
+          failedCases: true
         }
       })
     ]);
@@ -148,8 +156,38 @@ export async function GET(request: NextRequest) {
     // 按日期分组统计趋势数据
     const trendData: Record<string, { date: string; total: number; passed: number; failed: number }> = {};
     
-    trendExecutions.forEach(exec => {
-      const dateKey = exec.createdAt.toISOString().split('T')[0];
+    trendExecutions.forEach(item => {
+      trendData[item.day] = {
+        date: item.day,
+        total: item._sum.caseCount || 0,
+        passed: item._sum.passedCases || 0,
+        failed: item._sum.failedCases || 0
+      };
+    });
+
+    // 物化统计表只包含升级后的执行：第一条统计之前的日期（升级前的历史执行）回退为扫描执行记录
+    const firstStatsDay = trendExecutions.length > 0 ? trendExecutions[0].day : null;
+    const legacyTrendExecutions = await prisma.testSuiteExecution.findMany({
+      where: {
+        createdAt: {
+          gte: thirtyDaysAgo,
+          ...(firstStatsDay ? { lt: new Date(`${firstStatsDay}T00:00:00`) } : {})
+        },
+        status: { in: ["completed", "failed"] }
+      },
+      orderBy: { createdAt: "asc" },
+      select: {
+        createdAt: true,
+        passedCases: true,
+        failedCases: true,
+        totalCases: true
+      }
+    });
+
+    legacyTrendExecutions.forEach(exec => {
+      const dateKey = localDay(exec.createdAt);
+      // 已有统计的日期以统计表为准
+      if (firstStatsDay && dateKey >= firstStatsDay) return;
       if (!trendData[dateKey]) {
         trendData[dateKey] = {
           date: dateKey,
@@ -163,7 +201,7 @@ export async function GET(request: NextRequest) {
       trendData[dateKey].failed += exec.failedCases;
     });
 
-    const trendArray = Object.values(trendData).map(item => ({
+    const trendArray = Object.values(trendData).sort((a, b) => a.date.localeCompare(b.date)).map(item => ({
       ...item,
       successRate: item.total > 0 ? ((item.passed / item.total) * 100).toFixed(1) : "0"
     }));
@@ -160,6 +160,8 @@ export async function POST(
           suite_id: testSuite.id,
           environment_config: environmentConfig,
           run_mode: testSuite.runMode || 'serial',
+          // 性能剖析（cprofile / sampling），产物从执行器 /api/suite-executions/{id}/profile 获取
+          ...(body.profile ? { profile: body.profile } : {}),
         }),
         signal: controller.signal,
       });
@@ -170,15 +172,20 @@ export async function POST(
         throw new Error('Failed to start execution');
       }
 
+      const executorResult = await executorResponse.json().catch(() => ({}));
+
       logger.success(OperationType.EXECUTE, `执行器接受任务: ${execution.id}`);
 
-      await prisma.testSuiteExecution.updateMany({
-        where: { 
-          id: execution.id,
-          status: 'pending',
-        },
-        data: { status: 'running' },
-      });
+      // 执行器预算已满时任务排队，保持 pending，由执行器开始执行时更新为 running
+      if (!executorResult.queued) {
+        await prisma.testSuiteExecution.updateMany({
+          where: { 
+            id: execution.id,
+            status: 'pending',
+          },
+          data: { status: 'running' },
+        });
+      }
     } catch (error) {
       logger.error(OperationType.EXECUTE, '启动执行器失败', error as Error, {
         executionId: execution.id,
@@ -0,0 +1,20 @@
+import { NextResponse } from 'next/server';
+import { logger, OperationType } from '@/lib/logger';
+
+// POST /api/test-suites/[id]/executions/notify - 执行器通知：调度执行已在执行器内创建并开始
+// 执行记录由执行器直接写入数据库，这里只记录日志，页面通过执行历史接口获取最新状态
+export async function POST(
+  request: Request,
+  { params }: { params: Promise<{ id: string }> }
+) {
+  const { id } = await params;
+  const body = await request.json().catch(() => ({}));
+
+  logger.info(OperationType.EXECUTE, `执行器已开始测试套件执行: ${id}`, {
+    suiteId: id,
+    executionId: body.executionId,
+    triggeredBy: body.triggeredBy,
+  });
+
+  return NextResponse.json({ success: true });
+}
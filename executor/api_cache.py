@@ -0,0 +1,120 @@
+"""
+API 信息缓存 - 减少执行过程中对 Api 表的重复查询
+
+两级缓存：
+- 执行级缓存：一次套件执行（或压测）内共享的字典，套件开始时按所有用例引用的
+  apiId 一次性预取，执行期间不再变化
+- 进程级缓存：带 TTL 的全局缓存（环境变量 API_CACHE_TTL，单位秒，默认 300，
+  设置为 0 关闭），API 库保存/删除时由 Next.js 调用失效接口清除
+"""
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 进程级缓存有效期（秒）
+API_CACHE_TTL = float(os.getenv('API_CACHE_TTL', '300'))
+
+
+def collect_api_ids(flow_configs: Iterable[Optional[Dict[str, Any]]]) -> List[str]:
+    """
+    收集流程图中引用的所有 apiId（API 节点和并行节点中的 API）
+
+    Args:
+        flow_configs: flowConfig 字典列表
+
+    Returns:
+        去重后的 apiId 列表
+    """
+    api_ids: Dict[str, None] = {}
+    for flow_config in flow_configs:
+        for node in (flow_config or {}).get('nodes') or []:
+            data = node.get('data') or {}
+            if node.get('type') == 'api' and data.get('apiId'):
+                api_ids[data['apiId']] = None
+            elif node.get('type') == 'parallel':
+                for api in data.get('apis') or []:
+                    if isinstance(api, dict) and api.get('apiId'):
+                        api_ids[api['apiId']] = None
+    return list(api_ids)
+
+
+class ApiInfoCache:
+    """进程级 API 信息缓存（带 TTL）"""
+
+    def __init__(self, ttl: float = API_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def _get_fresh(self, api_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(api_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            self._entries.pop(api_id, None)
+            return None
+        return entry[1]
+
+    def get_many(self, database, api_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取 API 信息，未命中的部分用一次 IN 查询补齐
+
+        Returns:
+            API ID -> API 信息字典（不存在的 API 不包含在结果中）
+        """
+        if self.ttl <= 0:
+            return database.get_apis_by_ids(api_ids)
+
+        result = {}
+        missing = []
+        for api_id in api_ids:
+            info = self._get_fresh(api_id)
+            if info is None:
+                missing.append(api_id)
+            else:
+                result[api_id] = info
+
+        if missing:
+            fetched = database.get_apis_by_ids(missing)
+            now = time.monotonic()
+            for api_id, info in fetched.items():
+                self._entries[api_id] = (now, info)
+            result.update(fetched)
+        return result
+
+    def get(self, database, api_id: str) -> Optional[Dict[str, Any]]:
+        """获取单个 API 信息"""
+        return self.get_many(database, [api_id]).get(api_id)
+
+    def invalidate(self, api_ids: Optional[List[str]] = None) -> int:
+        """
+        使缓存失效
+
+        Args:
+            api_ids: 要失效的 API ID 列表，不提供时清空全部
+
+        Returns:
+            清除的条目数
+        """
+        if not api_ids:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
+        return sum(1 for api_id in api_ids if self._entries.pop(api_id, None) is not None)
+
+
+def prefetch_api_infos(database, flow_configs: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    预取流程图引用的全部 API 信息，生成执行级缓存
+
+    不存在的 apiId 以 None 记录，执行时不再重复查询
+    """
+    api_ids = collect_api_ids(flow_configs)
+    if not api_ids:
+        return {}
+    found = api_info_cache.get_many(database, api_ids)
+    print(f"[API缓存] 预取 API 信息: {len(found)}/{len(api_ids)}")
+    return {api_id: found.get(api_id) for api_id in api_ids}
+
+
+# 全局 API 信息缓存（进程内共享）
+api_info_cache = ApiInfoCache()
@@ -4,6 +4,7 @@
 from typing import Any, Dict, List, Optional
 from models import Assertion, AssertionOperator, ExpectedType
 from variable_manager import VariableManager
+from tracing import tracer
 import json
 
 
@@ -235,15 +236,17 @@ class AssertionEngine:
         """
         results = []
         
-        for idx, assertion in enumerate(assertions):
-            print(f"[断言引擎] 执行断言 {idx + 1}/{len(assertions)}")
-            result = self.execute_assertion(assertion, response_data)
-            results.append(result)
-            
-            # 如果失败且策略是停止，则不再执行后续断言
-            if not result.success and stop_on_failure:
-                print(f"[断言引擎] 断言失败，策略为停止执行，跳过剩余 {len(assertions) - idx - 1} 个断言")
-                break
+        with tracer.span('断言', 'assertion', count=len(assertions)) as span:
+            for idx, assertion in enumerate(assertions):
+                print(f"[断言引擎] 执行断言 {idx + 1}/{len(assertions)}")
+                result = self.execute_assertion(assertion, response_data)
+                results.append(result)
+                
+                # 如果失败且策略是停止，则不再执行后续断言
+                if not result.success and stop_on_failure:
+                    print(f"[断言引擎] 断言失败，策略为停止执行，跳过剩余 {len(assertions) - idx - 1} 个断言")
+                    break
+            span.set(passed=all(r.success for r in results))
         
         return results
     
@@ -0,0 +1,218 @@
+"""
+并行用例排序 - 按历史耗时估计，最长的用例优先启动（LPT 调度）
+
+并行执行时用例按提交顺序竞争并发名额，耗时最长的用例如果排在最后，
+会单独拖长整个套件的总耗时。这里用每个用例历史耗时的指数加权移动平均（EWMA）
+估计本次耗时，按"关键路径长度"（自身耗时 + 依赖它的后续用例链的最长耗时）从大到小排序；
+没有依赖关系时即为经典的最长处理时间优先（LPT）。
+
+套件执行配置（TestSuite.executionConfig）示例：
+    {"ordering": "lpt", "caseDependencies": {"caseB": ["caseA"]}}
+caseDependencies 声明的用例依赖会被保留：被依赖的用例执行结束后，依赖它的用例才会开始。
+
+同样的耗时估计也用于分片执行（{"shards": N}）时把用例均衡分配到各个分片（plan_shards）。
+"""
+import heapq
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# EWMA 平滑系数（越大越偏向最近的执行）
+DURATION_EWMA_ALPHA = float(os.getenv("DURATION_EWMA_ALPHA", "0.3"))
+
+# 参与估计的最近执行次数
+DURATION_HISTORY_LIMIT = int(os.getenv("DURATION_HISTORY_LIMIT", "20"))
+
+
+def ewma(durations: Sequence[float], alpha: float = DURATION_EWMA_ALPHA) -> Optional[float]:
+    """按时间先后（旧 -> 新）计算指数加权移动平均，没有数据时返回 None"""
+    estimate = None
+    for duration in durations:
+        estimate = duration if estimate is None else alpha * duration + (1 - alpha) * estimate
+    return estimate
+
+
+def estimate_durations(
+    case_ids: Iterable[str],
+    history: Dict[str, List[int]],
+    alpha: float = DURATION_EWMA_ALPHA
+) -> Dict[str, float]:
+    """
+    估计每个用例的耗时（毫秒）
+
+    没有历史记录的用例使用其他用例估计值的平均数（都没有时为 0）。
+
+    Args:
+        case_ids: 用例ID列表
+        history: 用例ID -> 历史耗时列表（旧 -> 新）
+    """
+    case_ids = list(case_ids)
+    estimates = {}
+    for case_id in case_ids:
+        value = ewma(history.get(case_id) or [], alpha)
+        if value is not None:
+            estimates[case_id] = value
+
+    default = sum(estimates.values()) / len(estimates) if estimates else 0.0
+    return {case_id: estimates.get(case_id, default) for case_id in case_ids}
+
+
+def normalize_dependencies(
+    case_ids: Sequence[str],
+    dependencies: Optional[Dict[str, List[str]]]
+) -> Dict[str, List[str]]:
+    """
+    整理用例依赖：只保留套件内的用例，并丢弃指向套件中排在后面的用例的依赖（避免循环等待）
+
+    Returns:
+        用例ID -> 依赖的用例ID列表
+    """
+    if not dependencies:
+        return {}
+    position = {case_id: index for index, case_id in enumerate(case_ids)}
+    result = {}
+    for case_id, upstream in dependencies.items():
+        if case_id not in position or not isinstance(upstream, list):
+            continue
+        kept = [dep for dep in upstream if dep in position and position[dep] < position[case_id]]
+        if kept:
+            result[case_id] = kept
+    return result
+
+
+def lpt_order(
+    case_ids: Sequence[str],
+    estimates: Dict[str, float],
+    dependencies: Optional[Dict[str, List[str]]] = None
+) -> List[str]:
+    """
+    按关键路径长度从大到小排序（稳定排序：估计相同的用例保持原顺序）
+
+    被依赖的用例总是排在依赖它的用例之前。
+
+    Returns:
+        排序后的用例ID列表
+    """
+    dependencies = dependencies or {}
+    downstream: Dict[str, List[str]] = {case_id: [] for case_id in case_ids}
+    for case_id, upstream in dependencies.items():
+        for dep in upstream:
+            downstream[dep].append(case_id)
+
+    # 依赖只指向前面的用例，倒序遍历即可得到每个用例的关键路径长度
+    rank: Dict[str, float] = {}
+    for case_id in reversed(case_ids):
+        tail = max((rank[child] for child in downstream[case_id]), default=0.0)
+        rank[case_id] = estimates.get(case_id, 0.0) + tail
+
+    position = {case_id: index for index, case_id in enumerate(case_ids)}
+    pending = {case_id: len(dependencies.get(case_id, [])) for case_id in case_ids}
+    ready = [(-rank[case_id], position[case_id], case_id) for case_id in case_ids if not pending[case_id]]
+    heapq.heapify(ready)
+
+    order = []
+    while ready:
+        _, _, case_id = heapq.heappop(ready)
+        order.append(case_id)
+        for child in downstream[case_id]:
+            pending[child] -= 1
+            if not pending[child]:
+                heapq.heappush(ready, (-rank[child], position[child], child))
+    return order
+
+
+def predict_makespan(
+    order: Sequence[str],
+    estimates: Dict[str, float],
+    workers: int,
+    dependencies: Optional[Dict[str, List[str]]] = None
+) -> float:
+    """
+    按给定顺序模拟并行执行，预测总耗时（毫秒）
+
+    每个用例在有空闲并发名额、且依赖的用例都结束后开始。
+    """
+    dependencies = dependencies or {}
+    free_at = [0.0] * max(1, workers)
+    finish: Dict[str, float] = {}
+    for case_id in order:
+        slot_free = heapq.heappop(free_at)
+        ready_at = max((finish.get(dep, 0.0) for dep in dependencies.get(case_id, [])), default=0.0)
+        finish[case_id] = max(slot_free, ready_at) + estimates.get(case_id, 0.0)
+        heapq.heappush(free_at, finish[case_id])
+    return max(finish.values(), default=0.0)
+
+
+def get_shard_count(execution_config: Optional[Dict[str, object]]) -> int:
+    """
+    读取执行配置中的分片数（{"shards": N}）
+
+    Returns:
+        分片数；未配置、无效（非整数、小于 2）时返回 0，表示不分片
+    """
+    value = (execution_config or {}).get('shards')
+    if value is None or isinstance(value, bool):
+        return 0
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        print(f"⚠️ 忽略无效的分片数配置: {value!r}")
+        return 0
+    return count if count > 1 else 0
+
+
+def plan_shards(
+    case_ids: Sequence[str],
+    estimates: Dict[str, float],
+    shard_count: int,
+    dependencies: Optional[Dict[str, List[str]]] = None
+) -> List[Dict[str, object]]:
+    """
+    把用例分成 shard_count 个分片，使各分片的预计耗时尽量均衡
+
+    有依赖关系的用例放在同一分片（作为一个整体分配），按预计耗时从大到小
+    依次放入当前负载最小的分片；分片内保持用例的原始顺序。
+
+    Returns:
+        分片列表，每项包含 caseIds 和 predictedDuration（毫秒）；空分片不返回
+    """
+    position = {case_id: index for index, case_id in enumerate(case_ids)}
+
+    # 用并查集把有依赖关系的用例合并为一组
+    parent = {case_id: case_id for case_id in case_ids}
+
+    def find(case_id: str) -> str:
+        while parent[case_id] != case_id:
+            parent[case_id] = parent[parent[case_id]]
+            case_id = parent[case_id]
+        return case_id
+
+    for case_id, upstream in (dependencies or {}).items():
+        for dep in upstream:
+            parent[find(dep)] = find(case_id)
+
+    groups: Dict[str, List[str]] = {}
+    for case_id in case_ids:
+        groups.setdefault(find(case_id), []).append(case_id)
+    units = sorted(
+        groups.values(),
+        key=lambda members: (-sum(estimates.get(m, 0.0) for m in members), position[members[0]])
+    )
+
+    shard_count = max(1, min(shard_count, len(units)))
+    loads = [(0.0, index) for index in range(shard_count)]
+    members_by_shard: List[List[str]] = [[] for _ in range(shard_count)]
+    for members in units:
+        load, index = heapq.heappop(loads)
+        members_by_shard[index].extend(members)
+        heapq.heappush(loads, (load + sum(estimates.get(m, 0.0) for m in members), index))
+
+    shards = []
+    for members in members_by_shard:
+        if not members:
+            continue
+        members.sort(key=position.get)
+        shards.append({
+            'caseIds': members,
+            'predictedDuration': round(sum(estimates.get(m, 0.0) for m in members)),
+        })
+    return shards
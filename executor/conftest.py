@@ -0,0 +1,7 @@
+"""
+pytest 配置：测试产生的日志写入临时目录，不写入项目的 logs/
+"""
+import os
+import tempfile
+
+os.environ.setdefault('EXECUTOR_LOG_DIR', tempfile.mkdtemp(prefix='executor-test-logs-'))
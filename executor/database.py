@@ -3,12 +3,152 @@
 """
 import sqlite3
 import json
+import json_codec
 import re
+import time
 import pytz
-from datetime import datetime
+from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Optional, List, Dict, Any
 from uuid import uuid4
 from models import TestCase, TestStep, FlowConfig, TestCaseStatus, NodeType
+from histogram import LatencyHistogram
+from json_codec import RawJson
+from metrics import timed_db_write
+
+
+# 执行器维护的附加表（与 prisma/schema.prisma 中的模型保持一致）
+# prisma db push 会按 schema 创建这些表；这里用 IF NOT EXISTS 兜底，兼容尚未同步 schema 的旧库
+EXECUTOR_TABLES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS "SuiteDailyStats" (
+        "suiteId" TEXT NOT NULL,
+        "day" TEXT NOT NULL,
+        "runCount" INTEGER NOT NULL DEFAULT 0,
+        "passedRuns" INTEGER NOT NULL DEFAULT 0,
+        "failedRuns" INTEGER NOT NULL DEFAULT 0,
+        "stoppedRuns" INTEGER NOT NULL DEFAULT 0,
+        "caseCount" INTEGER NOT NULL DEFAULT 0,
+        "passedCases" INTEGER NOT NULL DEFAULT 0,
+        "failedCases" INTEGER NOT NULL DEFAULT 0,
+        "totalDuration" INTEGER NOT NULL DEFAULT 0,
+        "caseDurationSum" INTEGER NOT NULL DEFAULT 0,
+        "durationHistogram" TEXT,
+        "caseDurationHistogram" TEXT,
+        "updatedAt" DATETIME NOT NULL,
+        PRIMARY KEY ("suiteId", "day")
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "SuiteDailyStats_day_idx" ON "SuiteDailyStats"("day")',
+    """
+    CREATE TABLE IF NOT EXISTS "ApiDailyStats" (
+        "apiId" TEXT NOT NULL,
+        "day" TEXT NOT NULL,
+        "method" TEXT,
+        "requestCount" INTEGER NOT NULL DEFAULT 0,
+        "errorCount" INTEGER NOT NULL DEFAULT 0,
+        "totalTime" INTEGER NOT NULL DEFAULT 0,
+        "maxTime" INTEGER NOT NULL DEFAULT 0,
+        "histogram" TEXT,
+        "updatedAt" DATETIME NOT NULL,
+        PRIMARY KEY ("apiId", "day")
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "ApiDailyStats_day_idx" ON "ApiDailyStats"("day")',
+    """
+    CREATE TABLE IF NOT EXISTS "ApiLatencyWindow" (
+        "apiId" TEXT NOT NULL DEFAULT '',
+        "method" TEXT NOT NULL,
+        "path" TEXT NOT NULL,
+        "windowStart" BIGINT NOT NULL,
+        "windowSeconds" INTEGER NOT NULL,
+        "requestCount" INTEGER NOT NULL DEFAULT 0,
+        "errorCount" INTEGER NOT NULL DEFAULT 0,
+        "histogram" TEXT,
+        "updatedAt" DATETIME NOT NULL,
+        PRIMARY KEY ("apiId", "method", "path", "windowStart")
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "ApiLatencyWindow_windowStart_idx" ON "ApiLatencyWindow"("windowStart")',
+    """
+    CREATE TABLE IF NOT EXISTS "LoadTestRun" (
+        "id" TEXT NOT NULL PRIMARY KEY,
+        "createdAt" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        "testCaseId" TEXT NOT NULL,
+        "testCaseName" TEXT NOT NULL,
+        "status" TEXT NOT NULL,
+        "config" TEXT NOT NULL,
+        "startTime" DATETIME NOT NULL,
+        "endTime" DATETIME,
+        "duration" INTEGER,
+        "iterations" INTEGER NOT NULL DEFAULT 0,
+        "failedIterations" INTEGER NOT NULL DEFAULT 0,
+        "requestCount" INTEGER NOT NULL DEFAULT 0,
+        "errorCount" INTEGER NOT NULL DEFAULT 0,
+        "requestsPerSecond" REAL,
+        "report" TEXT,
+        "errorMessage" TEXT
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "LoadTestRun_testCaseId_idx" ON "LoadTestRun"("testCaseId")',
+    """
+    CREATE TABLE IF NOT EXISTS "DataDrivenIteration" (
+        "id" TEXT NOT NULL PRIMARY KEY,
+        "createdAt" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        "caseExecutionId" TEXT NOT NULL,
+        "suiteExecutionId" TEXT NOT NULL,
+        "rowIndex" INTEGER NOT NULL,
+        "rowData" TEXT NOT NULL,
+        "status" TEXT NOT NULL,
+        "duration" INTEGER,
+        "passedSteps" INTEGER NOT NULL DEFAULT 0,
+        "failedSteps" INTEGER NOT NULL DEFAULT 0,
+        "errorMessage" TEXT,
+        CONSTRAINT "DataDrivenIteration_caseExecutionId_fkey" FOREIGN KEY ("caseExecutionId")
+            REFERENCES "TestCaseExecution" ("id") ON DELETE CASCADE ON UPDATE CASCADE
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "DataDrivenIteration_caseExecutionId_rowIndex_idx" ON "DataDrivenIteration"("caseExecutionId", "rowIndex")',
+    """
+    CREATE TABLE IF NOT EXISTS "SuiteShard" (
+        "id" TEXT NOT NULL PRIMARY KEY,
+        "createdAt" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        "suiteExecutionId" TEXT NOT NULL,
+        "shardIndex" INTEGER NOT NULL,
+        "caseIds" TEXT NOT NULL,
+        "runMode" TEXT NOT NULL DEFAULT 'serial',
+        "status" TEXT NOT NULL DEFAULT 'pending',
+        "owner" TEXT,
+        "leaseExpiresAt" BIGINT,
+        "attempts" INTEGER NOT NULL DEFAULT 0,
+        "predictedDuration" INTEGER,
+        "startTime" DATETIME,
+        "endTime" DATETIME,
+        "duration" INTEGER,
+        "passedCases" INTEGER NOT NULL DEFAULT 0,
+        "failedCases" INTEGER NOT NULL DEFAULT 0,
+        "passedSteps" INTEGER NOT NULL DEFAULT 0,
+        "failedSteps" INTEGER NOT NULL DEFAULT 0,
+        "errorMessage" TEXT
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "SuiteShard_suiteExecutionId_idx" ON "SuiteShard"("suiteExecutionId")',
+    'CREATE INDEX IF NOT EXISTS "SuiteShard_status_idx" ON "SuiteShard"("status")',
+    """
+    CREATE TABLE IF NOT EXISTS "SchedulerLease" (
+        "name" TEXT NOT NULL PRIMARY KEY,
+        "owner" TEXT NOT NULL,
+        "expiresAt" BIGINT NOT NULL,
+        "updatedAt" DATETIME NOT NULL
+    )
+    """,
+]
+
+# 数据驱动行数据快照的最大长度
+MAX_ROW_DATA_LENGTH = 2000
+
+# 视为结束状态的套件执行状态
+FINAL_SUITE_STATUSES = ('completed', 'failed', 'stopped')
 
 
 def format_datetime_for_prisma(dt: datetime) -> str:
@@ -62,19 +202,29 @@ def sanitize_json(data: Any) -> str:
     安全地序列化 JSON 数据
     
     Args:
-        data: 要序列化的数据
+        data: 要序列化的数据（已序列化的 RawJson 直接复用，只清理一次无效字符）
         
     Returns:
         JSON 字符串
     """
     try:
-        # 使用 ensure_ascii=False 保持 UTF-8 编码
-        json_str = json.dumps(data, ensure_ascii=False, default=str)
+        if isinstance(data, RawJson):
+            if not data.sanitized:
+                data.text = sanitize_text(data.text)
+                data.sanitized = True
+            return data.text
+        json_str = json_codec.dumps(data)
         # 清理可能的无效字符
         return sanitize_text(json_str)
     except Exception as e:
         # 如果序列化失败，返回错误信息
-        return json.dumps({"error": f"Failed to serialize: {str(e)}"})
+        return json_codec.dumps({"error": f"Failed to serialize: {str(e)}"})
+
+
+# 执行器在 Prisma 模型上新增的列（表名, 列名, 类型），旧库缺少时由 ensure_executor_tables 补齐
+EXECUTOR_COLUMNS = [
+    ("TestStepExecution", "timingBreakdown", "TEXT"),
+]
 
 
 class Database:
@@ -88,6 +238,7 @@ class Database:
             db_path: 数据库文件路径
         """
         self.db_path = db_path
+        self._executor_tables_ready = False
     
     def get_connection(self):
         """获取数据库连接"""
@@ -95,6 +246,47 @@ class Database:
         conn.row_factory = sqlite3.Row  # 使用字典游标
         return conn
     
+    def ping(self, timeout: float = 1.0) -> None:
+        """
+        检查数据库可达（执行 SELECT 1，失败时抛出异常）
+        
+        Args:
+            timeout: 等待数据库锁的最长时间（秒）
+        """
+        # 只读方式打开，数据库文件不存在时报错而不是新建空库
+        conn = sqlite3.connect(f"{Path(self.db_path).resolve().as_uri()}?mode=ro", uri=True, timeout=timeout)
+        try:
+            conn.execute("SELECT 1").fetchone()
+        finally:
+            conn.close()
+    
+    def ensure_executor_tables(self, conn: Optional[sqlite3.Connection] = None) -> None:
+        """
+        确保执行器维护的附加表存在（每个实例只执行一次）
+        
+        Args:
+            conn: 复用的数据库连接（可选，不提交事务）
+        """
+        if self._executor_tables_ready:
+            return
+        
+        own_conn = conn is None
+        conn = conn or self.get_connection()
+        try:
+            for ddl in EXECUTOR_TABLES_DDL:
+                conn.execute(ddl)
+            for table, column, column_type in EXECUTOR_COLUMNS:
+                existing = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+                # 表不存在时（由 prisma 创建）跳过
+                if existing and column not in existing:
+                    conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {column_type}')
+            if own_conn:
+                conn.commit()
+            self._executor_tables_ready = True
+        finally:
+            if own_conn:
+                conn.close()
+    
     def get_platform_settings(self) -> Optional[Dict[str, Any]]:
         """
         获取平台设置
@@ -151,10 +343,47 @@ class Database:
                 return None
             
             return dict(row)
-        
+
         finally:
             conn.close()
-    
+
+    def get_apis_by_ids(self, api_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取 API 信息（一次 IN 查询，超过 SQLite 参数上限时分批）
+
+        Args:
+            api_ids: API ID 列表
+
+        Returns:
+            API ID -> API 信息字典（不存在的 ID 不包含在结果中）
+        """
+        ids = list(dict.fromkeys(i for i in api_ids if i))
+        if not ids:
+            return {}
+
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            apis = {}
+            for start in range(0, len(ids), 900):
+                chunk = ids[start:start + 900]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(
+                    f"""
+                    SELECT id, name, method, url, path, domain,
+                           requestHeaders, requestQuery, requestBody
+                    FROM Api WHERE id IN ({placeholders})
+                    """,
+                    chunk
+                )
+                for row in cursor.fetchall():
+                    apis[row['id']] = dict(row)
+            return apis
+
+        finally:
+            conn.close()
+
     def get_test_case_by_id(self, test_case_id: str) -> Optional[TestCase]:
         """
         根据 ID 获取测试用例
@@ -301,6 +530,7 @@ class Database:
         finally:
             conn.close()
     
+    @timed_db_write()
     def update_test_case_stats(
         self,
         test_case_id: str,
@@ -355,8 +585,8 @@ class Database:
             测试用例对象
         """
         # 解析 JSON 字段
-        flow_config_data = json.loads(row['flowConfig'])
-        tags = json.loads(row['tags']) if row['tags'] else []
+        flow_config_data = json_codec.loads(row['flowConfig'])
+        tags = json_codec.loads(row['tags']) if row['tags'] else []
         
         # 转换步骤
         steps = []
@@ -369,7 +599,7 @@ class Database:
                 nodeId=step_row['nodeId'],
                 apiId=step_row['apiId'],
                 type=NodeType(step_row['type']),
-                config=json.loads(step_row['config']),
+                config=json_codec.loads(step_row['config']),
                 positionX=step_row['positionX'],
                 positionY=step_row['positionY']
             )
@@ -408,6 +638,252 @@ class Database:
         finally:
             conn.close()
     
+    # ==================== 套件分片 ====================
+    
+    @timed_db_write(batch='shards')
+    def create_suite_shards(
+        self,
+        suite_execution_id: str,
+        shards: List[Dict[str, Any]],
+        run_mode: str = 'serial'
+    ) -> List[str]:
+        """
+        创建套件执行的分片
+        
+        Args:
+            suite_execution_id: 测试套件执行ID
+            shards: 分片列表，每项包含 caseIds 和 predictedDuration（毫秒）
+            run_mode: 分片内的运行模式
+            
+        Returns:
+            分片ID列表
+        """
+        now = format_datetime_for_prisma(datetime.now())
+        rows = []
+        for index, shard in enumerate(shards):
+            rows.append((
+                str(uuid4()), now, suite_execution_id, index,
+                json_codec.dumps(shard['caseIds']), run_mode,
+                int(shard.get('predictedDuration') or 0)
+            ))
+        
+        conn = self.get_connection()
+        try:
+            self.ensure_executor_tables(conn)
+            conn.executemany(
+                """
+                INSERT INTO SuiteShard (
+                    id, createdAt, suiteExecutionId, shardIndex, caseIds, runMode, predictedDuration
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+            conn.commit()
+            return [row[0] for row in rows]
+        finally:
+            conn.close()
+    
+    def claim_suite_shard(
+        self,
+        owner: str,
+        lease_seconds: float,
+        suite_execution_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        领取一个待执行的分片（租约过期的运行中分片也可重新领取）
+        
+        在一个写事务中查询并更新，多个进程同时领取时同一分片只会被领取一次。
+        
+        Args:
+            owner: 领取者标识（进程唯一）
+            lease_seconds: 租约有效期（秒），执行期间需要续期
+            suite_execution_id: 只领取指定套件执行的分片（可选）
+            
+        Returns:
+            分片记录（caseIds 已解析），没有可领取的分片时返回 None
+        """
+        now_ms = int(time.time() * 1000)
+        conn = self.get_connection()
+        conn.isolation_level = None
+        try:
+            self.ensure_executor_tables(conn)
+            conn.execute("BEGIN IMMEDIATE")
+            query = """
+                SELECT * FROM SuiteShard
+                WHERE (status = 'pending' OR (status = 'running' AND leaseExpiresAt < ?))
+            """
+            params: List[Any] = [now_ms]
+            if suite_execution_id:
+                query += " AND suiteExecutionId = ?"
+                params.append(suite_execution_id)
+            query += " ORDER BY predictedDuration DESC, shardIndex ASC LIMIT 1"
+            row = conn.execute(query, params).fetchone()
+            if not row:
+                conn.execute("COMMIT")
+                return None
+            
+            conn.execute(
+                """
+                UPDATE SuiteShard
+                SET status = 'running', owner = ?, leaseExpiresAt = ?,
+                    attempts = attempts + 1, startTime = ?
+                WHERE id = ?
+                """,
+                (owner, now_ms + int(lease_seconds * 1000), format_datetime_for_prisma(datetime.now()), row['id'])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        
+        shard = dict(row)
+        shard['caseIds'] = json_codec.loads(shard['caseIds'])
+        shard['owner'] = owner
+        shard['attempts'] += 1
+        return shard
+    
+    @timed_db_write()
+    def renew_suite_shard_lease(self, shard_id: str, owner: str, lease_seconds: float) -> Optional[str]:
+        """
+        续期分片租约
+        
+        Returns:
+            仍由 owner 持有时返回分片状态（running，或已请求停止时为 stopping），租约已失效时返回 None
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute(
+                """
+                UPDATE SuiteShard SET leaseExpiresAt = ?
+                WHERE id = ? AND owner = ? AND status IN ('running', 'stopping')
+                """,
+                (int(time.time() * 1000) + int(lease_seconds * 1000), shard_id, owner)
+            )
+            if cursor.rowcount == 0:
+                conn.commit()
+                return None
+            row = conn.execute("SELECT status FROM SuiteShard WHERE id = ?", (shard_id,)).fetchone()
+            conn.commit()
+            return row['status']
+        finally:
+            conn.close()
+    
+    @timed_db_write()
+    def finish_suite_shard(
+        self,
+        shard_id: str,
+        owner: str,
+        status: str,
+        duration: int,
+        passed_cases: int = 0,
+        failed_cases: int = 0,
+        passed_steps: int = 0,
+        failed_steps: int = 0,
+        error_message: Optional[str] = None
+    ) -> bool:
+        """
+        结束分片，并把分片的统计原子累加到套件执行记录（同一事务）
+        
+        只有仍持有租约的 owner 能结束分片，租约被其他进程接管后结果不再重复累加。
+        
+        Returns:
+            是否已结束并累加
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute(
+                """
+                UPDATE SuiteShard
+                SET status = ?, endTime = ?, duration = ?, passedCases = ?, failedCases = ?,
+                    passedSteps = ?, failedSteps = ?, errorMessage = ?
+                WHERE id = ? AND owner = ? AND status IN ('running', 'stopping')
+                """,
+                (status, format_datetime_for_prisma(datetime.now()), duration,
+                 passed_cases, failed_cases, passed_steps, failed_steps, error_message,
+                 shard_id, owner)
+            )
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return False
+            
+            conn.execute(
+                """
+                UPDATE TestSuiteExecution
+                SET passedCases = passedCases + ?, failedCases = failedCases + ?,
+                    passedSteps = passedSteps + ?, failedSteps = failedSteps + ?
+                WHERE id = (SELECT suiteExecutionId FROM SuiteShard WHERE id = ?)
+                """,
+                (passed_cases, failed_cases, passed_steps, failed_steps, shard_id)
+            )
+            conn.commit()
+            return True
+        finally:
+            conn.close()
+    
+    def get_suite_shards(self, suite_execution_id: str) -> List[Dict[str, Any]]:
+        """获取套件执行的所有分片（按分片序号排序）"""
+        conn = self.get_connection()
+        try:
+            self.ensure_executor_tables(conn)
+            rows = conn.execute(
+                "SELECT * FROM SuiteShard WHERE suiteExecutionId = ? ORDER BY shardIndex",
+                (suite_execution_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        
+        shards = []
+        for row in rows:
+            shard = dict(row)
+            shard['caseIds'] = json_codec.loads(shard['caseIds'])
+            shards.append(shard)
+        return shards
+    
+    @timed_db_write()
+    def stop_suite_shards(self, suite_execution_id: str) -> int:
+        """
+        请求停止套件执行的分片（停止状态保存在数据库中，其他进程续期租约时读取）
+        
+        - 尚未领取的分片直接标记为 stopped
+        - 运行中的分片标记为 stopping，持有者续期时得知后停止执行后续用例，结束时写回 stopped
+        - 持有者已失联（租约过期）的 stopping 分片标记为 stopped，不再等待
+        
+        Returns:
+            直接标记为 stopped 的未领取分片数
+        """
+        now = format_datetime_for_prisma(datetime.now())
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute(
+                """
+                UPDATE SuiteShard SET status = 'stopped', endTime = ?
+                WHERE suiteExecutionId = ? AND status = 'pending'
+                """,
+                (now, suite_execution_id)
+            )
+            cancelled = cursor.rowcount
+            conn.execute(
+                """
+                UPDATE SuiteShard SET status = 'stopping'
+                WHERE suiteExecutionId = ? AND status = 'running'
+                """,
+                (suite_execution_id,)
+            )
+            conn.execute(
+                """
+                UPDATE SuiteShard SET status = 'stopped', endTime = ?
+                WHERE suiteExecutionId = ? AND status = 'stopping' AND leaseExpiresAt < ?
+                """,
+                (now, suite_execution_id, int(time.time() * 1000))
+            )
+            conn.commit()
+            return cancelled
+        finally:
+            conn.close()
+    
     def get_suite_test_cases(self, suite_id: str) -> List[Dict[str, Any]]:
         """获取测试套件中的所有测试用例（按order排序，只获取enabled的）"""
         conn = self.get_connection()
@@ -432,7 +908,7 @@ class Database:
                     'id': row['id'],
                     'name': row['name'],
                     'status': row['status'],
-                    'flowConfig': json.loads(row['flowConfig']),
+                    'flowConfig': json_codec.loads(row['flowConfig']),
                     'order': row['order']
                 })
             
@@ -440,6 +916,47 @@ class Database:
         finally:
             conn.close()
     
+    def get_case_duration_history(self, test_case_ids: List[str], limit: int = 20) -> Dict[str, List[int]]:
+        """
+        获取用例最近的执行耗时（只统计已结束的执行）
+        
+        Args:
+            test_case_ids: 用例ID列表
+            limit: 每个用例最多取最近多少次
+            
+        Returns:
+            用例ID -> 耗时列表（毫秒，按时间从旧到新）
+        """
+        if not test_case_ids:
+            return {}
+        
+        placeholders = ','.join('?' for _ in test_case_ids)
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT testCaseId, duration FROM (
+                    SELECT testCaseId, duration,
+                           ROW_NUMBER() OVER (PARTITION BY testCaseId ORDER BY startTime DESC) AS rn
+                    FROM TestCaseExecution
+                    WHERE testCaseId IN ({placeholders})
+                    AND duration IS NOT NULL
+                    AND status IN ('passed', 'failed')
+                )
+                WHERE rn <= ?
+                ORDER BY testCaseId, rn DESC
+                """,
+                (*test_case_ids, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+        
+        history: Dict[str, List[int]] = {}
+        for row in rows:
+            history.setdefault(row['testCaseId'], []).append(row['duration'])
+        return history
+    
+    @timed_db_write()
     def create_case_execution(
         self,
         suite_execution_id: str,
@@ -470,7 +987,7 @@ class Database:
             print(f"  - order: {order}, totalSteps: {total_steps}")
             
             # 序列化 JSON
-            snapshot_json = json.dumps(test_case_snapshot, ensure_ascii=False)
+            snapshot_json = json_codec.dumps(test_case_snapshot)
             print(f"  - snapshot_json 长度: {len(snapshot_json)}")
             print(f"  - snapshot_json 前200字符: {repr(snapshot_json[:200])}")
             print(f"  - snapshot_json 后200字符: {repr(snapshot_json[-200:])}")
@@ -552,6 +1069,7 @@ class Database:
         finally:
             conn.close()
     
+    @timed_db_write()
     def update_case_execution(
         self,
         case_execution_id: str,
@@ -561,9 +1079,17 @@ class Database:
         passed_steps: int = 0,
         failed_steps: int = 0,
         total_steps: int = None,
-        error_message: str = None
+        error_message: str = None,
+        api_samples: Optional[List[Dict[str, Any]]] = None
     ):
-        """更新用例执行记录"""
+        """
+        更新用例执行记录
+        
+        用例进入结束状态（passed/failed）时，会在同一事务内累加套件每日统计和接口耗时统计。
+        
+        Args:
+            api_samples: 本次用例执行的接口请求样本（apiId, method, duration, status），用于接口耗时统计
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -618,7 +1144,20 @@ class Database:
             print(f"  - SQL: {sql}")
             print(f"  - 参数数量: {len(params)}")
             
-            cursor.execute(sql, params)
+            # 首次进入结束状态时累加物化统计（与状态更新同一事务）：
+            # 以 "当前不是结束状态" 为条件更新，多个写入方（分片、协调者、重试）同时结束同一用例时只有一个累加
+            first_final = False
+            if status in ('passed', 'failed'):
+                cursor.execute(sql + " AND (status IS NULL OR status NOT IN ('passed', 'failed'))", params)
+                first_final = cursor.rowcount == 1
+            if not first_final:
+                cursor.execute(sql, params)
+            
+            if first_final:
+                self._accumulate_case_stats(
+                    cursor, case_execution_id, status, duration, api_samples or []
+                )
+            
             conn.commit()
             print(f"  ✅ TestCaseExecution 更新成功")
             print(f"{'='*80}\n")
@@ -632,6 +1171,7 @@ class Database:
         finally:
             conn.close()
     
+    @timed_db_write()
     def create_step_execution(
         self,
         case_execution_id: str,
@@ -661,7 +1201,7 @@ class Database:
             print(f"  - order: {order}")
             
             # 序列化 JSON
-            snapshot_json = json.dumps(node_snapshot, ensure_ascii=False)
+            snapshot_json = json_codec.dumps(node_snapshot)
             print(f"  - snapshot_json 长度: {len(snapshot_json)}")
             print(f"  - snapshot_json 前200字符: {repr(snapshot_json[:200])}")
             
@@ -712,6 +1252,7 @@ class Database:
         finally:
             conn.close()
     
+    @timed_db_write()
     def update_step_execution(
         self,
         step_execution_id: str,
@@ -720,6 +1261,8 @@ class Database:
         """更新步骤执行记录"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        if 'timingBreakdown' in kwargs:
+            self.ensure_executor_tables(conn)
         
         try:
             print(f"\n{'='*80}")
@@ -737,7 +1280,7 @@ class Database:
                     set_parts.append('endTime = ?')
                     params.append(format_datetime_for_prisma(value) if hasattr(value, 'isoformat') else value)
                 elif key in ['requestHeaders', 'requestBody', 'responseHeaders', 'responseBody', 
-                             'assertionResults', 'extractedVariables', 'requestParams']:
+                             'assertionResults', 'extractedVariables', 'requestParams', 'timingBreakdown']:
                     set_parts.append(f'{key} = ?')
                     # 使用 sanitize_json 清理 JSON 数据
                     params.append(sanitize_json(value) if value is not None else None)
@@ -790,6 +1333,7 @@ class Database:
         finally:
             conn.close()
     
+    @timed_db_write()
     def update_suite_execution(
         self,
         suite_execution_id: str,
@@ -836,10 +1380,25 @@ class Database:
             print(f"  SQL: {sql}")
             print(f"  参数: {params}")
             
-            cursor.execute(sql, params)
+            # 首次进入结束状态时累加套件每日统计（与状态更新同一事务，条件更新保证只累加一次）
+            first_final = False
+            if kwargs.get('status') in FINAL_SUITE_STATUSES:
+                placeholders = ', '.join('?' for _ in FINAL_SUITE_STATUSES)
+                cursor.execute(
+                    f"{sql} AND (status IS NULL OR status NOT IN ({placeholders}))",
+                    params + list(FINAL_SUITE_STATUSES)
+                )
+                first_final = cursor.rowcount == 1
+            if not first_final:
+                cursor.execute(sql, params)
+            updated_rows = cursor.rowcount
+            
+            if first_final:
+                self._accumulate_suite_stats(cursor, suite_execution_id)
+            
             conn.commit()
             
-            print(f"  ✅ 更新成功，影响行数: {cursor.rowcount}")
+            print(f"  ✅ 更新成功，影响行数: {updated_rows}")
             
             # 验证更新是否成功
             cursor.execute("SELECT status, passedCases, totalSteps FROM TestSuiteExecution WHERE id = ?", [suite_execution_id])
@@ -854,6 +1413,7 @@ class Database:
         finally:
             conn.close()
     
+    @timed_db_write()
     def create_execution_log(
         self,
         level: str,
@@ -994,7 +1554,7 @@ class Database:
                 # 解析 JSON 字段
                 if log.get('details'):
                     try:
-                        log['details'] = json.loads(log['details'])
+                        log['details'] = json_codec.loads(log['details'])
                     except:
                         pass
                 logs.append(log)
@@ -1003,6 +1563,501 @@ class Database:
         finally:
             conn.close()
     
+    # ==================== 物化统计相关方法 ====================
+    
+    @staticmethod
+    def _stats_day(dt: Optional[datetime] = None) -> str:
+        """统计日期（本地日期 YYYY-MM-DD）"""
+        return (dt or datetime.now()).strftime('%Y-%m-%d')
+    
+    def _upsert_stats_row(
+        self,
+        cursor: sqlite3.Cursor,
+        table: str,
+        keys: Dict[str, Any],
+        increments: Dict[str, Any],
+        histograms: Optional[Dict[str, LatencyHistogram]] = None,
+        maximums: Optional[Dict[str, Any]] = None,
+        values: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        累加一行统计（不存在则插入，直方图列在 Python 侧合并）
+        
+        Args:
+            cursor: 当前事务的游标
+            table: 统计表名
+            keys: 主键列及其值
+            increments: 需要累加的计数列
+            histograms: 需要合并的直方图列
+            maximums: 取最大值的列
+            values: 直接覆盖的列
+        """
+        histograms = histograms or {}
+        maximums = maximums or {}
+        values = values or {}
+        
+        merged_histograms = {}
+        if histograms:
+            where_sql = ' AND '.join(f'"{k}" = ?' for k in keys)
+            row = cursor.execute(
+                f'SELECT {", ".join(histograms)} FROM "{table}" WHERE {where_sql}',
+                list(keys.values())
+            ).fetchone()
+            for column, hist in histograms.items():
+                existing = LatencyHistogram.from_json(row[column] if row else None)
+                merged_histograms[column] = existing.merge(hist).to_json()
+        
+        columns = {**keys, **increments, **maximums, **values, **merged_histograms,
+                   'updatedAt': format_datetime_for_prisma(datetime.now())}
+        update_parts = (
+            [f'"{c}" = "{c}" + excluded."{c}"' for c in increments]
+            + [f'"{c}" = MAX("{c}", excluded."{c}")' for c in maximums]
+            + [f'"{c}" = excluded."{c}"' for c in list(values) + list(merged_histograms) + ['updatedAt']]
+        )
+        
+        cursor.execute(
+            f"""
+            INSERT INTO "{table}" ({", ".join(f'"{c}"' for c in columns)})
+            VALUES ({", ".join('?' for _ in columns)})
+            ON CONFLICT({", ".join(f'"{k}"' for k in keys)}) DO UPDATE SET {", ".join(update_parts)}
+            """,
+            list(columns.values())
+        )
+    
+    def _accumulate_case_stats(
+        self,
+        cursor: sqlite3.Cursor,
+        case_execution_id: str,
+        status: str,
+        duration: Optional[int],
+        api_samples: List[Dict[str, Any]]
+    ) -> None:
+        """用例结束时累加套件每日统计和接口耗时统计"""
+        self.ensure_executor_tables(cursor.connection)
+        day = self._stats_day()
+        
+        row = cursor.execute(
+            """
+            SELECT e.suiteId FROM TestCaseExecution c
+            JOIN TestSuiteExecution e ON e.id = c.suiteExecutionId
+            WHERE c.id = ?
+            """,
+            (case_execution_id,)
+        ).fetchone()
+        
+        if row:
+            case_hist = LatencyHistogram()
+            case_hist.record(duration)
+            self._upsert_stats_row(
+                cursor, 'SuiteDailyStats',
+                keys={'suiteId': row['suiteId'], 'day': day},
+                increments={
+                    'caseCount': 1,
+                    'passedCases': 1 if status == 'passed' else 0,
+                    'failedCases': 0 if status == 'passed' else 1,
+                    'caseDurationSum': duration or 0,
+                },
+                histograms={'caseDurationHistogram': case_hist}
+            )
+        
+        # 按 API 先在内存中聚合，每个 API 只写一次
+        per_api: Dict[str, Dict[str, Any]] = {}
+        for sample in api_samples:
+            api_id = sample.get('apiId')
+            if not api_id:
+                continue
+            agg = per_api.setdefault(api_id, {
+                'method': sample.get('method'),
+                'count': 0, 'errors': 0, 'total': 0, 'max': 0,
+                'hist': LatencyHistogram()
+            })
+            elapsed = int(sample.get('duration') or 0)
+            status_code = sample.get('status')
+            agg['count'] += 1
+            agg['total'] += elapsed
+            agg['max'] = max(agg['max'], elapsed)
+            if status_code is None or status_code >= 400:
+                agg['errors'] += 1
+            agg['hist'].record(elapsed)
+        
+        for api_id, agg in per_api.items():
+            self._upsert_stats_row(
+                cursor, 'ApiDailyStats',
+                keys={'apiId': api_id, 'day': day},
+                increments={
+                    'requestCount': agg['count'],
+                    'errorCount': agg['errors'],
+                    'totalTime': agg['total'],
+                },
+                histograms={'histogram': agg['hist']},
+                maximums={'maxTime': agg['max']},
+                values={'method': agg['method']}
+            )
+    
+    def _accumulate_suite_stats(self, cursor: sqlite3.Cursor, suite_execution_id: str) -> None:
+        """套件执行结束时累加套件每日统计"""
+        self.ensure_executor_tables(cursor.connection)
+        
+        row = cursor.execute(
+            "SELECT suiteId, status, duration, failedCases FROM TestSuiteExecution WHERE id = ?",
+            (suite_execution_id,)
+        ).fetchone()
+        if not row:
+            return
+        
+        status = row['status']
+        duration = row['duration'] or 0
+        run_hist = LatencyHistogram()
+        run_hist.record(duration)
+        
+        self._upsert_stats_row(
+            cursor, 'SuiteDailyStats',
+            keys={'suiteId': row['suiteId'], 'day': self._stats_day()},
+            increments={
+                'runCount': 1,
+                'passedRuns': 1 if status == 'completed' and not row['failedCases'] else 0,
+                'failedRuns': 1 if status == 'failed' or (status == 'completed' and row['failedCases']) else 0,
+                'stoppedRuns': 1 if status == 'stopped' else 0,
+                'totalDuration': duration,
+            },
+            histograms={'durationHistogram': run_hist}
+        )
+    
+    def get_suite_daily_stats(self, suite_id: str, days: int = 30) -> List[Dict[str, Any]]:
+        """
+        获取套件最近 N 天的每日统计
+        
+        Args:
+            suite_id: 测试套件ID
+            days: 天数
+            
+        Returns:
+            每日统计列表（按日期升序），包含通过率和耗时分位数
+        """
+        self.ensure_executor_tables()
+        since = self._stats_day(datetime.now() - timedelta(days=days - 1))
+        conn = self.get_connection()
+        
+        try:
+            rows = conn.execute(
+                """
+                SELECT * FROM SuiteDailyStats
+                WHERE suiteId = ? AND day >= ?
+                ORDER BY day ASC
+                """,
+                (suite_id, since)
+            ).fetchall()
+            
+            result = []
+            for row in rows:
+                item = dict(row)
+                run_hist = LatencyHistogram.from_json(item.pop('durationHistogram'))
+                case_hist = LatencyHistogram.from_json(item.pop('caseDurationHistogram'))
+                item['passRate'] = round(item['passedRuns'] / item['runCount'] * 100, 1) if item['runCount'] else None
+                item['casePassRate'] = round(item['passedCases'] / item['caseCount'] * 100, 1) if item['caseCount'] else None
+                item['duration'] = run_hist.summary()
+                item['caseDuration'] = case_hist.summary()
+                result.append(item)
+            return result
+        finally:
+            conn.close()
+    
+    def get_api_daily_stats(self, api_id: Optional[str] = None, days: int = 30) -> List[Dict[str, Any]]:
+        """
+        获取接口最近 N 天的耗时统计
+        
+        Args:
+            api_id: API ID（可选，不传则返回全部接口）
+            days: 天数
+            
+        Returns:
+            每日统计列表，包含 p50/p95/p99
+        """
+        self.ensure_executor_tables()
+        since = self._stats_day(datetime.now() - timedelta(days=days - 1))
+        conn = self.get_connection()
+        
+        try:
+            if api_id:
+                rows = conn.execute(
+                    "SELECT * FROM ApiDailyStats WHERE apiId = ? AND day >= ? ORDER BY day ASC",
+                    (api_id, since)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM ApiDailyStats WHERE day >= ? ORDER BY apiId, day ASC",
+                    (since,)
+                ).fetchall()
+            
+            result = []
+            for row in rows:
+                item = dict(row)
+                hist = LatencyHistogram.from_json(item.pop('histogram'))
+                item['errorRate'] = round(item['errorCount'] / item['requestCount'] * 100, 2) if item['requestCount'] else None
+                item['latency'] = hist.summary()
+                result.append(item)
+            return result
+        finally:
+            conn.close()
+    
+    @timed_db_write(batch='windows')
+    def save_latency_windows(self, windows: List[Dict[str, Any]]) -> None:
+        """
+        批量写入接口耗时窗口（同一窗口重复写入时合并直方图）
+        
+        Args:
+            windows: LatencyRecorder.drain() 的返回值
+        """
+        self.ensure_executor_tables()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            for window in windows:
+                self._upsert_stats_row(
+                    cursor, 'ApiLatencyWindow',
+                    keys={
+                        'apiId': window['apiId'],
+                        'method': window['method'],
+                        'path': window['path'],
+                        'windowStart': window['windowStart'],
+                    },
+                    increments={
+                        'requestCount': window['histogram'].count,
+                        'errorCount': window['errorCount'],
+                    },
+                    histograms={'histogram': window['histogram']},
+                    values={'windowSeconds': window['windowSeconds']}
+                )
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def get_api_latency(
+        self,
+        api_id: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        bucket_seconds: int = 3600
+    ) -> List[Dict[str, Any]]:
+        """
+        按时间粒度查询接口耗时分位数
+        
+        Args:
+            api_id: API ID（可选）
+            since: 起始时间（epoch 秒，包含）
+            until: 结束时间（epoch 秒，不包含）
+            bucket_seconds: 聚合粒度（秒），窗口会合并到该粒度
+            
+        Returns:
+            每个 (apiId, method, path) 一项，包含整体摘要和按时间粒度的序列
+        """
+        self.ensure_executor_tables()
+        conn = self.get_connection()
+        
+        try:
+            where = []
+            params: List[Any] = []
+            if api_id:
+                where.append('apiId = ?')
+                params.append(api_id)
+            if since is not None:
+                where.append('windowStart >= ?')
+                params.append(since)
+            if until is not None:
+                where.append('windowStart < ?')
+                params.append(until)
+            where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+            
+            rows = conn.execute(
+                f"""
+                SELECT apiId, method, path, windowStart, errorCount, histogram
+                FROM ApiLatencyWindow {where_sql}
+                ORDER BY apiId, method, path, windowStart
+                """,
+                params
+            ).fetchall()
+            
+            series: Dict[tuple, Dict[str, Any]] = {}
+            for row in rows:
+                key = (row['apiId'], row['method'], row['path'])
+                entry = series.setdefault(key, {'overall': LatencyHistogram(), 'errors': 0, 'buckets': {}})
+                hist = LatencyHistogram.from_json(row['histogram'])
+                bucket_start = row['windowStart'] // bucket_seconds * bucket_seconds
+                bucket = entry['buckets'].setdefault(bucket_start, [LatencyHistogram(), 0])
+                bucket[0].merge(hist)
+                bucket[1] += row['errorCount']
+                entry['overall'].merge(hist)
+                entry['errors'] += row['errorCount']
+            
+            result = []
+            for (row_api_id, method, path), entry in series.items():
+                result.append({
+                    'apiId': row_api_id or None,
+                    'method': method,
+                    'path': path,
+                    'errorCount': entry['errors'],
+                    'latency': entry['overall'].summary(),
+                    'series': [
+                        {'windowStart': start, 'errorCount': errors, **hist.summary()}
+                        for start, (hist, errors) in sorted(entry['buckets'].items())
+                    ],
+                })
+            return result
+        finally:
+            conn.close()
+    
+    # ==================== 数据驱动相关方法 ====================
+    
+    @timed_db_write(batch='iterations')
+    def save_data_driven_iterations(
+        self,
+        iterations: List[Dict[str, Any]],
+        failed_steps: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        批量写入数据驱动的行结果（单个事务，executemany）
+        
+        Args:
+            iterations: 行结果列表（caseExecutionId, suiteExecutionId, rowIndex, rowData, status,
+                        duration, passedSteps, failedSteps, errorMessage）
+            failed_steps: 失败行的步骤记录（字段与 TestStepExecution 列一致）
+        """
+        if not iterations and not failed_steps:
+            return
+        
+        self.ensure_executor_tables()
+        conn = self.get_connection()
+        now = format_datetime_for_prisma(datetime.now())
+        
+        try:
+            conn.executemany(
+                """
+                INSERT INTO DataDrivenIteration (
+                    id, createdAt, caseExecutionId, suiteExecutionId, rowIndex, rowData,
+                    status, duration, passedSteps, failedSteps, errorMessage
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        str(uuid4()), now, it['caseExecutionId'], it['suiteExecutionId'],
+                        it['rowIndex'],
+                        sanitize_text(sanitize_json(it.get('rowData')), MAX_ROW_DATA_LENGTH),
+                        it['status'], it.get('duration'), it.get('passedSteps', 0),
+                        it.get('failedSteps', 0), it.get('errorMessage')
+                    )
+                    for it in iterations
+                ]
+            )
+            
+            if failed_steps:
+                columns = [
+                    'id', 'caseExecutionId', 'nodeId', 'nodeName', 'nodeType', 'nodeSnapshot',
+                    'status', 'order', 'startTime', 'endTime', 'duration', 'createdAt',
+                    'requestUrl', 'requestMethod', 'requestHeaders', 'requestBody',
+                    'responseStatus', 'responseHeaders', 'responseBody', 'responseTime',
+                    'assertionResults', 'extractedVariables', 'errorMessage'
+                ]
+                conn.executemany(
+                    f"""
+                    INSERT INTO TestStepExecution ({", ".join(f'"{c}"' for c in columns)})
+                    VALUES ({", ".join('?' for _ in columns)})
+                    """,
+                    [tuple(step.get(c) for c in columns) for step in failed_steps]
+                )
+            
+            conn.commit()
+        finally:
+            conn.close()
+    
+    # ==================== 压测相关方法 ====================
+    
+    @timed_db_write()
+    def create_load_test_run(self, test_case_id: str, test_case_name: str, config: Dict[str, Any]) -> str:
+        """
+        创建压测记录
+        
+        Args:
+            test_case_id: 用例ID
+            test_case_name: 用例名称
+            config: 压测配置（并发、迭代次数、时长等）
+            
+        Returns:
+            压测记录ID
+        """
+        self.ensure_executor_tables()
+        conn = self.get_connection()
+        
+        try:
+            run_id = str(uuid4())
+            now = format_datetime_for_prisma(datetime.now())
+            conn.execute(
+                """
+                INSERT INTO LoadTestRun (id, createdAt, testCaseId, testCaseName, status, config, startTime)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (run_id, now, test_case_id, test_case_name, 'running',
+                 json_codec.dumps(config), now)
+            )
+            conn.commit()
+            return run_id
+        finally:
+            conn.close()
+    
+    @timed_db_write()
+    def finish_load_test_run(self, run_id: str, report: Dict[str, Any]) -> None:
+        """
+        写入压测汇总结果
+        
+        Args:
+            run_id: 压测记录ID
+            report: LoadRunner 生成的汇总报告
+        """
+        conn = self.get_connection()
+        
+        try:
+            conn.execute(
+                """
+                UPDATE LoadTestRun SET
+                    status = ?, endTime = ?, duration = ?, iterations = ?, failedIterations = ?,
+                    requestCount = ?, errorCount = ?, requestsPerSecond = ?, report = ?, errorMessage = ?
+                WHERE id = ?
+                """,
+                (
+                    report.get('status'),
+                    format_datetime_for_prisma(datetime.now()),
+                    int(report.get('elapsedSeconds', 0) * 1000),
+                    report.get('iterations', 0),
+                    report.get('failedIterations', 0),
+                    report.get('requests', 0),
+                    report.get('requestErrors', 0),
+                    report.get('requestsPerSecond'),
+                    sanitize_json(report),
+                    report.get('error'),
+                    run_id
+                )
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def get_load_test_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """获取压测记录（report/config 解析为字典）"""
+        self.ensure_executor_tables()
+        conn = self.get_connection()
+        
+        try:
+            row = conn.execute("SELECT * FROM LoadTestRun WHERE id = ?", (run_id,)).fetchone()
+            if not row:
+                return None
+            data = dict(row)
+            for key in ('config', 'report'):
+                if data.get(key):
+                    data[key] = json_codec.loads(data[key])
+            return data
+        finally:
+            conn.close()
+    
     # ==================== 调度相关方法 ====================
     
     def get_scheduled_suites(self) -> List[Dict[str, Any]]:
@@ -1018,7 +2073,8 @@ class Database:
         try:
             cursor.execute(
                 """
-                SELECT id, name, scheduleConfig, scheduleStatus, executionMode
+                SELECT id, name, scheduleConfig, scheduleStatus, executionMode,
+                       nextRunTime, lastScheduledRun
                 FROM TestSuite
                 WHERE executionMode = 'scheduled'
                 AND scheduleStatus = 'active'
@@ -1110,7 +2166,7 @@ class Database:
             if env_config:
                 try:
                     if isinstance(env_config, str):
-                        return json.loads(env_config)
+                        return json_codec.loads(env_config)
                     return env_config
                 except json.JSONDecodeError:
                     pass
@@ -1118,7 +2174,7 @@ class Database:
     
     def get_global_settings(self) -> Dict[str, Any]:
         """
-        获取全局平台设置
+        获取全局平台设置（转换为与 Next.js 执行接口一致的环境配置格式）
         
         Returns:
             全局设置字典
@@ -1129,29 +2185,42 @@ class Database:
         try:
             cursor.execute(
                 """
-                SELECT config FROM PlatformSettings
+                SELECT baseUrl, authTokenEnabled, authTokenKey, authTokenValue,
+                       sessionEnabled, loginApiUrl, loginMethod, loginRequestHeaders,
+                       loginRequestBody, sessionCookies, otherConfig
+                FROM PlatformSettings
                 ORDER BY updatedAt DESC
                 LIMIT 1
                 """
             )
             
             row = cursor.fetchone()
-            if row and row[0]:
-                try:
-                    return json.loads(row[0])
-                except json.JSONDecodeError:
-                    pass
-            return {}
+            if not row:
+                return {}
+            
+            settings = dict(row)
+            settings['authTokenEnabled'] = bool(settings['authTokenEnabled'])
+            settings['sessionEnabled'] = bool(settings['sessionEnabled'])
+            # Json 字段在 SQLite 中以文本存储
+            for key in ('loginRequestHeaders', 'loginRequestBody', 'otherConfig'):
+                if isinstance(settings.get(key), str):
+                    try:
+                        settings[key] = json_codec.loads(settings[key])
+                    except json.JSONDecodeError:
+                        pass
+            return settings
         
         finally:
             conn.close()
     
+    @timed_db_write()
     def create_suite_execution(
         self,
         suite_id: str,
         suite_name: str,
         triggered_by: str,
-        environment_config: Dict[str, Any]
+        environment_config: Dict[str, Any],
+        use_global_settings: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
         创建测试套件执行记录
@@ -1161,6 +2230,7 @@ class Database:
             suite_name: 测试套件名称
             triggered_by: 触发方式 (manual/schedule/api)
             environment_config: 环境配置
+            use_global_settings: 环境配置是否来自全局设置（用于环境快照的 source 字段）
             
         Returns:
             执行记录字典
@@ -1196,10 +2266,12 @@ class Database:
             
             # 创建执行记录
             execution_id = str(uuid4())
-            start_time = datetime.now().isoformat()
+            start_time = format_datetime_for_prisma(datetime.now())
+            if use_global_settings is None:
+                use_global_settings = bool(environment_config.get('useGlobalSettings'))
             
-            env_snapshot = json.dumps({
-                'source': 'global' if environment_config.get('useGlobalSettings') else 'suite',
+            env_snapshot = json_codec.dumps({
+                'source': 'global' if use_global_settings else 'suite',
                 'snapshotTime': start_time,
                 'config': environment_config
             })
@@ -1240,6 +2312,7 @@ class Database:
         finally:
             conn.close()
     
+    @timed_db_write()
     def update_suite_next_run_time(self, suite_id: str, next_run_time: datetime) -> None:
         """
         更新测试套件的下次执行时间
@@ -1274,6 +2347,87 @@ class Database:
         finally:
             conn.close()
     
+    @timed_db_write(batch='next_run_times')
+    def update_suites_next_run_time(self, next_run_times: Dict[str, Optional[datetime]]) -> None:
+        """
+        批量更新测试套件的下次执行时间（一个事务内完成）
+        
+        Args:
+            next_run_times: 测试套件ID -> 下次执行时间（带时区的 datetime，None 表示清空）
+        """
+        if not next_run_times:
+            return
+        
+        rows = []
+        for suite_id, next_run_time in next_run_times.items():
+            if next_run_time is not None and next_run_time.tzinfo is not None:
+                next_run_time = next_run_time.astimezone(pytz.UTC)
+            formatted_time = next_run_time.strftime('%Y-%m-%d %H:%M:%S') if next_run_time else None
+            rows.append((formatted_time, suite_id))
+        
+        conn = self.get_connection()
+        try:
+            conn.executemany("UPDATE TestSuite SET nextRunTime = ? WHERE id = ?", rows)
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def acquire_scheduler_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """
+        获取或续期调度器租约
+        
+        租约不存在、已过期或本来就由 owner 持有时获取成功，并把到期时间延后 ttl_seconds。
+        
+        Args:
+            name: 租约名称
+            owner: 持有者标识（进程唯一）
+            ttl_seconds: 租约有效期（秒）
+            
+        Returns:
+            是否持有租约
+        """
+        now_ms = int(time.time() * 1000)
+        expires_at = now_ms + int(ttl_seconds * 1000)
+        updated_at = format_datetime_for_prisma(datetime.now())
+        
+        conn = self.get_connection()
+        try:
+            self.ensure_executor_tables(conn)
+            cursor = conn.execute(
+                """
+                INSERT OR IGNORE INTO SchedulerLease (name, owner, expiresAt, updatedAt)
+                VALUES (?, ?, ?, ?)
+                """,
+                (name, owner, expires_at, updated_at)
+            )
+            if cursor.rowcount == 0:
+                cursor = conn.execute(
+                    """
+                    UPDATE SchedulerLease
+                    SET owner = ?, expiresAt = ?, updatedAt = ?
+                    WHERE name = ? AND (owner = ? OR expiresAt < ?)
+                    """,
+                    (owner, expires_at, updated_at, name, owner, now_ms)
+                )
+            conn.commit()
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+    
+    def release_scheduler_lease(self, name: str, owner: str) -> None:
+        """释放调度器租约（仅当 owner 仍持有时）"""
+        conn = self.get_connection()
+        try:
+            self.ensure_executor_tables(conn)
+            conn.execute(
+                "UPDATE SchedulerLease SET expiresAt = 0 WHERE name = ? AND owner = ?",
+                (name, owner)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    
+    @timed_db_write()
     def update_suite_last_run_time(self, suite_id: str, last_run_time: datetime) -> None:
         """
         更新测试套件的上次执行时间
@@ -0,0 +1,139 @@
+"""
+数据集加载 - 数据驱动执行的参数化数据（CSV / JSONL）
+
+数据集配置示例（用例 flowConfig.dataset 或套件 executionConfig.dataset）：
+    {
+        "format": "csv",            # csv / jsonl（省略时根据 path 后缀推断，默认 csv）
+        "content": "user,pwd\\n...", # 内联内容（与 path 二选一）
+        "path": "accounts.csv",     # 文件路径（相对于 DATASET_DIR 环境变量指定的目录，不允许超出该目录）
+        "maxRows": 1000,            # 最多读取的行数（可选）
+        "concurrency": 5,           # 行并发数（可选）
+        "seed": 12345               # 随机种子（可选，用于复现运行时函数生成的数据）
+    }
+
+每一行是一个变量字典，执行时覆盖用例的 flowConfig.variables。
+单元格可以使用运行时函数（如 ${{randomEmail()}}），执行前按列批量生成。
+"""
+import csv
+import io
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+# 数据集相对路径的基准目录
+DATASET_DIR = os.getenv('DATASET_DIR', os.path.join(os.path.dirname(__file__), 'datasets'))
+
+# 行并发数的默认值和上限
+DEFAULT_DATASET_CONCURRENCY = 5
+MAX_DATASET_CONCURRENCY = 50
+
+
+def get_dataset_config(
+    flow_config: Optional[Dict[str, Any]],
+    execution_config: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    获取生效的数据集配置（用例级优先于套件级）
+
+    Returns:
+        数据集配置，未配置时返回 None
+    """
+    dataset = (flow_config or {}).get('dataset') or (execution_config or {}).get('dataset')
+    if not dataset or not (dataset.get('content') or dataset.get('path')):
+        return None
+    return dataset
+
+
+def get_dataset_concurrency(dataset_config: Dict[str, Any]) -> int:
+    """数据集行并发数（限制在 1 ~ MAX_DATASET_CONCURRENCY）"""
+    try:
+        concurrency = int(dataset_config.get('concurrency') or DEFAULT_DATASET_CONCURRENCY)
+    except (TypeError, ValueError):
+        concurrency = DEFAULT_DATASET_CONCURRENCY
+    return max(1, min(concurrency, MAX_DATASET_CONCURRENCY))
+
+
+def resolve_dataset_path(path: str) -> str:
+    """
+    解析数据集文件路径（只允许 DATASET_DIR 下的相对路径）
+
+    Raises:
+        ValueError: 绝对路径，或解析（含符号链接）后位于 DATASET_DIR 之外
+    """
+    if os.path.isabs(path):
+        raise ValueError(f"数据集路径必须是相对于数据集目录的路径: {path}")
+    base = os.path.realpath(DATASET_DIR)
+    full_path = os.path.realpath(os.path.join(base, path))
+    if os.path.commonpath([base, full_path]) != base:
+        raise ValueError(f"数据集路径超出数据集目录: {path}")
+    return full_path
+
+
+def load_dataset(dataset_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    加载数据集
+
+    Args:
+        dataset_config: 数据集配置
+
+    Returns:
+        行列表，每行为变量字典
+
+    Raises:
+        ValueError: 格式不支持或内容无法解析
+    """
+    path = dataset_config.get('path')
+    fmt = (dataset_config.get('format') or '').lower()
+    if not fmt:
+        fmt = 'jsonl' if path and path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+    if dataset_config.get('content') is not None:
+        content = dataset_config['content']
+    else:
+        with open(resolve_dataset_path(path), 'r', encoding='utf-8-sig') as f:
+            content = f.read()
+
+    max_rows = dataset_config.get('maxRows')
+
+    if fmt == 'csv':
+        rows = _parse_csv(content, max_rows)
+    elif fmt in ('jsonl', 'ndjson'):
+        rows = _parse_jsonl(content, max_rows)
+    else:
+        raise ValueError(f"不支持的数据集格式: {fmt}")
+
+    print(f"[数据驱动] 已加载数据集: {len(rows)} 行 (格式: {fmt})")
+    return rows
+
+
+def _parse_csv(content: str, max_rows: Optional[int]) -> List[Dict[str, Any]]:
+    """解析 CSV（首行为表头）"""
+    rows = []
+    reader = csv.DictReader(io.StringIO(content))
+    for row in reader:
+        # 跳过空行，去掉表头中的空白
+        if not any(v for v in row.values() if v):
+            continue
+        rows.append({(k or '').strip(): v for k, v in row.items() if k})
+        if max_rows and len(rows) >= max_rows:
+            break
+    return rows
+
+
+def _parse_jsonl(content: str, max_rows: Optional[int]) -> List[Dict[str, Any]]:
+    """解析 JSONL（每行一个 JSON 对象）"""
+    rows = []
+    for line_no, line in enumerate(content.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"数据集第 {line_no} 行不是合法的 JSON: {e}")
+        if not isinstance(row, dict):
+            raise ValueError(f"数据集第 {line_no} 行不是 JSON 对象")
+        rows.append(row)
+        if max_rows and len(rows) >= max_rows:
+            break
+    return rows
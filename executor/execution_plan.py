@@ -0,0 +1,207 @@
+"""
+执行计划 - 将用例流程图编译为可复用的执行计划
+
+同一个用例需要多次执行时（数据驱动、压测），只需编译一次流程图，
+每次执行直接复用计划中的节点顺序。
+
+步骤结果保留：执行计划会静态分析每个节点引用了哪些步骤的结果
+（如 ${api_1.response.body.token}、断言字段 api_1.response.status），
+步骤结果在最后一个引用它的节点执行完后即释放，不再保留到用例结束。
+环境变量 STEP_RESULT_RETENTION=all 可关闭释放（保留全部步骤结果）。
+"""
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Set
+
+from models import FlowConfig, FlowNode, NodeType
+
+# 步骤结果保留策略：referenced（只保留仍会被引用的步骤结果）/ all（全部保留）
+STEP_RESULT_RETENTION = os.getenv('STEP_RESULT_RETENTION', 'referenced').lower()
+
+
+def build_execution_order(flow_config: FlowConfig):
+    """
+    构建执行顺序
+
+    根据节点和边的关系，构建一个有序的执行列表
+    将节点分为普通节点和后置清理节点
+
+    Args:
+        flow_config: 流程图配置
+
+    Returns:
+        元组: (普通节点列表, 后置清理节点列表)
+    """
+    nodes_dict = {node.id: node for node in flow_config.nodes}
+    edges = flow_config.edges
+
+    # 构建邻接表
+    graph = {node.id: [] for node in flow_config.nodes}
+    for edge in edges:
+        graph[edge.source].append(edge.target)
+
+    # 找到起始节点
+    start_nodes = [
+        node for node in flow_config.nodes
+        if node.type == NodeType.START
+    ]
+
+    if not start_nodes:
+        return [], []
+
+    # 从起始节点开始，BFS 遍历
+    all_nodes = []
+    visited = set()
+    queue = [start_nodes[0].id]
+
+    while queue:
+        node_id = queue.pop(0)
+
+        if node_id in visited:
+            continue
+
+        visited.add(node_id)
+        node = nodes_dict.get(node_id)
+
+        if node and node.type != NodeType.START and node.type != NodeType.END:
+            all_nodes.append(node)
+
+        # 添加下游节点
+        for next_node_id in graph.get(node_id, []):
+            if next_node_id not in visited:
+                queue.append(next_node_id)
+
+    # 分离普通节点和后置清理节点
+    normal_nodes = []
+    cleanup_nodes = []
+
+    for node in all_nodes:
+        # 检查节点是否标记为后置清理
+        is_cleanup = False
+
+        try:
+            if node.type == NodeType.API:
+                # API 节点 - node.data 是字典
+                is_cleanup = node.data.get('isCleanup', False) if isinstance(node.data, dict) else getattr(node.data, 'isCleanup', False)
+            elif node.type == NodeType.PARALLEL:
+                # 并行节点 - node.data 是字典
+                is_cleanup = node.data.get('isCleanup', False) if isinstance(node.data, dict) else getattr(node.data, 'isCleanup', False)
+
+            if is_cleanup:
+                cleanup_nodes.append(node)
+                node_name = node.data.get('name', node.id) if isinstance(node.data, dict) else getattr(node.data, 'name', node.id)
+                print(f"🧹 检测到后置清理节点: {node_name} (类型: {node.type.value})")
+            else:
+                normal_nodes.append(node)
+        except Exception as e:
+            print(f"⚠️ 解析节点 {node.id} 的清理标识时出错: {e}")
+            # 出错时视为普通节点
+            normal_nodes.append(node)
+
+    if cleanup_nodes:
+        print(f"📋 执行计划: {len(normal_nodes)} 个普通节点 + {len(cleanup_nodes)} 个后置清理节点")
+
+    return normal_nodes, cleanup_nodes
+
+
+class ExecutionPlan:
+    """编译后的用例执行计划"""
+
+    def __init__(self, normal_nodes: List[FlowNode], cleanup_nodes: List[FlowNode]):
+        self.normal_nodes = normal_nodes
+        self.cleanup_nodes = cleanup_nodes
+        self.nodes_by_id: Dict[str, FlowNode] = {
+            node.id: node for node in normal_nodes + cleanup_nodes
+        }
+        # 编译后的 URL 模板（(节点, URL, 数据库URL, BaseURL, 是否保留查询参数) -> UrlTemplate）
+        self.url_templates: Dict[tuple, Any] = {}
+
+        # 执行到第 N 个节点（普通节点 + 后置清理节点的顺序）后可以释放的步骤结果
+        self.release_after: Dict[int, List[str]] = (
+            compute_release_points(normal_nodes + cleanup_nodes)
+            if STEP_RESULT_RETENTION != 'all' else {}
+        )
+        # 被其他节点引用的步骤（这些步骤必须保留响应体）；未分析时为 None，视为全部被引用
+        self.referenced_steps: Optional[Set[str]] = None
+        if self.release_after:
+            positions = {node.id: position for position, node in enumerate(normal_nodes + cleanup_nodes)}
+            self.referenced_steps = {
+                node_id
+                for position, node_ids in self.release_after.items()
+                for node_id in node_ids
+                if position > positions[node_id]
+            }
+    
+    @property
+    def total_steps(self) -> int:
+        """总步数（普通节点 + 后置清理节点）"""
+        return len(self.normal_nodes) + len(self.cleanup_nodes)
+
+
+def compute_release_points(nodes: List[FlowNode]) -> Dict[int, List[str]]:
+    """
+    计算每个步骤结果的最后使用位置
+    
+    节点配置（请求参数、断言、等待条件等）中以节点ID作为路径开头的引用都视为对该步骤结果的引用；
+    步骤结果至少保留到节点自身执行完（支持 current 引用）。
+    
+    Args:
+        nodes: 按执行顺序排列的节点（普通节点 + 后置清理节点）
+        
+    Returns:
+        位置 -> 该位置的节点执行完后可以释放的节点ID列表
+    """
+    if not nodes:
+        return {}
+    
+    node_ids = sorted({node.id for node in nodes}, key=len, reverse=True)
+    reference = re.compile(
+        r'(?<![\w\-])(' + '|'.join(re.escape(node_id) for node_id in node_ids) + r')(?![\w\-])'
+    )
+    
+    last_use: Dict[str, int] = {}
+    for position, node in enumerate(nodes):
+        last_use[node.id] = max(last_use.get(node.id, position), position)
+        try:
+            text = json.dumps(node.data, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            text = str(node.data)
+        for referenced in set(reference.findall(text)):
+            last_use[referenced] = max(last_use.get(referenced, position), position)
+    
+    release_after: Dict[int, List[str]] = {}
+    for node_id, position in last_use.items():
+        release_after.setdefault(position, []).append(node_id)
+    return release_after
+
+
+def compile_plan(flow_config: FlowConfig) -> ExecutionPlan:
+    """编译流程图为执行计划"""
+    normal_nodes, cleanup_nodes = build_execution_order(flow_config)
+    return ExecutionPlan(normal_nodes, cleanup_nodes)
+
+
+def parse_execution_config(suite_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    解析测试套件的执行配置（TestSuite.executionConfig）
+
+    执行配置是套件级的扩展点（JSON），例如：
+        {"dataset": {"format": "csv", "path": "accounts.csv", "concurrency": 5}}
+
+    Returns:
+        执行配置字典（未配置或解析失败时返回空字典）
+    """
+    if not suite_data:
+        return {}
+    raw = suite_data.get('executionConfig')
+    if not raw:
+        return {}
+    if isinstance(raw, dict):
+        return raw
+    try:
+        config = json.loads(raw)
+        return config if isinstance(config, dict) else {}
+    except (TypeError, ValueError) as e:
+        print(f"⚠️ 解析套件执行配置失败: {e}")
+        return {}
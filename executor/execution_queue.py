@@ -0,0 +1,173 @@
+"""
+套件执行队列 - 进程内统一提交测试套件执行
+
+手动执行（Next.js 调用 /api/execute-suite）和定时调度都通过同一个队列提交，
+队列负责防止同一执行记录重复运行、保存后台任务引用（避免任务被回收），
+并在执行结束后清理停止标志。
+
+队列有全局执行预算：同时运行的套件数不超过 SUITE_MAX_CONCURRENT，
+超出的提交按提交顺序排队（执行记录保持 pending）；相邻两次启动至少间隔
+SUITE_START_INTERVAL 秒，同一时刻触发的大量调度会按固定速率依次启动。
+"""
+import asyncio
+import os
+import traceback
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from suite_executor import SuiteExecutor
+
+
+class SuiteJobQueue:
+    """测试套件执行队列"""
+
+    def __init__(
+        self,
+        database,
+        stop_flags: Optional[Dict[str, bool]] = None,
+        max_concurrent: Optional[int] = None,
+        start_interval: Optional[float] = None
+    ):
+        """
+        Args:
+            database: 数据库实例
+            stop_flags: 全局停止标志（execution_id -> should_stop），与停止接口共享
+            max_concurrent: 同时运行的套件数上限（默认读取 SUITE_MAX_CONCURRENT，默认 4）
+            start_interval: 相邻两次启动的最小间隔秒数（默认读取 SUITE_START_INTERVAL，默认 0）
+        """
+        self.database = database
+        self.stop_flags = stop_flags if stop_flags is not None else {}
+        if max_concurrent is None:
+            max_concurrent = int(os.getenv("SUITE_MAX_CONCURRENT", "4"))
+        if start_interval is None:
+            start_interval = float(os.getenv("SUITE_START_INTERVAL", "0"))
+        self.max_concurrent = max(1, max_concurrent)
+        self.start_interval = max(0.0, start_interval)
+        # 已提交的执行（排队中 + 运行中）
+        self.running: Set[str] = set()
+        # 排队等待执行预算的执行
+        self.queued: Set[str] = set()
+        # 执行记录 -> 测试套件
+        self._suites: Dict[str, str] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self._pace_lock = asyncio.Lock()
+        self._last_start: Optional[float] = None
+
+    def is_running(self, suite_execution_id: str) -> bool:
+        """执行记录是否已提交（排队中或运行中）"""
+        return suite_execution_id in self.running
+
+    def is_suite_active(self, suite_id: str) -> bool:
+        """测试套件是否有已提交（排队中或运行中）的执行"""
+        return suite_id in self._suites.values()
+
+    def stats(self) -> Dict[str, Any]:
+        """队列状态"""
+        return {
+            'maxConcurrent': self.max_concurrent,
+            'startInterval': self.start_interval,
+            'running': len(self.running) - len(self.queued),
+            'queued': len(self.queued),
+        }
+
+    def submit(
+        self,
+        suite_execution_id: str,
+        suite_id: str,
+        environment_config: Dict[str, Any],
+        run_mode: str = "serial",
+        profile: Any = None
+    ) -> bool:
+        """
+        提交测试套件执行（立即返回，后台执行；执行预算已满时排队）
+
+        Args:
+            profile: 性能剖析模式（cprofile / sampling，可选）
+
+        Returns:
+            是否已提交（同一执行记录已提交时返回 False）
+        """
+        if suite_execution_id in self.running:
+            return False
+
+        self.stop_flags.pop(suite_execution_id, None)
+        self.running.add(suite_execution_id)
+        self.queued.add(suite_execution_id)
+        self._suites[suite_execution_id] = suite_id
+        try:
+            self._tasks[suite_execution_id] = asyncio.create_task(
+                self._run(suite_execution_id, suite_id, environment_config, run_mode, profile)
+            )
+        except Exception:
+            self._forget(suite_execution_id)
+            raise
+        return True
+
+    def will_queue(self) -> bool:
+        """现在提交新的执行是否需要排队（执行预算已满）"""
+        return len(self.running) >= self.max_concurrent
+
+    def _forget(self, suite_execution_id: str) -> None:
+        self.running.discard(suite_execution_id)
+        self.queued.discard(suite_execution_id)
+        self._suites.pop(suite_execution_id, None)
+        self._tasks.pop(suite_execution_id, None)
+
+    async def _pace(self) -> None:
+        """按 start_interval 控制启动速率"""
+        if not self.start_interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._pace_lock:
+            if self._last_start is not None:
+                delay = self._last_start + self.start_interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self._last_start = loop.time()
+
+    async def _run(
+        self,
+        suite_execution_id: str,
+        suite_id: str,
+        environment_config: Dict[str, Any],
+        run_mode: str,
+        profile: Any = None
+    ) -> None:
+        """后台执行测试套件（等待执行预算），执行完毕后自动清理状态"""
+        try:
+            if self._slots.locked():
+                print(f"⏳ 执行预算已满（{self.max_concurrent}），排队等待: {suite_execution_id}")
+            async with self._slots:
+                await self._pace()
+                self.queued.discard(suite_execution_id)
+                if self.stop_flags.get(suite_execution_id):
+                    # 排队期间被停止，不再启动
+                    print(f"⏹️  排队中的执行已停止: {suite_execution_id}")
+                    if self.database is not None:
+                        self.database.update_suite_execution(
+                            suite_execution_id, status='stopped', end_time=datetime.now()
+                        )
+                    return
+                if self.database is not None:
+                    self.database.update_suite_execution(suite_execution_id, status='running')
+                suite_executor = SuiteExecutor(self.database, self.stop_flags)
+                await suite_executor.execute_suite(
+                    suite_execution_id=suite_execution_id,
+                    suite_id=suite_id,
+                    environment_config=environment_config,
+                    run_mode=run_mode,
+                    profile=profile,
+                )
+        except Exception as e:
+            print(f"❌ 后台执行测试套件异常: {e}")
+            traceback.print_exc()
+        finally:
+            self.stop_flags.pop(suite_execution_id, None)
+            self._forget(suite_execution_id)
+
+    async def wait(self, suite_execution_id: str) -> None:
+        """等待某个执行结束（未在运行时直接返回）"""
+        task = self._tasks.get(suite_execution_id)
+        if task:
+            await asyncio.shield(task)
@@ -0,0 +1,157 @@
+"""
+耗时直方图 - 固定桶（类 HDR Histogram）的耗时分布统计
+
+桶划分规则（单位：毫秒）：
+- 0 ~ 15ms：每 1ms 一个桶（精确）
+- 16ms 以上：每个 2 的幂区间再等分为 8 个子桶（相对误差约 12.5%）
+
+所有桶计数保存在紧凑数组中，可以无损合并，适合增量累加后落库。
+"""
+import json
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS  # 8
+# 最大可区分到 2^24 ms（约 4.6 小时），更大的值落入最后一个桶
+MAX_EXPONENT = 24
+BUCKET_COUNT = SUB_BUCKETS * (MAX_EXPONENT - SUB_BUCKET_BITS + 2)
+
+
+def bucket_index(value_ms: float) -> int:
+    """计算耗时所属的桶索引"""
+    v = int(value_ms) if value_ms and value_ms > 0 else 0
+    if v < 2 * SUB_BUCKETS:
+        return v
+    exponent = v.bit_length() - SUB_BUCKET_BITS - 1
+    index = SUB_BUCKETS * (exponent + 1) + (v >> exponent) - SUB_BUCKETS
+    return min(index, BUCKET_COUNT - 1)
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """返回桶的取值区间 [lower, upper)"""
+    if index < 2 * SUB_BUCKETS:
+        return index, index + 1
+    exponent = index // SUB_BUCKETS - 1
+    lower = (index % SUB_BUCKETS + SUB_BUCKETS) << exponent
+    return lower, lower + (1 << exponent)
+
+
+class LatencyHistogram:
+    """固定桶耗时直方图"""
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = array('Q', bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, value_ms: float, times: int = 1) -> None:
+        """记录一次（或多次相同的）耗时"""
+        if value_ms is None:
+            return
+        self.counts[bucket_index(value_ms)] += times
+        self.count += times
+        self.total += value_ms * times
+        if self.min is None or value_ms < self.min:
+            self.min = value_ms
+        if self.max is None or value_ms > self.max:
+            self.max = value_ms
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """合并另一个直方图（原地修改并返回自身）"""
+        if not other or not other.count:
+            return self
+        counts = self.counts
+        for idx, n in enumerate(other.counts):
+            if n:
+                counts[idx] += n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        估算分位数
+
+        Args:
+            p: 分位（0-100），如 95 表示 p95
+
+        Returns:
+            分位值（毫秒），取所在桶的中点并收敛到 [min, max] 范围内；无数据时返回 None
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(round(self.count * p / 100.0)))
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            if not n:
+                continue
+            seen += n
+            if seen >= rank:
+                lower, upper = bucket_bounds(idx)
+                value = (lower + upper - 1) / 2.0
+                if self.min is not None:
+                    value = max(value, self.min)
+                if self.max is not None:
+                    value = min(value, self.max)
+                return value
+        return self.max
+
+    def mean(self) -> Optional[float]:
+        """平均值（毫秒）"""
+        return self.total / self.count if self.count else None
+
+    def summary(self, percentiles: Iterable[float] = (50, 95, 99)) -> Dict[str, Any]:
+        """生成摘要（次数、均值、最值与分位数）"""
+        data = {
+            'count': self.count,
+            'mean': round(self.mean(), 2) if self.count else None,
+            'min': self.min,
+            'max': self.max,
+        }
+        for p in percentiles:
+            data[f'p{int(p) if float(p).is_integer() else p}'] = self.percentile(p)
+        return data
+
+    # ==================== 序列化 ====================
+
+    def to_pairs(self) -> List[List[int]]:
+        """稀疏表示：[[桶索引, 计数], ...]"""
+        return [[idx, n] for idx, n in enumerate(self.counts) if n]
+
+    def to_json(self) -> str:
+        """序列化为 JSON 字符串（用于落库）"""
+        return json.dumps({
+            'buckets': self.to_pairs(),
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+        }, separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, text: Optional[str]) -> 'LatencyHistogram':
+        """从 JSON 字符串还原（空值返回空直方图）"""
+        hist = cls()
+        if not text:
+            return hist
+        try:
+            data = json.loads(text)
+        except (TypeError, ValueError):
+            return hist
+        for idx, n in data.get('buckets', []):
+            if 0 <= idx < BUCKET_COUNT:
+                hist.counts[idx] += n
+        hist.count = data.get('count') or sum(hist.counts)
+        hist.total = data.get('total') or 0.0
+        hist.min = data.get('min')
+        hist.max = data.get('max')
+        return hist
@@ -0,0 +1,139 @@
+"""
+JSON 编解码 - 统一的序列化入口
+
+安装了 orjson 时使用 orjson（快数倍），否则回退到标准库 json；
+环境变量 JSON_BACKEND=stdlib 可强制使用标准库。两种后端输出格式一致：
+紧凑格式（无多余空格）、不转义非 ASCII 字符、无法序列化的对象按 str() 处理。
+例外是 NaN/Infinity：orjson 输出 null，标准库输出 NaN/Infinity（不是合法 JSON）。
+
+同一份数据需要写入多个位置（数据库字段、日志详情、SSE 消息）时，
+先用 RawJson.of() 序列化一次，之后作为已序列化的片段直接嵌入，不再重复编码。
+"""
+import json
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+if os.getenv('JSON_BACKEND', 'auto').lower() == 'stdlib':
+    orjson = None
+
+# 当前使用的后端名称
+BACKEND = 'orjson' if orjson is not None else 'stdlib'
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    _ORJSON_FRAGMENT = getattr(orjson, 'Fragment', None)
+
+# orjson 不支持 Fragment 或回退到标准库时，RawJson 先序列化为占位字符串再替换为原文。
+# 占位符包含每次调用随机生成的 nonce，数据中的字符串无法预先构造出相同的占位符
+_RAW_TOKEN = '\x00raw{}:{}\x00'
+_RAW_TOKEN_ESCAPED = '"\\u0000raw{}:{}\\u0000"'
+
+
+class RawJson:
+    """已序列化的 JSON 片段"""
+
+    __slots__ = ('text', 'sanitized')
+
+    def __init__(self, text: str):
+        self.text = text
+        # 是否已清理过无效字符（写入数据库前清理一次即可）
+        self.sanitized = False
+
+    @classmethod
+    def of(cls, data: Any) -> 'RawJson':
+        """序列化数据（已是 RawJson 时直接返回）"""
+        if isinstance(data, RawJson):
+            return data
+        return cls(dumps(data))
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __repr__(self) -> str:
+        return f'RawJson({self.text[:80]!r})'
+
+
+def dumps(data: Any) -> str:
+    """序列化为 JSON 字符串"""
+    if isinstance(data, RawJson):
+        return data.text
+
+    fragments = []
+    nonce = None
+
+    def default(obj: Any) -> Any:
+        nonlocal nonce
+        if isinstance(obj, RawJson):
+            if orjson is not None and _ORJSON_FRAGMENT is not None:
+                return _ORJSON_FRAGMENT(obj.text)
+            if nonce is None:
+                nonce = os.urandom(8).hex()
+            fragments.append(obj.text)
+            return _RAW_TOKEN.format(nonce, len(fragments) - 1)
+        return str(obj)
+
+    text = None
+    if orjson is not None:
+        try:
+            text = orjson.dumps(data, default=default, option=_ORJSON_OPTIONS).decode('utf-8')
+        except (TypeError, orjson.JSONEncodeError):
+            # 超出 64 位的整数、非法 UTF-8 等 orjson 不支持的数据回退到标准库
+            fragments.clear()
+    if text is None:
+        text = json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=default)
+
+    for index, fragment in enumerate(fragments):
+        text = text.replace(_RAW_TOKEN_ESCAPED.format(nonce, index), fragment, 1)
+    return text
+
+
+def materialize(data: Any) -> Any:
+    """将数据中嵌入的 RawJson 片段解析为普通对象（交给 pydantic/FastAPI 等不认识 RawJson 的序列化器前使用）"""
+    if isinstance(data, RawJson):
+        return loads(data.text)
+    if isinstance(data, dict):
+        return {key: materialize(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [materialize(value) for value in data]
+    return data
+
+
+def dumps_bytes(data: Any) -> bytes:
+    """序列化为 UTF-8 编码的 JSON 字节串"""
+    return dumps(data).encode('utf-8')
+
+
+def _pretty_default(obj: Any) -> Any:
+    if isinstance(obj, RawJson):
+        return loads(obj.text)
+    return str(obj)
+
+
+def pretty(data: Any) -> str:
+    """序列化为缩进 2 空格的 JSON 字符串（用于日志和调试输出）"""
+    if isinstance(data, RawJson):
+        data = loads(data.text)
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                data, default=_pretty_default, option=_ORJSON_OPTIONS | orjson.OPT_INDENT_2
+            ).decode('utf-8')
+        except (TypeError, orjson.JSONEncodeError):
+            pass
+    return json.dumps(data, ensure_ascii=False, indent=2, default=_pretty_default)
+
+
+def loads(text: Any) -> Any:
+    """解析 JSON 字符串或字节串"""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # orjson 不接受 NaN/Infinity，交给标准库处理（标准库同样失败时抛出 ValueError）
+            pass
+    return json.loads(text)
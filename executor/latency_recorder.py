@@ -0,0 +1,148 @@
+"""
+接口耗时记录器 - 进程内按 (apiId, method, 规范化路径) 聚合请求耗时
+
+- 每次请求只在内存直方图中累加一次计数，不产生数据库写入
+- 按固定时间窗口（默认 60 秒）分桶，周期性批量落库到 ApiLatencyWindow 表
+- 查询时按更大的时间粒度合并窗口直方图，计算 p50/p95/p99
+"""
+import asyncio
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from histogram import LatencyHistogram
+
+# 路径中视为 ID 的片段：纯数字、UUID、长十六进制串
+_ID_SEGMENT_PATTERNS = [
+    re.compile(r'^\d+$'),
+    re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$'),
+    re.compile(r'^[0-9a-fA-F]{16,}$'),
+]
+
+# 默认窗口长度与落库间隔（秒）
+DEFAULT_WINDOW_SECONDS = 60
+DEFAULT_FLUSH_INTERVAL = 30
+
+
+def normalize_path(url: str) -> str:
+    """
+    规范化请求路径（去掉 host 和查询参数，ID 类片段替换为 {id}）
+
+    例如: http://host/api/users/123/orders?page=1 -> /api/users/{id}/orders
+    """
+    path = urlsplit(url or '').path or '/'
+    segments = []
+    for segment in path.split('/'):
+        if segment and any(p.match(segment) for p in _ID_SEGMENT_PATTERNS):
+            segments.append('{id}')
+        else:
+            segments.append(segment)
+    return '/'.join(segments) or '/'
+
+
+class _WindowStats:
+    """单个 (key, 窗口) 的累计数据"""
+
+    __slots__ = ('histogram', 'error_count')
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.error_count = 0
+
+
+class LatencyRecorder:
+    """进程内接口耗时记录器"""
+
+    def __init__(self, window_seconds: int = DEFAULT_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        # (apiId, method, path, windowStart) -> _WindowStats
+        self._pending: Dict[Tuple[str, str, str, int], _WindowStats] = {}
+
+    def record(
+        self,
+        api_id: Optional[str],
+        method: str,
+        url: str,
+        duration_ms: float,
+        status: Optional[int] = None,
+        timestamp: Optional[float] = None
+    ) -> None:
+        """
+        记录一次请求耗时
+
+        Args:
+            api_id: API ID（临时请求可为空）
+            method: 请求方法
+            url: 请求 URL（会被规范化为路径模板）
+            duration_ms: 耗时（毫秒）
+            status: 响应状态码（None 表示请求异常）
+            timestamp: 请求时间（epoch 秒，默认当前时间）
+        """
+        ts = timestamp if timestamp is not None else time.time()
+        window_start = int(ts // self.window_seconds) * self.window_seconds
+        key = (api_id or '', (method or '').upper(), normalize_path(url), window_start)
+
+        stats = self._pending.get(key)
+        if stats is None:
+            stats = self._pending[key] = _WindowStats()
+        stats.histogram.record(duration_ms)
+        if status is None or status >= 400:
+            stats.error_count += 1
+
+    def pending_count(self) -> int:
+        """尚未落库的窗口数"""
+        return len(self._pending)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """取出并清空所有待落库窗口"""
+        pending, self._pending = self._pending, {}
+        return [
+            {
+                'apiId': api_id,
+                'method': method,
+                'path': path,
+                'windowStart': window_start,
+                'windowSeconds': self.window_seconds,
+                'errorCount': stats.error_count,
+                'histogram': stats.histogram,
+            }
+            for (api_id, method, path, window_start), stats in pending.items()
+        ]
+
+    def flush(self, database) -> int:
+        """
+        将待落库窗口批量写入数据库
+
+        Returns:
+            写入的窗口数
+        """
+        windows = self.drain()
+        if not windows:
+            return 0
+        try:
+            database.save_latency_windows(windows)
+        except Exception:
+            # 写入失败时放回内存，等待下次落库
+            for window in windows:
+                key = (window['apiId'], window['method'], window['path'], window['windowStart'])
+                stats = self._pending.setdefault(key, _WindowStats())
+                stats.histogram.merge(window['histogram'])
+                stats.error_count += window['errorCount']
+            raise
+        return len(windows)
+
+    async def run_flusher(self, database, interval: float = DEFAULT_FLUSH_INTERVAL) -> None:
+        """周期性落库（在应用生命周期内作为后台任务运行）"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                count = self.flush(database)
+                if count:
+                    print(f"[耗时统计] 已落库 {count} 个窗口")
+            except Exception as e:
+                print(f"[耗时统计] 落库失败: {e}")
+
+
+# 全局记录器（进程内共享）
+latency_recorder = LatencyRecorder()
@@ -0,0 +1,280 @@
+"""
+压测执行器 - 以指定并发反复执行同一个测试用例，统计吞吐量与耗时分布
+
+- 所有虚拟用户共享一个 HTTP 连接池（每个虚拟用户有独立的 Cookie 状态）
+- 支持按迭代次数或持续时间结束，支持线性加压（ramp-up）
+- 不写入单次迭代的执行记录，只在结束时写入汇总结果（LoadTestRun）
+- 压测请求不计入进程内耗时窗口和 /metrics 的 HTTP 指标
+"""
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from api_cache import prefetch_api_infos
+from execution_plan import compile_plan
+from histogram import LatencyHistogram
+from models import TestCase
+from test_executor import TestExecutor
+
+# 汇总中保留的错误信息条数
+MAX_ERROR_SAMPLES = 20
+
+
+class SharedTransport(httpx.AsyncBaseTransport):
+    """共享连接池的传输层包装（客户端关闭时不关闭底层连接池）"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class LoadRunner:
+    """压测执行器"""
+
+    def __init__(
+        self,
+        test_case: TestCase,
+        database=None,
+        concurrency: int = 10,
+        iterations: Optional[int] = None,
+        duration_seconds: Optional[float] = None,
+        ramp_up_seconds: float = 0,
+        environment_config: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        run_id: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        初始化压测执行器
+
+        Args:
+            test_case: 测试用例
+            database: 数据库实例（用于读取 API 信息和写入汇总结果）
+            concurrency: 并发虚拟用户数
+            iterations: 总迭代次数（与 duration_seconds 至少提供一个）
+            duration_seconds: 持续时间（秒）
+            ramp_up_seconds: 加压时间（秒），虚拟用户在该时间内均匀启动
+            environment_config: 环境配置（不提供时使用平台设置）
+            timeout: HTTP 请求超时时间（秒）
+            run_id: 压测记录ID（提供时结束后写入汇总）
+            transport: HTTP 传输层（可选，由调用方负责关闭；不提供时创建连接池）
+        """
+        if not iterations and not duration_seconds:
+            raise ValueError("必须提供 iterations 或 duration_seconds")
+
+        self.test_case = test_case
+        # 执行计划只编译一次，所有虚拟用户的每次迭代复用
+        self.plan = compile_plan(test_case.flowConfig)
+        self.database = database
+        self.concurrency = max(1, concurrency)
+        self.iterations = iterations
+        self.duration_seconds = duration_seconds
+        self.ramp_up_seconds = max(0.0, ramp_up_seconds or 0)
+        self.environment_config = environment_config
+        self.timeout = timeout
+        self.run_id = run_id
+        self.transport = transport
+
+        self._stop = False
+        self._started = 0  # 已领取的迭代数
+        self._start_time: Optional[float] = None
+        self._end_time: Optional[float] = None
+        self.active_users = 0
+
+        # 汇总统计
+        self.completed_iterations = 0
+        self.failed_iterations = 0
+        self.request_count = 0
+        self.request_errors = 0
+        self.iteration_histogram = LatencyHistogram()
+        self.request_histogram = LatencyHistogram()
+        self.step_stats: Dict[str, Dict[str, Any]] = {}
+        self.errors: Dict[str, int] = {}
+        # 所有虚拟用户共享的 API 信息缓存
+        self.api_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def stop(self) -> None:
+        """请求停止（正在执行的迭代会执行完）"""
+        self._stop = True
+
+    def _next_iteration(self) -> bool:
+        """领取下一次迭代，返回 False 表示应结束"""
+        if self._stop:
+            return False
+        if self.iterations and self._started >= self.iterations:
+            return False
+        if self.duration_seconds and time.perf_counter() - self._start_time >= self.duration_seconds:
+            return False
+        self._started += 1
+        return True
+
+    def _count_error(self, error: str) -> None:
+        """按错误信息计数（只保留前 MAX_ERROR_SAMPLES 种）"""
+        error = error[:200]
+        if error in self.errors or len(self.errors) < MAX_ERROR_SAMPLES:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    def _record_iteration(self, result, elapsed_ms: float, api_samples) -> None:
+        """累加一次迭代的结果"""
+        self.completed_iterations += 1
+        self.iteration_histogram.record(elapsed_ms)
+        if not result.success:
+            self.failed_iterations += 1
+            self._count_error(result.error or '未知错误')
+
+        for sample in api_samples:
+            self.request_count += 1
+            self.request_histogram.record(sample['duration'])
+            if sample['status'] is None or sample['status'] >= 400:
+                self.request_errors += 1
+
+        for step in result.steps:
+            stats = self.step_stats.get(step['nodeId'])
+            if stats is None:
+                stats = self.step_stats[step['nodeId']] = {
+                    'nodeName': step.get('stepName'),
+                    'nodeType': getattr(step.get('nodeType'), 'value', step.get('nodeType')),
+                    'count': 0,
+                    'failed': 0,
+                    'histogram': LatencyHistogram(),
+                }
+            stats['count'] += 1
+            if not step.get('success'):
+                stats['failed'] += 1
+            stats['histogram'].record((step.get('duration') or 0) * 1000)
+
+    async def _virtual_user(self, index: int, transport: httpx.AsyncBaseTransport) -> None:
+        """单个虚拟用户：循环执行用例直到迭代数或时间用完"""
+        if self.ramp_up_seconds and self.concurrency > 1:
+            await asyncio.sleep(self.ramp_up_seconds * index / self.concurrency)
+
+        self.active_users += 1
+        try:
+            async with TestExecutor(
+                timeout=self.timeout,
+                database=self.database,
+                environment_config=self.environment_config,
+                transport=SharedTransport(transport),
+                api_cache=self.api_cache,
+                keep_step_payloads=False,
+                record_latency=False
+            ) as executor:
+                while self._next_iteration():
+                    executor.api_samples = []
+                    iteration_start = time.perf_counter()
+                    try:
+                        result = await executor.execute_test_case(self.test_case, plan=self.plan)
+                    except Exception as e:
+                        self.completed_iterations += 1
+                        self.failed_iterations += 1
+                        self._count_error(f"{type(e).__name__}: {str(e)}")
+                        continue
+                    self._record_iteration(
+                        result,
+                        (time.perf_counter() - iteration_start) * 1000,
+                        executor.api_samples
+                    )
+        finally:
+            self.active_users -= 1
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        执行压测
+
+        Returns:
+            汇总报告
+        """
+        print(f"\n[压测] 开始: {self.test_case.name}，并发 {self.concurrency}，"
+              f"迭代 {self.iterations or '-'}，时长 {self.duration_seconds or '-'}s，加压 {self.ramp_up_seconds}s")
+
+        if self.environment_config is None and self.database:
+            # 平台设置只读取一次，所有虚拟用户共用
+            self.environment_config = self.database.get_platform_settings()
+        if self.database:
+            self.api_cache = prefetch_api_infos(
+                self.database, [self.test_case.flowConfig.dict()]
+            )
+
+        transport = self.transport or httpx.AsyncHTTPTransport(
+            verify=False,
+            limits=httpx.Limits(
+                # 并发节点会在单个虚拟用户内同时发出多个请求
+                max_connections=self.concurrency * 2,
+                max_keepalive_connections=self.concurrency
+            )
+        )
+        self._start_time = time.perf_counter()
+        status = 'completed'
+        error_message = None
+        try:
+            await asyncio.gather(*(
+                self._virtual_user(i, transport) for i in range(self.concurrency)
+            ))
+            if self._stop:
+                status = 'stopped'
+        except Exception as e:
+            status = 'failed'
+            error_message = f"{type(e).__name__}: {str(e)}"
+            print(f"[压测] 执行异常: {error_message}")
+        finally:
+            self._end_time = time.perf_counter()
+            if transport is not self.transport:
+                await transport.aclose()
+
+        report = self.snapshot()
+        report['status'] = status
+        report['error'] = error_message
+        print(f"[压测] 结束: {status}，迭代 {report['iterations']}，"
+              f"RPS {report['requestsPerSecond']}，错误率 {report['requestErrorRate']}%")
+
+        if self.run_id and self.database:
+            try:
+                self.database.finish_load_test_run(self.run_id, report)
+            except Exception as e:
+                print(f"[压测] 保存汇总结果失败: {e}")
+
+        return report
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前汇总（执行中也可调用）"""
+        if self._start_time is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._end_time or time.perf_counter()) - self._start_time
+
+        return {
+            'testCaseId': self.test_case.id,
+            'testCaseName': self.test_case.name,
+            'concurrency': self.concurrency,
+            'activeUsers': self.active_users,
+            'elapsedSeconds': round(elapsed, 3),
+            'iterations': self.completed_iterations,
+            'failedIterations': self.failed_iterations,
+            'iterationErrorRate': round(self.failed_iterations / self.completed_iterations * 100, 2) if self.completed_iterations else 0,
+            'iterationsPerSecond': round(self.completed_iterations / elapsed, 2) if elapsed else 0,
+            'requests': self.request_count,
+            'requestErrors': self.request_errors,
+            'requestErrorRate': round(self.request_errors / self.request_count * 100, 2) if self.request_count else 0,
+            'requestsPerSecond': round(self.request_count / elapsed, 2) if elapsed else 0,
+            'iterationLatency': self.iteration_histogram.summary(),
+            'requestLatency': self.request_histogram.summary(),
+            'steps': [
+                {
+                    'nodeId': node_id,
+                    'nodeName': stats['nodeName'],
+                    'nodeType': stats['nodeType'],
+                    'count': stats['count'],
+                    'failed': stats['failed'],
+                    'latency': stats['histogram'].summary(),
+                }
+                for node_id, stats in self.step_stats.items()
+            ],
+            'errors': [{'message': msg, 'count': n} for msg, n in self.errors.items()],
+        }
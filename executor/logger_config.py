@@ -16,6 +16,9 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, Any
 
+# 日志文件目录（默认为项目根目录下的 logs/）
+LOG_DIR = os.getenv('EXECUTOR_LOG_DIR', str(Path(__file__).parent.parent / 'logs'))
+
 
 # ANSI 颜色代码
 class Colors:
@@ -169,7 +172,7 @@ class ExecutorLogger:
     
     def _setup_handlers(self):
         """设置处理器"""
-        log_dir = Path(__file__).parent.parent / 'logs'
+        log_dir = Path(LOG_DIR)
         
         # 控制台处理器
         console_handler = logging.StreamHandler(sys.stdout)
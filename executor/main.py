@@ -7,17 +7,24 @@ import traceback as tb_mod
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Set
+from typing import Optional, List, Dict, Union
 from datetime import datetime
 
 from database import Database
 from test_executor import TestExecutor
 from sse_executor import SSEExecutor
-from suite_executor import SuiteExecutor
 from scheduler import TestSuiteScheduler
+from execution_queue import SuiteJobQueue
+from shard_worker import ShardWorker
 from models import ExecutionResult
+from latency_recorder import latency_recorder
+from load_runner import LoadRunner
+from api_cache import api_info_cache
+from metrics import event_loop_monitor, registry as metrics_registry
+from tracing import tracer
+from profiling import get_artifact_path, list_artifacts
 
 # 数据库路径
 # 统一使用 prisma/dev.db（与Prisma配置一致）
@@ -30,8 +37,32 @@ scheduler: Optional[TestSuiteScheduler] = None
 # 全局停止标志（execution_id -> should_stop）
 stop_flags = {}
 
-# 正在执行的套件 ID 集合（用于防止重复提交）
-running_suites: Set[str] = set()
+# 套件执行队列（手动执行和定时调度共用，防止重复提交）
+suite_job_queue = SuiteJobQueue(db, stop_flags)
+
+# 正在执行的压测（run_id -> LoadRunner）
+load_runners: Dict[str, LoadRunner] = {}
+
+# 健康检查：事件循环延迟超过该值（秒）视为无响应
+HEALTH_MAX_LOOP_LAG = float(os.getenv("HEALTH_MAX_LOOP_LAG", "1"))
+
+# 导出时读取的运行状态指标
+metrics_registry.gauge(
+    'executor_suites_running', '正在执行的测试套件数',
+    callback=lambda: suite_job_queue.stats()['running'],
+)
+metrics_registry.gauge(
+    'executor_suite_queue_depth', '等待执行预算的测试套件数',
+    callback=lambda: suite_job_queue.stats()['queued'],
+)
+metrics_registry.gauge(
+    'executor_latency_windows_pending', '等待落库的接口耗时窗口数',
+    callback=latency_recorder.pending_count,
+)
+metrics_registry.gauge(
+    'executor_load_tests_running', '正在执行的压测数',
+    callback=lambda: len(load_runners),
+)
 
 
 @asynccontextmanager
@@ -44,9 +75,21 @@ async def lifespan(app: FastAPI):
     print("🚀 启动测试执行器...")
     print("="*60 + "\n")
     
+    # 启动接口耗时窗口的周期性落库任务
+    latency_flush_interval = float(os.getenv("LATENCY_FLUSH_INTERVAL", "30"))
+    latency_flush_task = asyncio.create_task(latency_recorder.run_flusher(db, latency_flush_interval))
+    
+    # 事件循环延迟采样（用于 /metrics 和健康检查）
+    loop_monitor_task = asyncio.create_task(event_loop_monitor.run())
+    
+    # 分片工作进程：领取其他执行器拆分出的套件分片（SUITE_SHARD_WORKER=1 时开启）
+    shard_worker_task = None
+    if os.getenv("SUITE_SHARD_WORKER", "0") == "1":
+        shard_worker_task = asyncio.create_task(ShardWorker(db, stop_flags).run_forever())
+    
     try:
         # 初始化调度器
-        scheduler = TestSuiteScheduler(db)
+        scheduler = TestSuiteScheduler(db, suite_job_queue)
         await scheduler.initialize()
         
         print("="*60)
@@ -69,6 +112,19 @@ async def lifespan(app: FastAPI):
         scheduler.shutdown()
         print("✅ 调度器已停止")
     
+    if shard_worker_task:
+        shard_worker_task.cancel()
+    
+    loop_monitor_task.cancel()
+    
+    # 停止落库任务，并把内存中剩余的耗时窗口写入数据库
+    latency_flush_task.cancel()
+    try:
+        latency_recorder.flush(db)
+        print("✅ 接口耗时统计已落库")
+    except Exception as e:
+        print(f"⚠️  接口耗时统计落库失败: {e}")
+    
     print("="*60)
     print("👋 再见！")
     print("="*60 + "\n")
@@ -113,6 +169,18 @@ class ExecuteSuiteRequest(BaseModel):
     suite_id: str
     environment_config: dict
     run_mode: str = "serial"
+    profile: Optional[Union[bool, str]] = None  # 性能剖析：cprofile / sampling（true 等同于 cprofile）
+
+
+class LoadTestRequest(BaseModel):
+    """压测请求"""
+    test_case_id: str
+    concurrency: int = 10
+    iterations: Optional[int] = None
+    duration_seconds: Optional[float] = None
+    ramp_up_seconds: float = 0
+    environment_config: Optional[dict] = None
+    timeout: int = 30
 
 
 class TestCaseListResponse(BaseModel):
@@ -232,21 +300,28 @@ async def execute_test_case(request: ExecuteRequest):
 
 
 @app.get("/api/health")
-async def health_check():
-    """健康检查端点"""
+async def api_health_check():
+    """健康检查端点（常数时间：数据库可达 + 事件循环响应及时）"""
     try:
-        # 检查数据库连接
-        test_cases = db.get_all_test_cases()
-        return {
-            "status": "healthy",
-            "database": "connected",
-            "test_cases_count": len(test_cases)
-        }
+        db.ping()
+        database_status = "connected"
     except Exception as e:
-        return {
-            "status": "unhealthy",
-            "error": str(e)
-        }
+        database_status = f"unreachable: {e}"
+    
+    loop_responsive = event_loop_monitor.is_responsive(HEALTH_MAX_LOOP_LAG)
+    healthy = database_status == "connected" and loop_responsive
+    return {
+        "status": "healthy" if healthy else "unhealthy",
+        "database": database_status,
+        "eventLoopLag": round(event_loop_monitor.lag, 4),
+        "eventLoopResponsive": loop_responsive
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 指标"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.post("/api/execute/stream")
@@ -310,29 +385,6 @@ async def execute_test_case_stream(request: ExecuteRequest):
         raise HTTPException(status_code=500, detail=f"执行异常: {str(e)}")
 
 
-async def _run_suite_in_background(
-    suite_execution_id: str,
-    suite_id: str,
-    environment_config: dict,
-    run_mode: str = "serial",
-):
-    """后台执行测试套件，执行完毕后自动清理状态"""
-    try:
-        suite_executor = SuiteExecutor(db, stop_flags)
-        await suite_executor.execute_suite(
-            suite_execution_id=suite_execution_id,
-            suite_id=suite_id,
-            environment_config=environment_config,
-            run_mode=run_mode,
-        )
-    except Exception as e:
-        print(f"❌ 后台执行测试套件异常: {e}")
-        tb_mod.print_exc()
-    finally:
-        stop_flags.pop(suite_execution_id, None)
-        running_suites.discard(suite_execution_id)
-
-
 @app.post("/api/execute-suite")
 async def execute_suite(request: ExecuteSuiteRequest):
     """
@@ -345,28 +397,24 @@ async def execute_suite(request: ExecuteSuiteRequest):
         print(f"Suite ID: {request.suite_id}")
         print(f"{'='*60}\n")
 
-        if request.suite_execution_id in running_suites:
+        queued = suite_job_queue.will_queue()
+        if not suite_job_queue.submit(
+            suite_execution_id=request.suite_execution_id,
+            suite_id=request.suite_id,
+            environment_config=request.environment_config,
+            run_mode=request.run_mode,
+            profile=request.profile,
+        ):
             return {
                 "success": False,
                 "error": "该执行任务已在运行中",
             }
 
-        stop_flags.pop(request.suite_execution_id, None)
-        running_suites.add(request.suite_execution_id)
-
-        asyncio.create_task(
-            _run_suite_in_background(
-                suite_execution_id=request.suite_execution_id,
-                suite_id=request.suite_id,
-                environment_config=request.environment_config,
-                run_mode=request.run_mode,
-            )
-        )
-
         return {
             "success": True,
             "accepted": True,
-            "message": "测试套件已提交后台执行",
+            "queued": queued,
+            "message": "执行预算已满，测试套件已排队" if queued else "测试套件已提交后台执行",
             "suiteExecutionId": request.suite_execution_id,
         }
 
@@ -378,8 +426,6 @@ async def execute_suite(request: ExecuteSuiteRequest):
         print(error_msg)
         print(error_trace)
 
-        running_suites.discard(request.suite_execution_id)
-
         raise HTTPException(
             status_code=500,
             detail={
@@ -445,8 +491,8 @@ async def execute_batch(test_case_ids: List[str]):
 # ==================== 调度管理 API ====================
 
 class SyncScheduleRequest(BaseModel):
-    """同步调度任务请求"""
-    suite_id: str
+    """同步调度任务请求（不指定 suite_id 时增量同步所有测试套件）"""
+    suite_id: Optional[str] = None
 
 
 @app.post("/api/schedules/sync")
@@ -454,7 +500,8 @@ async def sync_schedule(request: SyncScheduleRequest):
     """
     同步调度任务（当前端保存测试套件时调用）
     
-    当测试套件的调度配置发生变化时，调用此接口同步到调度器
+    当测试套件的调度配置发生变化时，调用此接口同步到调度器；
+    调度配置没有变化的套件保留原有任务，不重新注册
     """
     try:
         if not scheduler:
@@ -462,6 +509,15 @@ async def sync_schedule(request: SyncScheduleRequest):
         
         suite_id = request.suite_id
         
+        if not suite_id:
+            summary = await scheduler.sync_all()
+            summary.pop('unchangedIds', None)
+            return {
+                "success": True,
+                "message": "调度任务已增量同步",
+                "data": summary
+            }
+        
         # 从数据库重新加载套件信息
         suite = db.get_test_suite(suite_id)
         
@@ -505,7 +561,8 @@ async def list_schedules():
         
         return {
             "success": True,
-            "data": schedules
+            "data": schedules,
+            "queue": suite_job_queue.stats()
         }
     
     except Exception as e:
@@ -597,6 +654,19 @@ async def resume_schedule(suite_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/suite-executions/{suite_execution_id}/shards")
+async def get_suite_shards(suite_execution_id: str):
+    """获取套件执行的分片状态（分片执行时）"""
+    try:
+        return {
+            "success": True,
+            "data": db.get_suite_shards(suite_execution_id)
+        }
+    except Exception as e:
+        print(f"获取分片状态失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ==================== 执行控制 API ====================
 
 class StopExecutionRequest(BaseModel):
@@ -604,6 +674,40 @@ class StopExecutionRequest(BaseModel):
     execution_id: str
 
 
+@app.get("/api/executions/{execution_id}/trace")
+async def export_execution_trace(execution_id: str):
+    """
+    导出执行时间线（Chrome Trace JSON，可在 chrome://tracing 或 ui.perfetto.dev 打开）
+    
+    execution_id 可以是套件执行ID或用例执行ID；只包含本进程环形缓冲区中仍保留的 span。
+    """
+    trace = tracer.export_chrome_trace(execution_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="没有该执行的追踪数据（未开启追踪、不在本进程执行或已被覆盖）")
+    return JSONResponse(
+        content=trace,
+        headers={"Content-Disposition": f'attachment; filename="trace-{execution_id}.json"'}
+    )
+
+
+@app.get("/api/suite-executions/{suite_execution_id}/profile")
+async def list_profile_artifacts(suite_execution_id: str):
+    """列出套件执行的性能剖析产物"""
+    artifacts = list_artifacts(suite_execution_id)
+    if not artifacts:
+        raise HTTPException(status_code=404, detail="该执行没有性能剖析产物")
+    return {"success": True, "data": artifacts}
+
+
+@app.get("/api/suite-executions/{suite_execution_id}/profile/{name}")
+async def download_profile_artifact(suite_execution_id: str, name: str):
+    """下载套件执行的性能剖析产物"""
+    path = get_artifact_path(suite_execution_id, name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"剖析产物不存在: {name}")
+    return FileResponse(path, filename=path.name)
+
+
 @app.post("/api/executions/stop")
 async def stop_execution(request: StopExecutionRequest):
     """
@@ -623,6 +727,12 @@ async def stop_execution(request: StopExecutionRequest):
         # 设置停止标志
         stop_flags[execution_id] = True
         
+        # 分片执行：停止状态写入数据库，其他执行器进程中运行的分片续期租约时读取
+        try:
+            db.stop_suite_shards(execution_id)
+        except Exception as e:
+            print(f"⚠️  写入分片停止状态失败: {e}")
+        
         print(f"✅ 已设置停止标志，执行器将在下一个用例前停止")
         
         return {
@@ -635,6 +745,202 @@ async def stop_execution(request: StopExecutionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ==================== 压测 API ====================
+
+async def _run_load_test_in_background(run_id: str, runner: LoadRunner):
+    """后台执行压测，结束后移出运行列表"""
+    try:
+        await runner.run()
+    except Exception as e:
+        print(f"❌ 后台执行压测异常: {e}")
+        tb_mod.print_exc()
+    finally:
+        load_runners.pop(run_id, None)
+
+
+@app.post("/api/load-tests")
+async def start_load_test(request: LoadTestRequest):
+    """
+    启动压测（异步执行，立即返回压测记录ID）
+    
+    Args:
+        request: 压测请求（并发数、迭代次数或持续时间、加压时间）
+    """
+    if not request.iterations and not request.duration_seconds:
+        raise HTTPException(status_code=400, detail="必须提供 iterations 或 duration_seconds")
+    if request.concurrency < 1:
+        raise HTTPException(status_code=400, detail="concurrency 必须大于 0")
+    
+    test_case = db.get_test_case_by_id(request.test_case_id)
+    if not test_case:
+        raise HTTPException(status_code=404, detail="测试用例不存在")
+    
+    try:
+        config = request.dict(exclude={'environment_config'})
+        run_id = db.create_load_test_run(test_case.id, test_case.name, config)
+        
+        runner = LoadRunner(
+            test_case,
+            database=db,
+            concurrency=request.concurrency,
+            iterations=request.iterations,
+            duration_seconds=request.duration_seconds,
+            ramp_up_seconds=request.ramp_up_seconds,
+            environment_config=request.environment_config,
+            timeout=request.timeout,
+            run_id=run_id
+        )
+        load_runners[run_id] = runner
+        asyncio.create_task(_run_load_test_in_background(run_id, runner))
+        
+        return {
+            "success": True,
+            "accepted": True,
+            "message": "压测已提交后台执行",
+            "runId": run_id
+        }
+    
+    except Exception as e:
+        print(f"❌ 启动压测失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/load-tests/{run_id}")
+async def get_load_test(run_id: str):
+    """获取压测结果（执行中返回实时汇总）"""
+    runner = load_runners.get(run_id)
+    if runner:
+        return {
+            "success": True,
+            "data": {"id": run_id, "status": "running", "report": runner.snapshot()}
+        }
+    
+    run = db.get_load_test_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="压测记录不存在")
+    
+    return {
+        "success": True,
+        "data": run
+    }
+
+
+@app.post("/api/load-tests/{run_id}/stop")
+async def stop_load_test(run_id: str):
+    """停止压测（正在执行的迭代会执行完）"""
+    runner = load_runners.get(run_id)
+    if not runner:
+        raise HTTPException(status_code=404, detail="压测不在运行中")
+    
+    runner.stop()
+    return {
+        "success": True,
+        "message": "停止信号已发送"
+    }
+
+
+# ==================== 执行统计 API ====================
+
+@app.get("/api/stats/suites/{suite_id}")
+async def get_suite_stats(suite_id: str, days: int = 30):
+    """
+    获取测试套件最近 N 天的每日统计（通过率、耗时分位数）
+    
+    Args:
+        suite_id: 测试套件ID
+        days: 天数（默认30天）
+    """
+    try:
+        days = max(1, min(days, 365))
+        stats = db.get_suite_daily_stats(suite_id, days)
+        
+        return {
+            "success": True,
+            "data": stats
+        }
+    
+    except Exception as e:
+        print(f"获取套件统计失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/stats/apis")
+async def get_api_stats(api_id: Optional[str] = None, days: int = 30):
+    """
+    获取接口最近 N 天的耗时统计（请求数、错误率、p50/p95/p99）
+    
+    Args:
+        api_id: API ID（可选，不传返回全部接口）
+        days: 天数（默认30天）
+    """
+    try:
+        days = max(1, min(days, 365))
+        stats = db.get_api_daily_stats(api_id, days)
+        
+        return {
+            "success": True,
+            "data": stats
+        }
+    
+    except Exception as e:
+        print(f"获取接口统计失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/stats/latency")
+async def get_api_latency(
+    api_id: Optional[str] = None,
+    hours: int = 24,
+    bucket_seconds: int = 3600
+):
+    """
+    获取接口耗时分位数（p50/p95/p99）随时间的变化
+    
+    Args:
+        api_id: API ID（可选，不传返回全部接口）
+        hours: 查询最近多少小时（默认24小时）
+        bucket_seconds: 聚合粒度（秒，默认1小时）
+    """
+    try:
+        # 先把内存中的窗口落库，保证查询包含最新数据
+        latency_recorder.flush(db)
+        
+        bucket_seconds = max(latency_recorder.window_seconds, bucket_seconds)
+        since = int(datetime.now().timestamp()) - max(1, hours) * 3600
+        stats = db.get_api_latency(api_id, since=since, bucket_seconds=bucket_seconds)
+        
+        return {
+            "success": True,
+            "data": stats
+        }
+    
+    except Exception as e:
+        print(f"获取接口耗时统计失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ==================== 缓存管理 API ====================
+
+class InvalidateApiCacheRequest(BaseModel):
+    """API 信息缓存失效请求"""
+    api_ids: Optional[List[str]] = None  # 不提供时清空全部
+
+
+@app.post("/api/cache/apis/invalidate")
+async def invalidate_api_cache(request: InvalidateApiCacheRequest):
+    """
+    使 API 信息缓存失效（API 库保存、删除 API 后由 Next.js 调用）
+    
+    正在执行的套件使用开始时预取的快照，不受影响
+    """
+    count = api_info_cache.invalidate(request.api_ids)
+    print(f"[API缓存] 已失效 {count} 条缓存 (apiIds: {request.api_ids or '全部'})")
+    return {
+        "success": True,
+        "invalidated": count
+    }
+
+
 # ==================== 启动配置 ====================
 
 if __name__ == "__main__":
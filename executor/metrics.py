@@ -0,0 +1,339 @@
+"""
+进程内指标 - 低开销的计数器/仪表/直方图，以 Prometheus 文本格式从 /metrics 导出
+
+- 记录指标只是内存中的字典查找与加法，不产生 I/O
+- 直方图使用固定桶（与 Prometheus 的累积桶一致），导出时才计算累积值
+- 运行中套件数、队列深度等由回调在导出时读取，不需要在业务代码中维护
+"""
+import asyncio
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from tracing import tracer
+
+# 耗时直方图的默认桶（秒）
+DEFAULT_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# 批量大小直方图的默认桶（行数）
+DEFAULT_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    """指标基类"""
+
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """导出为 Prometheus 文本格式的行"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[Any, ...], float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1) -> None:
+        """按标签值（与 label_names 顺序一致）累加"""
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: Any) -> float:
+        return self._values.get(labels, 0)
+
+    def _samples(self) -> Iterable[str]:
+        for labels, value in list(self._values.items()):
+            yield f'{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}'
+
+
+class Gauge(_Metric):
+    """仪表（可设置任意值，或在导出时通过回调读取）"""
+
+    type_name = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        callback: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Args:
+            callback: 导出时调用；无标签时返回数值，有标签时返回 {标签值元组: 数值}
+        """
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[Any, ...], float] = {}
+        self.callback = callback
+
+    def set(self, value: float, *labels: Any) -> None:
+        self._values[labels] = value
+
+    def value(self, *labels: Any) -> Optional[float]:
+        return self._values.get(labels)
+
+    def _samples(self) -> Iterable[str]:
+        values = self._values
+        if self.callback is not None:
+            try:
+                result = self.callback()
+            except Exception as e:
+                print(f"[指标] 读取 {self.name} 失败: {e}")
+                return
+            values = result if isinstance(result, dict) else {(): result}
+        for labels, value in list(values.items()):
+            if value is not None:
+                yield f'{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}'
+
+
+class Histogram(_Metric):
+    """固定桶直方图"""
+
+    type_name = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_SECONDS_BUCKETS
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值元组 -> [各桶计数..., +Inf 桶计数, 总和]
+        self._values: Dict[Tuple[Any, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: Any) -> None:
+        """记录一个观测值（只更新所在的桶，导出时再计算累积值）"""
+        data = self._values.get(labels)
+        if data is None:
+            data = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        data[bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+
+    def count(self, *labels: Any) -> int:
+        data = self._values.get(labels)
+        return sum(data[:-1]) if data else 0
+
+    def _samples(self) -> Iterable[str]:
+        bounds = [_format_value(b) for b in self.buckets] + ['+Inf']
+        for labels, data in list(self._values.items()):
+            cumulative = 0
+            for bound, n in zip(bounds, data[:-1]):
+                cumulative += n
+                le = 'le="%s"' % bound
+                yield f'{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(data[-1])}'
+            yield f'{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}'
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """注册指标（同名指标会被替换，便于重复初始化）"""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        callback: Optional[Callable[[], Any]] = None
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names, callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_SECONDS_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        """导出全部指标（Prometheus 文本格式 0.0.4）"""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# 全局注册表（进程内共享）
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'executor_http_request_duration_seconds',
+    '测试请求耗时（按目标主机与状态码类别）',
+    ('host', 'status_class'),
+)
+HTTP_PHASE_SECONDS = registry.histogram(
+    'executor_http_phase_duration_seconds',
+    '测试请求各阶段耗时（按目标主机与阶段：connect/tls/send/ttfb/download）',
+    ('host', 'phase'),
+)
+HTTP_CONNECTIONS = registry.counter(
+    'executor_http_connections_total',
+    '测试请求使用的连接数（按目标主机与是否复用连接池中的连接）',
+    ('host', 'reused'),
+)
+DB_WRITE_SECONDS = registry.histogram(
+    'executor_db_write_duration_seconds',
+    '数据库写入耗时（按操作）',
+    ('operation',),
+)
+DB_WRITE_BATCH_SIZE = registry.histogram(
+    'executor_db_write_batch_size',
+    '数据库批量写入的行数（按操作）',
+    ('operation',),
+    buckets=DEFAULT_SIZE_BUCKETS,
+)
+EVENT_LOOP_LAG_SECONDS = registry.gauge(
+    'executor_event_loop_lag_seconds',
+    '事件循环调度延迟（最近一次采样）',
+)
+SUITE_CASES = registry.counter(
+    'executor_suite_cases_total',
+    '套件执行中的用例结果数（按套件与结果）',
+    ('suite_id', 'result'),
+)
+SUITE_EXECUTIONS = registry.counter(
+    'executor_suite_executions_total',
+    '结束的套件执行数（按套件与最终状态）',
+    ('suite_id', 'status'),
+)
+
+
+def status_class(status: Optional[int]) -> str:
+    """状态码类别（2xx/3xx/4xx/5xx），请求异常时为 error"""
+    return f'{status // 100}xx' if status else 'error'
+
+
+def _host(url: str) -> str:
+    return urlsplit(url or '').netloc.lower() or 'unknown'
+
+
+def observe_http_request(url: str, duration: float, status: Optional[int]) -> None:
+    """记录一次测试请求耗时（秒）"""
+    HTTP_REQUEST_SECONDS.observe(duration, _host(url), status_class(status))
+
+
+def observe_http_timing(url: str, breakdown: Optional[Dict[str, Any]]) -> None:
+    """记录一次测试请求的耗时分解（request_timing.RequestTiming.breakdown 的结果，单位毫秒）"""
+    if not breakdown:
+        return
+    host = _host(url)
+    for phase in ('connect', 'tls', 'send', 'ttfb', 'download'):
+        value = breakdown.get(phase)
+        if value is not None:
+            HTTP_PHASE_SECONDS.observe(value / 1000, host, phase)
+    HTTP_CONNECTIONS.inc(host, 'true' if breakdown.get('reused') else 'false')
+
+
+def record_suite_result(suite_id: str, status: str, passed_cases: int, failed_cases: int) -> None:
+    """记录一次结束的套件执行及其用例结果"""
+    SUITE_EXECUTIONS.inc(suite_id, status)
+    if passed_cases:
+        SUITE_CASES.inc(suite_id, 'passed', amount=passed_cases)
+    if failed_cases:
+        SUITE_CASES.inc(suite_id, 'failed', amount=failed_cases)
+
+
+def timed_db_write(batch: Optional[str] = None):
+    """
+    数据库写方法装饰器：记录写入耗时（成功与失败都记录），并写入执行时间线
+
+    Args:
+        batch: 批量写入方法中表示行集合的参数名，记录其长度为批量大小
+    """
+    def decorator(func):
+        operation = func.__name__
+        batch_index = list(inspect.signature(func).parameters).index(batch) if batch else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+                DB_WRITE_SECONDS.observe(duration, operation)
+                tracer.record(operation, 'db', start, duration)
+                if batch_index is not None:
+                    rows = kwargs[batch] if batch in kwargs else (
+                        args[batch_index] if len(args) > batch_index else None
+                    )
+                    DB_WRITE_BATCH_SIZE.observe(len(rows) if rows else 0, operation)
+        return wrapper
+    return decorator
+
+
+class EventLoopMonitor:
+    """事件循环延迟采样（定时 sleep，实际唤醒时间与预期的差值即为延迟）"""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.lag = 0.0
+        self.last_beat: Optional[float] = None
+
+    async def run(self) -> None:
+        """在应用生命周期内作为后台任务运行"""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.last_beat = time.monotonic()
+            self.lag = max(0.0, self.last_beat - start - self.interval)
+            EVENT_LOOP_LAG_SECONDS.set(self.lag)
+
+    def is_responsive(self, max_lag: float) -> bool:
+        """最近一次采样的延迟未超过 max_lag，且采样任务仍在按时运行（未启动时视为正常）"""
+        if self.last_beat is None:
+            return True
+        overdue = time.monotonic() - self.last_beat - self.interval
+        return self.lag <= max_lag and overdue <= max_lag
+
+
+# 全局事件循环监控
+event_loop_monitor = EventLoopMonitor()
@@ -2,10 +2,12 @@
 数据模型定义 - 对应 TypeScript 类型和数据库结构
 """
 from typing import Optional, Dict, Any, List, Union, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer
 from datetime import datetime
 from enum import Enum
 
+import json_codec
+
 
 class ValueType(str, Enum):
     """参数值类型"""
@@ -180,6 +182,7 @@ class FlowConfig(BaseModel):
     nodes: List[FlowNode]
     edges: List[FlowEdge]
     variables: Optional[Dict[str, Any]] = None
+    dataset: Optional[Dict[str, Any]] = None  # 数据驱动数据集配置（见 dataset.py）
 
 
 class TestStep(BaseModel):
@@ -228,6 +231,11 @@ class ExecutionResult(BaseModel):
     error: Optional[str] = None
     variables: Dict[str, Any] = {}
 
+    @field_serializer('steps')
+    def _serialize_steps(self, steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # 步骤响应体可能是未解码的 RawJson 片段，输出前解析为普通对象
+        return json_codec.materialize(steps)
+
 
 class StepExecutionResult(BaseModel):
     """步骤执行结果"""
@@ -244,4 +252,6 @@ class StepExecutionResult(BaseModel):
     assertions: Optional[List[Dict[str, Any]]] = None
     extractedVariables: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    # 步骤事件（StepEvent，请求/响应的序列化结果），只在进程内使用，不参与序列化
+    event: Optional[Any] = Field(default=None, exclude=True)
 
@@ -0,0 +1,249 @@
+"""
+执行性能剖析 - 按单次套件执行开启 cProfile / 采样剖析，并在用例边界记录 tracemalloc 快照
+
+开启方式（任选其一）：
+- 执行请求中传 {"profile": "cprofile"} 或 {"profile": "sampling"}（true 等同于 cprofile）
+- 套件执行配置（TestSuite.executionConfig）中配置 {"profile": "sampling"}，对定时执行同样生效
+
+产物写入 PROFILE_ARTIFACT_DIR/<套件执行ID>/，通过 /api/suite-executions/{id}/profile 获取：
+- cprofile.pstats / cprofile.txt：cProfile 原始数据（可用 pstats、snakeviz 打开）与按累计耗时排序的前若干行
+- sampling.folded：采样剖析的折叠调用栈（每行 "栈帧;栈帧;... 次数"，可用 speedscope、flamegraph.pl 打开）
+- tracemalloc.txt：每 PROFILE_SNAPSHOT_EVERY 个用例结束时相对上一个快照内存增长最多的代码行
+
+注意：剖析对象是整个事件循环线程，同一时间执行的其他套件也会被计入；
+cProfile 同一时间只能有一个，已被占用时自动改用采样剖析。
+tracemalloc 快照和比较在事件循环线程上同步执行，耗时随已分配对象数增长，
+期间其他执行都会被阻塞；用例较多时可调大 PROFILE_SNAPSHOT_EVERY。
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 剖析产物目录
+PROFILE_ARTIFACT_DIR = os.getenv(
+    "PROFILE_ARTIFACT_DIR", os.path.join(os.path.dirname(__file__), "artifacts", "profiles")
+)
+
+# 采样间隔（秒）
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+# tracemalloc 记录的调用栈深度
+PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "1"))
+
+# 每隔多少个用例记录一次 tracemalloc 快照（0 表示不在用例边界记录）
+PROFILE_SNAPSHOT_EVERY = int(os.getenv("PROFILE_SNAPSHOT_EVERY", "1"))
+
+# cprofile.txt / tracemalloc.txt 中每部分保留的行数
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "50"))
+
+PROFILE_MODES = ('cprofile', 'sampling')
+
+# 同一时间只允许一个 cProfile
+_cprofile_lock = threading.Lock()
+
+# 使用 tracemalloc 的剖析会话数（由剖析开启的 tracemalloc 在最后一个会话结束时关闭）
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def parse_profile_mode(value: Any) -> Optional[str]:
+    """解析剖析开关（true -> cprofile，未知的值视为不开启）"""
+    if value is True:
+        return 'cprofile'
+    if isinstance(value, str) and value.lower() in PROFILE_MODES:
+        return value.lower()
+    return None
+
+
+def artifact_dir(suite_execution_id: str) -> Path:
+    """套件执行的剖析产物目录（ID 只保留文件名部分，避免路径穿越）"""
+    return Path(PROFILE_ARTIFACT_DIR) / Path(suite_execution_id).name
+
+
+def list_artifacts(suite_execution_id: str) -> List[Dict[str, Any]]:
+    """列出套件执行的剖析产物"""
+    directory = artifact_dir(suite_execution_id)
+    if not directory.is_dir():
+        return []
+    return [
+        {'name': path.name, 'size': path.stat().st_size}
+        for path in sorted(directory.iterdir()) if path.is_file()
+    ]
+
+
+def get_artifact_path(suite_execution_id: str, name: str) -> Optional[Path]:
+    """获取剖析产物路径（不存在时返回 None）"""
+    path = artifact_dir(suite_execution_id) / Path(name).name
+    return path if path.is_file() else None
+
+
+def _acquire_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_owned
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+        _tracemalloc_owned = True
+    _tracemalloc_users += 1
+
+
+def _release_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_owned
+    _tracemalloc_users -= 1
+    if _tracemalloc_users <= 0 and _tracemalloc_owned:
+        tracemalloc.stop()
+        _tracemalloc_owned = False
+
+
+class _Sampler(threading.Thread):
+    """采样剖析线程：定时读取目标线程的调用栈，按折叠栈计数"""
+
+    def __init__(self, target_thread_id: int, interval: float):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+    def folded(self) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class ExecutionProfiler:
+    """一次套件执行的剖析会话"""
+
+    def __init__(self, suite_execution_id: str, mode: str):
+        self.suite_execution_id = suite_execution_id
+        self.mode = mode
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_Sampler] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._memory_report: List[str] = []
+        self._cases = 0
+        self._start = 0.0
+
+    def start(self) -> None:
+        """开始剖析（在事件循环线程中调用）"""
+        if self.mode == 'cprofile' and _cprofile_lock.acquire(blocking=False):
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            if self.mode == 'cprofile':
+                print(f"⚠️  已有执行在使用 cProfile，改用采样剖析: {self.suite_execution_id}")
+                self.mode = 'sampling'
+            self._sampler = _Sampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL)
+            self._sampler.start()
+
+        _acquire_tracemalloc()
+        self._snapshot = tracemalloc.take_snapshot()
+        self._start = time.perf_counter()
+        print(f"🔬 已开启性能剖析（{self.mode}）: {self.suite_execution_id}")
+
+    def case_boundary(self, case_name: str) -> None:
+        """
+        用例结束时记录内存快照，与上一个快照比较
+
+        快照和比较在调用线程（事件循环）上同步执行，按 PROFILE_SNAPSHOT_EVERY 间隔记录
+        """
+        if not tracemalloc.is_tracing():
+            return
+        self._cases += 1
+        if PROFILE_SNAPSHOT_EVERY <= 0 or self._cases % PROFILE_SNAPSHOT_EVERY:
+            return
+        # 快照比较本身不计入 cProfile
+        if self._profile is not None:
+            self._profile.disable()
+        try:
+            self._record_memory(case_name)
+        finally:
+            if self._profile is not None:
+                self._profile.enable()
+
+    def _record_memory(self, case_name: str) -> None:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        self._memory_report.append(
+            f'== {case_name}（当前 {current / 1024:.1f} KiB，峰值 {peak / 1024:.1f} KiB）'
+        )
+        if self._snapshot is not None:
+            growth = [
+                stat for stat in snapshot.compare_to(self._snapshot, 'lineno')
+                if stat.size_diff > 0 and stat.traceback[0].filename != tracemalloc.__file__
+            ]
+            self._memory_report.extend(f'  {stat}' for stat in growth[:PROFILE_TOP_N])
+        self._snapshot = snapshot
+
+    def stop(self) -> List[str]:
+        """
+        结束剖析并写入产物
+
+        写入产物失败时同样释放 cProfile 锁、停止采样线程并释放 tracemalloc，
+        否则之后的剖析都会退化为采样剖析，tracemalloc 也不会关闭
+
+        Returns:
+            写入的产物文件名列表
+        """
+        elapsed = time.perf_counter() - self._start
+        try:
+            if self._profile is not None:
+                self._profile.disable()
+            if self._sampler is not None:
+                self._sampler.stop()
+            written = self._write_artifacts()
+        finally:
+            if self._profile is not None:
+                _cprofile_lock.release()
+                self._profile = None
+            if self._sampler is not None:
+                self._sampler.stop()
+                self._sampler = None
+            _release_tracemalloc()
+
+        print(f"🔬 性能剖析结束（{elapsed:.1f}s），产物: {', '.join(written) or '无'}")
+        return written
+
+    def _write_artifacts(self) -> List[str]:
+        directory = artifact_dir(self.suite_execution_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        written = []
+
+        if self._profile is not None:
+            self._profile.dump_stats(str(directory / 'cprofile.pstats'))
+            text = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=text)
+            stats.sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+            (directory / 'cprofile.txt').write_text(text.getvalue(), encoding='utf-8')
+            written += ['cprofile.pstats', 'cprofile.txt']
+
+        if self._sampler is not None:
+            (directory / 'sampling.folded').write_text(self._sampler.folded(), encoding='utf-8')
+            written.append('sampling.folded')
+
+        if self._memory_report:
+            (directory / 'tracemalloc.txt').write_text('\n'.join(self._memory_report) + '\n', encoding='utf-8')
+            written.append('tracemalloc.txt')
+        return written
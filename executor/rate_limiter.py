@@ -0,0 +1,169 @@
+"""
+请求限流 - 按目标主机限制请求速率和并发数
+
+进程内所有执行器（并行套件、并行节点、数据驱动行）共享同一组限流器，
+避免同时压测同一个测试环境导致 429。
+
+配置位置：environment_config.rateLimits 或 environment_config.otherConfig.rateLimits
+    {
+        "default": {"rps": 20, "burst": 40, "maxInflight": 10},
+        "hosts": {
+            "staging.example.com": {"rps": 5, "maxInflight": 3},
+            "https://api.example.com:8443": {"rps": 10}
+        }
+    }
+
+- rps: 每秒允许的请求数（令牌桶填充速率），不配置则不限速
+- burst: 令牌桶容量（允许的突发请求数），默认等于 rps
+- maxInflight: 同时进行中的最大请求数，不配置则不限制
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """异步令牌桶（等待者按先后顺序获取令牌）"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """获取令牌，不足时等待"""
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+
+
+class HostLimiter:
+    """单个主机的限流器（令牌桶 + 最大并发）"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.loop = asyncio.get_running_loop()
+        rps = config.get('rps')
+        max_inflight = config.get('maxInflight')
+        self.bucket = TokenBucket(rps, config.get('burst')) if rps else None
+        self.semaphore = asyncio.Semaphore(int(max_inflight)) if max_inflight else None
+
+    async def acquire(self) -> float:
+        """
+        等待获取请求许可
+
+        Returns:
+            等待时间（秒）
+        """
+        start = time.perf_counter()
+        if self.semaphore:
+            await self.semaphore.acquire()
+        if self.bucket:
+            try:
+                await self.bucket.acquire()
+            except BaseException:
+                if self.semaphore:
+                    self.semaphore.release()
+                raise
+        return time.perf_counter() - start
+
+    def release(self) -> None:
+        """请求结束后释放并发名额"""
+        if self.semaphore:
+            self.semaphore.release()
+
+
+class RateLimiterRegistry:
+    """
+    进程内共享的限流器注册表（按 主机 + 限流配置 缓存）
+
+    同一主机在不同环境中配置了不同的限流时，各自使用独立的限流器，
+    不会因为配置不同而互相替换（替换会丢失进行中请求的计数，导致超出限制）。
+    """
+
+    def __init__(self):
+        self._limiters: Dict[Tuple[str, str], HostLimiter] = {}
+
+    def get(self, key: str, config: Dict[str, Any]) -> HostLimiter:
+        """获取主机限流器（需在事件循环内调用）"""
+        cache_key = (key, json.dumps(config, sort_keys=True, default=str))
+        limiter = self._limiters.get(cache_key)
+        if limiter is None or limiter.loop is not asyncio.get_running_loop():
+            limiter = self._limiters[cache_key] = HostLimiter(config)
+        return limiter
+
+    def clear(self) -> None:
+        self._limiters.clear()
+
+
+def parse_rate_limits(environment_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    从环境配置中读取限流配置
+
+    Returns:
+        限流配置，未配置时返回 None
+    """
+    if not environment_config:
+        return None
+
+    rate_limits = environment_config.get('rateLimits')
+    if not rate_limits:
+        other_config = environment_config.get('otherConfig')
+        if isinstance(other_config, str):
+            try:
+                other_config = json.loads(other_config)
+            except ValueError:
+                other_config = None
+        if isinstance(other_config, dict):
+            rate_limits = other_config.get('rateLimits')
+
+    if not isinstance(rate_limits, dict):
+        return None
+    if not rate_limits.get('default') and not rate_limits.get('hosts'):
+        return None
+    return rate_limits
+
+
+def resolve_host_limit(rate_limits: Dict[str, Any], url: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    根据请求 URL 找到生效的限流配置
+
+    匹配顺序：scheme://host:port -> host:port -> host -> default
+
+    Returns:
+        (限流器键, 限流配置)，不限流时返回 None
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    if not host:
+        return None
+    netloc = parts.netloc.lower().rsplit('@', 1)[-1]
+    origin = f"{parts.scheme.lower()}://{netloc}"
+
+    hosts = rate_limits.get('hosts') or {}
+    for key in (origin, netloc, host):
+        config = hosts.get(key)
+        if config:
+            return key, config
+
+    default = rate_limits.get('default')
+    if default:
+        # 默认配置对每个主机单独计数
+        return origin, default
+    return None
+
+
+# 全局限流器注册表（进程内共享）
+rate_limiter_registry = RateLimiterRegistry()
@@ -0,0 +1,76 @@
+"""
+请求耗时分解 - 通过 httpcore 的 trace 扩展记录一次请求各阶段的耗时
+
+阶段（毫秒）：
+- poolWait：发起请求到开始建连或发送（连接池排队及客户端处理）
+- connect：建立 TCP 连接（httpcore 不单独上报 DNS 解析，域名解析耗时包含在内）
+- tls：TLS 握手
+- send：发送请求头和请求体
+- ttfb：请求发送完毕到收到响应头（服务端处理时间 + 网络往返）
+- download：读取响应体
+
+复用连接池中已有连接时没有 connect/tls 阶段，reused 为 True。
+使用 MockTransport 等不经过 httpcore 的传输时没有任何 trace 事件，不生成耗时分解。
+"""
+import time
+from typing import Any, Dict, Optional
+
+# 阶段名 -> (开始事件, 结束事件)，事件名不含 http11/http2 等前缀
+_PHASES = (
+    ('connect', 'connect_tcp.started', 'connect_tcp.complete'),
+    ('tls', 'start_tls.started', 'start_tls.complete'),
+    ('send', 'send_request_headers.started', 'send_request_body.complete'),
+    ('ttfb', 'send_request_body.complete', 'receive_response_headers.complete'),
+    ('download', 'receive_response_body.started', 'receive_response_body.complete'),
+)
+
+
+class RequestTiming:
+    """单次请求的 trace 事件记录（作为 extensions['trace'] 回调传给 httpx）"""
+
+    __slots__ = ('start', 'marks')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        # "connection.connect_tcp.started" / "http11.send_request_headers.started" -> 去掉前缀
+        self.marks.setdefault(event_name.split('.', 1)[-1], time.perf_counter())
+
+    def breakdown(self) -> Optional[Dict[str, Any]]:
+        """
+        计算各阶段耗时
+
+        Returns:
+            {"poolWait": 0, "connect": 12, "tls": 30, "send": 1, "ttfb": 120, "download": 5, "reused": false}，
+            没有 trace 事件（未经过 httpcore）时返回 None
+        """
+        marks = self.marks
+        if not marks:
+            return None
+
+        result: Dict[str, Any] = {}
+        first = marks.get('connect_tcp.started') or marks.get('send_request_headers.started')
+        if first is not None:
+            result['poolWait'] = _ms(first - self.start)
+        for phase, begin, end in _PHASES:
+            if begin in marks and end in marks:
+                result[phase] = _ms(marks[end] - marks[begin])
+        result['reused'] = 'connect_tcp.started' not in marks
+        return result
+
+
+def _ms(seconds: float) -> float:
+    return round(max(0.0, seconds) * 1000, 1)
+
+
+def format_breakdown(breakdown: Optional[Dict[str, Any]]) -> str:
+    """格式化为一行日志文本，例如：连接 12ms / TLS 30ms / 发送 1ms / 首字节 120ms / 下载 5ms（新建连接）"""
+    if not breakdown:
+        return ''
+    labels = (('poolWait', '排队'), ('connect', '连接'), ('tls', 'TLS'),
+              ('send', '发送'), ('ttfb', '首字节'), ('download', '下载'))
+    parts = [f'{label} {breakdown[key]:g}ms' for key, label in labels if breakdown.get(key)]
+    reuse = '复用连接' if breakdown.get('reused') else '新建连接'
+    return f"{' / '.join(parts) or '0ms'}（{reuse}）"
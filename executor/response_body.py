@@ -0,0 +1,172 @@
+"""
+响应体处理 - 流式读取、按需解码、超限截断
+
+- 流式读取：响应体按块读取，超过硬上限（RESPONSE_MAX_BYTES，默认 50MB，0 表示不限制）
+  时停止下载并关闭连接，避免几百 MB 的响应撑爆执行器内存
+- 按需解码：只有断言、变量提取、等待条件或后续步骤引用时才解码，且只解码一次
+  （JSON 解析失败时回退为文本，与原逻辑一致）；落库/日志直接保存原始文本，
+  JSON 响应作为 RawJson 片段嵌入，不做解码再编码
+- 超限截断：超过存储上限（RESPONSE_STORE_MAX_BYTES，默认 1MB）的响应体，
+  写入数据库/日志/执行结果时只保留预览；配置了 RESPONSE_SPILL_DIR 时完整内容另存为文件
+"""
+import os
+import uuid
+from typing import Any, Dict, Optional
+
+import httpx
+
+import json_codec
+from json_codec import RawJson
+
+# 响应体下载硬上限（字节）
+RESPONSE_MAX_BYTES = int(os.getenv('RESPONSE_MAX_BYTES', str(50 * 1024 * 1024)))
+# 响应体存储上限（字节），超过时只保存预览
+RESPONSE_STORE_MAX_BYTES = int(os.getenv('RESPONSE_STORE_MAX_BYTES', str(1024 * 1024)))
+# 超限响应体的转存目录（不配置则只截断不转存）
+RESPONSE_SPILL_DIR = os.getenv('RESPONSE_SPILL_DIR', '')
+# 截断时保留的预览长度（字符）
+RESPONSE_PREVIEW_CHARS = 2000
+
+_UNDECODED = object()
+
+
+class ResponseBody:
+    """已下载的响应体（按需解码）"""
+
+    def __init__(self, response: httpx.Response, truncated: bool = False):
+        self.response = response
+        self.truncated = truncated
+        self._decoded: Any = _UNDECODED
+        self._spilled = False
+        self._spill_path: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        """已下载的字节数"""
+        return len(self.response.content)
+
+    def decode(self) -> Any:
+        """解码响应体：优先解析 JSON，失败时返回文本（结果缓存）"""
+        if self._decoded is _UNDECODED:
+            if self.truncated:
+                # 截断的内容不可能是合法 JSON，直接按文本处理
+                self._decoded = self.response.text
+            else:
+                try:
+                    self._decoded = self.response.json()
+                except ValueError:
+                    self._decoded = self.response.text
+        return self._decoded
+
+    @property
+    def oversized(self) -> bool:
+        """是否超过存储上限"""
+        return self.truncated or (RESPONSE_STORE_MAX_BYTES > 0 and self.size > RESPONSE_STORE_MAX_BYTES)
+
+    def stored(self) -> Any:
+        """
+        用于存储（数据库、日志、执行结果）的响应体
+
+        未超过存储上限时返回完整响应体：已解码过则复用解码结果，否则不解码，
+        JSON 对象/数组以原始文本作为 RawJson 返回，其他响应返回文本；
+        超过存储上限时返回截断摘要：
+            {"truncated": true, "size": 字节数, "preview": "前 N 个字符", "file": "转存文件路径"}
+        """
+        if not self.oversized:
+            if self._decoded is not _UNDECODED:
+                return self._decoded
+            return self._raw()
+
+        summary: Dict[str, Any] = {
+            'truncated': True,
+            'size': self.size,
+            'downloadTruncated': self.truncated,
+            'preview': self.response.text[:RESPONSE_PREVIEW_CHARS],
+        }
+        spilled = self.spill()
+        if spilled:
+            summary['file'] = spilled
+        return summary
+
+    def _raw(self) -> Any:
+        """未解码的存储用响应体"""
+        content_type = self.response.headers.get('content-type', '').split(';')[0].strip().lower()
+        if not (content_type == 'application/json' or content_type.endswith('+json')):
+            return self.response.text
+        text = self.response.text
+        stripped = text.strip()
+        # 声明为 JSON 且形如对象/数组时直接嵌入原文（信任服务端的 Content-Type）；
+        # 空响应、标量等其他情况解码一次，开销可忽略
+        if stripped[:1] + stripped[-1:] in ('{}', '[]'):
+            return RawJson(text)
+        return self.decode()
+
+    def spill(self) -> Optional[str]:
+        """将完整响应体另存为文件，返回文件路径（未配置转存目录或写入失败时返回 None）"""
+        if not RESPONSE_SPILL_DIR:
+            return None
+        if not self._spilled:
+            self._spilled = True
+            try:
+                os.makedirs(RESPONSE_SPILL_DIR, exist_ok=True)
+                path = os.path.join(RESPONSE_SPILL_DIR, f'{uuid.uuid4().hex}.body')
+                with open(path, 'wb') as f:
+                    f.write(self.response.content)
+                self._spill_path = path
+                print(f"[响应体] 响应体 {self.size} 字节超过存储上限，已转存: {path}")
+            except OSError as e:
+                print(f"⚠️ 响应体转存失败: {e}")
+        return self._spill_path
+
+
+async def read_response(response: httpx.Response, max_bytes: int = RESPONSE_MAX_BYTES) -> ResponseBody:
+    """
+    流式读取响应体（最多 max_bytes 字节）
+
+    读取完成后 response.content / .text / .json() 均可正常使用；
+    超过上限时只保留前 max_bytes 字节并停止下载。
+    """
+    chunks = []
+    size = 0
+    truncated = False
+    async for chunk in response.aiter_bytes():
+        if max_bytes > 0 and size + len(chunk) > max_bytes:
+            chunks.append(chunk[:max_bytes - size])
+            size = max_bytes
+            truncated = True
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    # 与 httpx.Response.aread() 相同，缓存已读取的内容
+    response._content = b''.join(chunks)
+    if truncated:
+        print(f"⚠️ [响应体] 响应体超过下载上限 {max_bytes} 字节，已停止下载并截断")
+    return ResponseBody(response, truncated)
+
+
+def build_response_context(response_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    构建断言/等待使用的当前响应上下文
+
+    包含 status, headers, body；响应体是字典时其字段同时放到根层级
+    """
+    body = response_data.get('body')
+    context = {
+        'status': response_data['status'],
+        'headers': response_data.get('headers', {})
+    }
+    if isinstance(body, dict):
+        context.update(body)
+    context['body'] = body
+    return context
+
+
+def format_body_preview(body: Any, limit: int = 500) -> str:
+    """格式化响应体用于日志消息（超过 limit 字符时截断）"""
+    if isinstance(body, RawJson):
+        body_str = body.text
+    else:
+        body_str = json_codec.pretty(body) if isinstance(body, (dict, list)) else str(body)
+    if len(body_str) > limit:
+        body_str = body_str[:limit] + '...(已截断)'
+    return body_str
@@ -6,25 +6,122 @@
   - ${{random(8)}} → 生成8位随机数字
   - ${{timestamp()}} → 获取当前时间戳
   - "名称${{random()}}" → 拼接字符串，如 "名称87188172"
+
+扩展函数：
+  在插件模块中注册函数，并通过环境变量 RUNTIME_FUNCTION_PLUGINS 指定模块
+  （逗号分隔，如 "my_functions,team.signing"）：
+
+      from runtime_functions import register_function, current_random
+
+      @register_function('orderNo')
+      def order_no(prefix='NO'):
+          return f"{prefix}{current_random().randint(100000, 999999)}"
+
+  随机类函数应使用 current_random() 获取随机数生成器，这样按种子执行时可以复现。
+
+随机种子：
+  每次用例执行使用独立的随机数生成器（seeded_random），种子会打印在执行日志中，
+  数据驱动执行可以通过 dataset.seed 指定种子复现同样的数据。
+  并发节点的每个分支使用从用例种子派生的子生成器（forked_random），
+  取值不受分支之间调度顺序的影响。
 """
 
+import ast
+import importlib
+import os
 import re
 import uuid
 import random
 import string
 import hashlib
 import base64
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
+from functools import lru_cache
 from urllib.parse import quote
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# 是否打印每次函数调用（高频调用时会产生大量输出，默认关闭）
+TRACE_CALLS = os.getenv('RUNTIME_FUNCTION_TRACE', '').lower() in ('1', 'true', 'yes')
+
+# 当前执行的随机数生成器（未按种子执行时使用进程级默认生成器）
+_default_random = random.Random()
+_current_random: ContextVar[Optional[random.Random]] = ContextVar('runtime_function_random', default=None)
+# 当前生成器的种子（派生子生成器时使用）
+_current_seed: ContextVar[Optional[str]] = ContextVar('runtime_function_seed', default=None)
+# 当前执行是否显式指定了种子（未指定时 uuid 直接使用 uuid.uuid4()，不依赖伪随机数生成器）
+_explicit_seed: ContextVar[bool] = ContextVar('runtime_function_explicit_seed', default=False)
+
+
+def current_random() -> random.Random:
+    """获取当前执行的随机数生成器"""
+    return _current_random.get() or _default_random
+
+
+def new_seed() -> int:
+    """生成新的随机种子（128 位，避免不同执行的种子碰撞）"""
+    return random.SystemRandom().getrandbits(128)
+
+
+@contextmanager
+def seeded_random(seed: Any = None) -> Iterator[Any]:
+    """
+    在上下文内使用按种子初始化的随机数生成器
+
+    Args:
+        seed: 随机种子（不提供时自动生成，此时 uuid 仍使用 uuid.uuid4()）
+
+    Yields:
+        实际使用的种子（用于记录和复现）
+    """
+    explicit = seed is not None
+    if not explicit:
+        seed = new_seed()
+    token = _current_random.set(random.Random(str(seed)))
+    seed_token = _current_seed.set(str(seed))
+    explicit_token = _explicit_seed.set(explicit)
+    try:
+        yield seed
+    finally:
+        _explicit_seed.reset(explicit_token)
+        _current_seed.reset(seed_token)
+        _current_random.reset(token)
+
+
+@contextmanager
+def forked_random(key: Any) -> Iterator[None]:
+    """
+    在上下文内使用从当前种子派生的子随机数生成器（种子为 "当前种子:key"）
+
+    并发分支共用一个生成器时，各分支取到的值取决于任务调度顺序，无法复现。
+    在此上下文内创建分支任务（任务会复制当前上下文），每个分支即使用各自的生成器。
+    当前未按种子执行时不做处理。
+    """
+    seed = _current_seed.get()
+    if seed is None:
+        yield
+        return
+    child_seed = f"{seed}:{key}"
+    token = _current_random.set(random.Random(child_seed))
+    seed_token = _current_seed.set(child_seed)
+    try:
+        yield
+    finally:
+        _current_seed.reset(seed_token)
+        _current_random.reset(token)
 
 
 class RuntimeFunctions:
-    """运行时函数执行器"""
+    """内置运行时函数"""
     
-    def __init__(self):
-        # 注册所有可用的函数
-        self.functions: Dict[str, Callable] = {
+    PHONE_PREFIXES = ['130', '131', '132', '133', '134', '135', '136', '137', '138', '139',
+                      '150', '151', '152', '153', '155', '156', '157', '158', '159',
+                      '180', '181', '182', '183', '184', '185', '186', '187', '188', '189']
+    
+    def functions(self) -> Dict[str, Callable]:
+        """所有内置函数"""
+        return {
             # 随机值类
             'random': self.random_number,
             'randomInt': self.random_int,
@@ -52,24 +149,57 @@ class RuntimeFunctions:
             'randomFloat': self.random_float,
         }
     
+    def batch_functions(self) -> Dict[str, Callable]:
+        """支持批量生成的内置函数（第一个参数为生成数量）"""
+        return {
+            'random': self.random_number_batch,
+            'randomInt': self.random_int_batch,
+            'uuid': self.generate_uuid_batch,
+            'guid': self.generate_uuid_batch,
+            'randomString': self.random_string_batch,
+        }
+    
     # ========== 随机值类 ==========
     
     def random_number(self, length: int = 8) -> str:
         """生成指定长度的随机数字字符串"""
-        return ''.join(random.choices(string.digits, k=int(length)))
+        return ''.join(current_random().choices(string.digits, k=int(length)))
+    
+    def random_number_batch(self, count: int, length: int = 8) -> List[str]:
+        """批量生成随机数字字符串"""
+        return self._chunk(current_random().choices(string.digits, k=int(length) * count), int(length), count)
     
     def random_int(self, min_val: int = 0, max_val: int = 1000) -> int:
         """生成指定范围内的随机整数"""
-        return random.randint(int(min_val), int(max_val))
+        return current_random().randint(int(min_val), int(max_val))
+    
+    def random_int_batch(self, count: int, min_val: int = 0, max_val: int = 1000) -> List[int]:
+        """批量生成随机整数"""
+        rng = current_random()
+        return [rng.randint(int(min_val), int(max_val)) for _ in range(count)]
     
     def generate_uuid(self) -> str:
-        """生成 UUID v4"""
-        return str(uuid.uuid4())
+        """生成 UUID v4（显式指定种子时按种子生成，否则使用 uuid.uuid4()）"""
+        if not _explicit_seed.get():
+            return str(uuid.uuid4())
+        return str(uuid.UUID(int=current_random().getrandbits(128), version=4))
+    
+    def generate_uuid_batch(self, count: int) -> List[str]:
+        """批量生成 UUID v4"""
+        if not _explicit_seed.get():
+            return [str(uuid.uuid4()) for _ in range(count)]
+        rng = current_random()
+        return [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(count)]
     
     def random_string(self, length: int = 10) -> str:
         """生成指定长度的随机字符串（字母+数字）"""
         chars = string.ascii_letters + string.digits
-        return ''.join(random.choices(chars, k=int(length)))
+        return ''.join(current_random().choices(chars, k=int(length)))
+    
+    def random_string_batch(self, count: int, length: int = 10) -> List[str]:
+        """批量生成随机字符串"""
+        chars = string.ascii_letters + string.digits
+        return self._chunk(current_random().choices(chars, k=int(length) * count), int(length), count)
     
     def random_email(self) -> str:
         """生成随机邮箱地址"""
@@ -78,13 +208,16 @@ class RuntimeFunctions:
     
     def random_phone(self) -> str:
         """生成随机中国手机号"""
-        prefixes = ['130', '131', '132', '133', '134', '135', '136', '137', '138', '139',
-                   '150', '151', '152', '153', '155', '156', '157', '158', '159',
-                   '180', '181', '182', '183', '184', '185', '186', '187', '188', '189']
-        prefix = random.choice(prefixes)
+        prefix = current_random().choice(self.PHONE_PREFIXES)
         suffix = self.random_number(8)
         return f"{prefix}{suffix}"
     
+    @staticmethod
+    def _chunk(chars: List[str], length: int, count: int) -> List[str]:
+        """将字符列表切分为 count 个长度为 length 的字符串"""
+        joined = ''.join(chars)
+        return [joined[i * length:(i + 1) * length] for i in range(count)]
+    
     # ========== 时间日期类 ==========
     
     def timestamp(self) -> int:
@@ -137,14 +270,47 @@ class RuntimeFunctions:
     
     def random_boolean(self) -> bool:
         """生成随机布尔值"""
-        return random.choice([True, False])
+        return current_random().choice([True, False])
     
     def random_float(self, min_val: float = 0, max_val: float = 1, decimals: int = 2) -> float:
         """生成指定范围内的随机浮点数"""
-        value = random.uniform(float(min_val), float(max_val))
+        value = current_random().uniform(float(min_val), float(max_val))
         return round(value, int(decimals))
+
+
+class FunctionRegistry:
+    """运行时函数注册表（内置函数 + 插件注册的函数）"""
+    
+    def __init__(self):
+        self.functions: Dict[str, Callable] = {}
+        self.batch_functions: Dict[str, Callable] = {}
+    
+    def register(self, name: str, func: Optional[Callable] = None, batch: Optional[Callable] = None):
+        """
+        注册函数（可作为装饰器使用）
+        
+        Args:
+            name: 函数名（模板中使用的名称）
+            func: 函数实现
+            batch: 批量实现（可选），签名为 batch(count, *args) -> list
+        """
+        if func is None:
+            def decorator(f: Callable) -> Callable:
+                self.register(name, f, batch)
+                return f
+            return decorator
+        
+        self.functions[name] = func
+        if batch is not None:
+            self.batch_functions[name] = batch
+        else:
+            self.batch_functions.pop(name, None)
+        return func
     
-    # ========== 核心执行方法 ==========
+    def unregister(self, name: str) -> None:
+        """移除函数"""
+        self.functions.pop(name, None)
+        self.batch_functions.pop(name, None)
     
     def execute(self, func_name: str, *args) -> Any:
         """
@@ -161,17 +327,166 @@ class RuntimeFunctions:
             raise ValueError(f"未知的运行时函数: {func_name}")
         
         try:
-            func = self.functions[func_name]
-            result = func(*args)
-            print(f"[运行时函数] {func_name}({', '.join(map(str, args))}) → {result}")
+            result = self.functions[func_name](*args)
+            if TRACE_CALLS:
+                print(f"[运行时函数] {func_name}({', '.join(map(str, args))}) → {result}")
             return result
         except Exception as e:
             print(f"[运行时函数] 执行失败: {func_name}({args}), 错误: {e}")
             raise
+    
+    def generate_batch(self, func_name: str, count: int, *args) -> List[Any]:
+        """
+        批量执行函数（有批量实现时一次生成，否则逐个调用）
+        
+        Args:
+            func_name: 函数名
+            count: 生成数量
+            *args: 函数参数
+        """
+        if func_name not in self.functions:
+            raise ValueError(f"未知的运行时函数: {func_name}")
+        
+        batch = self.batch_functions.get(func_name)
+        if batch is not None:
+            values = list(batch(count, *args))
+            if len(values) == count:
+                return values
+            print(f"[运行时函数] 批量生成数量不符: {func_name} 期望 {count}，实际 {len(values)}，改为逐个生成")
+        func = self.functions[func_name]
+        return [func(*args) for _ in range(count)]
+    
+    def load_plugins(self, modules: Optional[str]) -> None:
+        """
+        加载插件模块（模块导入时通过 register_function 注册函数，
+        或提供 register(registry) 函数）
+        
+        Args:
+            modules: 逗号分隔的模块名
+        """
+        for module_name in (modules or '').split(','):
+            module_name = module_name.strip()
+            if not module_name:
+                continue
+            try:
+                module = importlib.import_module(module_name)
+                if callable(getattr(module, 'register', None)):
+                    module.register(self)
+                print(f"[运行时函数] 已加载插件: {module_name}")
+            except Exception as e:
+                print(f"[运行时函数] 加载插件失败: {module_name}, 错误: {e}")
+
+
+# 全局注册表
+function_registry = FunctionRegistry()
+_builtin_functions = RuntimeFunctions()
+for _name, _func in _builtin_functions.functions().items():
+    function_registry.register(_name, _func, _builtin_functions.batch_functions().get(_name))
+
+
+def register_function(name: str, func: Optional[Callable] = None, batch: Optional[Callable] = None):
+    """注册运行时函数（插件使用，可作为装饰器）"""
+    return function_registry.register(name, func, batch)
+
+
+# 匹配 ${{函数名(参数)}}
+# 支持：
+# - ${{random()}}
+# - ${{random(8)}}
+# - ${{randomInt(1, 100)}}
+# - ${{datetime("YYYY-MM-DD")}}
+FUNCTION_PATTERN = re.compile(r'\$\{\{(\w+)\((.*?)\)\}\}')
+
+# 编译模板的缓存条数上限
+TEMPLATE_CACHE_SIZE = 4096
+
+
+def _parse_args(params_str: str) -> Tuple[Any, ...]:
+    """解析函数参数（支持字符串、数字），解析失败时按逗号简单分割"""
+    params_str = params_str.strip()
+    if not params_str:
+        return ()
+    try:
+        # 将参数字符串包装为元组，用 ast.literal_eval 安全解析
+        return tuple(ast.literal_eval(f"({params_str},)"))
+    except (ValueError, SyntaxError) as e:
+        print(f"[运行时函数] 参数解析失败: {params_str}, 错误: {e}")
+        return tuple(p.strip().strip('"\'') for p in params_str.split(','))
+
+
+class FunctionCall:
+    """模板中的一次函数调用（参数已预先解析）"""
 
+    __slots__ = ('name', 'args', 'raw')
 
-# 全局实例
-_runtime_functions = RuntimeFunctions()
+    def __init__(self, name: str, args: Tuple[Any, ...], raw: str):
+        self.name = name
+        self.args = args
+        self.raw = raw  # 原始文本，执行失败时原样保留
+
+    def __call__(self) -> Any:
+        return function_registry.execute(self.name, *self.args)
+
+    def batch(self, count: int) -> List[Any]:
+        return function_registry.generate_batch(self.name, count, *self.args)
+
+
+class CompiledTemplate:
+    """
+    编译后的运行时函数模板
+
+    字符串只扫描一次，拆分为字面量和函数调用片段；
+    整个字符串只有一个函数调用时返回函数的原始类型
+    """
+
+    __slots__ = ('source', 'segments', 'single_call')
+
+    def __init__(self, source: str):
+        self.source = source
+        self.segments: List[Union[str, FunctionCall]] = []
+        position = 0
+        for match in FUNCTION_PATTERN.finditer(source):
+            if match.start() > position:
+                self.segments.append(source[position:match.start()])
+            self.segments.append(FunctionCall(match.group(1), _parse_args(match.group(2)), match.group(0)))
+            position = match.end()
+        if position < len(source):
+            self.segments.append(source[position:])
+
+        single = len(self.segments) == 1 and isinstance(self.segments[0], FunctionCall)
+        self.single_call: Optional[FunctionCall] = self.segments[0] if single else None
+
+    @property
+    def is_constant(self) -> bool:
+        """不包含函数调用"""
+        return not any(isinstance(segment, FunctionCall) for segment in self.segments)
+
+    def render(self) -> Any:
+        """执行模板中的函数调用，返回解析后的值"""
+        if self.single_call is not None:
+            try:
+                return self.single_call()  # 保持原始类型
+            except Exception as e:
+                print(f"[运行时函数] 执行失败: {self.single_call.name}, 错误: {e}")
+                return self.source
+
+        parts = []
+        for segment in self.segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+                continue
+            try:
+                parts.append(str(segment()))
+            except Exception as e:
+                print(f"[运行时函数] 执行失败: {segment.name}, 错误: {e}")
+                parts.append(segment.raw)  # 保持原样
+        return ''.join(parts)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(value: str) -> CompiledTemplate:
+    """编译字符串模板（结果按字符串缓存）"""
+    return CompiledTemplate(value)
 
 
 def resolve_runtime_functions(value: Any) -> Any:
@@ -189,73 +504,14 @@ def resolve_runtime_functions(value: Any) -> Any:
     Returns:
         解析后的值
     """
-    # 如果不是字符串，直接返回
-    if not isinstance(value, str):
+    # 不是字符串或不包含函数调用标记，直接返回（不进入模板缓存）
+    if not isinstance(value, str) or '${{' not in value:
         return value
     
-    # 正则表达式匹配 ${{函数名(参数)}}
-    # 支持：
-    # - ${{random()}}
-    # - ${{random(8)}}
-    # - ${{randomInt(1, 100)}}
-    # - ${{datetime("YYYY-MM-DD")}}
-    pattern = r'\$\{\{(\w+)\((.*?)\)\}\}'
-    
-    def replace_function(match):
-        """替换单个函数调用"""
-        func_name = match.group(1)
-        params_str = match.group(2).strip()
-        
-        # 解析参数
-        args = []
-        if params_str:
-            # 简单的参数解析（支持字符串、数字）
-            # 处理引号内的字符串和普通数字
-            import ast
-            try:
-                # 尝试用 ast.literal_eval 安全解析参数
-                # 将参数字符串包装为元组进行解析
-                params_tuple = f"({params_str},)"
-                args = list(ast.literal_eval(params_tuple))
-            except (ValueError, SyntaxError) as e:
-                print(f"[运行时函数] 参数解析失败: {params_str}, 错误: {e}")
-                # 如果解析失败，尝试简单分割
-                args = [p.strip().strip('"\'') for p in params_str.split(',')]
-        
-        # 执行函数
-        try:
-            result = _runtime_functions.execute(func_name, *args)
-            return str(result)
-        except Exception as e:
-            print(f"[运行时函数] 执行失败: {func_name}, 错误: {e}")
-            return match.group(0)  # 保持原样
-    
-    # 检查是否整个值都是一个函数调用
-    full_match = re.fullmatch(pattern, value)
-    if full_match:
-        # 纯函数调用，返回原始类型（不转换为字符串）
-        func_name = full_match.group(1)
-        params_str = full_match.group(2).strip()
-        
-        args = []
-        if params_str:
-            import ast
-            try:
-                params_tuple = f"({params_str},)"
-                args = list(ast.literal_eval(params_tuple))
-            except (ValueError, SyntaxError):
-                args = [p.strip().strip('"\'') for p in params_str.split(',')]
-        
-        try:
-            result = _runtime_functions.execute(func_name, *args)
-            return result  # 保持原始类型
-        except Exception as e:
-            print(f"[运行时函数] 执行失败: {func_name}, 错误: {e}")
-            return value
-    
-    # 字符串拼接模式，替换所有函数调用
-    resolved = re.sub(pattern, replace_function, value)
-    return resolved
+    template = compile_template(value)
+    if template.is_constant:
+        return value
+    return template.render()
 
 
 def resolve_value_with_functions(value: Any) -> Any:
@@ -277,3 +533,44 @@ def resolve_value_with_functions(value: Any) -> Any:
     else:
         return value
 
+
+def pregenerate_rows(rows: List[Dict[str, Any]]) -> int:
+    """
+    批量预生成数据集中的运行时函数值
+
+    同一列中相同的函数模板（如 ${{randomEmail()}}）一次生成全部行的值，
+    替换后各行直接使用具体值
+
+    Args:
+        rows: 数据集行（原地替换）
+
+    Returns:
+        替换的单元格数
+    """
+    cells: Dict[Tuple[str, str], List[int]] = {}
+    for index, row in enumerate(rows):
+        for key, value in row.items():
+            if isinstance(value, str) and '${{' in value:
+                cells.setdefault((key, value), []).append(index)
+
+    replaced = 0
+    for (key, value), indexes in cells.items():
+        template = compile_template(value)
+        if template.is_constant:
+            continue
+        if template.single_call is not None:
+            try:
+                values = template.single_call.batch(len(indexes))
+            except Exception as e:
+                print(f"[运行时函数] 批量生成失败: {template.single_call.name}, 错误: {e}")
+                continue
+        else:
+            values = [template.render() for _ in indexes]
+        for index, generated in zip(indexes, values):
+            rows[index][key] = generated
+        replaced += len(indexes)
+    return replaced
+
+
+# 加载插件（RUNTIME_FUNCTION_PLUGINS 环境变量，逗号分隔的模块名）
+function_registry.load_plugins(os.getenv('RUNTIME_FUNCTION_PLUGINS'))
@@ -1,27 +1,139 @@
 """
 测试套件调度器 - 支持定时和周期性执行测试套件
+
+削峰相关配置（scheduleConfig 中的同名字段可按套件覆盖）：
+- jitterSeconds（SCHEDULE_JITTER_SECONDS，默认 0）：周期调度的触发时间在 ±jitter 秒内随机偏移，
+  避免大量套件在同一分钟整点同时触发
+- misfireGraceSeconds（SCHEDULE_MISFIRE_GRACE_SECONDS，默认 3600）：错过触发时间多久以内仍然补跑
+- misfirePolicy（SCHEDULE_MISFIRE_POLICY，默认 run_once）：run_once 表示多次错过的触发合并为一次补跑，
+  skip 表示不补跑
+补跑任务在 SCHEDULE_CATCHUP_SPREAD_SECONDS（默认 120）秒内随机分散启动；
+所有触发最终都提交到执行队列，由队列的全局执行预算控制同时运行的套件数。
+
+调度任务持久化在同一个 SQLite 数据库的 SchedulerJob 表中（SCHEDULER_JOBSTORE=memory 时只保存在内存），
+启动和同步时只重新注册调度配置有变化的套件。多个执行器进程共用数据库时，
+通过 SchedulerLease 表中的租约保证只有一个进程触发调度，其余进程的调度器保持暂停。
 """
+import asyncio
+import hashlib
 import os
+import random
+import socket
+import httpx
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.cron import CronTrigger
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Set
+from uuid import uuid4
 from database import Database
-from suite_executor import SuiteExecutor
+from execution_queue import SuiteJobQueue
+
+SCHEDULE_JITTER_SECONDS = int(os.getenv("SCHEDULE_JITTER_SECONDS", "0"))
+SCHEDULE_MISFIRE_GRACE_SECONDS = int(os.getenv("SCHEDULE_MISFIRE_GRACE_SECONDS", "3600"))
+SCHEDULE_MISFIRE_POLICY = os.getenv("SCHEDULE_MISFIRE_POLICY", "run_once")
+SCHEDULE_CATCHUP_SPREAD_SECONDS = int(os.getenv("SCHEDULE_CATCHUP_SPREAD_SECONDS", "120"))
+SCHEDULER_JOBSTORE = os.getenv("SCHEDULER_JOBSTORE", "sqlite")
+SCHEDULER_LEASE_TTL_SECONDS = float(os.getenv("SCHEDULER_LEASE_TTL_SECONDS", "30"))
+
+# 调度器租约名称
+LEASE_NAME = 'suite-scheduler'
+
+# 补跑任务的 job id 后缀
+CATCHUP_SUFFIX = ':catchup'
+
+
+def _parse_db_time(value: Any) -> Optional[datetime]:
+    """解析数据库中的时间字段（UTC 字符串或毫秒时间戳），返回带时区的 UTC 时间"""
+    if value is None or value == '':
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value / 1000, tz=pytz.UTC)
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = pytz.UTC.localize(parsed)
+    return parsed
+
+
+# 当前进程的调度器实例（持久化的任务通过 run_scheduled_suite 回调到这里）
+_active_scheduler: Optional['TestSuiteScheduler'] = None
+
+
+async def run_scheduled_suite(suite_id: str, suite_name: str, fingerprint: Optional[str] = None):
+    """
+    调度任务入口
+    
+    持久化的任务只能引用模块级函数，这里转发给当前进程的调度器实例。
+    fingerprint 是注册时的调度配置指纹，用于同步时判断配置是否变化，执行时不使用。
+    """
+    if _active_scheduler is None:
+        print(f"⚠️  调度器未初始化，跳过调度: {suite_name}")
+        return
+    if not _active_scheduler.is_leader:
+        print(f"⚠️  当前进程未持有调度租约，跳过调度: {suite_name}")
+        return
+    await _active_scheduler._execute_scheduled_suite(suite_id, suite_name)
+
+
+def schedule_fingerprint(suite_data: dict) -> str:
+    """调度配置指纹（名称、调度配置和削峰默认值任一变化都需要重新注册）"""
+    source = json.dumps([
+        suite_data.get('name'),
+        suite_data.get('scheduleConfig'),
+        SCHEDULE_JITTER_SECONDS,
+        SCHEDULE_MISFIRE_GRACE_SECONDS,
+        SCHEDULE_MISFIRE_POLICY,
+    ])
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
 
 
 class TestSuiteScheduler:
     """测试套件调度器"""
     
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, job_queue: Optional[SuiteJobQueue] = None):
+        """
+        Args:
+            database: 数据库实例
+            job_queue: 套件执行队列（与 /api/execute-suite 共用，不提供时新建）
+        """
+        global _active_scheduler
         self.database = database
+        jobstore = self._create_jobstore(database)
+        self.persistent = jobstore is not None
         self.scheduler = AsyncIOScheduler(timezone='Asia/Shanghai')
-        self.suite_executor = SuiteExecutor(database)
+        if jobstore is not None:
+            self.scheduler.configure(jobstores={'default': jobstore})
+        self.job_queue = job_queue or SuiteJobQueue(database)
+        self._notify_tasks: Set[asyncio.Task] = set()
+        # 租约持有者标识（每个进程唯一）
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        # 没有数据库时不需要租约，当前进程即为调度进程
+        self.is_leader = database is None
+        self._lease_task: Optional[asyncio.Task] = None
+        _active_scheduler = self
         print("🕐 初始化测试套件调度器...")
     
+    @staticmethod
+    def _create_jobstore(database: Optional[Database]) -> Optional[Any]:
+        """创建持久化任务存储（与业务数据共用同一个 SQLite 文件），不可用时返回 None 使用内存存储"""
+        db_path = getattr(database, 'db_path', None)
+        if SCHEDULER_JOBSTORE == 'memory' or not db_path:
+            return None
+        try:
+            from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+        except ImportError:
+            print("⚠️  未安装 SQLAlchemy，调度任务只保存在内存中")
+            return None
+        return SQLAlchemyJobStore(
+            url=f"sqlite:///{os.path.abspath(db_path)}",
+            tablename='SchedulerJob'
+        )
+    
     async def initialize(self):
         """初始化调度器，从数据库加载所有活动的调度任务"""
         try:
@@ -29,36 +141,40 @@ class TestSuiteScheduler:
             print("📋 加载调度任务...")
             print(f"{'='*60}\n")
             
-            # 从数据库加载所有需要调度的测试套件
+            # 以暂停状态启动：可以读取持久化的任务并计算下次执行时间，但在获得租约前不会触发
+            self.scheduler.start(paused=True)
+            persisted = {job.id: job for job in self.scheduler.get_jobs()}
+            if persisted:
+                print(f"📦 已持久化的调度任务: {len(persisted)} 个")
+            
+            # 从数据库加载所有需要调度的测试套件，只重新注册有变化的
             suites = self.database.get_scheduled_suites()
             
             if not suites:
                 print("ℹ️  当前没有需要调度的测试套件")
             else:
                 print(f"✅ 找到 {len(suites)} 个需要调度的测试套件\n")
-                
-                for suite in suites:
-                    try:
-                        await self.register_schedule(suite)
-                        print(f"  ✓ 已注册调度: {suite['name']}")
-                    except Exception as e:
-                        print(f"  ✗ 注册调度失败 {suite['name']}: {e}")
             
-            # 启动调度器
-            self.scheduler.start()
+            summary = await self.sync_suites(suites)
             
-            # 调度器启动后，更新所有任务的下次执行时间
-            for job in self.scheduler.get_jobs():
+            # 停机期间错过的周期调度按 misfire 策略补跑
+            now = datetime.now(pytz.UTC)
+            for suite in suites:
                 try:
-                    next_run_time = getattr(job, 'next_run_time', None)
-                    if next_run_time:
-                        self.database.update_suite_next_run_time(job.id, next_run_time)
-                        print(f"  📅 {job.name}: 下次执行 {next_run_time.strftime('%Y-%m-%d %H:%M:%S')}")
+                    kept = persisted.get(suite['id']) if suite['id'] in summary['unchangedIds'] else None
+                    self._schedule_catch_up(suite, now, kept)
                 except Exception as e:
-                    print(f"  ⚠️ 更新 {job.name} 下次执行时间失败: {e}")
+                    print(f"  ⚠️ 处理错过的调度失败 {suite['name']}: {e}")
+            
+            # 获取租约后恢复调度器，之后定期续期
+            self._refresh_lease()
+            if self.database is not None:
+                self._lease_task = asyncio.create_task(self._lease_loop())
             
             print(f"\n{'='*60}")
-            print(f"✅ 调度器已启动，当前任务数: {len(self.scheduler.get_jobs())}")
+            print(f"✅ 调度器已启动，当前任务数: {len(self.scheduler.get_jobs())}"
+                  f"（新增 {summary['added']}，更新 {summary['updated']}，"
+                  f"未变化 {summary['unchanged']}，移除 {summary['removed']}）")
             print(f"{'='*60}\n")
             
         except Exception as e:
@@ -66,29 +182,109 @@ class TestSuiteScheduler:
             import traceback
             traceback.print_exc()
     
+    async def sync_all(self) -> Dict[str, Any]:
+        """从数据库重新加载所有需要调度的测试套件并增量同步"""
+        return await self.sync_suites(self.database.get_scheduled_suites())
+    
+    async def sync_suites(self, suites: List[dict]) -> Dict[str, Any]:
+        """
+        增量同步调度任务
+        
+        只重新注册调度配置有变化的套件，移除不再需要调度的任务，
+        最后在一个事务中批量更新下次执行时间。
+        
+        Args:
+            suites: 需要调度的测试套件列表（get_scheduled_suites 的结果）
+            
+        Returns:
+            同步结果统计
+        """
+        desired = {suite['id'] for suite in suites}
+        summary = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'unchangedIds': set()}
+        next_run_times: Dict[str, Optional[datetime]] = {}
+        
+        for job in self.scheduler.get_jobs():
+            suite_id = job.id[:-len(CATCHUP_SUFFIX)] if job.id.endswith(CATCHUP_SUFFIX) else job.id
+            if suite_id not in desired:
+                self.scheduler.remove_job(job.id)
+                if job.id == suite_id:
+                    summary['removed'] += 1
+                    print(f"  🗑️  移除调度: {job.name}")
+        
+        for suite in suites:
+            try:
+                existed = self.scheduler.get_job(suite['id']) is not None
+                job, changed = await self._register(suite)
+            except Exception as e:
+                print(f"  ✗ 注册调度失败 {suite['name']}: {e}")
+                continue
+            if not changed:
+                summary['unchanged'] += 1
+                summary['unchangedIds'].add(suite['id'])
+                continue
+            summary['updated' if existed else 'added'] += 1
+            print(f"  ✓ 已注册调度: {suite['name']}")
+            if job is not None:
+                next_run_times[suite['id']] = getattr(job, 'next_run_time', None)
+        
+        if next_run_times and self.database is not None:
+            self.database.update_suites_next_run_time(next_run_times)
+        return summary
+    
     async def register_schedule(self, suite_data: dict):
         """
-        注册调度任务
+        注册调度任务（调度配置没有变化时保留已有任务）
         
         Args:
             suite_data: 测试套件数据，包含 id, name, scheduleConfig 等
         """
+        job, changed = await self._register(suite_data)
+        if not changed or job is None:
+            return
+        
+        # 更新下次执行时间（安全访问 next_run_time）
+        try:
+            next_run_time = getattr(job, 'next_run_time', None)
+            if next_run_time:
+                self.database.update_suite_next_run_time(suite_data['id'], next_run_time)
+                print(f"    下次执行: {next_run_time.strftime('%Y-%m-%d %H:%M:%S')}")
+            else:
+                # 调度器未启动时，next_run_time 可能为 None
+                # 调度器启动后会自动计算
+                print(f"    调度任务已添加，等待调度器启动后计算执行时间")
+        except Exception as e:
+            print(f"    ⚠️ 获取下次执行时间失败: {e}，任务已添加")
+    
+    async def _register(self, suite_data: dict):
+        """
+        注册调度任务
+        
+        Returns:
+            (任务, 是否重新注册)；调度配置无效时任务为 None
+        """
         suite_id = suite_data['id']
         schedule_config_str = suite_data.get('scheduleConfig')
         
         if not schedule_config_str:
             print(f"⚠️  测试套件 {suite_data['name']} 没有调度配置")
-            return
+            return None, False
+        
+        # 配置没有变化且任务未暂停时保留已有任务（保留其下次执行时间）
+        fingerprint = schedule_fingerprint(suite_data)
+        existing = self.scheduler.get_job(suite_id)
+        if (existing is not None and existing.kwargs.get('fingerprint') == fingerprint
+                and getattr(existing, 'next_run_time', None) is not None):
+            return existing, False
         
         # 解析调度配置
         try:
             schedule_config = json.loads(schedule_config_str)
         except json.JSONDecodeError as e:
             print(f"❌ 调度配置解析失败: {e}")
-            return
+            return None, False
         
         # 移除已存在的任务
-        if self.scheduler.get_job(suite_id):
+        if existing is not None:
             self.scheduler.remove_job(suite_id)
         
         # 根据调度类型创建触发器
@@ -96,30 +292,91 @@ class TestSuiteScheduler:
         
         if not trigger:
             print(f"⚠️  无法为测试套件 {suite_data['name']} 创建触发器")
-            return
+            return None, False
         
-        # 添加调度任务
+        # 添加调度任务（错过的多次触发合并为一次，超过宽限时间的不再执行）
         job = self.scheduler.add_job(
-            func=self._execute_scheduled_suite,
+            func=run_scheduled_suite,
             trigger=trigger,
             args=[suite_id, suite_data['name']],
+            kwargs={'fingerprint': fingerprint},
             id=suite_id,
             name=suite_data['name'],
-            replace_existing=True
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=self._job_misfire_grace_time(schedule_config)
         )
+        return job, True
+    
+    @staticmethod
+    def _misfire_grace_seconds(config: dict) -> int:
+        """错过触发时间后仍然执行的宽限秒数"""
+        return int(config.get('misfireGraceSeconds', SCHEDULE_MISFIRE_GRACE_SECONDS))
+    
+    @classmethod
+    def _job_misfire_grace_time(cls, config: dict) -> int:
+        """任务的 misfire_grace_time（skip 策略下错过即跳过）"""
+        if config.get('misfirePolicy', SCHEDULE_MISFIRE_POLICY) == 'skip':
+            return 1
+        return cls._misfire_grace_seconds(config)
+    
+    def _schedule_catch_up(self, suite: dict, now: datetime, kept_job: Optional[Any] = None) -> bool:
+        """
+        为停机期间错过的周期调度安排一次补跑
         
-        # 更新下次执行时间（安全访问 next_run_time）
+        多次错过的触发只补跑一次（coalesce），补跑时间在 SCHEDULE_CATCHUP_SPREAD_SECONDS 内
+        随机分散，避免重启后所有套件同时启动。一次性调度由 APScheduler 的
+        misfire_grace_time 处理，这里不重复补跑。
+        
+        Args:
+            suite: 测试套件数据
+            now: 当前时间（UTC）
+            kept_job: 从持久化存储中保留下来的任务（错过的时间以任务为准，补跑时直接推迟该任务）
+        
+        Returns:
+            是否安排了补跑
+        """
         try:
-            next_run_time = getattr(job, 'next_run_time', None)
-            if next_run_time:
-                self.database.update_suite_next_run_time(suite_id, next_run_time)
-                print(f"    下次执行: {next_run_time.strftime('%Y-%m-%d %H:%M:%S')}")
-            else:
-                # 调度器未启动时，next_run_time 可能为 None
-                # 调度器启动后会自动计算
-                print(f"    调度任务已添加，等待调度器启动后计算执行时间")
-        except Exception as e:
-            print(f"    ⚠️ 获取下次执行时间失败: {e}，任务已添加")
+            schedule_config = json.loads(suite.get('scheduleConfig') or '{}')
+        except json.JSONDecodeError:
+            return False
+        if schedule_config.get('type') != 'recurring':
+            return False
+        
+        policy = schedule_config.get('misfirePolicy', SCHEDULE_MISFIRE_POLICY)
+        if kept_job is not None:
+            missed_at = getattr(kept_job, 'next_run_time', None)
+        else:
+            missed_at = _parse_db_time(suite.get('nextRunTime'))
+        if policy != 'run_once' or not missed_at or missed_at > now:
+            return False
+        
+        # 超过宽限时间的错过调度：保留的任务交给 APScheduler 按 misfire 规则跳过
+        late_seconds = (now - missed_at).total_seconds()
+        if late_seconds > self._misfire_grace_seconds(schedule_config):
+            print(f"    ⏭️  错过的调度已超过宽限时间（{int(late_seconds)} 秒），不补跑")
+            return False
+        
+        run_at = now + timedelta(seconds=random.uniform(0, SCHEDULE_CATCHUP_SPREAD_SECONDS))
+        if kept_job is not None:
+            kept_job.modify(next_run_time=run_at)
+            print(f"    🔁 补跑错过的调度（原定 {missed_at.strftime('%Y-%m-%d %H:%M:%S')}），"
+                  f"将于 {run_at.strftime('%H:%M:%S')} UTC 执行")
+            return True
+        
+        self.scheduler.add_job(
+            func=run_scheduled_suite,
+            trigger=DateTrigger(run_date=run_at),
+            args=[suite['id'], suite['name']],
+            id=f"{suite['id']}{CATCHUP_SUFFIX}",
+            name=f"{suite['name']} (补跑)",
+            replace_existing=True,
+            misfire_grace_time=None
+        )
+        print(f"    🔁 补跑错过的调度（原定 {missed_at.strftime('%Y-%m-%d %H:%M:%S')} UTC），"
+              f"将于 {run_at.strftime('%H:%M:%S')} UTC 执行")
+        return True
     
     def _create_trigger(self, config: dict) -> Optional[Any]:
         """
@@ -154,7 +411,7 @@ class TestSuiteScheduler:
                 else:
                     execute_at = execute_at.astimezone(timezone)
 
-                # 如果时间已经过去，给出清晰提示（APScheduler 不会“补跑” DateTrigger）
+                # 如果时间已经过去，给出清晰提示（超过 misfire 宽限时间的不会补跑）
                 now_in_tz = datetime.now(timezone)
                 if execute_at <= now_in_tz:
                     print(
@@ -171,13 +428,16 @@ class TestSuiteScheduler:
                 time_parts = time_str.split(':')
                 hour = int(time_parts[0])
                 minute = int(time_parts[1]) if len(time_parts) > 1 else 0
+                # 触发时间随机偏移，分散同一时刻的大量调度
+                jitter = int(config.get('jitterSeconds', SCHEDULE_JITTER_SECONDS)) or None
                 
                 if frequency == 'daily':
                     # 每天执行
                     return CronTrigger(
                         hour=hour,
                         minute=minute,
-                        timezone=timezone
+                        timezone=timezone,
+                        jitter=jitter
                     )
                 
                 elif frequency == 'weekly':
@@ -194,7 +454,8 @@ class TestSuiteScheduler:
                         day_of_week=weekdays_str,
                         hour=hour,
                         minute=minute,
-                        timezone=timezone
+                        timezone=timezone,
+                        jitter=jitter
                     )
                 
                 elif frequency == 'monthly':
@@ -208,7 +469,8 @@ class TestSuiteScheduler:
                         day=day_of_month,
                         hour=hour,
                         minute=minute,
-                        timezone=timezone
+                        timezone=timezone,
+                        jitter=jitter
                     )
                 
                 else:
@@ -227,7 +489,7 @@ class TestSuiteScheduler:
     
     async def _execute_scheduled_suite(self, suite_id: str, suite_name: str):
         """
-        执行调度的测试套件（通过调用 Next.js API）
+        执行调度的测试套件（在执行器进程内创建执行记录并提交到执行队列）
         
         Args:
             suite_id: 测试套件ID
@@ -252,7 +514,10 @@ class TestSuiteScheduler:
                 print(f"⚠️  测试套件调度状态非激活，跳过执行: {suite.get('scheduleStatus')}")
                 return
             
-            # 检查是否有正在执行的任务（防止并发执行）
+            # 检查是否有排队或正在执行的任务（防止并发执行）
+            if self.job_queue.is_suite_active(suite_id):
+                print(f"⚠️  测试套件 {suite_name} 已在执行队列中，跳过本次调度")
+                return
             running_executions = self.database.get_running_executions(suite_id)
             if running_executions:
                 print(f"⚠️  测试套件 {suite_name} 正在执行中，跳过本次调度")
@@ -262,30 +527,13 @@ class TestSuiteScheduler:
             # 更新上次执行时间
             self.database.update_suite_last_run_time(suite_id, datetime.now())
             
-            # 调用 Next.js API 执行测试套件（而不是直接执行）
-            print(f"🚀 调用 Next.js API 执行测试套件...\n")
-            
-            import httpx
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                # 使用环境变量配置 Next.js 服务地址，默认端口与 package.json 中保持一致 (3009)
-                next_base_url = os.getenv("NEXT_API_BASE_URL", "http://localhost:3009")
-                response = await client.post(
-                    f'{next_base_url}/api/test-suites/{suite_id}/execute',
-                    json={'triggered_by': 'schedule'}
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    print(f"✅ 执行请求已发送")
-                    print(f"执行ID: {result.get('data', {}).get('executionId')}")
-                    print(f"总用例数: {result.get('data', {}).get('totalCases')}")
-                    print(f"总步骤数: {result.get('data', {}).get('totalSteps')}")
-                else:
-                    print(f"❌ 执行请求失败: HTTP {response.status_code}")
-                    print(f"错误信息: {response.text}")
+            # 在进程内创建执行记录并直接提交到执行队列（不再经 Next.js 转发）
+            execution_id = self._start_execution(suite)
+            if execution_id:
+                self._notify_next(suite_id, execution_id)
             
             print(f"\n{'='*60}")
-            print(f"✅ 调度触发完成（实际执行由 Next.js 处理）")
+            print(f"✅ 调度触发完成")
             print(f"{'='*60}\n")
             
             # 获取调度配置
@@ -322,6 +570,69 @@ class TestSuiteScheduler:
             import traceback
             traceback.print_exc()
     
+    def _start_execution(self, suite: Dict[str, Any]) -> Optional[str]:
+        """
+        创建套件执行记录并提交到执行队列
+        
+        Returns:
+            执行记录ID（提交失败时记录为失败并返回 None）
+        """
+        suite_id = suite['id']
+        environment_config = self.database.get_environment_config(suite)
+        execution = self.database.create_suite_execution(
+            suite_id=suite_id,
+            suite_name=suite['name'],
+            triggered_by='schedule',
+            environment_config=environment_config,
+            use_global_settings=bool(suite.get('useGlobalSettings')),
+        )
+        execution_id = execution['id']
+        print(f"🚀 已创建执行记录: {execution_id}（{execution['totalCases']} 个用例，{execution['totalSteps']} 个步骤）")
+        
+        queued = self.job_queue.will_queue()
+        try:
+            if not self.job_queue.submit(
+                suite_execution_id=execution_id,
+                suite_id=suite_id,
+                environment_config=environment_config,
+                run_mode=suite.get('runMode') or 'serial',
+            ):
+                raise RuntimeError('该执行任务已在运行中')
+        except Exception as e:
+            print(f"❌ 提交调度执行失败: {e}")
+            self.database.update_suite_execution(
+                execution_id,
+                status='failed',
+                logs=f'Failed to start execution: {e}',
+                end_time=datetime.now(),
+            )
+            return None
+        
+        if queued:
+            print(f"⏳ 执行预算已满，调度执行已排队: {execution_id}")
+        return execution_id
+    
+    def _notify_next(self, suite_id: str, execution_id: str) -> None:
+        """
+        通知 Next.js 调度已触发（后台发送，失败不影响执行）
+        
+        通知地址由 NEXT_API_BASE_URL 配置，默认与 package.json 中的端口一致 (3009)
+        """
+        async def notify():
+            next_base_url = os.getenv("NEXT_API_BASE_URL", "http://localhost:3009")
+            try:
+                async with httpx.AsyncClient(timeout=5.0) as client:
+                    await client.post(
+                        f'{next_base_url}/api/test-suites/{suite_id}/executions/notify',
+                        json={'executionId': execution_id, 'triggeredBy': 'schedule'}
+                    )
+            except Exception as e:
+                print(f"⚠️  通知 Next.js 失败（不影响执行）: {e}")
+        
+        task = asyncio.create_task(notify())
+        self._notify_tasks.add(task)
+        task.add_done_callback(self._notify_tasks.discard)
+    
     async def update_schedule(self, suite_id: str, suite_data: dict):
         """
         更新调度任务
@@ -340,6 +651,8 @@ class TestSuiteScheduler:
         Args:
             suite_id: 测试套件ID
         """
+        if self.scheduler.get_job(f"{suite_id}{CATCHUP_SUFFIX}"):
+            self.scheduler.remove_job(f"{suite_id}{CATCHUP_SUFFIX}")
         if self.scheduler.get_job(suite_id):
             self.scheduler.remove_job(suite_id)
             print(f"🗑️  已移除调度: {suite_id}")
@@ -412,8 +725,56 @@ class TestSuiteScheduler:
             })
         return result
     
+    def _refresh_lease(self) -> bool:
+        """
+        获取或续期调度器租约，并按是否持有租约恢复或暂停调度器
+        
+        Returns:
+            是否持有租约
+        """
+        if self.database is None:
+            held = True
+        else:
+            try:
+                held = self.database.acquire_scheduler_lease(LEASE_NAME, self.owner, SCHEDULER_LEASE_TTL_SECONDS)
+            except Exception as e:
+                print(f"⚠️  续期调度器租约失败: {e}")
+                held = False
+        
+        if held and not self.is_leader:
+            print(f"👑 已获得调度器租约: {self.owner}")
+        elif not held and self.is_leader:
+            print(f"⚠️  调度器租约已被其他进程持有，暂停调度: {self.owner}")
+        elif not held and self._lease_task is None:
+            print("ℹ️  调度器租约由其他执行器进程持有，本进程调度器保持暂停")
+        self.is_leader = held
+        
+        if self.scheduler.running:
+            if held:
+                self.scheduler.resume()
+                # 其他进程可能修改了共享的任务存储，唤醒调度器重新读取下次执行时间
+                self.scheduler.wakeup()
+            else:
+                self.scheduler.pause()
+        return held
+    
+    async def _lease_loop(self) -> None:
+        """定期续期调度器租约（间隔为租约有效期的三分之一）"""
+        while True:
+            await asyncio.sleep(SCHEDULER_LEASE_TTL_SECONDS / 3)
+            self._refresh_lease()
+    
     def shutdown(self):
         """关闭调度器"""
+        if self._lease_task:
+            self._lease_task.cancel()
+            self._lease_task = None
+        if self.is_leader and self.database is not None:
+            try:
+                self.database.release_scheduler_lease(LEASE_NAME, self.owner)
+            except Exception as e:
+                print(f"⚠️  释放调度器租约失败: {e}")
+            self.is_leader = False
         if self.scheduler.running:
             self.scheduler.shutdown()
             print("🛑 调度器已停止")
@@ -0,0 +1,194 @@
+"""
+套件分片工作进程 - 多个执行器进程通过共享数据库领取并执行同一次套件执行的分片
+
+套件执行配置 {"shards": N} 时，收到执行请求的执行器按历史耗时把用例均衡分成 N 个分片
+写入 SuiteShard 表。开启了分片工作进程（SUITE_SHARD_WORKER=1）的执行器会轮询领取分片，
+用 SuiteExecutor 执行其中的用例，结束时把统计原子累加到同一条套件执行记录。
+
+分片通过租约领取：执行期间定期续期，进程异常退出后租约过期，分片会被其他进程重新领取
+（重新领取的分片会再次执行其中的用例）。续期失败或租约已被接管时立即中止本进程的分片，
+避免与重新领取的进程重复执行用例。
+
+停止执行时停止状态写入数据库（分片状态 stopping），各进程续期租约时读取，
+设置本进程的停止标志后不再开始新的用例。
+"""
+import asyncio
+import os
+import socket
+import time
+import traceback
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+import json_codec
+from suite_executor import SuiteExecutor
+from tracing import tracer
+
+# 分片租约有效期（秒）
+SHARD_LEASE_SECONDS = float(os.getenv("SHARD_LEASE_SECONDS", "60"))
+
+# 没有可领取的分片时的轮询间隔（秒）
+SHARD_POLL_INTERVAL = float(os.getenv("SHARD_POLL_INTERVAL", "2"))
+
+
+class ShardWorker:
+    """分片工作进程"""
+
+    def __init__(
+        self,
+        database,
+        stop_flags: Optional[Dict[str, bool]] = None,
+        owner: Optional[str] = None,
+        suite_executor: Optional[SuiteExecutor] = None
+    ):
+        """
+        Args:
+            database: 数据库实例
+            stop_flags: 全局停止标志（execution_id -> should_stop）
+            owner: 领取者标识（默认 主机名:进程号:随机串）
+            suite_executor: 执行分片使用的套件执行器（发起分片的执行器传入自身，默认每个分片新建）
+        """
+        self.database = database
+        self.stop_flags = stop_flags if stop_flags is not None else {}
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.suite_executor = suite_executor
+
+    async def run_forever(self, poll_interval: float = SHARD_POLL_INTERVAL) -> None:
+        """持续领取并执行分片（后台任务，取消时退出）"""
+        print(f"🧩 分片工作进程已启动: {self.owner}")
+        while True:
+            try:
+                executed = await self.run_available()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ 分片工作进程异常: {e}")
+                traceback.print_exc()
+                executed = 0
+            if not executed:
+                await asyncio.sleep(poll_interval)
+
+    async def run_available(self, suite_execution_id: Optional[str] = None) -> int:
+        """
+        依次领取并执行分片，直到没有可领取的分片
+
+        Args:
+            suite_execution_id: 只领取指定套件执行的分片（可选）
+
+        Returns:
+            执行的分片数
+        """
+        executed = 0
+        while True:
+            shard = self.database.claim_suite_shard(self.owner, SHARD_LEASE_SECONDS, suite_execution_id)
+            if not shard:
+                return executed
+            await self.run_shard(shard)
+            executed += 1
+
+    async def run_shard(self, shard: Dict[str, Any]) -> bool:
+        """
+        执行已领取的分片，结束后写回结果
+
+        Returns:
+            结果是否已累加到套件执行记录（租约被其他进程接管时为 False）
+        """
+        suite_execution_id = shard['suiteExecutionId']
+        print(f"🧩 领取分片 #{shard['shardIndex']}（{len(shard['caseIds'])} 个用例，第 {shard['attempts']} 次）: {suite_execution_id}")
+
+        start = time.monotonic()
+        status = 'completed'
+        error_message = None
+        results = {'passed_cases': 0, 'failed_cases': 0, 'total_passed_steps': 0, 'total_failed_steps': 0}
+        shard_task: Optional[asyncio.Task] = None
+        renew_task: Optional[asyncio.Task] = None
+        stop_already_set = bool(self.stop_flags.get(suite_execution_id))
+        try:
+            suite_execution = self.database.get_suite_execution(suite_execution_id)
+            if not suite_execution:
+                raise Exception(f"测试套件执行记录不存在: {suite_execution_id}")
+            snapshot = json_codec.loads(suite_execution.get('environmentSnapshot') or '{}')
+
+            suite_executor = self.suite_executor or SuiteExecutor(self.database, self.stop_flags)
+            trace_token = tracer.bind(suite_execution_id)
+            try:
+                with tracer.span(f"分片 #{shard['shardIndex']}", 'shard', owner=self.owner):
+                    shard_task = asyncio.create_task(suite_executor.execute_shard(
+                        suite_execution_id=suite_execution_id,
+                        suite_id=suite_execution['suiteId'],
+                        shard=shard,
+                        environment_config=snapshot.get('config') or {},
+                    ))
+                    renew_task = asyncio.create_task(
+                        self._renew_lease(shard['id'], suite_execution_id, shard_task)
+                    )
+                    results = await shard_task
+            finally:
+                tracer.unbind(trace_token)
+            if self.stop_flags.get(suite_execution_id):
+                status = 'stopped'
+        except asyncio.CancelledError:
+            if renew_task is None or not renew_task.done() or not renew_task.result():
+                raise
+            # 租约已失效：分片由其他进程重新领取执行，本进程的结果不再写回
+            print(f"⚠️  分片 #{shard['shardIndex']} 租约已失效，已中止执行: {suite_execution_id}")
+            return False
+        except Exception as e:
+            status = 'failed'
+            error_message = str(e)
+            # 分片准备阶段失败，分片内的用例都记为失败
+            results['failed_cases'] = len(shard['caseIds'])
+            print(f"❌ 分片执行失败: {e}")
+            traceback.print_exc()
+        finally:
+            if renew_task is not None:
+                renew_task.cancel()
+            if shard_task is not None and not shard_task.done():
+                shard_task.cancel()
+            # 由数据库停止状态设置的停止标志只用于本分片（本进程不是该套件执行的发起者）
+            if not stop_already_set and self.suite_executor is None:
+                self.stop_flags.pop(suite_execution_id, None)
+
+        merged = self.database.finish_suite_shard(
+            shard['id'],
+            self.owner,
+            status=status,
+            duration=int((time.monotonic() - start) * 1000),
+            passed_cases=results['passed_cases'],
+            failed_cases=results['failed_cases'],
+            passed_steps=results['total_passed_steps'],
+            failed_steps=results['total_failed_steps'],
+            error_message=error_message,
+        )
+        if not merged:
+            print(f"⚠️  分片 #{shard['shardIndex']} 的租约已被其他进程接管，结果未累加")
+        return merged
+
+    async def _renew_lease(self, shard_id: str, suite_execution_id: str, shard_task: asyncio.Task) -> bool:
+        """
+        执行期间定期续期分片租约（间隔为租约有效期的三分之一）
+
+        - 分片已请求停止（stopping）时设置本进程的停止标志，不再开始新的用例
+        - 租约已被接管，或持续续期失败直到租约过期时取消分片任务
+
+        Returns:
+            是否因租约失效取消了分片任务
+        """
+        last_renewed = time.monotonic()
+        while True:
+            await asyncio.sleep(SHARD_LEASE_SECONDS / 3)
+            try:
+                state = self.database.renew_suite_shard_lease(shard_id, self.owner, SHARD_LEASE_SECONDS)
+            except Exception as e:
+                print(f"⚠️  续期分片租约失败: {e}")
+                if time.monotonic() - last_renewed < SHARD_LEASE_SECONDS:
+                    continue
+                state = None
+            if state is None:
+                print(f"⚠️  分片租约已失效，中止分片: {shard_id}")
+                shard_task.cancel()
+                return True
+            last_renewed = time.monotonic()
+            if state == 'stopping' and not self.stop_flags.get(suite_execution_id):
+                print(f"🛑 分片已请求停止: {shard_id}")
+                self.stop_flags[suite_execution_id] = True
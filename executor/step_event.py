@@ -0,0 +1,109 @@
+"""
+步骤事件 - API 步骤的请求/响应数据只序列化一次
+
+一个 API 步骤的请求和响应会写入多个位置：步骤执行记录（TestStepExecution）、
+请求/响应日志（ExecutionLog.details）、SSE 推送。StepEvent 在步骤执行时构建一次，
+各部分（请求头、请求体、响应头、响应体……）首次使用时序列化为 RawJson，
+之后所有写入方直接复用同一份序列化结果。
+"""
+from typing import Any, Dict, Optional
+
+from json_codec import RawJson
+
+
+class StepEvent:
+    """API 步骤的请求/响应事件"""
+
+    def __init__(self, request: Dict[str, Any], request_url: Optional[str] = None):
+        """
+        Args:
+            request: 用于展示的请求数据（method, url, headers, params, json, data, files）
+            request_url: 实际发送的 URL（不含查询参数），默认使用 request['url']
+        """
+        self.request = request
+        self.request_url = request_url or request.get('url')
+        self.response: Optional[Dict[str, Any]] = None
+        self._fragments: Dict[str, Optional[RawJson]] = {}
+
+    def set_response(self, response: Dict[str, Any]) -> None:
+        """设置响应数据（响应体为存储用版本，超限时是截断摘要）"""
+        self.response = response
+
+    def fragment(self, key: str, value: Any) -> Optional[RawJson]:
+        """获取某部分数据的序列化结果（首次调用时序列化，None 不序列化）"""
+        if key not in self._fragments:
+            self._fragments[key] = RawJson.of(value) if value is not None else None
+        return self._fragments[key]
+
+    def _request_part(self, key: str) -> Optional[RawJson]:
+        return self.fragment(f'request.{key}', self.request.get(key))
+
+    def _response_part(self, key: str) -> Optional[RawJson]:
+        return self.fragment(f'response.{key}', (self.response or {}).get(key))
+
+    def request_payload(self) -> Dict[str, Any]:
+        """请求数据（用于 SSE 推送）"""
+        payload = dict(self.request)
+        for key in ('headers', 'params', 'json', 'data', 'files'):
+            payload[key] = self._request_part(key)
+        return payload
+
+    def response_payload(self) -> Optional[Dict[str, Any]]:
+        """响应数据（用于 SSE 推送）"""
+        if self.response is None:
+            return None
+        payload = dict(self.response)
+        payload['headers'] = self._response_part('headers')
+        payload['body'] = self._response_part('body')
+        return payload
+
+    def request_log_details(self) -> Dict[str, Any]:
+        """请求日志详情"""
+        body = {}
+        for key in ('json', 'data', 'files'):
+            if self.request.get(key):
+                body[key] = self._request_part(key)
+        return {
+            'url': self.request.get('url'),
+            'method': self.request.get('method'),
+            'headers': self._request_part('headers'),
+            'params': self._request_part('params'),
+            'body': body if body else None
+        }
+
+    def response_log_details(self) -> Dict[str, Any]:
+        """响应日志详情"""
+        details = {
+            'status': self.response['status'],
+            'headers': self._response_part('headers'),
+            'body': self._response_part('body')
+        }
+        if self.response.get('timing'):
+            details['timing'] = self._response_part('timing')
+        return details
+
+    def step_columns(self) -> Dict[str, Any]:
+        """步骤执行记录中的请求/响应字段（update_step_execution 参数）"""
+        # 对于 form-data 和 x-www-form-urlencoded，requestBody 保存 data 字段；JSON 保存 json 字段
+        if not self.request.get('json') and self.request.get('data'):
+            request_body = self._request_part('data')
+        else:
+            request_body = self._request_part('json')
+
+        columns = {
+            'requestUrl': self.request_url,
+            'requestMethod': self.request.get('method'),
+            'requestHeaders': self._request_part('headers'),
+            'requestBody': request_body,
+            'requestParams': self._request_part('params') if self.request.get('params') else None,
+        }
+        if self.response is not None:
+            columns.update({
+                'responseStatus': self.response['status'],
+                'responseHeaders': self._response_part('headers'),
+                'responseBody': self._response_part('body'),
+                'responseTime': self.response.get('responseTime'),
+            })
+            if self.response.get('timing'):
+                columns['timingBreakdown'] = self._response_part('timing')
+        return columns
@@ -3,18 +3,36 @@
 """
 import asyncio
 import json
+import json_codec
 import sys
 import os
+import time
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from uuid import uuid4
 
 # 添加当前目录到 Python 路径
 sys.path.insert(0, os.path.dirname(__file__))
 
-from database import Database
+import httpx
+
+from database import Database, format_datetime_for_prisma
 from test_executor import TestExecutor
-from models import TestCase, FlowConfig, FlowNode, NodeType
+from models import TestCase, FlowConfig, FlowNode, NodeType, ExecutionResult
 from logger_config import get_logger
+from execution_plan import ExecutionPlan, compile_plan, parse_execution_config
+from dataset import get_dataset_config, get_dataset_concurrency, load_dataset
+from load_runner import SharedTransport
+from api_cache import prefetch_api_infos
+from runtime_functions import new_seed, pregenerate_rows, seeded_random
+from suite_fixtures import SuiteFixtures, get_fixture_config
+from metrics import record_suite_result
+from tracing import tracer
+from profiling import ExecutionProfiler, parse_profile_mode
+from case_ordering import (
+    DURATION_HISTORY_LIMIT, estimate_durations, get_shard_count, lpt_order, normalize_dependencies,
+    plan_shards, predict_makespan
+)
 
 # 获取日志器
 logger = get_logger('executor')
@@ -26,13 +44,22 @@ class SuiteExecutor:
     def __init__(self, database: Database, stop_flags: dict = None):
         self.database = database
         self.stop_flags = stop_flags if stop_flags is not None else {}
+        # 套件执行配置（suite_execution_id -> TestSuite.executionConfig）
+        self.execution_configs: Dict[str, Dict[str, Any]] = {}
+        # 执行级 API 信息缓存（suite_execution_id -> {apiId: API 信息}）
+        self.api_caches: Dict[str, Dict[str, Optional[Dict[str, Any]]]] = {}
+        # 套件级前置/后置用例（suite_execution_id -> SuiteFixtures）
+        self.fixtures: Dict[str, SuiteFixtures] = {}
+        # 性能剖析会话（suite_execution_id -> ExecutionProfiler）
+        self.profilers: Dict[str, ExecutionProfiler] = {}
     
     async def execute_suite(
         self, 
         suite_execution_id: str,
         suite_id: str,
         environment_config: Dict[str, Any],
-        run_mode: str = "serial"
+        run_mode: str = "serial",
+        profile: Any = None
     ) -> Dict[str, Any]:
         """
         执行测试测试套件
@@ -42,12 +69,33 @@ class SuiteExecutor:
             suite_id: 测试套件ID
             environment_config: 环境配置
             run_mode: 运行模式 serial(串行) / parallel(并行)
+            profile: 性能剖析模式 cprofile / sampling（可选，也可在套件执行配置中设置，见 profiling）
             
         Returns:
             执行结果
         """
+        # 执行期间的 span 归属到套件执行（用于导出时间线）
+        trace_token = tracer.bind(suite_execution_id)
+        try:
+            with tracer.span(f'套件 {suite_id}', 'suite', suiteExecutionId=suite_execution_id, runMode=run_mode) as span:
+                result = await self._run_suite(suite_execution_id, suite_id, environment_config, run_mode, profile)
+                span.set(success=result.get('success'))
+                return result
+        finally:
+            tracer.unbind(trace_token)
+    
+    async def _run_suite(
+        self,
+        suite_execution_id: str,
+        suite_id: str,
+        environment_config: Dict[str, Any],
+        run_mode: str,
+        profile: Any = None
+    ) -> Dict[str, Any]:
+        """执行测试套件（execute_suite 的实现）"""
         suite_data = self.database.get_test_suite(suite_id)
         suite_name = suite_data.get('name', suite_id) if suite_data else suite_id
+        self.execution_configs[suite_execution_id] = parse_execution_config(suite_data)
         
         logger.execution_start(suite_name, suite_execution_id)
         
@@ -67,6 +115,8 @@ class SuiteExecutor:
         )
         
         try:
+            self._start_profile(suite_execution_id, profile)
+            
             logger.db_operation('SELECT', 'TestSuiteExecution')
             suite_execution = self.database.get_suite_execution(suite_execution_id)
             if not suite_execution:
@@ -78,9 +128,19 @@ class SuiteExecutor:
             if not test_cases:
                 raise Exception(f"测试套件中没有启用的测试用例: {suite_id}")
             
+            # 一次性预取所有用例引用的 API 信息，执行期间不再逐个查询
+            self.api_caches[suite_execution_id] = prefetch_api_infos(
+                self.database, (tc.get('flowConfig') for tc in test_cases)
+            )
+            
             total_cases = len(test_cases)
             logger.info(f"📋 总共 {total_cases} 个测试用例待执行 (模式: {run_mode})")
             
+            # 套件级前置用例：执行一次，共享变量注入每个用例
+            fixtures = self._create_fixtures(suite_execution_id, environment_config)
+            if fixtures:
+                await fixtures.variables()
+            
             self.database.create_execution_log(
                 level='info',
                 message=f'共有 {total_cases} 个测试用例待执行 (模式: {"并行" if run_mode == "parallel" else "串行"})',
@@ -88,7 +148,12 @@ class SuiteExecutor:
                 log_type='system'
             )
             
-            if run_mode == "parallel":
+            shard_count = get_shard_count(self.execution_configs[suite_execution_id])
+            if shard_count > 1 and total_cases > 1:
+                results = await self._execute_sharded(
+                    test_cases, suite_execution_id, run_mode, shard_count
+                )
+            elif run_mode == "parallel":
                 results = await self._execute_parallel(
                     test_cases, suite_execution_id, environment_config, total_cases
                 )
@@ -102,6 +167,8 @@ class SuiteExecutor:
             total_passed_steps = results['total_passed_steps']
             total_failed_steps = results['total_failed_steps']
             
+            await self._teardown_fixtures(suite_execution_id)
+            
             end_time = datetime.now()
             duration = int((end_time - start_time).total_seconds() * 1000)
             
@@ -119,6 +186,8 @@ class SuiteExecutor:
                 failed_steps=total_failed_steps
             )
             
+            record_suite_result(suite_id, final_status, passed_cases, failed_cases)
+            
             print(f"\n{'='*60}")
             if was_stopped:
                 print(f"测试套件执行已停止")
@@ -144,6 +213,8 @@ class SuiteExecutor:
         except Exception as e:
             print(f"\n❌ 测试套件执行失败: {str(e)}\n")
             
+            await self._teardown_fixtures(suite_execution_id)
+            
             end_time = datetime.now()
             duration = int((end_time - start_time).total_seconds() * 1000)
             
@@ -165,11 +236,74 @@ class SuiteExecutor:
                 failed_steps=total_failed_steps,
                 logs=f"执行异常: {str(e)}"
             )
+            record_suite_result(suite_id, 'failed', passed_cases, failed_cases)
             
             return {
                 'success': False,
                 'error': str(e)
             }
+        
+        finally:
+            self._finish_profile(suite_execution_id)
+            self.execution_configs.pop(suite_execution_id, None)
+            self.api_caches.pop(suite_execution_id, None)
+            self.fixtures.pop(suite_execution_id, None)
+
+    def _create_fixtures(
+        self, suite_execution_id: str, environment_config: Dict[str, Any]
+    ) -> Optional[SuiteFixtures]:
+        """按套件执行配置创建前置/后置用例（未配置时返回 None）"""
+        config = get_fixture_config(self.execution_configs.get(suite_execution_id))
+        if not config:
+            return None
+        fixtures = SuiteFixtures(
+            self.database, config, suite_execution_id, environment_config,
+            api_cache=self.api_caches.get(suite_execution_id)
+        )
+        self.fixtures[suite_execution_id] = fixtures
+        return fixtures
+
+    async def _fixture_variables(self, suite_execution_id: str) -> Dict[str, Any]:
+        """套件前置用例共享的变量（过期时自动刷新）"""
+        fixtures = self.fixtures.get(suite_execution_id)
+        return await fixtures.variables() if fixtures else {}
+
+    async def _teardown_fixtures(self, suite_execution_id: str) -> None:
+        """执行套件后置用例（只执行一次，失败不影响套件结果）"""
+        fixtures = self.fixtures.pop(suite_execution_id, None)
+        if fixtures:
+            try:
+                await fixtures.teardown()
+            except Exception as e:
+                print(f"⚠️  套件后置用例执行异常: {e}")
+
+    def _start_profile(self, suite_execution_id: str, profile: Any) -> None:
+        """按执行请求或套件执行配置开启性能剖析"""
+        mode = parse_profile_mode(profile) or parse_profile_mode(
+            (self.execution_configs.get(suite_execution_id) or {}).get('profile')
+        )
+        if not mode:
+            return
+        profiler = ExecutionProfiler(suite_execution_id, mode)
+        profiler.start()
+        self.profilers[suite_execution_id] = profiler
+
+    def _finish_profile(self, suite_execution_id: str) -> None:
+        """结束性能剖析并记录产物（失败不影响套件结果）"""
+        profiler = self.profilers.pop(suite_execution_id, None)
+        if not profiler:
+            return
+        try:
+            artifacts = profiler.stop()
+            self.database.create_execution_log(
+                level='info',
+                message=f'性能剖析（{profiler.mode}）产物: {", ".join(artifacts) or "无"}',
+                suite_execution_id=suite_execution_id,
+                log_type='system',
+                details={'mode': profiler.mode, 'artifacts': artifacts}
+            )
+        except Exception as e:
+            print(f"⚠️  写入性能剖析产物失败: {e}")
 
     async def _execute_single_case(
         self,
@@ -208,6 +342,7 @@ class SuiteExecutor:
 
         case_start_time = datetime.now()
         result_info = {'passed': False, 'passed_steps': 0, 'failed_steps': 0}
+        api_samples = []  # 接口请求样本（用于接口耗时统计）
 
         try:
             test_case_obj = TestCase(
@@ -217,14 +352,29 @@ class SuiteExecutor:
                 flowConfig=FlowConfig(**test_case_config)
             )
 
-            async with TestExecutor(
-                timeout=60,
-                database=self.database,
-                environment_config=environment_config,
-                case_execution_id=case_execution_id,
-                suite_execution_id=suite_execution_id
-            ) as executor:
-                result = await executor.execute_test_case(test_case_obj)
+            dataset_config = get_dataset_config(
+                test_case_config, self.execution_configs.get(suite_execution_id)
+            )
+            if dataset_config:
+                # 数据驱动：每行数据执行一次用例
+                result = await self._execute_data_driven(
+                    test_case_obj, dataset_config, case_execution_id,
+                    suite_execution_id, environment_config, api_samples
+                )
+            else:
+                async with TestExecutor(
+                    timeout=60,
+                    database=self.database,
+                    environment_config=environment_config,
+                    case_execution_id=case_execution_id,
+                    suite_execution_id=suite_execution_id,
+                    api_cache=self.api_caches.get(suite_execution_id),
+                    keep_step_payloads=False  # 步骤请求/响应已逐步落库
+                ) as executor:
+                    api_samples = executor.api_samples
+                    result = await executor.execute_test_case(
+                        test_case_obj, variables=await self._fixture_variables(suite_execution_id) or None
+                    )
 
             case_end_time = datetime.now()
             case_duration = int((case_end_time - case_start_time).total_seconds() * 1000)
@@ -237,7 +387,8 @@ class SuiteExecutor:
                     duration=case_duration,
                     passed_steps=result.passedSteps,
                     failed_steps=result.failedSteps,
-                    total_steps=result.totalSteps
+                    total_steps=result.totalSteps,
+                    api_samples=api_samples
                 )
                 print(f"✅ 用例执行成功 (耗时: {case_duration}ms)")
 
@@ -258,7 +409,8 @@ class SuiteExecutor:
                     passed_steps=result.passedSteps,
                     failed_steps=result.failedSteps,
                     total_steps=result.totalSteps,
-                    error_message=result.error
+                    error_message=result.error,
+                    api_samples=api_samples
                 )
                 print(f"❌ 用例执行失败: {result.error}")
 
@@ -281,7 +433,8 @@ class SuiteExecutor:
                 status='failed',
                 end_time=case_end_time,
                 duration=case_duration,
-                error_message=str(e)
+                error_message=str(e),
+                api_samples=api_samples
             )
             print(f"❌ 用例执行异常: {str(e)}")
 
@@ -294,16 +447,232 @@ class SuiteExecutor:
                 details={'error': str(e)}
             )
 
+        profiler = self.profilers.get(suite_execution_id)
+        if profiler:
+            profiler.case_boundary(test_case_name)
+
         return result_info
 
+    async def _execute_data_driven(
+        self,
+        test_case: TestCase,
+        dataset_config: Dict[str, Any],
+        case_execution_id: str,
+        suite_execution_id: str,
+        environment_config: Dict[str, Any],
+        api_samples: List[Dict[str, Any]],
+    ) -> ExecutionResult:
+        """
+        数据驱动执行：用例执行计划只编译一次，按数据集每行执行一次
+        
+        - 固定数量的 worker 从同一个行迭代器中依次取行执行（有界并发），共享一个 HTTP 连接池
+        - 每行只写一条 DataDrivenIteration 汇总，失败行额外写入完整步骤记录
+        - 行结果按批次 executemany 写入
+        - 某行抛出异常时取消其余 worker，等待它们结束后再关闭共享连接池
+        
+        Returns:
+            汇总后的执行结果（全部行通过才算通过，套件停止导致未执行的行视为失败）
+        """
+        start_time = datetime.now()
+        rows = load_dataset(dataset_config)
+        plan = compile_plan(test_case.flowConfig)
+        concurrency = get_dataset_concurrency(dataset_config)
+        batch_size = int(dataset_config.get('batchSize') or 100)
+        # 所有行共享 API 信息缓存
+        api_cache = self.api_caches.get(suite_execution_id)
+        if api_cache is None:
+            api_cache = {}
+        
+        # 随机种子：数据集中的运行时函数按种子批量预生成，每行再使用 种子:行号 执行，
+        # 在 dataset.seed 中指定同一种子即可复现
+        seed = dataset_config.get('seed')
+        if seed is None:
+            seed = new_seed()
+        with seeded_random(f"{seed}:dataset"):
+            generated = pregenerate_rows(rows)
+        if generated:
+            print(f"[数据驱动] 已批量生成 {generated} 个运行时函数值")
+        
+        self.database.create_execution_log(
+            level='info',
+            message=f'数据驱动执行: 共 {len(rows)} 行数据，并发 {concurrency}，随机种子 {seed}',
+            case_execution_id=case_execution_id,
+            suite_execution_id=suite_execution_id,
+            log_type='system'
+        )
+        
+        result = ExecutionResult(
+            success=True,
+            testCaseId=test_case.id or "",
+            testCaseName=test_case.name,
+            startTime=start_time,
+            totalSteps=0,
+            executedSteps=0,
+            passedSteps=0,
+            failedSteps=0,
+        )
+        pending_iterations: List[Dict[str, Any]] = []
+        pending_steps: List[Dict[str, Any]] = []
+        failed_rows: List[int] = []
+        skipped_rows = 0
+        first_error: Optional[str] = None
+        step_order = 0
+        
+        def flush():
+            if pending_iterations or pending_steps:
+                self.database.save_data_driven_iterations(list(pending_iterations), list(pending_steps))
+                pending_iterations.clear()
+                pending_steps.clear()
+        
+        transport = httpx.AsyncHTTPTransport(
+            verify=False,
+            limits=httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency)
+        )
+        
+        async def run_row(row_index: int, row: Dict[str, Any]):
+            nonlocal step_order, first_error
+            row_start = datetime.now()
+            async with TestExecutor(
+                timeout=60,
+                database=self.database,
+                environment_config=environment_config,
+                suite_execution_id=suite_execution_id,
+                transport=SharedTransport(transport),
+                api_cache=api_cache
+            ) as executor:
+                row_variables = {**(await self._fixture_variables(suite_execution_id)), **row}
+                row_result = await executor.execute_test_case(
+                    test_case, plan=plan, variables=row_variables, seed=f"{seed}:{row_index}"
+                )
+            api_samples.extend(executor.api_samples)
+            
+            result.totalSteps += row_result.totalSteps
+            result.executedSteps += row_result.executedSteps
+            result.passedSteps += row_result.passedSteps
+            result.failedSteps += row_result.failedSteps
+            
+            pending_iterations.append({
+                'caseExecutionId': case_execution_id,
+                'suiteExecutionId': suite_execution_id,
+                'rowIndex': row_index,
+                'rowData': row,
+                'status': 'passed' if row_result.success else 'failed',
+                'duration': int((datetime.now() - row_start).total_seconds() * 1000),
+                'passedSteps': row_result.passedSteps,
+                'failedSteps': row_result.failedSteps,
+                'errorMessage': row_result.error,
+            })
+            
+            if not row_result.success:
+                failed_rows.append(row_index)
+                if first_error is None:
+                    first_error = f"第 {row_index + 1} 行: {row_result.error}"
+                for step in row_result.steps:
+                    step_order += 1
+                    pending_steps.append(
+                        self._build_step_row(case_execution_id, row_index, step, step_order, plan)
+                    )
+            
+            if len(pending_iterations) >= batch_size:
+                flush()
+        
+        # 行按需从迭代器中取出，任务数只与并发数有关，与数据集行数无关
+        row_iter = enumerate(rows)
+        
+        async def worker():
+            nonlocal skipped_rows
+            for row_index, row in row_iter:
+                if self.stop_flags.get(suite_execution_id):
+                    skipped_rows += 1
+                    continue
+                await run_row(row_index, row)
+        
+        tasks = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(rows)))]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # 任一行异常（或外部取消）时取消其余 worker，避免关闭连接池时仍有请求在发送
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            await transport.aclose()
+            flush()
+        
+        result.endTime = datetime.now()
+        result.duration = (result.endTime - start_time).total_seconds()
+        passed_rows = len(rows) - len(failed_rows) - skipped_rows
+        if failed_rows:
+            result.success = False
+            result.error = f"{len(failed_rows)}/{len(rows)} 行数据执行失败，{first_error}"
+        elif skipped_rows:
+            result.success = False
+            result.error = f"执行已停止，{skipped_rows}/{len(rows)} 行数据未执行"
+        elif not rows:
+            result.success = False
+            result.error = "数据集为空"
+        
+        skipped_note = f"，{skipped_rows} 行未执行" if skipped_rows else ""
+        print(f"[数据驱动] 完成: {passed_rows}/{len(rows)} 行通过{skipped_note}")
+        return result
+
+    @staticmethod
+    def _build_step_row(
+        case_execution_id: str,
+        row_index: int,
+        step: Dict[str, Any],
+        order: int,
+        plan: ExecutionPlan
+    ) -> Dict[str, Any]:
+        """将失败行的步骤结果转换为 TestStepExecution 行"""
+        request = step.get('request') or {}
+        response = step.get('response') or {}
+        node = plan.nodes_by_id.get(step.get('nodeId'))
+        node_type = step.get('nodeType')
+        
+        def to_json(value):
+            return json_codec.dumps(value) if value is not None else None
+        
+        def to_time(value):
+            return format_datetime_for_prisma(value) if value else None
+        
+        body = response.get('body')
+        return {
+            'id': str(uuid4()),
+            'caseExecutionId': case_execution_id,
+            'nodeId': step.get('nodeId'),
+            'nodeName': f"[第{row_index + 1}行] {step.get('stepName')}",
+            'nodeType': getattr(node_type, 'value', node_type),
+            'nodeSnapshot': to_json(node.dict() if node else {}),
+            'status': 'success' if step.get('success') else 'failed',
+            'order': order,
+            'startTime': to_time(step.get('startTime')),
+            'endTime': to_time(step.get('endTime')),
+            'duration': int((step.get('duration') or 0) * 1000),
+            'createdAt': to_time(datetime.now()),
+            'requestUrl': request.get('url'),
+            'requestMethod': request.get('method'),
+            'requestHeaders': to_json(request.get('headers')),
+            'requestBody': to_json(request.get('body') or request.get('json') or request.get('data')),
+            'responseStatus': response.get('status'),
+            'responseHeaders': to_json(response.get('headers')),
+            'responseBody': body if isinstance(body, str) else to_json(body),
+            'responseTime': response.get('responseTime'),
+            'assertionResults': to_json(step.get('assertions')),
+            'extractedVariables': to_json(step.get('extractedVariables')),
+            'errorMessage': step.get('error'),
+        }
+
     async def _execute_serial(
         self,
         test_cases: List[dict],
         suite_execution_id: str,
         environment_config: Dict[str, Any],
         total_cases: int,
+        case_orders: Optional[List[int]] = None,
     ) -> Dict[str, int]:
-        """串行逐个执行测试用例"""
+        """串行逐个执行测试用例（case_orders 为各用例在套件中的序号，默认按列表位置）"""
         passed_cases = 0
         failed_cases = 0
         total_passed_steps = 0
@@ -321,7 +690,8 @@ class SuiteExecutor:
                 break
 
             info = await self._execute_single_case(
-                test_case_data, idx + 1, total_cases, suite_execution_id, environment_config
+                test_case_data, case_orders[idx] if case_orders else idx + 1,
+                total_cases, suite_execution_id, environment_config
             )
             if info['passed']:
                 passed_cases += 1
@@ -343,26 +713,54 @@ class SuiteExecutor:
         suite_execution_id: str,
         environment_config: Dict[str, Any],
         total_cases: int,
+        case_orders: Optional[List[int]] = None,
     ) -> Dict[str, int]:
-        """并行执行所有测试用例，限制最大并发数为 3"""
-        semaphore = asyncio.Semaphore(3)
+        """
+        并行执行所有测试用例，限制最大并发数为 3（case_orders 同 _execute_serial）
+
+        执行配置 ordering 为 lpt 时按历史耗时估计最长的用例优先启动；
+        caseDependencies 声明的依赖用例在被依赖的用例结束后才开始（等待期间不占用并发名额）。
+        """
+        workers = 3
+        semaphore = asyncio.Semaphore(workers)
+        execution_config = self.execution_configs.get(suite_execution_id) or {}
+        case_ids = [tc['id'] for tc in test_cases]
+        dependencies = normalize_dependencies(case_ids, execution_config.get('caseDependencies'))
+        done_events = {
+            dep: asyncio.Event() for upstream in dependencies.values() for dep in upstream
+        }
+
+        indexed = list(enumerate(test_cases))
+        prediction = None
+        if execution_config.get('ordering') == 'lpt':
+            indexed, prediction = self._lpt_schedule(test_cases, dependencies, workers)
 
         async def _wrapped_execute(idx: int, test_case_data: dict):
-            async with semaphore:
-                return await self._execute_single_case(
-                    test_case_data,
-                    idx + 1,
-                    total_cases,
-                    suite_execution_id,
-                    environment_config,
-                )
+            case_id = test_case_data['id']
+            try:
+                for dep in dependencies.get(case_id, []):
+                    await done_events[dep].wait()
+                async with semaphore:
+                    return await self._execute_single_case(
+                        test_case_data,
+                        case_orders[idx] if case_orders else idx + 1,
+                        total_cases,
+                        suite_execution_id,
+                        environment_config,
+                    )
+            finally:
+                if case_id in done_events:
+                    done_events[case_id].set()
 
         tasks = [
             _wrapped_execute(idx, test_case_data)
-            for idx, test_case_data in enumerate(test_cases)
+            for idx, test_case_data in indexed
         ]
 
+        started = time.monotonic()
         results = await asyncio.gather(*tasks, return_exceptions=True)
+        if prediction:
+            self._report_makespan(suite_execution_id, prediction, (time.monotonic() - started) * 1000)
 
         passed_cases = 0
         failed_cases = 0
@@ -390,6 +788,167 @@ class SuiteExecutor:
             'total_failed_steps': total_failed_steps,
         }
 
+    async def _execute_sharded(
+        self,
+        test_cases: List[dict],
+        suite_execution_id: str,
+        run_mode: str,
+        shard_count: int,
+    ) -> Dict[str, int]:
+        """
+        分片执行：按历史耗时把用例均衡分成多个分片写入 SuiteShard，
+        本进程和其他开启了分片工作进程的执行器一起领取执行，全部分片结束后汇总
+
+        各分片的统计在分片结束时原子累加到套件执行记录。
+        """
+        from shard_worker import ShardWorker, SHARD_POLL_INTERVAL
+
+        execution_config = self.execution_configs.get(suite_execution_id) or {}
+        case_ids = [tc['id'] for tc in test_cases]
+        dependencies = normalize_dependencies(case_ids, execution_config.get('caseDependencies'))
+        history = self.database.get_case_duration_history(case_ids, DURATION_HISTORY_LIMIT)
+        estimates = estimate_durations(case_ids, history)
+        shards = plan_shards(case_ids, estimates, shard_count, dependencies)
+        self.database.create_suite_shards(suite_execution_id, shards, run_mode)
+
+        message = (
+            f"分片执行: {len(test_cases)} 个用例分为 {len(shards)} 个分片，预计耗时 "
+            + ', '.join(f"{shard['predictedDuration']}ms" for shard in shards)
+        )
+        logger.info(f"🧩 {message}")
+        self.database.create_execution_log(
+            level='info',
+            message=message,
+            suite_execution_id=suite_execution_id,
+            log_type='system',
+            details={'shards': shards}
+        )
+
+        worker = ShardWorker(self.database, self.stop_flags, suite_executor=self)
+        while True:
+            if self.stop_flags.get(suite_execution_id):
+                # 停止状态写入数据库，运行中分片的持有进程续期租约时读取
+                cancelled = self.database.stop_suite_shards(suite_execution_id)
+                if cancelled:
+                    logger.warning(f"🛑 检测到停止信号，已取消 {cancelled} 个未领取的分片")
+            # 本进程也领取分片执行（包括其他进程租约过期的分片）
+            await worker.run_available(suite_execution_id)
+            shard_rows = self.database.get_suite_shards(suite_execution_id)
+            if any(shard['status'] in ('stopping', 'stopped') for shard in shard_rows):
+                # 停止请求可能由其他执行器进程接收，以数据库中的停止状态为准
+                self.stop_flags[suite_execution_id] = True
+            if all(shard['status'] not in ('pending', 'running', 'stopping') for shard in shard_rows):
+                break
+            await asyncio.sleep(SHARD_POLL_INTERVAL)
+
+        return {
+            'passed_cases': sum(shard['passedCases'] for shard in shard_rows),
+            'failed_cases': sum(shard['failedCases'] for shard in shard_rows),
+            'total_passed_steps': sum(shard['passedSteps'] for shard in shard_rows),
+            'total_failed_steps': sum(shard['failedSteps'] for shard in shard_rows),
+        }
+
+    async def execute_shard(
+        self,
+        suite_execution_id: str,
+        suite_id: str,
+        shard: Dict[str, Any],
+        environment_config: Dict[str, Any],
+    ) -> Dict[str, int]:
+        """
+        执行一个分片中的用例（由 ShardWorker 调用，分片可能来自其他执行器进程）
+
+        Returns:
+            分片统计（passed_cases, failed_cases, total_passed_steps, total_failed_steps）
+        """
+        # 发起分片的执行器自己执行分片时，复用套件执行已准备好的配置、API 缓存和前置用例变量
+        owns_state = suite_execution_id not in self.execution_configs
+        if owns_state:
+            suite_data = self.database.get_test_suite(suite_id)
+            self.execution_configs[suite_execution_id] = parse_execution_config(suite_data)
+        try:
+            all_cases = self.database.get_suite_test_cases(suite_id)
+            shard_case_ids = set(shard['caseIds'])
+            selected = [
+                (index + 1, tc) for index, tc in enumerate(all_cases) if tc['id'] in shard_case_ids
+            ]
+            test_cases = [tc for _, tc in selected]
+            case_orders = [order for order, _ in selected]
+            if owns_state:
+                self.api_caches[suite_execution_id] = prefetch_api_infos(
+                    self.database, (tc.get('flowConfig') for tc in test_cases)
+                )
+                # 其他进程各自执行一次前置用例，分片结束时执行对应的后置用例清理本进程创建的数据
+                self._create_fixtures(suite_execution_id, environment_config)
+
+            logger.info(
+                f"🧩 执行分片 #{shard['shardIndex']}: {len(test_cases)} 个用例 (模式: {shard.get('runMode')})"
+            )
+            if shard.get('runMode') == 'parallel':
+                return await self._execute_parallel(
+                    test_cases, suite_execution_id, environment_config, len(all_cases), case_orders
+                )
+            return await self._execute_serial(
+                test_cases, suite_execution_id, environment_config, len(all_cases), case_orders
+            )
+        finally:
+            if owns_state:
+                fixtures = self.fixtures.get(suite_execution_id)
+                if fixtures and fixtures.started:
+                    await self._teardown_fixtures(suite_execution_id)
+                self.execution_configs.pop(suite_execution_id, None)
+                self.api_caches.pop(suite_execution_id, None)
+                self.fixtures.pop(suite_execution_id, None)
+
+    def _lpt_schedule(
+        self,
+        test_cases: List[dict],
+        dependencies: Dict[str, List[str]],
+        workers: int,
+    ):
+        """
+        按历史耗时估计排序用例（最长优先）
+
+        Returns:
+            ([(原始序号, 用例数据)], 预测信息)
+        """
+        case_ids = [tc['id'] for tc in test_cases]
+        history = self.database.get_case_duration_history(case_ids, DURATION_HISTORY_LIMIT)
+        estimates = estimate_durations(case_ids, history)
+        order = lpt_order(case_ids, estimates, dependencies)
+
+        position = {case_id: index for index, case_id in enumerate(case_ids)}
+        indexed = [(position[case_id], test_cases[position[case_id]]) for case_id in order]
+        prediction = {
+            'predictedMakespan': round(predict_makespan(order, estimates, workers, dependencies)),
+            'originalMakespan': round(predict_makespan(case_ids, estimates, workers, dependencies)),
+            'estimatedCases': len(history),
+            'order': [
+                {'testCaseId': case_id, 'estimate': round(estimates[case_id])}
+                for case_id in order
+            ],
+        }
+        logger.info(
+            f"📐 按历史耗时排序（LPT）: 预计总耗时 {prediction['predictedMakespan']}ms，"
+            f"原顺序预计 {prediction['originalMakespan']}ms（{len(history)}/{len(case_ids)} 个用例有历史记录）"
+        )
+        return indexed, prediction
+
+    def _report_makespan(self, suite_execution_id: str, prediction: Dict[str, Any], actual_ms: float) -> None:
+        """记录预测总耗时与实际总耗时的对比"""
+        actual = round(actual_ms)
+        predicted = prediction['predictedMakespan']
+        error = f"{(actual - predicted) / predicted * 100:+.1f}%" if predicted else '-'
+        message = f"并行调度（LPT）: 预计总耗时 {predicted}ms，实际 {actual}ms（偏差 {error}），原顺序预计 {prediction['originalMakespan']}ms"
+        logger.info(f"📐 {message}")
+        self.database.create_execution_log(
+            level='info',
+            message=message,
+            suite_execution_id=suite_execution_id,
+            log_type='system',
+            details={**prediction, 'actualMakespan': actual}
+        )
+
 
 # 测试代码
 if __name__ == '__main__':
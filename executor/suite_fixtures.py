@@ -0,0 +1,155 @@
+"""
+套件级前置/后置用例（fixtures）- 登录等准备流程每次套件执行只运行一次
+
+套件执行配置（TestSuite.executionConfig）示例：
+    {"fixtures": {"setup": ["登录用例ID"], "teardown": ["清理用例ID"], "ttlSeconds": 1500, "share": ["token"]}}
+
+- setup：套件开始时按顺序执行（前一个用例结束时的变量传给下一个），
+  最终的变量注入到每个用例的 VariableManager（用例自身的 flowConfig.variables 之上，数据驱动的行数据之下）
+- ttlSeconds：共享变量的有效期（如令牌过期时间），过期后在下一个用例开始前重新执行 setup，
+  并发执行的用例只会触发一次刷新
+- share：只共享指定的变量名（默认共享 setup 结束时的全部变量）
+- teardown：所有用例结束后执行（无论通过、失败还是被停止），使用共享变量；
+  与用例内的 isCleanup 节点一样，失败只记录日志，不影响套件结果
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from test_executor import TestExecutor
+
+
+def get_fixture_config(execution_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """从套件执行配置中读取 fixtures 配置（未配置 setup/teardown 时返回 None）"""
+    config = (execution_config or {}).get('fixtures')
+    if not isinstance(config, dict):
+        return None
+    if not config.get('setup') and not config.get('teardown'):
+        return None
+    return config
+
+
+class SuiteFixtures:
+    """一次套件执行的前置/后置用例及共享变量"""
+
+    def __init__(
+        self,
+        database,
+        config: Dict[str, Any],
+        suite_execution_id: str,
+        environment_config: Dict[str, Any],
+        api_cache: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Args:
+            database: 数据库实例
+            config: fixtures 配置（见模块说明）
+            suite_execution_id: 测试套件执行ID（日志归属）
+            environment_config: 环境配置
+            api_cache: 执行级 API 信息缓存
+        """
+        self.database = database
+        self.setup_ids: List[str] = list(config.get('setup') or [])
+        self.teardown_ids: List[str] = list(config.get('teardown') or [])
+        self.ttl_seconds: Optional[float] = float(config['ttlSeconds']) if config.get('ttlSeconds') else None
+        self.share: Optional[List[str]] = config.get('share')
+        self.suite_execution_id = suite_execution_id
+        self.environment_config = environment_config
+        self.api_cache = api_cache
+        self._variables: Dict[str, Any] = {}
+        self._fetched_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def started(self) -> bool:
+        """是否已执行过 setup"""
+        return self._fetched_at is not None
+
+    def _is_stale(self) -> bool:
+        if self._fetched_at is None:
+            return True
+        return self.ttl_seconds is not None and time.monotonic() - self._fetched_at >= self.ttl_seconds
+
+    async def variables(self) -> Dict[str, Any]:
+        """
+        获取共享变量（首次调用或过期时执行 setup）
+
+        Raises:
+            Exception: setup 用例执行失败
+        """
+        if not self.setup_ids:
+            return {}
+        if self._is_stale():
+            async with self._lock:
+                if self._is_stale():
+                    refreshing = self._fetched_at is not None
+                    self._variables = await self._run_setup(refreshing)
+                    self._fetched_at = time.monotonic()
+        return dict(self._variables)
+
+    async def _run_setup(self, refreshing: bool) -> Dict[str, Any]:
+        """按顺序执行 setup 用例，返回要共享的变量"""
+        variables: Dict[str, Any] = {}
+        for case_id in self.setup_ids:
+            result = await self._run_case(case_id, variables)
+            if not result.success:
+                raise Exception(f"套件前置用例执行失败: {result.testCaseName}: {result.error}")
+            variables.update((result.variables or {}).get('variables') or {})
+
+        if self.share is not None:
+            variables = {name: variables[name] for name in self.share if name in variables}
+
+        action = '刷新' if refreshing else '执行'
+        self.database.create_execution_log(
+            level='info',
+            message=f'套件前置用例{action}完成，共享变量: {", ".join(variables) or "无"}',
+            suite_execution_id=self.suite_execution_id,
+            log_type='system'
+        )
+        print(f"🔑 套件前置用例{action}完成，共享 {len(variables)} 个变量")
+        return variables
+
+    async def teardown(self) -> None:
+        """执行 teardown 用例（失败只记录日志）"""
+        if not self.teardown_ids:
+            return
+
+        try:
+            variables = await self.variables() if self._fetched_at is not None else {}
+        except Exception as e:
+            print(f"⚠️  刷新共享变量失败，使用过期的变量执行后置用例: {e}")
+            variables = dict(self._variables)
+
+        for case_id in self.teardown_ids:
+            try:
+                result = await self._run_case(case_id, variables)
+                level = 'info' if result.success else 'warning'
+                message = (
+                    f'套件后置用例执行完成: {result.testCaseName}' if result.success
+                    else f'套件后置用例执行失败: {result.testCaseName}: {result.error}'
+                )
+            except Exception as e:
+                level, message = 'warning', f'套件后置用例执行异常: {case_id}: {e}'
+            print(f"🧹 {message}")
+            self.database.create_execution_log(
+                level=level,
+                message=message,
+                suite_execution_id=self.suite_execution_id,
+                log_type='system'
+            )
+
+    async def _run_case(self, case_id: str, variables: Dict[str, Any]):
+        """执行一个前置/后置用例（不生成用例执行记录）"""
+        test_case = self.database.get_test_case_by_id(case_id)
+        if test_case is None:
+            raise Exception(f"套件前置/后置用例不存在: {case_id}")
+
+        async with TestExecutor(
+            timeout=60,
+            database=self.database,
+            environment_config=self.environment_config,
+            suite_execution_id=self.suite_execution_id,
+            api_cache=self.api_cache,
+            keep_step_payloads=False
+        ) as executor:
+            return await executor.execute_test_case(test_case, variables=dict(variables))
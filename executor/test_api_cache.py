@@ -0,0 +1,70 @@
+"""
+测试 API 信息缓存（引用收集、批量预取与缓存失效）
+"""
+import os
+import sqlite3
+import tempfile
+
+from api_cache import ApiInfoCache, collect_api_ids
+from database import Database
+
+
+def _create_temp_db() -> Database:
+    """创建只包含 Api 表的临时数据库"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE Api (
+            id TEXT PRIMARY KEY, name TEXT, method TEXT, url TEXT, path TEXT, domain TEXT,
+            requestHeaders TEXT, requestQuery TEXT, requestBody TEXT
+        )
+    """)
+    conn.commit()
+    conn.close()
+    return Database(path)
+
+
+def test_api_info_cache():
+    """测试 API 信息批量预取与缓存失效"""
+    db = _create_temp_db()
+    try:
+        conn = db.get_connection()
+        conn.executemany(
+            "INSERT INTO Api (id, name, method, url) VALUES (?, ?, 'GET', ?)",
+            [('a1', 'A', 'http://h/a'), ('a2', 'B', 'http://h/b')]
+        )
+        conn.commit()
+        conn.close()
+
+        flow_configs = [
+            {'nodes': [{'type': 'api', 'data': {'apiId': 'a1'}}]},
+            {'nodes': [
+                {'type': 'parallel', 'data': {'apis': [{'apiId': 'a2'}, {'apiId': 'a1'}, {'apiId': 'x'}]}},
+                {'type': 'wait', 'data': {}},
+            ]},
+            None,
+        ]
+        assert collect_api_ids(flow_configs) == ['a1', 'a2', 'x']
+
+        cache = ApiInfoCache(ttl=60)
+        apis = cache.get_many(db, ['a1', 'a2', 'x'])
+        assert sorted(apis) == ['a1', 'a2']
+        assert apis['a1']['url'] == 'http://h/a'
+
+        # 缓存命中时不再查库
+        conn = db.get_connection()
+        conn.execute("UPDATE Api SET url = 'http://h/new' WHERE id = 'a1'")
+        conn.commit()
+        conn.close()
+        assert cache.get(db, 'a1')['url'] == 'http://h/a'
+
+        assert cache.invalidate(['a1']) == 1
+        assert cache.get(db, 'a1')['url'] == 'http://h/new'
+    finally:
+        os.remove(db.db_path)
+
+
+if __name__ == "__main__":
+    test_api_info_cache()
+    print("✅ 所有测试通过")
@@ -0,0 +1,66 @@
+"""
+测试并行用例的历史耗时估计与 LPT 排序
+"""
+from case_ordering import (
+    ewma, estimate_durations, get_shard_count, lpt_order, normalize_dependencies, plan_shards,
+    predict_makespan
+)
+
+
+def test_ewma_estimates():
+    """测试 EWMA 偏向最近的耗时，没有历史的用例使用平均估计"""
+    assert ewma([]) is None
+    assert ewma([100, 200], alpha=0.5) == 150
+    estimates = estimate_durations(['a', 'b', 'c'], {'a': [100], 'b': [300]})
+    assert estimates == {'a': 100, 'b': 300, 'c': 200}
+
+
+def test_lpt_order_and_makespan():
+    """测试最长优先排序缩短预测总耗时，依赖关系保持先后"""
+    case_ids = ['short1', 'short2', 'short3', 'long']
+    estimates = {'short1': 10, 'short2': 10, 'short3': 10, 'long': 100}
+
+    order = lpt_order(case_ids, estimates)
+    assert order[0] == 'long'
+    assert predict_makespan(order, estimates, workers=3) == 100
+    assert predict_makespan(case_ids, estimates, workers=3) == 110
+
+    # 指向后面用例的依赖和套件外的用例被丢弃
+    dependencies = normalize_dependencies(case_ids, {'short1': ['long'], 'x': ['long']})
+    assert dependencies == {}
+    dependencies = normalize_dependencies(case_ids, {'long': ['short1']})
+    order = lpt_order(case_ids, estimates, dependencies)
+    assert order.index('short1') < order.index('long')
+    assert order[0] == 'short1'
+
+
+def test_plan_shards():
+    """测试分片按预计耗时均衡，有依赖关系的用例分在同一分片"""
+    estimates = {'a': 60, 'b': 50, 'c': 40, 'd': 30, 'e': 20}
+    shards = plan_shards(list(estimates), estimates, 2)
+    loads = sorted(shard['predictedDuration'] for shard in shards)
+    assert loads == [90, 110] and sum(loads) == sum(estimates.values())
+    assert sorted(case_id for shard in shards for case_id in shard['caseIds']) == list(estimates)
+
+    shards = plan_shards(list(estimates), estimates, 3, {'e': ['a']})
+    grouped = next(shard for shard in shards if 'a' in shard['caseIds'])
+    assert grouped['caseIds'] == ['a', 'e']
+    # 分片数不超过可分配的用例组数
+    assert len(plan_shards(['a'], estimates, 4)) == 1
+
+
+def test_shard_count_config():
+    """测试分片数配置校验（无效值不分片）"""
+    assert get_shard_count({'shards': 4}) == 4
+    assert get_shard_count({'shards': '3'}) == 3
+    for value in (None, 1, 0, -2, 'abc', [2], {}, True):
+        assert get_shard_count({'shards': value}) == 0
+    assert get_shard_count(None) == 0
+
+
+if __name__ == "__main__":
+    test_ewma_estimates()
+    test_lpt_order_and_makespan()
+    test_plan_shards()
+    test_shard_count_config()
+    print("✅ 所有测试通过")
@@ -0,0 +1,259 @@
+"""
+测试数据驱动执行（数据集解析、按行执行与批量落库）
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from database import Database
+import dataset
+from dataset import get_dataset_config, load_dataset
+from models import TestCase, FlowConfig
+from suite_executor import SuiteExecutor
+
+
+class _LoginHandler(BaseHTTPRequestHandler):
+    """模拟登录接口：密码为 ok 时返回 200，否则返回 401"""
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        status = 200 if query.get('pwd') == ['ok'] else 401
+        body = json.dumps({'user': query.get('user', [''])[0]}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _create_temp_db() -> Database:
+    """创建只包含数据驱动所需最小表结构的临时数据库"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE Api (
+            id TEXT PRIMARY KEY, name TEXT, method TEXT, url TEXT, path TEXT, domain TEXT,
+            requestHeaders TEXT, requestQuery TEXT, requestBody TEXT
+        );
+        CREATE TABLE TestCaseExecution (id TEXT PRIMARY KEY);
+        CREATE TABLE TestStepExecution (
+            id TEXT PRIMARY KEY, caseExecutionId TEXT, nodeId TEXT, nodeName TEXT, nodeType TEXT,
+            nodeSnapshot TEXT, status TEXT, "order" INTEGER, startTime TEXT, endTime TEXT,
+            duration INTEGER, createdAt TEXT, requestUrl TEXT, requestMethod TEXT,
+            requestHeaders TEXT, requestBody TEXT, requestParams TEXT, responseStatus INTEGER,
+            responseHeaders TEXT, responseBody TEXT, responseTime INTEGER,
+            assertionResults TEXT, extractedVariables TEXT, errorMessage TEXT
+        );
+        CREATE TABLE ExecutionLog (
+            id TEXT PRIMARY KEY, timestamp TEXT, stepExecutionId TEXT, caseExecutionId TEXT,
+            suiteExecutionId TEXT, level TEXT, type TEXT, message TEXT, details TEXT,
+            nodeId TEXT, nodeName TEXT, createdAt TEXT
+        );
+        INSERT INTO TestCaseExecution (id) VALUES ('case1');
+    """)
+    conn.commit()
+    conn.close()
+    return Database(path)
+
+
+def _login_case(base: str) -> TestCase:
+    """用例：带 user/pwd 查询参数调用登录接口，断言状态码 200"""
+    return TestCase(
+        id='tc1',
+        name='login',
+        status='active',
+        flowConfig=FlowConfig(
+            nodes=[
+                {'id': 'start', 'type': 'start', 'position': {'x': 0, 'y': 0}, 'data': {}},
+                {'id': 'login', 'type': 'api', 'position': {'x': 0, 'y': 0}, 'data': {
+                    'apiId': 'api1', 'name': '登录', 'method': 'GET',
+                    'url': base + '/login',
+                    'requestConfig': {'queryParams': {
+                        'user': {'valueType': 'variable', 'variable': 'user'},
+                        'pwd': {'valueType': 'variable', 'variable': 'pwd'},
+                    }},
+                    'assertions': [{'field': 'status', 'operator': 'equals', 'expected': 200}],
+                }},
+                {'id': 'end', 'type': 'end', 'position': {'x': 0, 'y': 0}, 'data': {}},
+            ],
+            edges=[
+                {'id': 'e1', 'source': 'start', 'target': 'login'},
+                {'id': 'e2', 'source': 'login', 'target': 'end'},
+            ],
+        )
+    )
+
+
+def test_load_dataset_formats():
+    """测试 CSV / JSONL 数据集解析与配置优先级"""
+    rows = load_dataset({'content': 'user,pwd\na,1\n\nb,2\n'})
+    assert rows == [{'user': 'a', 'pwd': '1'}, {'user': 'b', 'pwd': '2'}]
+
+    rows = load_dataset({'format': 'jsonl', 'content': '{"n": 1}\n\n{"n": 2}\n{"n": 3}', 'maxRows': 2})
+    assert rows == [{'n': 1}, {'n': 2}]
+
+    case_dataset = {'content': 'a\n1'}
+    suite_dataset = {'content': 'b\n2'}
+    assert get_dataset_config({'dataset': case_dataset}, {'dataset': suite_dataset}) is case_dataset
+    assert get_dataset_config({}, {'dataset': suite_dataset}) is suite_dataset
+    assert get_dataset_config({'dataset': {}}, None) is None
+
+
+def test_dataset_path_confined():
+    """测试数据集文件只能从 DATASET_DIR 读取：拒绝绝对路径、.. 和指向目录外的符号链接"""
+    original_dir = dataset.DATASET_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'datasets')
+        os.makedirs(os.path.join(base, 'sub'))
+        with open(os.path.join(base, 'sub', 'ok.csv'), 'w') as f:
+            f.write('user\na\n')
+        secret = os.path.join(tmp, 'secret.csv')
+        with open(secret, 'w') as f:
+            f.write('token\nleaked\n')
+        os.symlink(secret, os.path.join(base, 'link.csv'))
+
+        dataset.DATASET_DIR = base
+        try:
+            assert load_dataset({'path': 'sub/../sub/ok.csv'}) == [{'user': 'a'}]
+            for path in (secret, '../secret.csv', 'sub/../../secret.csv', 'link.csv'):
+                try:
+                    load_dataset({'path': path})
+                except ValueError:
+                    pass
+                else:
+                    raise AssertionError(f'应拒绝数据集路径: {path}')
+        finally:
+            dataset.DATASET_DIR = original_dir
+
+
+def test_data_driven_rows():
+    """测试按行执行：通过行只写汇总，失败行写入完整步骤"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _LoginHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    db = _create_temp_db()
+
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        test_case = _login_case(base)
+        dataset = {'content': 'user,pwd\nu1,ok\nu2,bad\nu3,ok\n', 'concurrency': 2, 'batchSize': 2}
+
+        api_samples = []
+        executor = SuiteExecutor(db)
+        result = asyncio.run(executor._execute_data_driven(
+            test_case, dataset, 'case1', 'exec1', {'baseUrl': None}, api_samples
+        ))
+
+        assert not result.success
+        assert result.error.startswith('1/3')
+        assert result.passedSteps == 2 and result.failedSteps == 1
+        assert len(api_samples) == 3
+
+        conn = db.get_connection()
+        iterations = conn.execute(
+            "SELECT rowIndex, status, rowData FROM DataDrivenIteration ORDER BY rowIndex"
+        ).fetchall()
+        steps = conn.execute("SELECT nodeName, status, responseStatus FROM TestStepExecution").fetchall()
+        conn.close()
+
+        assert [(r['rowIndex'], r['status']) for r in iterations] == [(0, 'passed'), (1, 'failed'), (2, 'passed')]
+        assert json.loads(iterations[1]['rowData']) == {'user': 'u2', 'pwd': 'bad'}
+        assert len(steps) == 1
+        assert steps[0]['nodeName'] == '[第2行] 登录'
+        assert steps[0]['responseStatus'] == 401
+        body = db.get_connection().execute("SELECT responseBody FROM TestStepExecution").fetchone()[0]
+        assert json.loads(body) == {'user': 'u2'}
+    finally:
+        server.shutdown()
+        os.remove(db.db_path)
+
+
+def test_data_driven_stop_and_cancel():
+    """测试停止后未执行的行视为失败，某行异常时取消其余行"""
+    db = _create_temp_db()
+    try:
+        test_case = _login_case('http://127.0.0.1:9')
+        rows = {'content': 'user,pwd\nu1,ok\nu2,ok\nu3,ok\n', 'concurrency': 3}
+
+        executor = SuiteExecutor(db, stop_flags={'exec1': True})
+        result = asyncio.run(executor._execute_data_driven(
+            test_case, rows, 'case1', 'exec1', {'baseUrl': None}, []
+        ))
+        assert not result.success
+        assert '3/3 行数据未执行' in result.error
+
+        executor = SuiteExecutor(db)
+        cancelled = []
+
+        async def fixture_variables(suite_execution_id):
+            if not cancelled:
+                cancelled.append(None)
+                await asyncio.sleep(0.05)
+                raise RuntimeError('row failed')
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return {}
+
+        executor._fixture_variables = fixture_variables
+
+        async def run():
+            try:
+                await executor._execute_data_driven(
+                    test_case, rows, 'case1', 'exec1', {'baseUrl': None}, []
+                )
+            except RuntimeError as e:
+                assert str(e) == 'row failed'
+            else:
+                raise AssertionError('行异常应向上抛出')
+            # 返回前其余行已被取消
+            assert cancelled == [None, True, True]
+
+        asyncio.run(run())
+    finally:
+        os.remove(db.db_path)
+
+
+def test_data_driven_bounded_workers():
+    """测试行由固定数量的 worker 依次取出执行，任务数不随数据集行数增长"""
+    db = _create_temp_db()
+    try:
+        test_case = _login_case('http://127.0.0.1:9')
+        rows = {'content': 'user,pwd\n' + ''.join(f'u{i},ok\n' for i in range(40)), 'concurrency': 2}
+        executor = SuiteExecutor(db)
+        task_counts = []
+
+        async def fixture_variables(suite_execution_id):
+            task_counts.append(len(asyncio.all_tasks()))
+            return {}
+
+        executor._fixture_variables = fixture_variables
+        result = asyncio.run(executor._execute_data_driven(
+            test_case, rows, 'case1', 'exec1', {'baseUrl': None}, []
+        ))
+
+        assert len(task_counts) == 40
+        assert result.error.startswith('40/40')
+        # 主任务 + 2 个 worker
+        assert max(task_counts) <= 3
+    finally:
+        os.remove(db.db_path)
+
+
+if __name__ == "__main__":
+    test_load_dataset_formats()
+    test_dataset_path_confined()
+    test_data_driven_rows()
+    test_data_driven_stop_and_cancel()
+    test_data_driven_bounded_workers()
+    print("✅ 所有测试通过")
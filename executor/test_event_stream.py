@@ -0,0 +1,66 @@
+"""
+测试执行事件流（SSE 推送与普通执行共用 TestExecutor）
+"""
+import asyncio
+
+import httpx
+
+from models import TestCase, FlowConfig
+from test_executor import TestExecutor
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == '/fail':
+        return httpx.Response(500, json={'error': 'boom'})
+    return httpx.Response(200, json={'ok': True})
+
+
+def _node(node_id, node_type='api', **data):
+    return {'id': node_id, 'type': node_type, 'position': {'x': 0, 'y': 0}, 'data': data}
+
+
+def test_iter_events():
+    """测试事件顺序：普通节点失败后发送 error，后置清理节点仍执行，最后发送 complete"""
+    status_200 = [{'field': 'status', 'operator': 'equals', 'expected': 200}]
+    test_case = TestCase(
+        name='events',
+        status='active',
+        flowConfig=FlowConfig(
+            nodes=[
+                _node('start', 'start'),
+                _node('ok', apiId='a1', name='成功', method='GET', url='http://t/ok', assertions=status_200),
+                _node('fail', apiId='a2', name='失败', method='GET', url='http://t/fail', assertions=status_200),
+                _node('clean', apiId='a3', name='清理', method='GET', url='http://t/ok', isCleanup=True),
+                _node('end', 'end'),
+            ],
+            edges=[
+                {'id': 'e1', 'source': 'start', 'target': 'ok'},
+                {'id': 'e2', 'source': 'ok', 'target': 'fail'},
+                {'id': 'e3', 'source': 'fail', 'target': 'clean'},
+                {'id': 'e4', 'source': 'clean', 'target': 'end'},
+            ],
+        )
+    )
+
+    async def run():
+        async with TestExecutor(transport=httpx.MockTransport(_handler)) as executor:
+            return [event async for event in executor.iter_events(test_case)]
+
+    events = asyncio.run(run())
+    assert [e['type'] for e in events] == [
+        'start',
+        'step_start', 'step_complete',
+        'step_start', 'step_error', 'error',
+        'step_start', 'step_complete',
+        'complete',
+    ]
+    assert events[0]['data']['totalSteps'] == 3
+    assert events[2]['data']['response']['body'].text == '{"ok":true}'
+    assert events[6]['data']['nodeName'] == '[清理] 清理' and events[7]['data']['isCleanup']
+    complete = events[-1]['data']
+    assert not complete['success'] and (complete['passedSteps'], complete['failedSteps']) == (2, 1)
+
+
+if __name__ == "__main__":
+    test_iter_events()
+    print("✅ 所有测试通过")
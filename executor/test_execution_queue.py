@@ -0,0 +1,76 @@
+"""
+测试套件执行队列
+"""
+import asyncio
+
+import execution_queue
+from execution_queue import SuiteJobQueue
+
+
+class _FakeSuiteExecutor:
+    """记录执行参数的假执行器"""
+    calls = []
+
+    def __init__(self, database, stop_flags):
+        self.stop_flags = stop_flags
+
+    async def execute_suite(self, suite_execution_id, suite_id, environment_config, run_mode, profile=None):
+        await asyncio.sleep(0.01)
+        _FakeSuiteExecutor.calls.append((suite_execution_id, suite_id, run_mode))
+
+
+def test_submit_deduplicates():
+    """测试同一执行记录不会重复提交，执行结束后清理状态"""
+    original = execution_queue.SuiteExecutor
+    execution_queue.SuiteExecutor = _FakeSuiteExecutor
+    _FakeSuiteExecutor.calls = []
+    try:
+        async def run():
+            stop_flags = {'exec-1': True}
+            queue = SuiteJobQueue(database=None, stop_flags=stop_flags)
+            assert queue.submit('exec-1', 'suite-1', {}, 'parallel')
+            # 提交时清除遗留的停止标志
+            assert 'exec-1' not in stop_flags
+            assert not queue.submit('exec-1', 'suite-1', {}, 'parallel')
+            assert queue.is_running('exec-1')
+            await queue.wait('exec-1')
+            assert not queue.is_running('exec-1')
+            return queue
+
+        asyncio.run(run())
+    finally:
+        execution_queue.SuiteExecutor = original
+
+    assert _FakeSuiteExecutor.calls == [('exec-1', 'suite-1', 'parallel')]
+
+
+def test_global_budget():
+    """测试超出执行预算的提交排队，按提交顺序依次启动"""
+    original = execution_queue.SuiteExecutor
+    execution_queue.SuiteExecutor = _FakeSuiteExecutor
+    _FakeSuiteExecutor.calls = []
+    try:
+        async def run():
+            queue = SuiteJobQueue(database=None, max_concurrent=2, start_interval=0)
+            for i in range(4):
+                assert queue.will_queue() == (i >= 2)
+                queue.submit(f'exec-{i}', f'suite-{i}', {}, 'serial')
+            await asyncio.sleep(0)
+            stats = queue.stats()
+            assert stats['running'] == 2 and stats['queued'] == 2
+            assert queue.is_suite_active('suite-3')
+            for i in range(4):
+                await queue.wait(f'exec-{i}')
+            assert queue.stats()['queued'] == 0 and not queue.running
+
+        asyncio.run(run())
+    finally:
+        execution_queue.SuiteExecutor = original
+
+    assert [call[0] for call in _FakeSuiteExecutor.calls] == ['exec-0', 'exec-1', 'exec-2', 'exec-3']
+
+
+if __name__ == "__main__":
+    test_submit_deduplicates()
+    test_global_budget()
+    print("✅ 所有测试通过")
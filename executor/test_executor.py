@@ -2,8 +2,10 @@
 测试执行器 - 核心执行引擎
 """
 import asyncio
+import time
 import httpx
-from typing import Any, Dict, List, Optional
+import json_codec
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 from datetime import datetime
 from models import (
     TestCase, FlowNode, NodeType, ApiNodeData, ParallelNodeData,
@@ -13,6 +15,17 @@ from variable_manager import VariableManager
 from assertion_engine import AssertionEngine, AssertionResult
 from wait_handler import WaitHandler
 from logger_config import get_logger
+from latency_recorder import latency_recorder
+from metrics import observe_http_request, observe_http_timing
+from request_timing import RequestTiming, format_breakdown
+from tracing import tracer
+from execution_plan import ExecutionPlan, build_execution_order, compile_plan
+from rate_limiter import parse_rate_limits, rate_limiter_registry, resolve_host_limit
+from api_cache import api_info_cache
+from url_template import UrlTemplate, compile_url_template
+from step_event import StepEvent
+from response_body import build_response_context, format_body_preview, read_response
+from runtime_functions import forked_random, seeded_random
 
 # 获取日志器
 logger = get_logger('executor')
@@ -43,7 +56,7 @@ def _sanitize_outgoing_headers(headers: Any) -> None:
 class TestExecutor:
     """测试执行器 - 负责执行测试用例"""
     
-    def __init__(self, timeout: int = 30, database=None, environment_config: Optional[Dict[str, Any]] = None, case_execution_id: Optional[str] = None, suite_execution_id: Optional[str] = None):
+    def __init__(self, timeout: int = 30, database=None, environment_config: Optional[Dict[str, Any]] = None, case_execution_id: Optional[str] = None, suite_execution_id: Optional[str] = None, transport: Optional[httpx.AsyncBaseTransport] = None, api_cache: Optional[Dict[str, Optional[Dict[str, Any]]]] = None, keep_step_payloads: bool = True, event_handler: Optional[Callable[[Dict[str, Any]], Any]] = None, record_latency: bool = True):
         """
         初始化测试执行器
         
@@ -53,14 +66,25 @@ class TestExecutor:
             environment_config: 自定义环境配置（如果提供，优先使用此配置而不是平台设置）
             case_execution_id: 用例执行ID（用于保存步骤执行记录和日志）
             suite_execution_id: 套件执行ID（用于日志关联）
+            transport: 共享的 HTTP 传输层（可选，多个执行器复用同一连接池，由调用方负责关闭）
+            api_cache: 执行级 API 信息缓存（可选，同一次套件执行内的执行器共享，apiId -> API 信息）
+            keep_step_payloads: 执行结果的步骤中是否保留请求/响应数据（步骤记录已落库或只需统计时可关闭以节省内存）
+            event_handler: 执行事件回调（可选，接收 {'type', 'data'} 事件，可以是协程函数），见 iter_events
+            record_latency: 是否把请求耗时计入进程内耗时窗口和 HTTP 指标（压测等合成流量应关闭，避免污染线上统计）
         """
         self.timeout = timeout
+        self.transport = transport
         self.client: Optional[httpx.AsyncClient] = None
         self.database = database
         self.case_execution_id = case_execution_id  # 用例执行ID
         self.suite_execution_id = suite_execution_id  # 套件执行ID
         self.platform_settings = None
         self.config_source = "未配置"  # 配置来源标识
+        self.api_samples: List[Dict[str, Any]] = []  # 接口请求样本（用于接口耗时统计）
+        self.api_cache = api_cache if api_cache is not None else {}
+        self.keep_step_payloads = keep_step_payloads
+        self.event_handler = event_handler
+        self.record_latency = record_latency
         
         # 如果提供了自定义配置，使用它；否则从数据库加载平台设置
         if environment_config:
@@ -79,6 +103,27 @@ class TestExecutor:
                 print(f"[{self.config_source}] Auth Token 启用: {self.platform_settings.get('authTokenEnabled')}")
                 print(f"[{self.config_source}] Session 启用: {self.platform_settings.get('sessionEnabled')}")
     
+        # 按主机限流配置（environment_config.rateLimits 或 otherConfig.rateLimits）
+        self.rate_limits = parse_rate_limits(self.platform_settings)
+        if self.rate_limits:
+            print(f"[{self.config_source}] 已启用请求限流: {self.rate_limits}")
+        
+        # 平台设置中的 BaseURL 和认证信息只解析一次，每次请求直接使用
+        settings = self.platform_settings or {}
+        self.base_url: Optional[str] = settings.get('baseUrl') or None
+        self.auth_token_header: Optional[tuple] = None
+        if settings.get('authTokenEnabled') and settings.get('authTokenKey') and settings.get('authTokenValue'):
+            self.auth_token_header = (settings['authTokenKey'], settings['authTokenValue'])
+        self.session_cookies: Optional[str] = None
+        if settings.get('sessionEnabled'):
+            self.session_cookies = settings.get('sessionCookies') or None
+            if not self.session_cookies:
+                print(f"[{self.config_source}] ⚠️  Session模式已启用，但sessionCookies为空，可能需要测试登录")
+        
+        # 当前执行计划（URL 模板缓存在计划上，多次执行同一用例时复用）
+        self.plan: Optional[ExecutionPlan] = None
+        self._url_templates: Dict[tuple, UrlTemplate] = {}
+    
     async def __aenter__(self):
         """异步上下文管理器入口"""
         # 不传入cookies参数，这样httpx不会维护cookie jar
@@ -87,6 +132,7 @@ class TestExecutor:
             timeout=self.timeout,
             verify=False,  # 禁用 SSL 验证（生产环境应启用）
             follow_redirects=True,  # 支持重定向
+            transport=self.transport,
             # 不传入cookies参数，禁用自动cookie管理
         )
         
@@ -104,16 +150,263 @@ class TestExecutor:
         if self.client:
             await self.client.aclose()
     
-    async def execute_test_case(self, test_case: TestCase) -> ExecutionResult:
+    def _get_api_info(self, api_id: str) -> Optional[Dict[str, Any]]:
+        """获取 API 信息（优先使用执行级缓存，其次进程级缓存）"""
+        if api_id not in self.api_cache:
+            self.api_cache[api_id] = api_info_cache.get(self.database, api_id)
+        return self.api_cache[api_id]
+    
+    def _get_url_template(self, key: str, node_url: str, api_id: Optional[str], keep_query: bool = False) -> UrlTemplate:
+        """
+        获取节点的 URL 模板（按节点和环境编译一次）
+        
+        Args:
+            key: 节点标识（并发节点中的 API 使用 节点ID/API配置ID）
+            node_url: 节点配置的 URL
+            api_id: API ID（用于获取数据库中的完整 URL）
+            keep_query: 是否保留 URL 中的查询参数
+        """
+        db_url = None
+        if self.database and api_id:
+            api_info = self._get_api_info(api_id)
+            if api_info:
+                db_url = api_info.get('url') or None
+        
+        templates = self.plan.url_templates if self.plan is not None else self._url_templates
+        cache_key = (key, node_url, db_url, self.base_url, keep_query)
+        template = templates.get(cache_key)
+        if template is None:
+            template = templates[cache_key] = compile_url_template(node_url, db_url, self.base_url, keep_query)
+        return template
+    
+    def _apply_auth_headers(self, headers: Dict[str, Any]) -> None:
+        """应用平台设置的认证 Token 和 Session Cookies"""
+        if self.auth_token_header:
+            headers[self.auth_token_header[0]] = self.auth_token_header[1]
+        if self.session_cookies:
+            existing_cookie = headers.get('Cookie', '')
+            headers['Cookie'] = f'{existing_cookie}; {self.session_cookies}' if existing_cookie else self.session_cookies
+    
+    def _needs_response_body(self, node_id: str, has_consumers: Any) -> bool:
+        """
+        判断是否需要解码响应体
+        
+        只有节点自身有断言/提取/等待，或后续节点引用该步骤结果时才需要解码；
+        落库、执行结果和执行事件使用 ResponseBody.stored()，不需要解码。
+        """
+        if has_consumers:
+            return True
+        plan = self.plan
+        if plan is None or plan.referenced_steps is None or node_id not in plan.nodes_by_id:
+            return True
+        return node_id in plan.referenced_steps
+    
+    def _stores_response_body(self) -> bool:
+        """执行结果保留响应数据、步骤需要落库或推送执行事件时才需要存储用响应体"""
+        if self.keep_step_payloads or self.event_handler is not None:
+            return True
+        return bool(self.database and self.case_execution_id)
+    
+    async def _send_request(self, api_id: Optional[str], method: str, request_kwargs: Dict[str, Any]):
+        """
+        发送 HTTP 请求并记录接口耗时样本
+        
+        配置了限流时先等待目标主机的限流许可，等待时间不计入请求耗时。
+        响应体流式读取，超过 RESPONSE_MAX_BYTES 时截断并停止下载。
+        
+        请求通过 httpcore 的 trace 扩展记录各阶段耗时（连接、TLS、首字节、下载等）。
+        
+        Returns:
+            (response, body, request_duration, rate_limit_wait, timing) 元组，时间单位均为秒；
+            timing 为各阶段耗时（毫秒，见 request_timing），未经过 httpcore 时为 None
+        """
+        limiter = None
+        rate_limit_wait = 0.0
+        if self.rate_limits:
+            resolved = resolve_host_limit(self.rate_limits, str(request_kwargs.get('url') or ''))
+            if resolved:
+                limiter = rate_limiter_registry.get(*resolved)
+                rate_limit_wait = await limiter.acquire()
+                if rate_limit_wait >= 0.001:
+                    print(f"[限流] {resolved[0]} 等待 {rate_limit_wait * 1000:.0f}ms")
+        
+        timing = RequestTiming()
+        request_start_time = time.perf_counter()
+        try:
+            request = self.client.build_request(**request_kwargs, extensions={'trace': timing})
+            response = await self.client.send(request, stream=True)
+            try:
+                body = await read_response(response)
+            finally:
+                await response.aclose()
+        except Exception as e:
+            request_duration = time.perf_counter() - request_start_time
+            self._record_api_sample(api_id, method, request_kwargs.get('url'), request_duration, None)
+            tracer.record(f"{(method or '').upper()} {request_kwargs.get('url')}", 'http',
+                          request_start_time, request_duration, {'error': str(e)})
+            raise
+        finally:
+            if limiter:
+                limiter.release()
+        request_duration = time.perf_counter() - request_start_time
+        self._record_api_sample(api_id, method, request_kwargs.get('url'),
+                                request_duration, response.status_code)
+        breakdown = timing.breakdown()
+        if self.record_latency:
+            observe_http_timing(str(request_kwargs.get('url') or ''), breakdown)
+        tracer.record(f"{(method or '').upper()} {request_kwargs.get('url')}", 'http',
+                      request_start_time, request_duration, {'status': response.status_code, 'reused': (breakdown or {}).get('reused')})
+        return response, body, request_duration, rate_limit_wait, breakdown
+    
+    def _record_api_sample(self, api_id: Optional[str], method: str, url: str,
+                           request_duration: float, status: Optional[int]) -> None:
+        """记录接口耗时样本（用例级每日统计 + 进程内耗时窗口，关闭 record_latency 时只保留样本）"""
+        duration_ms = int(request_duration * 1000)
+        self.api_samples.append({
+            'apiId': api_id,
+            'method': (method or '').upper(),
+            'duration': duration_ms,
+            'status': status,
+        })
+        if self.record_latency:
+            latency_recorder.record(api_id, method, str(url or ''), duration_ms, status)
+            observe_http_request(str(url or ''), request_duration, status)
+    
+    async def execute_test_case(
+        self,
+        test_case: TestCase,
+        plan: Optional[ExecutionPlan] = None,
+        variables: Optional[Dict[str, Any]] = None,
+        seed: Any = None
+    ) -> ExecutionResult:
         """
         执行测试用例
         
         Args:
             test_case: 测试用例对象
+            plan: 预编译的执行计划（可选，多次执行同一用例时复用）
+            variables: 额外变量（可选，覆盖 flowConfig.variables，如数据驱动的行数据）
+            seed: 运行时函数的随机种子（可选，不提供时自动生成，用于复现随机数据）
             
         Returns:
             执行结果
         """
+        # 单独执行的用例以用例执行ID归属 span；套件内的用例同时归属于套件执行
+        trace_token = tracer.bind(self.case_execution_id)
+        try:
+            with seeded_random(seed) as used_seed, tracer.span(test_case.name, 'case', caseId=test_case.id) as span:
+                print(f"[运行时函数] 随机种子: {used_seed}")
+                result = await self._run_test_case(test_case, plan, variables)
+                span.set(success=result.success, seed=used_seed)
+                return result
+        finally:
+            tracer.unbind(trace_token)
+    
+    async def iter_events(
+        self,
+        test_case: TestCase,
+        plan: Optional[ExecutionPlan] = None,
+        variables: Optional[Dict[str, Any]] = None,
+        seed: Any = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        执行测试用例并逐个产出执行事件
+        
+        事件格式为 {'type': ..., 'data': ...}，type 依次为：
+        start -> (step_start -> step_complete/step_error)* -> [error] -> complete
+        
+        提前停止迭代（如 SSE 客户端断开）时取消执行。
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        previous_handler = self.event_handler
+        self.event_handler = queue.put_nowait
+        task = asyncio.create_task(self.execute_test_case(test_case, plan, variables, seed))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+            # 执行过程中未捕获的异常在这里抛出
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+            self.event_handler = previous_handler
+    
+    async def _emit(self, event_type: str, data: Dict[str, Any]) -> None:
+        """发送执行事件（未设置回调时不做任何事）"""
+        if self.event_handler is None:
+            return
+        try:
+            ret = self.event_handler({'type': event_type, 'data': data})
+            if asyncio.iscoroutine(ret):
+                await ret
+        except Exception as e:
+            print(f"⚠️ 执行事件回调失败: {e}")
+    
+    async def _emit_step_start(self, node: FlowNode, position: int, total_steps: int, is_cleanup: bool) -> None:
+        """发送步骤开始事件"""
+        if self.event_handler is None:
+            return
+        name = node.data.get('name', f'步骤 {position + 1}')
+        data = {
+            'stepIndex': position + 1,
+            'totalSteps': total_steps,
+            'nodeId': node.id,
+            'nodeType': node.type.value,
+            'nodeName': f'[清理] {name}' if is_cleanup else name,
+            'startTime': datetime.now().isoformat()
+        }
+        if is_cleanup:
+            data['isCleanup'] = True
+        await self._emit('step_start', data)
+    
+    async def _emit_step_result(self, step_result: StepExecutionResult, position: int, is_cleanup: bool) -> None:
+        """
+        发送步骤完成/失败事件
+        
+        API 步骤的请求/响应直接复用步骤事件的序列化结果
+        """
+        if self.event_handler is None:
+            return
+        data = {
+            'stepIndex': position + 1,
+            'nodeId': step_result.nodeId,
+            'nodeType': step_result.nodeType.value,
+            'nodeName': step_result.stepName,
+            'success': step_result.success,
+            'duration': step_result.duration,
+            'endTime': step_result.endTime.isoformat() if step_result.endTime else None
+        }
+        if is_cleanup:
+            data['isCleanup'] = True
+        
+        event = step_result.event
+        if step_result.request:
+            data['request'] = event.request_payload() if event is not None else step_result.request
+        if step_result.response:
+            if event is not None and event.response is not None:
+                data['response'] = event.response_payload()
+            else:
+                data['response'] = step_result.response
+        if step_result.extractedVariables:
+            data['extractedVariables'] = step_result.extractedVariables
+        if step_result.assertions:
+            data['assertions'] = step_result.assertions
+        if step_result.error:
+            data['error'] = str(step_result.error)
+        
+        await self._emit('step_complete' if step_result.success else 'step_error', data)
+    
+    async def _run_test_case(
+        self,
+        test_case: TestCase,
+        plan: Optional[ExecutionPlan],
+        variables: Optional[Dict[str, Any]]
+    ) -> ExecutionResult:
+        """执行测试用例（在按种子初始化的随机数上下文中）"""
         start_time = datetime.now()
         
         # 记录测试用例执行开始
@@ -125,12 +418,13 @@ class TestExecutor:
         logger.info(f"{'='*60}")
         
         # 初始化变量管理器
-        variable_manager = VariableManager(
-            test_case.flowConfig.variables or {}
-        )
+        initial_variables = dict(test_case.flowConfig.variables or {})
+        if variables:
+            initial_variables.update(variables)
+        variable_manager = VariableManager(initial_variables)
         
         logger.data_flow(f"初始化变量管理器", data={
-            'variableCount': len(test_case.flowConfig.variables or {})
+            'variableCount': len(initial_variables)
         })
         
         # 初始化断言引擎和等待处理器
@@ -138,7 +432,10 @@ class TestExecutor:
         wait_handler = WaitHandler(variable_manager)
         
         # 解析执行流程（将节点分为普通节点和后置清理节点）
-        execution_order, cleanup_nodes = self._build_execution_order(test_case.flowConfig)
+        if plan is None:
+            plan = compile_plan(test_case.flowConfig)
+        self.plan = plan
+        execution_order, cleanup_nodes = plan.normal_nodes, plan.cleanup_nodes
         
         # 初始化结果（总步数包括普通节点和后置清理节点）
         total_steps = len(execution_order) + len(cleanup_nodes)
@@ -158,9 +455,18 @@ class TestExecutor:
         # 标记是否有普通节点失败
         has_failure = False
         
+        await self._emit('start', {
+            'testCaseId': test_case.id,
+            'testCaseName': test_case.name,
+            'totalSteps': total_steps,
+            'startTime': start_time.isoformat()
+        })
+        
         try:
             # 第一阶段：按顺序执行普通节点
             for idx, node in enumerate(execution_order):
+                await self._emit_step_start(node, idx, total_steps, False)
+                
                 # 创建步骤执行记录（如果有case_execution_id）
                 step_execution_id = None
                 if self.case_execution_id and self.database:
@@ -196,8 +502,10 @@ class TestExecutor:
                     step_execution_id=step_execution_id
                 )
                 
-                result.steps.append(step_result.dict())
+                result.steps.append(self._step_record(step_result))
+                variable_manager.release_step_results(plan.release_after.get(idx, []))
                 result.executedSteps += 1
+                await self._emit_step_result(step_result, idx, False)
                 
                 if step_result.success:
                     result.passedSteps += 1
@@ -206,6 +514,14 @@ class TestExecutor:
                     result.success = False
                     result.error = f"步骤 '{step_result.stepName}' 执行失败: {step_result.error}"
                     has_failure = True
+                    await self._emit('error', {
+                        'message': f"步骤 '{step_result.stepName}' 执行失败",
+                        'error': step_result.error,
+                        'nodeId': node.id,
+                        'executedSteps': result.executedSteps,
+                        'passedSteps': result.passedSteps,
+                        'failedSteps': result.failedSteps
+                    })
                     break  # 遇到失败就停止普通节点的执行
             
             # 第二阶段：执行后置清理节点（无论前面成功或失败都执行）
@@ -226,6 +542,7 @@ class TestExecutor:
                 
                 for idx, node in enumerate(cleanup_nodes):
                     cleanup_idx = len(execution_order) + idx
+                    await self._emit_step_start(node, cleanup_idx, total_steps, True)
                     step_execution_id = None
                     
                     if self.case_execution_id and self.database:
@@ -261,8 +578,10 @@ class TestExecutor:
                         step_execution_id=step_execution_id
                     )
                     
-                    result.steps.append(step_result.dict())
+                    result.steps.append(self._step_record(step_result))
+                    variable_manager.release_step_results(plan.release_after.get(cleanup_idx, []))
                     result.executedSteps += 1
+                    await self._emit_step_result(step_result, cleanup_idx, True)
                     
                     if step_result.success:
                         result.passedSteps += 1
@@ -294,6 +613,7 @@ class TestExecutor:
         except Exception as e:
             result.success = False
             result.error = f"执行异常: {str(e)}"
+            await self._emit('error', {'message': '执行异常', 'error': str(e)})
         
         finally:
             # 记录结束时间和耗时
@@ -301,91 +621,37 @@ class TestExecutor:
             result.duration = (result.endTime - start_time).total_seconds()
             result.variables = variable_manager.get_all_variables()
         
+        await self._emit('complete', {
+            'success': result.success,
+            'executedSteps': result.executedSteps,
+            'passedSteps': result.passedSteps,
+            'failedSteps': result.failedSteps,
+            'totalSteps': total_steps,
+            'variables': result.variables,
+            'endTime': result.endTime.isoformat()
+        })
         return result
     
-    def _build_execution_order(self, flow_config):
+    def _step_record(self, step_result: StepExecutionResult) -> Dict[str, Any]:
         """
-        构建执行顺序
+        执行结果中的步骤记录（按配置去掉请求/响应数据）
         
-        根据节点和边的关系，构建一个有序的执行列表
-        将节点分为普通节点和后置清理节点
+        请求/响应数据直接引用，不随 .dict() 逐层复制
+        """
+        record = step_result.dict(exclude={'request', 'response'})
+        if self.keep_step_payloads:
+            record['request'] = step_result.request
+            record['response'] = step_result.response
+        return record
+    
+    def _build_execution_order(self, flow_config):
+        """
+        构建执行顺序（兼容旧调用，逻辑见 execution_plan.build_execution_order）
         
-        Args:
-            flow_config: 流程图配置
-            
         Returns:
             元组: (普通节点列表, 后置清理节点列表)
         """
-        nodes_dict = {node.id: node for node in flow_config.nodes}
-        edges = flow_config.edges
-        
-        # 构建邻接表
-        graph = {node.id: [] for node in flow_config.nodes}
-        for edge in edges:
-            graph[edge.source].append(edge.target)
-        
-        # 找到起始节点
-        start_nodes = [
-            node for node in flow_config.nodes 
-            if node.type == NodeType.START
-        ]
-        
-        if not start_nodes:
-            return [], []
-        
-        # 从起始节点开始，BFS 遍历
-        all_nodes = []
-        visited = set()
-        queue = [start_nodes[0].id]
-        
-        while queue:
-            node_id = queue.pop(0)
-            
-            if node_id in visited:
-                continue
-            
-            visited.add(node_id)
-            node = nodes_dict.get(node_id)
-            
-            if node and node.type != NodeType.START and node.type != NodeType.END:
-                all_nodes.append(node)
-            
-            # 添加下游节点
-            for next_node_id in graph.get(node_id, []):
-                if next_node_id not in visited:
-                    queue.append(next_node_id)
-        
-        # 分离普通节点和后置清理节点
-        normal_nodes = []
-        cleanup_nodes = []
-        
-        for node in all_nodes:
-            # 检查节点是否标记为后置清理
-            is_cleanup = False
-            
-            try:
-                if node.type == NodeType.API:
-                    # API 节点 - node.data 是字典
-                    is_cleanup = node.data.get('isCleanup', False) if isinstance(node.data, dict) else getattr(node.data, 'isCleanup', False)
-                elif node.type == NodeType.PARALLEL:
-                    # 并行节点 - node.data 是字典
-                    is_cleanup = node.data.get('isCleanup', False) if isinstance(node.data, dict) else getattr(node.data, 'isCleanup', False)
-                
-                if is_cleanup:
-                    cleanup_nodes.append(node)
-                    node_name = node.data.get('name', node.id) if isinstance(node.data, dict) else getattr(node.data, 'name', node.id)
-                    print(f"🧹 检测到后置清理节点: {node_name} (类型: {node.type.value})")
-                else:
-                    normal_nodes.append(node)
-            except Exception as e:
-                print(f"⚠️ 解析节点 {node.id} 的清理标识时出错: {e}")
-                # 出错时视为普通节点
-                normal_nodes.append(node)
-        
-        if cleanup_nodes:
-            print(f"📋 执行计划: {len(normal_nodes)} 个普通节点 + {len(cleanup_nodes)} 个后置清理节点")
-        
-        return normal_nodes, cleanup_nodes
+        return build_execution_order(flow_config)
     
     async def _execute_node(
         self,
@@ -409,6 +675,7 @@ class TestExecutor:
             步骤执行结果
         """
         start_time = datetime.now()
+        trace_start = time.perf_counter()
         
         result = StepExecutionResult(
             stepId=node.id,
@@ -464,6 +731,8 @@ class TestExecutor:
         finally:
             result.endTime = datetime.now()
             result.duration = (result.endTime - start_time).total_seconds()
+            tracer.record(result.stepName, f'node.{getattr(node.type, "value", node.type)}', trace_start,
+                          time.perf_counter() - trace_start, {'nodeId': node.id, 'success': result.success})
             
             # 更新步骤执行记录
             if step_execution_id and self.database:
@@ -534,29 +803,6 @@ class TestExecutor:
             # 解析节点数据
             api_data = ApiNodeData(**node.data)
             
-            # 获取URL - 优先使用节点配置的URL（可能包含占位符）
-            url = api_data.url
-            print(f"[API执行] 节点配置的URL: {url}")
-            
-            # 从数据库获取完整URL的scheme+netloc（host/port）
-            # 无论节点URL是否包含占位符（如 {id}），都尝试拼接
-            if self.database and api_data.apiId:
-                api_info = self.database.get_api_by_id(api_data.apiId)
-                if api_info and api_info.get('url'):
-                    db_url = api_info['url']
-                    print(f"[API执行] 数据库URL: {db_url}")
-
-                    if '{' in url:
-                        # 路径包含占位符：使用数据库URL的scheme+netloc（host/port），保留节点的参数化路径
-                        from urllib.parse import urlparse as _up, urlunparse as _uup
-                        parsed_db = _up(db_url)
-                        parsed_node = _up(url)
-                        url = _uup((parsed_db.scheme, parsed_db.netloc, parsed_node.path, '', '', ''))
-                        print(f"[API执行] 拼接数据库base+节点路径: {url}")
-                    else:
-                        # 路径不包含占位符：直接使用数据库完整URL（原逻辑不变）
-                        url = db_url
-            
             # 解析请求配置
             resolved_config = {}
             if api_data.requestConfig:
@@ -566,78 +812,16 @@ class TestExecutor:
                 )
                 print(f"[API执行] 解析后的请求配置: {resolved_config}")
             
-            # 构建 URL - 替换路径参数
-            if resolved_config.get('pathParams'):
-                print(f"[API执行] 替换前的URL: {url}")
-                print(f"[API执行] 路径参数: {resolved_config['pathParams']}")
-                url = variable_manager.replace_url_params(
-                    url, resolved_config['pathParams']
-                )
-                print(f"[API执行] 替换后的URL: {url}")
-            
-            # 移除 URL 中的查询参数（查询参数将从 queryParams 配置中重新构建）
-            from urllib.parse import urlparse, urlunparse
-            parsed_url = urlparse(url)
-            # 重新构建 URL，不包含查询参数和 fragment
-            url_without_query = urlunparse((
-                parsed_url.scheme,
-                parsed_url.netloc,
-                parsed_url.path,
-                '',  # params (不常用)
-                '',  # query - 移除查询参数
-                ''   # fragment - 移除 fragment
-            ))
-            if url_without_query != url:
-                print(f"[API执行] 移除URL中的查询参数: {url} -> {url_without_query}")
-                url = url_without_query
-            
-            # 应用平台设置 - 拼接或替换 BaseURL
-            if self.platform_settings and self.platform_settings.get('baseUrl'):
-                base_url = self.platform_settings['baseUrl'].rstrip('/')
-                
-                if url.startswith('http://') or url.startswith('https://'):
-                    # URL是完整的，需要替换域名部分
-                    # 提取路径部分（从第三个斜杠开始）
-                    parsed = urlparse(url)
-                    path = parsed.path  # 只保留路径部分，不包含查询参数
-                    
-                    url = f"{base_url}{path}"
-                    print(f"[{self.config_source}] 替换BaseURL后的URL: {url}")
-                else:
-                    # URL是相对路径，直接拼接
-                    url = f"{base_url}/{url.lstrip('/')}"
-                    print(f"[{self.config_source}] 拼接BaseURL后的URL: {url}")
+            # 构建 URL - 合并数据库URL、去掉查询参数、应用BaseURL 已编译为模板，这里只填入路径参数
+            url_template = self._get_url_template(node.id, api_data.url, api_data.apiId)
+            url = url_template.render(resolved_config.get('pathParams'))
+            print(f"[API执行] 请求URL: {url}")
             
             # 构建请求头
             headers = resolved_config.get('headers', {}).copy()
             
-            # 应用平台设置 - 添加认证Token
-            if self.platform_settings and self.platform_settings.get('authTokenEnabled'):
-                auth_key = self.platform_settings.get('authTokenKey')
-                auth_value = self.platform_settings.get('authTokenValue')
-                if auth_key and auth_value:
-                    headers[auth_key] = auth_value
-                    print(f"[{self.config_source}] 添加认证Token: {auth_key}")
-            
-            # 应用平台设置 - 添加Session Cookies
-            if self.platform_settings and self.platform_settings.get('sessionEnabled'):
-                session_cookies = self.platform_settings.get('sessionCookies')
-                print(f"[{self.config_source}] Session模式已启用")
-                print(f"[{self.config_source}] sessionCookies内容: {session_cookies}")
-                if session_cookies:
-                    # 添加到Cookie头（类似requests.Session()自动管理cookies）
-                    existing_cookie = headers.get('Cookie', '')
-                    if existing_cookie:
-                        # 合并已有的cookie和session cookies
-                        headers['Cookie'] = f'{existing_cookie}; {session_cookies}'
-                        print(f"[{self.config_source}] 合并Cookies: 原有={existing_cookie[:50]}... + Session={session_cookies[:50]}...")
-                    else:
-                        headers['Cookie'] = session_cookies
-                    print(f"[{self.config_source}] 添加Session Cookies: {session_cookies[:100]}...")
-                else:
-                    print(f"[{self.config_source}] ⚠️  Session模式已启用，但sessionCookies为空，可能需要测试登录")
-            else:
-                print(f"[{self.config_source}] Session模式未启用或无配置")
+            # 应用平台设置 - 添加认证Token和Session Cookies
+            self._apply_auth_headers(headers)
             
             # 构建完整的 URL（包含查询参数）用于显示
             query_params = resolved_config.get('queryParams', {})
@@ -717,6 +901,9 @@ class TestExecutor:
                     request_data['json'] = body_data
                     print(f"[API执行] 使用 JSON 格式发送请求体")
             
+            # 避免手动 Content-Length 导致协议错误（LocalProtocolError）
+            _sanitize_outgoing_headers(headers)
+            
             # 用于日志显示的请求数据（包含完整 URL）
             result.request = {
                 'method': api_data.method.upper(),
@@ -727,6 +914,9 @@ class TestExecutor:
                 'data': request_data.get('data'),  # form-data 和 x-www-form-urlencoded 的数据
                 'files': request_data.get('files')  # form-data 的文件数据
             }
+            # 步骤事件：请求/响应数据只序列化一次，步骤记录、日志和 SSE 推送共用
+            event = StepEvent(result.request, request_url=request_data['url'])
+            result.event = event
             
             # ========== 详细调试信息 ==========
             print(f"\n{'='*80}")
@@ -764,16 +954,15 @@ class TestExecutor:
                     print(f"  {key}: {value}")
             
             # 显示请求体
-            import json
             if result.request.get('json'):
                 print(f"\n[请求调试] 请求体 (JSON):")
-                print(f"  {json.dumps(result.request['json'], indent=2, ensure_ascii=False)}")
+                print(f"  {json_codec.pretty(result.request['json'])}")
             if result.request.get('data'):
                 print(f"\n[请求调试] 请求体 (表单数据):")
-                print(f"  {json.dumps(result.request['data'], indent=2, ensure_ascii=False)}")
+                print(f"  {json_codec.pretty(result.request['data'])}")
             if result.request.get('files'):
                 print(f"\n[请求调试] 请求体 (文件):")
-                print(f"  {json.dumps(result.request['files'], indent=2, ensure_ascii=False)}")
+                print(f"  {json_codec.pretty(result.request['files'])}")
             
             print(f"{'='*80}\n")
             
@@ -783,32 +972,23 @@ class TestExecutor:
                     request_log = f'{result.request["method"]} {display_url}'
                     # 记录 JSON 格式的请求体
                     if result.request.get('json'):
-                        body_str = json.dumps(result.request["json"], ensure_ascii=False, indent=2)
+                        body_str = json_codec.pretty(result.request["json"])
                         if len(body_str) > 500:
                             body_str = body_str[:500] + '...(已截断)'
                         request_log += f'\n请求体 (JSON): {body_str}'
                     # 记录表单数据
                     if result.request.get('data'):
-                        data_str = json.dumps(result.request["data"], ensure_ascii=False, indent=2)
+                        data_str = json_codec.pretty(result.request["data"])
                         if len(data_str) > 500:
                             data_str = data_str[:500] + '...(已截断)'
                         request_log += f'\n请求体 (表单数据): {data_str}'
                     # 记录文件数据
                     if result.request.get('files'):
-                        files_str = json.dumps(result.request["files"], ensure_ascii=False, indent=2)
+                        files_str = json_codec.pretty(result.request["files"])
                         if len(files_str) > 500:
                             files_str = files_str[:500] + '...(已截断)'
                         request_log += f'\n请求体 (文件): {files_str}'
                     
-                    # 构建请求体对象，包含所有类型的数据
-                    request_body = {}
-                    if result.request.get('json'):
-                        request_body['json'] = result.request.get('json')
-                    if result.request.get('data'):
-                        request_body['data'] = result.request.get('data')
-                    if result.request.get('files'):
-                        request_body['files'] = result.request.get('files')
-                    
                     self.database.create_execution_log(
                         level='info',
                         message=request_log,
@@ -818,13 +998,7 @@ class TestExecutor:
                         node_id=node.id,
                         node_name=node.data.get('name'),
                         log_type='request',
-                        details={
-                            'url': display_url,
-                            'method': result.request['method'],
-                            'headers': dict(headers),
-                            'params': result.request.get('params'),
-                            'body': request_body if request_body else None
-                        }
+                        details=event.request_log_details()
                     )
                 except Exception as e:
                     print(f"⚠️ 记录请求日志失败: {e}")
@@ -837,25 +1011,23 @@ class TestExecutor:
             print(f"[请求调试] 🚀 发送请求到: {display_url}")
             print(f"[请求调试] 使用的认证: Cookie头={bool(headers.get('Cookie'))}, Authorization头={bool(headers.get('Authorization'))}")
             
-            # 避免手动 Content-Length 导致协议错误（LocalProtocolError）
-            _sanitize_outgoing_headers(headers)
-
             # 记录请求开始时间
-            request_start_time = datetime.now()
-            response = await self.client.request(**request_data)
-            request_duration = (datetime.now() - request_start_time).total_seconds()
+            response, body, request_duration, rate_limit_wait, timing = await self._send_request(api_data.apiId, api_data.method, request_data)
             
             logger.http_response(response.status_code, request_duration * 1000, data={
-                'contentLength': len(response.content) if response.content else 0,
+                'contentLength': body.size,
+                'timing': timing,
             })
-            print(f"[请求调试] ✅ 收到响应: {response.status_code}，耗时: {request_duration:.3f}秒")
+            print(f"[请求调试] ✅ 收到响应: {response.status_code}，耗时: {request_duration:.3f}秒 {format_breakdown(timing)}")
             
             # 解析响应
             response_data = {
                 'status': response.status_code,
                 'headers': dict(response.headers),
                 'body': None,
-                'responseTime': int(request_duration * 1000)  # 响应时间（毫秒）
+                'responseTime': int(request_duration * 1000),  # 响应时间（毫秒）
+                'rateLimitWaitMs': int(rate_limit_wait * 1000),  # 限流等待时间（毫秒，不计入响应时间）
+                'timing': timing  # 各阶段耗时（毫秒），未经过 httpcore 时为 None
             }
             
             # 检查响应中的Set-Cookie
@@ -876,12 +1048,19 @@ class TestExecutor:
             else:
                 print(f"  (无cookies)")
             
-            try:
-                response_data['body'] = response.json()
-            except:
-                response_data['body'] = response.text
+            # 只有断言、提取、等待或后续引用需要时才解码响应体；存储用响应体不解码
+            stored_body = None
+            response_context = None
+            if self._needs_response_body(node.id, api_data.assertions or api_data.responseExtract or api_data.wait):
+                response_data['body'] = body.decode()
+            if self._stores_response_body():
+                stored_body = body.stored()
+            if body.truncated:
+                response_data['bodyTruncated'] = True
             
-            result.response = response_data
+            # 超过存储上限时，执行结果中只保留响应体摘要（步骤结果保留完整响应体供后续引用）
+            result.response = response_data if stored_body is response_data['body'] else {**response_data, 'body': stored_body}
+            event.set_response(result.response)
             
             # 保存步骤结果
             variable_manager.set_step_result(node.id, {
@@ -894,25 +1073,8 @@ class TestExecutor:
                 try:
                     print(f"[响应日志] 准备保存响应数据 - stepId: {step_execution_id}, status: {response_data['status']}")
                     
-                    # 先更新步骤执行记录
-                    # 对于form-data和x-www-form-urlencoded，requestBody应该保存data字段
-                    # 对于JSON，requestBody保存json字段
-                    request_body = request_data.get('json')
-                    if not request_body and request_data.get('data'):
-                        request_body = request_data.get('data')
-                    
-                    self.database.update_step_execution(
-                        step_execution_id,
-                        requestUrl=request_data['url'],
-                        requestMethod=request_data['method'],
-                        requestHeaders=request_data.get('headers'),
-                        requestBody=request_body,
-                        requestParams=request_data.get('params'),
-                        responseStatus=response_data['status'],
-                        responseHeaders=response_data.get('headers'),
-                        responseBody=response_data.get('body'),
-                        responseTime=int(request_duration * 1000) if 'request_duration' in locals() else None
-                    )
+                    # 更新步骤执行记录（请求/响应字段复用步骤事件的序列化结果）
+                    self.database.update_step_execution(step_execution_id, **event.step_columns())
                     print(f"[响应日志] ✅ update_step_execution 成功")
                 except Exception as update_error:
                     print(f"⚠️ update_step_execution 失败: {update_error}")
@@ -923,11 +1085,10 @@ class TestExecutor:
                 try:
                     # 记录响应日志
                     response_log = f'收到响应: {response_data["status"]}'
-                    if response_data.get('body'):
-                        body_str = json.dumps(response_data['body'], ensure_ascii=False, indent=2) if isinstance(response_data['body'], (dict, list)) else str(response_data['body'])
-                        if len(body_str) > 500:
-                            body_str = body_str[:500] + '...(已截断)'
-                        response_log += f'\n响应体: {body_str}'
+                    if timing:
+                        response_log += f'\n耗时分解: {format_breakdown(timing)}'
+                    if stored_body:
+                        response_log += f'\n响应体: {format_body_preview(stored_body)}'
                     
                     print(f"[响应日志] 准备创建ExecutionLog - message长度: {len(response_log)}, case_id: {self.case_execution_id}, suite_id: {self.suite_execution_id}")
                     
@@ -940,11 +1101,7 @@ class TestExecutor:
                         node_id=node.id,
                         node_name=node.data.get('name'),
                         log_type='response',
-                        details={
-                            'status': response_data['status'],
-                            'headers': response_data.get('headers'),
-                            'body': response_data.get('body')
-                        }
+                        details=event.response_log_details()
                     )
                     print(f"[响应日志] ✅ create_execution_log 成功 - logId: {log_id}")
                 except Exception as log_error:
@@ -972,7 +1129,7 @@ class TestExecutor:
                     try:
                         var_log = f'提取了 {len(extracted)} 个变量:'
                         for var_name, var_value in extracted.items():
-                            value_str = json.dumps(var_value, ensure_ascii=False) if not isinstance(var_value, str) else var_value
+                            value_str = json_codec.dumps(var_value) if not isinstance(var_value, str) else var_value
                             if len(value_str) > 100:
                                 value_str = value_str[:100] + '...(已截断)'
                             var_log += f'\n  • {var_name} = {value_str}'
@@ -994,22 +1151,12 @@ class TestExecutor:
             # 执行断言
             if api_data.assertions:
                 print(f"[断言] 开始执行节点 {node.id} 的断言，共 {len(api_data.assertions)} 个")
-                print(f"[断言] 响应数据结构: {response_data}")
                 
-                # 构建完整的断言上下文，包含 status, headers 和 body 的展平数据
-                assertion_context = {
-                    'status': response_data['status'],
-                    'headers': response_data.get('headers', {})
-                }
+                # 构建完整的断言上下文，包含 status, headers 和 body 的展平数据（等待条件复用）
+                response_context = build_response_context(response_data)
+                assertion_context = response_context
                 
-                # 如果响应体是字典，将其字段直接放到根层级，同时保留 body 字段
-                if isinstance(response_data.get('body'), dict):
-                    assertion_context.update(response_data['body'])
-                    assertion_context['body'] = response_data['body']
-                else:
-                    assertion_context['body'] = response_data.get('body')
-                
-                print(f"[断言] 断言上下文: {assertion_context}")
+                print(f"[断言] 断言上下文: {str(assertion_context)[:500]}")
                 
                 # 获取断言失败策略
                 from models import AssertionFailureStrategy
@@ -1029,7 +1176,7 @@ class TestExecutor:
                     logger.assertion_result(
                         f"{ar.field} {ar.operator} {ar.expected}",
                         ar.success,
-                        f"实际值: {str(ar.actual)[:50]}" if not ar.success else ""
+                        f"实际值: {str(ar.actual_value)[:50]}" if not ar.success else ""
                     )
                 
                 # 保存断言结果到数据库
@@ -1052,7 +1199,7 @@ class TestExecutor:
                             status_icon = '✅' if ar.success else '❌'
                             log_message += f'\n  {status_icon} {ar.field} {ar.operator} {ar.expected}'
                             if not ar.success:
-                                actual_str = json.dumps(ar.actual, ensure_ascii=False) if not isinstance(ar.actual, str) else ar.actual
+                                actual_str = json_codec.dumps(ar.actual_value) if not isinstance(ar.actual_value, str) else ar.actual_value
                                 if len(actual_str) > 100:
                                     actual_str = actual_str[:100] + '...'
                                 log_message += f' (实际: {actual_str})'
@@ -1099,20 +1246,10 @@ class TestExecutor:
                     if not condition_var.startswith('step_') and not condition_var.startswith('current'):
                         print(f"[等待] 检测到简单字段名，使用当前响应上下文: {condition_var}")
                         
-                        # 构建与断言相同的上下文
-                        wait_context = {
-                            'status': response_data['status'],
-                            'headers': response_data.get('headers', {})
-                        }
+                        # 使用与断言相同的上下文
+                        wait_context = response_context or build_response_context(response_data)
                         
-                        # 如果响应体是字典，将其字段直接放到根层级
-                        if isinstance(response_data.get('body'), dict):
-                            wait_context.update(response_data['body'])
-                            wait_context['body'] = response_data['body']
-                        else:
-                            wait_context['body'] = response_data.get('body')
-                        
-                        print(f"[等待] 等待上下文: {wait_context}")
+                        print(f"[等待] 等待上下文: {str(wait_context)[:500]}")
                         
                         # 使用当前响应上下文执行等待
                         wait_success, wait_error = await self._execute_wait_with_context(
@@ -1361,12 +1498,11 @@ class TestExecutor:
                         log_message = f'断言结果: {passed_count} 通过, {failed_count} 失败'
                         
                         # 列出每个断言的详细结果
-                        import json
                         for ar in assertion_results:
                             status_icon = '✅' if ar.success else '❌'
                             log_message += f'\n  {status_icon} {ar.field} {ar.operator} {ar.expected}'
                             if not ar.success:
-                                actual_str = json.dumps(ar.actual, ensure_ascii=False) if not isinstance(ar.actual, str) else ar.actual
+                                actual_str = json_codec.dumps(ar.actual_value) if not isinstance(ar.actual_value, str) else ar.actual_value
                                 if len(actual_str) > 100:
                                     actual_str = actual_str[:100] + '...'
                                 log_message += f' (实际: {actual_str})'
@@ -1448,18 +1584,24 @@ class TestExecutor:
                     pass
             
             # 创建并发任务（Task对象，可以取消）
+            # 每个分支使用独立的写时复制变量作用域，结束后按声明顺序合并；
+            # 随机数生成器按 节点:API 派生，分支取值不受调度顺序影响
             tasks = []
             task_to_api_map = {}  # 映射Task到API配置
+            branch_scopes = []
             
             for api_config in parallel_data.apis:
-                task = asyncio.create_task(
-                    self._execute_parallel_api(
-                        node.id,
-                        api_config,
-                        variable_manager,
-                        assertion_engine
+                branch_scope = variable_manager.fork()
+                branch_scopes.append((api_config.id, branch_scope))
+                with forked_random(f"{node.id}:{api_config.id}"):
+                    task = asyncio.create_task(
+                        self._execute_parallel_api(
+                            node.id,
+                            api_config,
+                            branch_scope,
+                            AssertionEngine(branch_scope)
+                        )
                     )
-                )
                 tasks.append(task)
                 task_to_api_map[task] = api_config
             
@@ -1522,7 +1664,7 @@ class TestExecutor:
                                             'api_id': api_config.id,
                                             'api_name': api_config.name,
                                             'request': api_result.get('request'),
-                                            'response': api_result.get('response'),
+                                            'response': api_result.get('storedResponse', api_result.get('response')),
                                             'assertions': api_result.get('assertions', [])
                                         }
                                     )
@@ -1652,6 +1794,9 @@ class TestExecutor:
                     else:
                         parallel_results[api_config.id] = api_result.get('response')
             
+            # 合并各分支提取的变量（与完成顺序无关，冲突时按声明顺序后者生效）
+            scope_conflicts = variable_manager.merge_scopes(branch_scopes)
+            
             # 将所有并发API的响应存储到变量管理器
             variable_manager.set_step_result(node.id, {
                 'parallel': parallel_results
@@ -1662,6 +1807,8 @@ class TestExecutor:
                 'parallel': parallel_results,
                 'logs': parallel_logs
             }
+            if scope_conflicts:
+                result.response['variableConflicts'] = scope_conflicts
             if not all_success:
                 result.error = "; ".join(errors)
             
@@ -1728,12 +1875,12 @@ class TestExecutor:
         elif not api_result.get('success', False):
             api_log['error'] = api_result.get('error', 'Unknown')
             api_log['request'] = api_result.get('request')
-            api_log['response'] = api_result.get('response')
+            api_log['response'] = api_result.get('storedResponse', api_result.get('response'))
             api_log['assertions'] = api_result.get('assertions', [])
         else:
             api_log['success'] = True
             api_log['request'] = api_result.get('request')
-            api_log['response'] = api_result.get('response')
+            api_log['response'] = api_result.get('storedResponse', api_result.get('response'))
             api_log['assertions'] = api_result.get('assertions', [])
             api_log['extractedVariables'] = api_result.get('extractedVariables')
         
@@ -1755,62 +1902,18 @@ class TestExecutor:
                     api_config.requestConfig.dict() if hasattr(api_config.requestConfig, 'dict') else api_config.requestConfig
                 )
             
-            # 构建 URL - 先从数据库获取完整URL的scheme+netloc
-            url = api_config.url
-            if self.database and api_config.apiId:
-                api_info = self.database.get_api_by_id(api_config.apiId)
-                if api_info and api_info.get('url'):
-                    db_url = api_info['url']
-                    print(f"[并发API] 数据库URL: {db_url}")
-
-                    if '{' in url:
-                        # 路径包含占位符：使用数据库URL的scheme+netloc，保留参数化路径
-                        from urllib.parse import urlparse as _up2, urlunparse as _uup2
-                        parsed_db = _up2(db_url)
-                        parsed_node = _up2(url)
-                        url = _uup2((parsed_db.scheme, parsed_db.netloc, parsed_node.path, '', '', ''))
-                        print(f"[并发API] 拼接数据库base+节点路径: {url}")
-                    else:
-                        # 路径不包含占位符：直接使用数据库完整URL
-                        url = db_url
-
-            if resolved_config.get('pathParams'):
-                url = variable_manager.replace_url_params(
-                    url, resolved_config['pathParams']
-                )
+            # 构建 URL - 模板按节点和环境编译一次，这里只填入路径参数
+            url_template = self._get_url_template(
+                f"{node_id}/{api_config.id}", api_config.url, api_config.apiId, keep_query=True
+            )
+            url = url_template.render(resolved_config.get('pathParams'))
 
             # 在URL替换后打印日志，显示替换后的实际URL
             print(f"[并发API] 开始执行: {api_config.name or api_config.id} ({api_config.method} {url})")
             
             # 应用平台设置
             headers = resolved_config.get('headers', {}).copy()
-            if self.platform_settings:
-                # BaseURL
-                if self.platform_settings.get('baseUrl'):
-                    base_url = self.platform_settings['baseUrl'].rstrip('/')
-                    if url.startswith('http://') or url.startswith('https://'):
-                        from urllib.parse import urlparse
-                        parsed = urlparse(url)
-                        path = parsed.path
-                        if parsed.query:
-                            path = f"{path}?{parsed.query}"
-                        url = f"{base_url}{path}"
-                    else:
-                        url = f"{base_url}/{url.lstrip('/')}"
-                
-                # 认证Token
-                if self.platform_settings.get('authTokenEnabled'):
-                    auth_key = self.platform_settings.get('authTokenKey')
-                    auth_value = self.platform_settings.get('authTokenValue')
-                    if auth_key and auth_value:
-                        headers[auth_key] = auth_value
-                
-                # Session Cookies
-                if self.platform_settings.get('sessionEnabled'):
-                    session_cookies = self.platform_settings.get('sessionCookies')
-                    if session_cookies:
-                        existing_cookie = headers.get('Cookie', '')
-                        headers['Cookie'] = f'{existing_cookie}; {session_cookies}' if existing_cookie else session_cookies
+            self._apply_auth_headers(headers)
             
             # 清空客户端的cookie jar
             self.client.cookies.clear()
@@ -1859,22 +1962,31 @@ class TestExecutor:
             _sanitize_outgoing_headers(headers)
 
             # 发送请求
-            request_start_time = datetime.now()
-            response = await self.client.request(**request_kwargs)
-            request_duration = (datetime.now() - request_start_time).total_seconds()
+            response, body, request_duration, rate_limit_wait, timing = await self._send_request(api_config.apiId, api_config.method, request_kwargs)
             
             # 解析响应
             response_data = {
                 'status': response.status_code,
                 'headers': dict(response.headers),
                 'body': None,
-                'responseTime': int(request_duration * 1000)  # 响应时间（毫秒）
+                'responseTime': int(request_duration * 1000),  # 响应时间（毫秒）
+                'rateLimitWaitMs': int(rate_limit_wait * 1000),  # 限流等待时间（毫秒，不计入响应时间）
+                'timing': timing  # 各阶段耗时（毫秒），未经过 httpcore 时为 None
             }
             
-            try:
-                response_data['body'] = response.json()
-            except:
-                response_data['body'] = response.text
+            # 只有断言、提取、等待或后续引用需要时才解码响应体；存储用响应体不解码
+            if self._needs_response_body(node_id, api_config.assertions or api_config.responseExtract or api_config.wait):
+                response_data['body'] = body.decode()
+            if body.truncated:
+                response_data['bodyTruncated'] = True
+            response_context = None
+            
+            # 日志中使用的响应（未解码时保存原始文本，超过存储上限时只保留响应体摘要）
+            stored_response = response_data
+            if self._stores_response_body():
+                stored_body = body.stored()
+                if stored_body is not response_data['body']:
+                    stored_response = {**response_data, 'body': stored_body}
             
             print(f"[并发API] 请求成功: {api_config.name or api_config.id}, 状态码: {response.status_code}")
             
@@ -1906,18 +2018,9 @@ class TestExecutor:
             if api_config.assertions:
                 print(f"[并发API] 开始执行断言，共 {len(api_config.assertions)} 个")
                 
-                # 构建断言上下文（与主API节点逻辑一致）
-                assertion_context = {
-                    'status': response_data['status'],
-                    'headers': response_data.get('headers', {})
-                }
-                
-                # 如果响应体是字典，将其字段直接放到根层级
-                if isinstance(response_data.get('body'), dict):
-                    assertion_context.update(response_data['body'])
-                    assertion_context['body'] = response_data['body']
-                else:
-                    assertion_context['body'] = response_data.get('body')
+                # 构建断言上下文（与主API节点逻辑一致，等待条件复用）
+                response_context = build_response_context(response_data)
+                assertion_context = response_context
                 
                 # 使用配置的断言失败策略
                 from models import AssertionFailureStrategy
@@ -1940,6 +2043,7 @@ class TestExecutor:
                         'error': error_msg,
                         'request': request_info,
                         'response': response_data,
+                        'storedResponse': stored_response,
                         'assertions': assertion_results_list
                     }
                 
@@ -1956,16 +2060,7 @@ class TestExecutor:
                     
                     if not condition_var.startswith('step_') and not condition_var.startswith('current'):
                         # 使用当前响应上下文
-                        wait_context = {
-                            'status': response_data['status'],
-                            'headers': response_data.get('headers', {})
-                        }
-                        
-                        if isinstance(response_data.get('body'), dict):
-                            wait_context.update(response_data['body'])
-                            wait_context['body'] = response_data['body']
-                        else:
-                            wait_context['body'] = response_data.get('body')
+                        wait_context = response_context or build_response_context(response_data)
                         
                         wait_success, wait_error = await self._execute_wait_with_context(
                             wait_config, wait_context
@@ -1989,6 +2084,7 @@ class TestExecutor:
                         'error': error_msg,
                         'request': request_info,
                         'response': response_data,
+                        'storedResponse': stored_response,
                         'assertions': assertion_results_list
                     }
                 
@@ -1999,6 +2095,7 @@ class TestExecutor:
                 'success': True,
                 'request': request_info,
                 'response': response_data,
+                'storedResponse': stored_response,
                 'assertions': assertion_results_list,
                 'extractedVariables': extracted_variables
             }
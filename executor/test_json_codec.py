@@ -0,0 +1,95 @@
+"""
+测试 JSON 编解码（orjson 与标准库输出一致、RawJson 占位符不与数据冲突、RawJson / 步骤事件只序列化一次）
+"""
+import json
+from datetime import datetime
+
+import json_codec
+from database import sanitize_json
+from json_codec import RawJson
+from sse_executor import SSEExecutor
+from step_event import StepEvent
+
+
+def test_backends_match():
+    """测试两种后端输出完全一致"""
+    data = {
+        'name': '中文',
+        'items': [1, 2.5, None, True, {'nested': 'x'}],
+        1: 'int key',
+        'time': datetime(2024, 1, 2, 3, 4, 5),
+        'big': 2 ** 70,
+        'raw': RawJson.of({'token': 'abc', 'list': [1, 2]}),
+    }
+    outputs = [json_codec.dumps(data)]
+    backend = json_codec.orjson
+    json_codec.orjson = None
+    try:
+        outputs.append(json_codec.dumps(data))
+        stdlib_pretty = json_codec.pretty({'a': [1]})
+    finally:
+        json_codec.orjson = backend
+
+    assert outputs[0] == outputs[-1]
+    assert json.loads(outputs[0]) == {
+        'name': '中文',
+        'items': [1, 2.5, None, True, {'nested': 'x'}],
+        '1': 'int key',
+        'time': '2024-01-02 03:04:05',
+        'big': 2 ** 70,
+        'raw': {'token': 'abc', 'list': [1, 2]},
+    }
+    assert stdlib_pretty == json_codec.pretty({'a': [1]})
+
+
+def test_raw_placeholder_collision():
+    """测试数据中与占位符相同的字符串不会被替换为 RawJson 片段"""
+    data = {'user': '\x00raw0\x00', 'other': '\x00raw:0\x00', 'raw': RawJson('{"a":1}')}
+    backend = json_codec.orjson
+    json_codec.orjson = None
+    try:
+        output = json_codec.dumps(data)
+        nan_output = json_codec.dumps({'v': float('nan')})
+    finally:
+        json_codec.orjson = backend
+
+    assert json.loads(output) == {'user': '\x00raw0\x00', 'other': '\x00raw:0\x00', 'raw': {'a': 1}}
+    # NaN 在两种后端下输出不同（见模块说明）
+    assert nan_output == '{"v":NaN}'
+    if backend is not None:
+        assert json_codec.dumps({'v': float('nan')}) == '{"v":null}'
+
+
+def test_raw_json_reused():
+    """测试 RawJson 写入数据库时直接复用已序列化的文本"""
+    raw = RawJson.of({'body': 'ok\udcff'})
+    first = sanitize_json(raw)
+    assert raw.sanitized and sanitize_json(raw) is first
+    assert json_codec.loads(first) == {'body': 'ok'}
+    assert json_codec.loads(sanitize_json({'wrapped': raw})) == {'wrapped': {'body': 'ok'}}
+
+
+def test_step_event_fragments_shared():
+    """测试步骤记录、日志详情与 SSE 推送共用同一份序列化结果"""
+    request = {'method': 'POST', 'url': 'http://h/login?x=1', 'headers': {'A': '1'},
+               'params': {'x': 1}, 'json': {'user': 'u'}, 'data': None, 'files': None}
+    response = {'status': 200, 'headers': {'B': '2'}, 'body': {'token': 't'}, 'responseTime': 5}
+    event = StepEvent(request, request_url='http://h/login')
+    event.set_response(response)
+
+    columns = event.step_columns()
+    assert columns['requestUrl'] == 'http://h/login'
+    assert columns['responseBody'] is event.response_log_details()['body'] is event.response_payload()['body']
+    assert columns['requestBody'] is event.request_log_details()['body']['json']
+
+    sse = SSEExecutor()
+    message = sse._format_sse({'type': 'step_complete', 'data': {'response': event.response_payload()}})
+    assert json.loads(message[len('data: '):]) == {'type': 'step_complete', 'data': {'response': response}}
+
+
+if __name__ == "__main__":
+    test_backends_match()
+    test_raw_placeholder_collision()
+    test_raw_json_reused()
+    test_step_event_fragments_shared()
+    print("✅ 所有测试通过")
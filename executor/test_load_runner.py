@@ -0,0 +1,88 @@
+"""
+测试压测执行器（迭代次数、错误率、耗时分位数，压测流量不计入全局耗时统计，执行计划只编译一次）
+"""
+import asyncio
+
+import httpx
+
+import test_executor
+from latency_recorder import latency_recorder
+from load_runner import LoadRunner
+from metrics import HTTP_REQUEST_SECONDS
+from models import TestCase, FlowConfig
+
+
+def _case() -> TestCase:
+    return TestCase(
+        id='tc-load',
+        name='load',
+        status='active',
+        flowConfig=FlowConfig(
+            nodes=[
+                {'id': 'start', 'type': 'start', 'position': {'x': 0, 'y': 0}, 'data': {}},
+                {'id': 'get', 'type': 'api', 'position': {'x': 0, 'y': 0}, 'data': {
+                    'apiId': 'api-load', 'name': '查询', 'method': 'GET',
+                    'url': 'http://load.test/items',
+                    'assertions': [{'field': 'status', 'operator': 'equals', 'expected': 200}],
+                }},
+                {'id': 'end', 'type': 'end', 'position': {'x': 0, 'y': 0}, 'data': {}},
+            ],
+            edges=[
+                {'id': 'e1', 'source': 'start', 'target': 'get'},
+                {'id': 'e2', 'source': 'get', 'target': 'end'},
+            ],
+        )
+    )
+
+
+def test_load_run_report():
+    """测试按迭代次数执行：每 4 个请求有 1 个慢速 500，报告统计迭代数、错误率和分位数"""
+    served = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        served.append(request.url.path)
+        if len(served) % 4 == 0:
+            await asyncio.sleep(0.06)
+            return httpx.Response(500, json={'ok': False})
+        return httpx.Response(200, json={'ok': True})
+
+    pending_before = latency_recorder.pending_count()
+    metric_before = HTTP_REQUEST_SECONDS.count('load.test', '2xx') + HTTP_REQUEST_SECONDS.count('load.test', '5xx')
+
+    compiled = []
+    original_compile = test_executor.compile_plan
+
+    def counting_compile(flow_config):
+        compiled.append(flow_config)
+        return original_compile(flow_config)
+
+    runner = LoadRunner(_case(), concurrency=4, iterations=20, transport=httpx.MockTransport(handler))
+    test_executor.compile_plan = counting_compile
+    try:
+        report = asyncio.run(runner.run())
+    finally:
+        test_executor.compile_plan = original_compile
+
+    # 执行计划在创建压测时编译一次，迭代中不再重复编译
+    assert compiled == []
+
+    assert report['status'] == 'completed'
+    assert report['iterations'] == 20 and len(served) == 20
+    assert report['requests'] == 20
+    assert report['requestErrors'] == 5 and report['requestErrorRate'] == 25.0
+    assert report['failedIterations'] == 5 and report['iterationErrorRate'] == 25.0
+
+    latency = report['requestLatency']
+    assert latency['count'] == 20
+    assert latency['p50'] < 50
+    assert latency['p99'] >= 50 and latency['max'] >= 60
+    assert report['steps'][0]['count'] == 20 and report['steps'][0]['failed'] == 5
+
+    # 压测请求不计入进程内耗时窗口和 HTTP 指标
+    assert latency_recorder.pending_count() == pending_before
+    assert HTTP_REQUEST_SECONDS.count('load.test', '2xx') + HTTP_REQUEST_SECONDS.count('load.test', '5xx') == metric_before
+
+
+if __name__ == "__main__":
+    test_load_run_report()
+    print("✅ 所有测试通过")
@@ -0,0 +1,73 @@
+"""
+测试进程内指标的记录与 Prometheus 文本导出
+"""
+import os
+import sqlite3
+import tempfile
+
+import metrics
+from metrics import Histogram, MetricsRegistry, timed_db_write, observe_http_request, HTTP_REQUEST_SECONDS
+from database import Database
+
+
+def test_histogram_render():
+    """测试直方图桶为累积计数，并带 _sum/_count"""
+    registry = MetricsRegistry()
+    hist = registry.histogram('demo_seconds', '示例', ('host',), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 3):
+        hist.observe(value, 'a')
+    registry.gauge('demo_depth', '示例', callback=lambda: 7)
+    registry.counter('demo_total', '示例', ('result',)).inc('passed', amount=3)
+
+    text = registry.render()
+    assert 'demo_seconds_bucket{host="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{host="a",le="1"} 3' in text
+    assert 'demo_seconds_bucket{host="a",le="+Inf"} 4' in text
+    assert 'demo_seconds_sum{host="a"} 4.05' in text
+    assert 'demo_seconds_count{host="a"} 4' in text
+    assert 'demo_depth 7' in text
+    assert 'demo_total{result="passed"} 3' in text
+
+
+def test_http_and_db_write_metrics():
+    """测试请求耗时按主机/状态码类别记录，数据库写入记录批量大小"""
+    observe_http_request('http://API.example.com:8080/users/1', 0.2, 503)
+    observe_http_request('http://api.example.com:8080/users/2', 0.2, None)
+    assert HTTP_REQUEST_SECONDS.count('api.example.com:8080', '5xx') == 1
+    assert HTTP_REQUEST_SECONDS.count('api.example.com:8080', 'error') == 1
+
+    hist = Histogram('rows', '示例', ('operation',), buckets=(1, 10))
+    original, metrics.DB_WRITE_BATCH_SIZE = metrics.DB_WRITE_BATCH_SIZE, hist
+    try:
+        @timed_db_write(batch='rows')
+        def save(self, rows, flag=False):
+            return len(rows)
+
+        assert save(None, [1, 2, 3]) == 3
+        save(None, rows=[1])
+    finally:
+        metrics.DB_WRITE_BATCH_SIZE = original
+    assert hist.count('save') == 2
+
+
+def test_database_ping():
+    """测试健康检查的数据库探测：文件不存在时报错且不新建空库"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dev.db')
+        try:
+            Database(path).ping()
+        except sqlite3.Error:
+            pass
+        else:
+            raise AssertionError('数据库不存在时应报错')
+        assert not os.path.exists(path)
+
+        sqlite3.connect(path).close()
+        Database(path).ping()
+
+
+if __name__ == "__main__":
+    test_histogram_render()
+    test_http_and_db_write_metrics()
+    test_database_ping()
+    print("✅ 所有测试通过")
@@ -0,0 +1,106 @@
+"""
+测试套件执行的性能剖析（cProfile / 采样）与 tracemalloc 用例边界快照
+"""
+import asyncio
+import tempfile
+import tracemalloc
+
+import profiling
+from profiling import ExecutionProfiler, get_artifact_path, list_artifacts, parse_profile_mode
+
+
+def _busy_case(n: int):
+    return [str(i) * 10 for i in range(n)]
+
+
+def test_profile_artifacts():
+    """测试 cProfile 被占用时第二个会话改用采样剖析，两者都写出产物"""
+    assert parse_profile_mode(True) == 'cprofile'
+    assert parse_profile_mode('Sampling') == 'sampling'
+    assert parse_profile_mode('perf') is None
+
+    original_dir = profiling.PROFILE_ARTIFACT_DIR
+    kept = []
+
+    async def run():
+        first = ExecutionProfiler('exec-1', 'cprofile')
+        second = ExecutionProfiler('exec-2', 'cprofile')
+        first.start()
+        second.start()
+        assert second.mode == 'sampling'
+        for index in range(2):
+            kept.append(_busy_case(20000))
+            await asyncio.sleep(0.05)
+            first.case_boundary(f'用例{index}')
+            second.case_boundary(f'用例{index}')
+        return first.stop(), second.stop()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profiling.PROFILE_ARTIFACT_DIR = tmp
+        try:
+            first_artifacts, second_artifacts = asyncio.run(run())
+            assert first_artifacts == ['cprofile.pstats', 'cprofile.txt', 'tracemalloc.txt']
+            assert second_artifacts == ['sampling.folded', 'tracemalloc.txt']
+            assert not tracemalloc.is_tracing()
+
+            assert '_busy_case' in get_artifact_path('exec-1', 'cprofile.txt').read_text(encoding='utf-8')
+            folded = get_artifact_path('exec-2', 'sampling.folded').read_text(encoding='utf-8')
+            assert folded and all(line.rsplit(' ', 1)[1].isdigit() for line in folded.splitlines())
+            memory = get_artifact_path('exec-1', 'tracemalloc.txt').read_text(encoding='utf-8')
+            assert '== 用例0' in memory and 'test_profiling.py' in memory
+
+            assert [a['name'] for a in list_artifacts('exec-2')] == ['sampling.folded', 'tracemalloc.txt']
+            assert get_artifact_path('exec-1', '../exec-2/sampling.folded') is None
+        finally:
+            profiling.PROFILE_ARTIFACT_DIR = original_dir
+
+
+def test_stop_releases_on_write_failure():
+    """测试写入产物失败时仍释放 cProfile 锁和 tracemalloc"""
+    original_dir = profiling.PROFILE_ARTIFACT_DIR
+    with tempfile.NamedTemporaryFile() as blocker:
+        # 产物目录的父路径是普通文件，创建目录必然失败
+        profiling.PROFILE_ARTIFACT_DIR = blocker.name
+        try:
+            profiler = ExecutionProfiler('exec-fail', 'cprofile')
+            profiler.start()
+            try:
+                profiler.stop()
+            except OSError:
+                pass
+            else:
+                raise AssertionError('写入产物失败应向上抛出')
+        finally:
+            profiling.PROFILE_ARTIFACT_DIR = original_dir
+
+    assert not tracemalloc.is_tracing()
+    assert profiling._cprofile_lock.acquire(blocking=False)
+    profiling._cprofile_lock.release()
+
+
+def test_snapshot_interval():
+    """测试按 PROFILE_SNAPSHOT_EVERY 间隔记录用例边界快照"""
+    original_dir = profiling.PROFILE_ARTIFACT_DIR
+    original_every = profiling.PROFILE_SNAPSHOT_EVERY
+    with tempfile.TemporaryDirectory() as tmp:
+        profiling.PROFILE_ARTIFACT_DIR = tmp
+        profiling.PROFILE_SNAPSHOT_EVERY = 2
+        try:
+            profiler = ExecutionProfiler('exec-every', 'sampling')
+            profiler.start()
+            for index in range(5):
+                profiler.case_boundary(f'用例{index}')
+            profiler.stop()
+            memory = get_artifact_path('exec-every', 'tracemalloc.txt').read_text(encoding='utf-8')
+        finally:
+            profiling.PROFILE_ARTIFACT_DIR = original_dir
+            profiling.PROFILE_SNAPSHOT_EVERY = original_every
+
+    assert [line.split('（')[0] for line in memory.splitlines() if line.startswith('==')] == ['== 用例1', '== 用例3']
+
+
+if __name__ == "__main__":
+    test_profile_artifacts()
+    test_stop_releases_on_write_failure()
+    test_snapshot_interval()
+    print("✅ 所有测试通过")
@@ -0,0 +1,84 @@
+"""
+测试请求限流（令牌桶速率、最大并发、同一主机的多个限流配置）
+"""
+import asyncio
+import time
+
+from rate_limiter import RateLimiterRegistry, parse_rate_limits, resolve_host_limit
+
+
+async def _run_requests(registry: RateLimiterRegistry, configs, duration: float = 0.02):
+    """按 configs 依次发起模拟请求，返回各配置的最大并发数"""
+    inflight = {}
+    peak = {}
+
+    async def request(config):
+        key = str(config)
+        limiter = registry.get('api.example.com', config)
+        await limiter.acquire()
+        try:
+            inflight[key] = inflight.get(key, 0) + 1
+            peak[key] = max(peak.get(key, 0), inflight[key])
+            await asyncio.sleep(duration)
+        finally:
+            inflight[key] -= 1
+            limiter.release()
+
+    await asyncio.gather(*(request(config) for config in configs))
+    return peak
+
+
+def test_rate_and_concurrency_enforced():
+    """测试令牌桶限制速率，maxInflight 限制同时进行中的请求数"""
+    registry = RateLimiterRegistry()
+
+    async def run():
+        limiter = registry.get('api.example.com', {'rps': 20, 'burst': 1})
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire()
+            limiter.release()
+        # 第 1 个请求使用初始令牌，其余 4 个各等待 1/20 秒
+        assert time.monotonic() - start >= 0.18
+
+        peak = await _run_requests(registry, [{'maxInflight': 2}] * 6)
+        assert peak == {str({'maxInflight': 2}): 2}
+
+    asyncio.run(run())
+
+
+def test_configs_sharing_host():
+    """测试同一主机的不同配置各自使用独立限流器，交替获取时不互相替换"""
+    registry = RateLimiterRegistry()
+    strict = {'maxInflight': 1}
+    loose = {'maxInflight': 3}
+
+    async def run():
+        first = registry.get('api.example.com', strict)
+        registry.get('api.example.com', loose)
+        assert registry.get('api.example.com', {'maxInflight': 1}) is first
+        assert registry.get('api.example.com', {'rps': 5, 'burst': 2}) is registry.get(
+            'api.example.com', {'burst': 2, 'rps': 5}
+        )
+
+        peak = await _run_requests(registry, [strict, loose] * 6)
+        assert peak[str(strict)] == 1
+        assert peak[str(loose)] == 3
+
+    asyncio.run(run())
+
+
+def test_parse_and_resolve():
+    """测试从 otherConfig 读取配置，主机配置优先于默认配置"""
+    rate_limits = parse_rate_limits({'otherConfig': '{"rateLimits": {"default": {"rps": 20}, '
+                                                    '"hosts": {"api.example.com": {"rps": 5}}}}'})
+    assert resolve_host_limit(rate_limits, 'https://api.example.com/a') == ('api.example.com', {'rps': 5})
+    assert resolve_host_limit(rate_limits, 'http://other:8080/b') == ('http://other:8080', {'rps': 20})
+    assert parse_rate_limits({'rateLimits': {}}) is None
+
+
+if __name__ == "__main__":
+    test_rate_and_concurrency_enforced()
+    test_configs_sharing_host()
+    test_parse_and_resolve()
+    print("✅ 所有测试通过")
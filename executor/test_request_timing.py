@@ -0,0 +1,78 @@
+"""
+测试请求耗时分解（httpcore trace 事件）
+"""
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import httpx
+
+from request_timing import RequestTiming, format_breakdown
+from step_event import StepEvent
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_breakdown_and_connection_reuse():
+    """测试首个请求新建连接（有 connect 阶段），第二个请求复用连接"""
+    server = HTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    async def run():
+        breakdowns = []
+        async with httpx.AsyncClient() as client:
+            for _ in range(2):
+                timing = RequestTiming()
+                request = client.build_request('GET', f'http://127.0.0.1:{server.server_port}/', extensions={'trace': timing})
+                response = await client.send(request, stream=True)
+                await response.aread()
+                await response.aclose()
+                breakdowns.append(timing.breakdown())
+        return breakdowns
+
+    try:
+        first, second = asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    assert first['reused'] is False and 'connect' in first
+    assert second['reused'] is True and 'connect' not in second
+    for phase in ('send', 'ttfb', 'download'):
+        assert second[phase] >= 0
+    assert '复用连接' in format_breakdown(second)
+
+
+def test_mock_transport_has_no_breakdown():
+    """测试不经过 httpcore 的传输不生成耗时分解，步骤记录不写入该列"""
+    async def run():
+        timing = RequestTiming()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(200))) as client:
+            await client.send(client.build_request('GET', 'http://test/', extensions={'trace': timing}))
+        return timing.breakdown()
+
+    assert asyncio.run(run()) is None
+
+    event = StepEvent({'method': 'GET', 'url': 'http://test/'})
+    event.set_response({'status': 200, 'headers': {}, 'body': None, 'timing': None})
+    assert 'timingBreakdown' not in event.step_columns()
+    event.set_response({'status': 200, 'headers': {}, 'body': None, 'timing': {'ttfb': 1.5, 'reused': True}})
+    assert event.step_columns()['timingBreakdown'].text == '{"ttfb":1.5,"reused":true}'
+
+
+if __name__ == "__main__":
+    test_breakdown_and_connection_reuse()
+    test_mock_transport_has_no_breakdown()
+    print("✅ 所有测试通过")
@@ -0,0 +1,179 @@
+"""
+测试响应体流式读取、按需解码与超限截断
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+
+import httpx
+
+import response_body
+from database import Database
+from json_codec import RawJson
+from models import TestCase, FlowConfig
+from response_body import read_response
+from test_executor import TestExecutor
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == '/big':
+        return httpx.Response(200, content=b'x' * 10000)
+    return httpx.Response(200, json={'id': 1, 'name': 'demo'})
+
+
+def test_read_response_capped():
+    """测试超过下载上限时截断并按文本处理"""
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+            response = await client.send(client.build_request('GET', 'http://t/big'), stream=True)
+            body = await read_response(response, max_bytes=1000)
+            await response.aclose()
+            return body
+
+    body = asyncio.run(run())
+    assert body.truncated and body.size == 1000
+    assert body.decode() == 'x' * 1000
+    stored = body.stored()
+    assert stored['truncated'] and stored['downloadTruncated'] and stored['size'] == 1000
+
+
+def test_lazy_decode():
+    """测试没有断言/提取/引用的步骤不解码响应体，超过存储上限时结果只保留摘要"""
+    def node(node_id, node_type='api', **data):
+        return {'id': node_id, 'type': node_type, 'position': {'x': 0, 'y': 0}, 'data': data}
+
+    test_case = TestCase(
+        name='lazy',
+        status='active',
+        flowConfig=FlowConfig(
+            nodes=[
+                node('start', 'start'),
+                node('plain', apiId='a1', name='无断言', method='GET', url='http://t/item'),
+                node('checked', apiId='a2', name='有断言', method='GET', url='http://t/big', assertions=[
+                    {'field': 'status', 'operator': 'equals', 'expected': 200}
+                ]),
+                node('end', 'end'),
+            ],
+            edges=[
+                {'id': 'e1', 'source': 'start', 'target': 'plain'},
+                {'id': 'e2', 'source': 'plain', 'target': 'checked'},
+                {'id': 'e3', 'source': 'checked', 'target': 'end'},
+            ],
+        )
+    )
+
+    decoded = []
+    original_decode = response_body.ResponseBody.decode
+    original_limit = response_body.RESPONSE_STORE_MAX_BYTES
+
+    def counting_decode(self):
+        decoded.append(self.response.url.path)
+        return original_decode(self)
+
+    response_body.ResponseBody.decode = counting_decode
+    response_body.RESPONSE_STORE_MAX_BYTES = 1000
+    try:
+        async def run(keep_step_payloads):
+            async with TestExecutor(transport=httpx.MockTransport(_handler),
+                                    keep_step_payloads=keep_step_payloads) as executor:
+                return await executor.execute_test_case(test_case)
+
+        result = asyncio.run(run(False))
+        lazy_decoded = list(decoded)
+        full_result = asyncio.run(run(True))
+    finally:
+        response_body.ResponseBody.decode = original_decode
+        response_body.RESPONSE_STORE_MAX_BYTES = original_limit
+
+    assert result.success and full_result.success
+    # 只有带断言的步骤解码，执行结果保留响应数据时也不解码无消费者的步骤
+    assert lazy_decoded == ['/big']
+    assert decoded == ['/big', '/big']
+    # 未解码的 JSON 响应以原始文本保存，输出执行结果时解析为普通对象
+    assert isinstance(full_result.steps[0]['response']['body'], RawJson)
+    assert full_result.model_dump(mode='json')['steps'][0]['response']['body'] == {'id': 1, 'name': 'demo'}
+    big = full_result.steps[1]['response']['body']
+    assert big['truncated'] and big['size'] == 10000 and len(big['preview']) == 2000
+
+
+def test_db_run_skips_json_parse():
+    """测试落库执行中没有消费者的步骤不调用 response.json()，数据库中保存原始响应文本"""
+    test_case = TestCase(
+        name='db',
+        status='active',
+        flowConfig=FlowConfig(
+            nodes=[
+                {'id': 'start', 'type': 'start', 'position': {'x': 0, 'y': 0}, 'data': {}},
+                {'id': 'plain', 'type': 'api', 'position': {'x': 0, 'y': 0}, 'data': {
+                    'apiId': 'a1', 'name': '无断言', 'method': 'GET', 'url': 'http://t/item'
+                }},
+                {'id': 'end', 'type': 'end', 'position': {'x': 0, 'y': 0}, 'data': {}},
+            ],
+            edges=[
+                {'id': 'e1', 'source': 'start', 'target': 'plain'},
+                {'id': 'e2', 'source': 'plain', 'target': 'end'},
+            ],
+        )
+    )
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE TestStepExecution (
+            id TEXT PRIMARY KEY, caseExecutionId TEXT, nodeId TEXT, nodeName TEXT, nodeType TEXT,
+            nodeSnapshot TEXT, status TEXT, "order" INTEGER, startTime TEXT, endTime TEXT,
+            duration INTEGER, createdAt TEXT, updatedAt TEXT, requestUrl TEXT, requestMethod TEXT,
+            requestHeaders TEXT, requestBody TEXT, requestParams TEXT, responseStatus INTEGER,
+            responseHeaders TEXT, responseBody TEXT, responseTime INTEGER,
+            assertionResults TEXT, extractedVariables TEXT, errorMessage TEXT, errorStack TEXT, logs TEXT
+        );
+        CREATE TABLE ExecutionLog (
+            id TEXT PRIMARY KEY, timestamp TEXT, stepExecutionId TEXT, caseExecutionId TEXT,
+            suiteExecutionId TEXT, level TEXT, type TEXT, message TEXT, details TEXT,
+            nodeId TEXT, nodeName TEXT, createdAt TEXT
+        );
+        CREATE TABLE PlatformSettings (id TEXT PRIMARY KEY, updatedAt TEXT);
+        CREATE TABLE Api (
+            id TEXT PRIMARY KEY, name TEXT, method TEXT, url TEXT, path TEXT, domain TEXT,
+            requestHeaders TEXT, requestQuery TEXT, requestBody TEXT
+        );
+    """)
+    conn.close()
+
+    parsed = []
+    original_json = httpx.Response.json
+
+    def counting_json(self, **kwargs):
+        parsed.append(self.url.path)
+        return original_json(self, **kwargs)
+
+    httpx.Response.json = counting_json
+    try:
+        async def run():
+            async with TestExecutor(transport=httpx.MockTransport(_handler), database=Database(path),
+                                    case_execution_id='case1', keep_step_payloads=False) as executor:
+                return await executor.execute_test_case(test_case)
+
+        result = asyncio.run(run())
+        conn = sqlite3.connect(path)
+        stored = conn.execute("SELECT responseBody FROM TestStepExecution").fetchone()[0]
+        details = conn.execute("SELECT details FROM ExecutionLog WHERE type = 'response'").fetchone()[0]
+        conn.close()
+    finally:
+        httpx.Response.json = original_json
+        os.remove(path)
+
+    assert result.success
+    assert parsed == []
+    assert json.loads(stored) == {'id': 1, 'name': 'demo'}
+    assert json.loads(details)['body'] == {'id': 1, 'name': 'demo'}
+
+
+if __name__ == "__main__":
+    test_read_response_capped()
+    test_lazy_decode()
+    test_db_run_skips_json_parse()
+    print("✅ 所有测试通过")
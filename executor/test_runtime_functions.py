@@ -0,0 +1,110 @@
+"""
+测试运行时函数模板编译、按种子复现与并发分支的子生成器
+"""
+import asyncio
+import re
+
+from runtime_functions import (
+    compile_template, forked_random, function_registry, pregenerate_rows, register_function,
+    new_seed, resolve_runtime_functions, resolve_value_with_functions, seeded_random
+)
+
+
+def test_compiled_template():
+    """测试模板编译：常量、单个函数（保持类型）、多个函数拼接、未知函数保持原样"""
+    assert resolve_runtime_functions('plain text') == 'plain text'
+    assert resolve_runtime_functions(123) == 123
+
+    value = resolve_runtime_functions('${{randomInt(5, 5)}}')
+    assert value == 5 and isinstance(value, int)
+
+    value = resolve_runtime_functions('${{random(4)}}_${{randomString(3)}}')
+    assert re.fullmatch(r'\d{4}_[A-Za-z0-9]{3}', value)
+
+    assert resolve_runtime_functions('a${{unknownFunc()}}b') == 'a${{unknownFunc()}}b'
+
+    # 同一字符串只编译一次，参数已预先解析
+    template = compile_template('名称${{datetime("YYYY")}}')
+    assert template is compile_template('名称${{datetime("YYYY")}}')
+    assert template.segments[1].args == ('YYYY',)
+
+
+def test_resolve_nested_values():
+    """测试嵌套结构的解析"""
+    body = {'id': '${{randomInt(1, 1)}}', 'tags': ['x', '${{md5("a")}}'], 'n': None}
+    assert resolve_value_with_functions(body) == {
+        'id': 1, 'tags': ['x', '0cc175b9c0f1b6a831c399e269772661'], 'n': None
+    }
+
+
+def test_seeded_and_registered_functions():
+    """测试按种子复现、插件注册函数和数据集批量生成"""
+    template = '${{uuid()}}-${{random(6)}}-${{randomString(4)}}'
+    with seeded_random(42):
+        first = [resolve_runtime_functions(template) for _ in range(3)]
+    with seeded_random(42):
+        second = [resolve_runtime_functions(template) for _ in range(3)]
+    assert first == second and len(set(first)) == 3
+
+    # 未指定种子时 uuid 不依赖伪随机数生成器，自动生成的种子为 128 位
+    with seeded_random() as auto_seed:
+        auto = resolve_runtime_functions('${{uuid()}}')
+    assert new_seed() != new_seed()
+    with seeded_random(auto_seed):
+        assert resolve_runtime_functions('${{uuid()}}') != auto
+
+    @register_function('seq', batch=lambda count, start=1: list(range(start, start + count)))
+    def seq(start=1):
+        return start
+
+    try:
+        assert resolve_runtime_functions('${{seq(7)}}') == 7
+        rows = [{'id': '${{seq(10)}}', 'code': '${{random(3)}}', 'name': 'a'} for _ in range(4)]
+        with seeded_random('s'):
+            assert pregenerate_rows(rows) == 8
+        assert [row['id'] for row in rows] == [10, 11, 12, 13]
+        assert all(len(row['code']) == 3 and row['code'].isdigit() for row in rows)
+        assert rows[0]['name'] == 'a'
+
+        # 批量生成与逐个生成使用同一随机序列时结果一致
+        with seeded_random(1):
+            batch = function_registry.generate_batch('random', 3, 5)
+        with seeded_random(1):
+            single = ''.join(resolve_runtime_functions('${{random(15)}}'))
+        assert ''.join(batch) == single
+    finally:
+        function_registry.unregister('seq')
+
+
+def test_forked_random_per_branch():
+    """测试并发分支使用派生的子生成器，取值与分支完成顺序无关"""
+    async def branch(delay):
+        await asyncio.sleep(delay)
+        return resolve_runtime_functions('${{random(8)}}')
+
+    async def run(delays):
+        tasks = []
+        with seeded_random(7):
+            for key, delay in zip(('a', 'b'), delays):
+                with forked_random(f'node:{key}'):
+                    tasks.append(asyncio.create_task(branch(delay)))
+            # 父上下文不受分支影响
+            parent = resolve_runtime_functions('${{random(8)}}')
+        return await asyncio.gather(*tasks), parent
+
+    first, first_parent = asyncio.run(run((0.01, 0)))
+    second, second_parent = asyncio.run(run((0, 0.01)))
+    assert first == second and first[0] != first[1]
+    assert first_parent == second_parent
+
+    # 未按种子执行时不派生
+    with forked_random('x'):
+        assert len(resolve_runtime_functions('${{random(4)}}')) == 4
+
+
+if __name__ == "__main__":
+    test_compiled_template()
+    test_resolve_nested_values()
+    test_seeded_and_registered_functions()
+    test_forked_random_per_branch()
+    print("✅ 所有测试通过")
@@ -0,0 +1,114 @@
+"""
+测试调度器的错过补跑策略、任务持久化与租约
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+import pytz
+
+from database import Database
+from execution_queue import SuiteJobQueue
+from scheduler import TestSuiteScheduler as SuiteScheduler, CATCHUP_SUFFIX
+
+
+def _suite(suite_id, missed_minutes, **config):
+    now = datetime.now(pytz.UTC)
+    schedule_config = {'type': 'recurring', 'frequency': 'daily', 'time': '02:00', **config}
+    return {
+        'id': suite_id,
+        'name': suite_id,
+        'scheduleConfig': json.dumps(schedule_config),
+        'nextRunTime': (now - timedelta(minutes=missed_minutes)).strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def test_catch_up_missed_runs():
+    """测试重启后错过的调度只补跑一次，超过宽限时间或策略为 skip 时不补跑"""
+    scheduler = SuiteScheduler(database=None, job_queue=SuiteJobQueue(None))
+    now = datetime.now(pytz.UTC)
+
+    assert scheduler._schedule_catch_up(_suite('recent', 10), now)
+    assert not scheduler._schedule_catch_up(_suite('stale', 600), now)
+    assert not scheduler._schedule_catch_up(_suite('skipped', 10, misfirePolicy='skip'), now)
+    assert scheduler._schedule_catch_up(_suite('long-grace', 600, misfireGraceSeconds=86400), now)
+
+    job_ids = sorted(job.id for job in scheduler.scheduler.get_jobs())
+    assert job_ids == [f'long-grace{CATCHUP_SUFFIX}', f'recent{CATCHUP_SUFFIX}']
+
+
+def test_trigger_jitter():
+    """测试周期调度支持按套件配置触发抖动"""
+    scheduler = SuiteScheduler(database=None, job_queue=SuiteJobQueue(None))
+    trigger = scheduler._create_trigger({'type': 'recurring', 'frequency': 'daily', 'time': '02:00', 'jitterSeconds': 300})
+    assert trigger.jitter == 300
+
+
+def _temp_database():
+    db_path = os.path.join(tempfile.mkdtemp(), 'scheduler.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE TestSuite (id TEXT PRIMARY KEY, nextRunTime DATETIME)')
+    conn.executemany('INSERT INTO TestSuite (id) VALUES (?)', [('a',), ('b',)])
+    conn.commit()
+    conn.close()
+    return Database(db_path)
+
+
+def test_persistent_diff_sync():
+    """测试任务持久化到 SQLite，重启后配置未变化的任务不重新注册"""
+    database = _temp_database()
+    suites = [
+        {'id': 'a', 'name': 'a', 'scheduleConfig': json.dumps({'type': 'recurring', 'frequency': 'daily', 'time': '02:00'})},
+        {'id': 'b', 'name': 'b', 'scheduleConfig': json.dumps({'type': 'recurring', 'frequency': 'daily', 'time': '03:00'})},
+    ]
+
+    async def run():
+        first = SuiteScheduler(database, SuiteJobQueue(None))
+        assert first.persistent
+        first.scheduler.start(paused=True)
+        summary = await first.sync_suites(suites)
+        first.scheduler.shutdown(wait=False)
+        assert (summary['added'], summary['unchanged']) == (2, 0)
+
+        # 模拟重启：b 的调度时间变化，a 保持不变
+        second = SuiteScheduler(database, SuiteJobQueue(None))
+        second.scheduler.start(paused=True)
+        changed = [suites[0], {**suites[1], 'scheduleConfig': json.dumps({'type': 'recurring', 'frequency': 'daily', 'time': '04:00'})}]
+        summary = await second.sync_suites(changed)
+        assert (summary['updated'], summary['unchanged'], summary['removed']) == (1, 1, 0)
+        assert summary['unchangedIds'] == {'a'}
+
+        summary = await second.sync_suites(changed[:1])
+        assert summary['removed'] == 1
+        assert [job.id for job in second.scheduler.get_jobs()] == ['a']
+        second.scheduler.shutdown(wait=False)
+
+    asyncio.run(run())
+
+    conn = sqlite3.connect(database.db_path)
+    next_run_times = dict(conn.execute('SELECT id, nextRunTime FROM TestSuite').fetchall())
+    conn.close()
+    assert next_run_times['a'] and next_run_times['b']
+
+
+def test_scheduler_lease():
+    """测试同一时刻只有一个进程持有调度器租约，租约释放或过期后可被接管"""
+    database = _temp_database()
+    assert database.acquire_scheduler_lease('test', 'p1', 30)
+    assert database.acquire_scheduler_lease('test', 'p1', 30)
+    assert not database.acquire_scheduler_lease('test', 'p2', 30)
+    database.release_scheduler_lease('test', 'p1')
+    assert database.acquire_scheduler_lease('test', 'p2', -1)
+    # p2 的租约已过期
+    assert database.acquire_scheduler_lease('test', 'p1', 30)
+
+
+if __name__ == "__main__":
+    test_catch_up_missed_runs()
+    test_trigger_jitter()
+    test_persistent_diff_sync()
+    test_scheduler_lease()
+    print("✅ 所有测试通过")
@@ -0,0 +1,164 @@
+"""
+测试执行统计物化表（耗时直方图与每日统计增量累加）
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+
+from database import Database
+from histogram import LatencyHistogram, bucket_index, bucket_bounds
+from latency_recorder import LatencyRecorder, normalize_path
+
+
+def _create_temp_db() -> Database:
+    """创建只包含统计所需最小表结构的临时数据库"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE TestSuiteExecution (
+            id TEXT PRIMARY KEY, suiteId TEXT, status TEXT, duration INTEGER,
+            endTime TEXT, passedCases INTEGER DEFAULT 0, failedCases INTEGER DEFAULT 0,
+            totalSteps INTEGER DEFAULT 0, passedSteps INTEGER DEFAULT 0, failedSteps INTEGER DEFAULT 0
+        );
+        CREATE TABLE TestCaseExecution (
+            id TEXT PRIMARY KEY, suiteExecutionId TEXT, status TEXT, endTime TEXT,
+            duration INTEGER, passedSteps INTEGER DEFAULT 0, failedSteps INTEGER DEFAULT 0,
+            totalSteps INTEGER DEFAULT 0, errorMessage TEXT
+        );
+        INSERT INTO TestSuiteExecution (id, suiteId, status) VALUES ('exec1', 'suite1', 'running');
+        INSERT INTO TestCaseExecution (id, suiteExecutionId, status) VALUES ('case1', 'exec1', 'running');
+        INSERT INTO TestCaseExecution (id, suiteExecutionId, status) VALUES ('case2', 'exec1', 'running');
+    """)
+    conn.commit()
+    conn.close()
+    return Database(path)
+
+
+def test_histogram_buckets_and_percentiles():
+    """测试直方图桶划分、分位数与序列化"""
+    for value in (0, 1, 15, 16, 17, 100, 1000, 123456):
+        lower, upper = bucket_bounds(bucket_index(value))
+        assert lower <= value < upper
+
+    hist = LatencyHistogram()
+    for value in range(1, 101):
+        hist.record(value)
+    assert hist.count == 100
+    assert hist.min == 1 and hist.max == 100
+    # 相对误差不超过一个子桶（12.5%）
+    assert abs(hist.percentile(50) - 50) <= 50 * 0.125
+    assert abs(hist.percentile(99) - 99) <= 99 * 0.125
+
+    restored = LatencyHistogram.from_json(hist.to_json())
+    assert restored.to_pairs() == hist.to_pairs()
+    assert restored.merge(hist).count == 200
+
+
+def test_daily_stats_accumulation():
+    """测试用例/套件结束时的每日统计累加与幂等"""
+    db = _create_temp_db()
+    try:
+        samples = [
+            {'apiId': 'api1', 'method': 'GET', 'duration': 20, 'status': 200},
+            {'apiId': 'api1', 'method': 'GET', 'duration': 40, 'status': 500},
+            {'apiId': 'api2', 'method': 'POST', 'duration': 10, 'status': None},
+        ]
+        db.update_case_execution('case1', status='passed', duration=100, api_samples=samples)
+        db.update_case_execution('case2', status='failed', duration=300, api_samples=samples[:1])
+        # 重复更新同一结束状态不应重复累加
+        db.update_case_execution('case2', status='failed', duration=300, api_samples=samples[:1])
+
+        db.update_suite_execution('exec1', status='completed', duration=500, passed_cases=1, failed_cases=1)
+        db.update_suite_execution('exec1', status='completed', duration=500)
+
+        suite_stats = db.get_suite_daily_stats('suite1', days=1)
+        assert len(suite_stats) == 1
+        day = suite_stats[0]
+        assert day['runCount'] == 1
+        assert day['passedRuns'] == 0 and day['failedRuns'] == 1
+        assert day['caseCount'] == 2
+        assert day['passedCases'] == 1 and day['failedCases'] == 1
+        assert day['caseDurationSum'] == 400
+        assert day['casePassRate'] == 50.0
+        assert day['caseDuration']['count'] == 2
+        assert day['duration']['max'] == 500
+
+        api_stats = {row['apiId']: row for row in db.get_api_daily_stats(days=1)}
+        assert api_stats['api1']['requestCount'] == 3
+        assert api_stats['api1']['errorCount'] == 1
+        assert api_stats['api1']['maxTime'] == 40
+        assert api_stats['api1']['latency']['count'] == 3
+        assert api_stats['api2']['errorCount'] == 1
+        assert api_stats['api2']['method'] == 'POST'
+    finally:
+        os.remove(db.db_path)
+
+
+def test_concurrent_final_updates_count_once():
+    """测试多个写入方同时写入同一结束状态时统计只累加一次"""
+    db = _create_temp_db()
+    try:
+        samples = [{'apiId': 'api1', 'method': 'GET', 'duration': 20, 'status': 200}]
+        barrier = threading.Barrier(4)
+
+        def finish():
+            barrier.wait()
+            db.update_case_execution('case1', status='passed', duration=100, api_samples=samples)
+            db.update_suite_execution('exec1', status='completed', duration=500, passed_cases=1)
+
+        threads = [threading.Thread(target=finish) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        day = db.get_suite_daily_stats('suite1', days=1)[0]
+        assert day['runCount'] == 1
+        assert day['caseCount'] == 1 and day['passedCases'] == 1
+        assert db.get_api_daily_stats(days=1)[0]['requestCount'] == 1
+    finally:
+        os.remove(db.db_path)
+
+
+def test_latency_recorder_windows():
+    """测试接口耗时窗口的路径规范化、落库合并与分位数查询"""
+    assert normalize_path('http://h/api/users/123/orders?page=1') == '/api/users/{id}/orders'
+    assert normalize_path('/api/items/550e8400-e29b-41d4-a716-446655440000') == '/api/items/{id}'
+    assert normalize_path('') == '/'
+
+    db = _create_temp_db()
+    try:
+        recorder = LatencyRecorder(window_seconds=60)
+        for i in range(10):
+            recorder.record('api1', 'get', f'http://h/users/{i}', 10 + i, 200, timestamp=120)
+        recorder.record('api1', 'GET', 'http://h/users/99', 500, 503, timestamp=130)
+        assert recorder.pending_count() == 1
+        assert recorder.flush(db) == 1
+        assert recorder.pending_count() == 0
+
+        # 同一窗口再次落库时合并
+        recorder.record('api1', 'GET', 'http://h/users/1', 30, 200, timestamp=170)
+        recorder.record('api1', 'GET', 'http://h/users/1', 40, 200, timestamp=200)
+        assert recorder.flush(db) == 2
+
+        stats = db.get_api_latency('api1', since=0, bucket_seconds=60)
+        assert len(stats) == 1
+        entry = stats[0]
+        assert entry['path'] == '/users/{id}'
+        assert entry['method'] == 'GET'
+        assert entry['errorCount'] == 1
+        assert entry['latency']['count'] == 13
+        assert entry['latency']['max'] == 500
+        assert [w['count'] for w in entry['series']] == [12, 1]
+    finally:
+        os.remove(db.db_path)
+
+
+if __name__ == "__main__":
+    test_histogram_buckets_and_percentiles()
+    test_daily_stats_accumulation()
+    test_concurrent_final_updates_count_once()
+    test_latency_recorder_windows()
+    print("✅ 所有测试通过")
@@ -0,0 +1,127 @@
+"""
+测试套件级前置/后置用例的共享变量、过期刷新与后置执行
+"""
+import asyncio
+from types import SimpleNamespace
+
+from suite_fixtures import SuiteFixtures, get_fixture_config
+
+
+class _FakeDatabase:
+    def __init__(self):
+        self.logs = []
+
+    def create_execution_log(self, **kwargs):
+        self.logs.append(kwargs)
+
+
+def _fixtures(config):
+    fixtures = SuiteFixtures(_FakeDatabase(), config, 'exec-1', {})
+    calls = []
+
+    async def run_case(case_id, variables):
+        calls.append((case_id, dict(variables)))
+        await asyncio.sleep(0.01)
+        login_count = sum(1 for c, _ in calls if c == 'login')
+        return SimpleNamespace(
+            success=True, testCaseName=case_id, error=None,
+            variables={'variables': {'token': f't{login_count}', 'userId': 7, 'tmp': 1}}
+        )
+
+    fixtures._run_case = run_case
+    return fixtures, calls
+
+
+def test_setup_runs_once_and_refreshes():
+    """测试并发用例只触发一次 setup，过期后刷新，teardown 使用共享变量"""
+    assert get_fixture_config({'fixtures': {}}) is None
+    config = get_fixture_config({'fixtures': {'setup': ['login'], 'teardown': ['cleanup'], 'share': ['token', 'userId']}})
+    fixtures, calls = _fixtures(config)
+
+    async def run():
+        results = await asyncio.gather(*(fixtures.variables() for _ in range(5)))
+        assert all(r == {'token': 't1', 'userId': 7} for r in results)
+
+        fixtures.ttl_seconds = 0
+        assert (await fixtures.variables())['token'] == 't2'
+
+        fixtures.ttl_seconds = None
+        await fixtures.teardown()
+
+    asyncio.run(run())
+    assert [c for c, _ in calls] == ['login', 'login', 'cleanup']
+    assert calls[-1][1] == {'token': 't2', 'userId': 7}
+
+
+def test_setup_failure_raises():
+    """测试 setup 用例失败时抛出异常，teardown 失败只记录日志"""
+    fixtures = SuiteFixtures(_FakeDatabase(), {'setup': ['login'], 'teardown': ['cleanup']}, 'exec-1', {})
+
+    async def failing(case_id, variables):
+        return SimpleNamespace(success=False, testCaseName=case_id, error='401', variables={})
+
+    fixtures._run_case = failing
+
+    async def run():
+        try:
+            await fixtures.variables()
+        except Exception as e:
+            assert '401' in str(e)
+        else:
+            raise AssertionError('setup 失败应抛出异常')
+        await fixtures.teardown()
+
+    asyncio.run(run())
+    assert fixtures.database.logs[-1]['level'] == 'warning'
+
+
+class _ShardDatabase(_FakeDatabase):
+    def get_test_suite(self, suite_id):
+        return {'executionConfig': {'fixtures': {'setup': ['login'], 'teardown': ['cleanup']}}}
+
+    def get_suite_test_cases(self, suite_id):
+        return [{'id': 'c1', 'flowConfig': None}, {'id': 'c2', 'flowConfig': None}]
+
+
+def test_shard_worker_tears_down_own_setup():
+    """测试其他进程执行分片时，执行过前置用例的分片结束后执行后置用例"""
+    from suite_executor import SuiteExecutor as _SuiteExecutor
+
+    executor = _SuiteExecutor(_ShardDatabase())
+    calls = []
+
+    async def run_case(case_id, variables):
+        calls.append(case_id)
+        return SimpleNamespace(
+            success=True, testCaseName=case_id, error=None, variables={'variables': {'token': 't'}}
+        )
+
+    async def execute_serial(test_cases, suite_execution_id, environment_config, total, orders):
+        fixtures = executor.fixtures[suite_execution_id]
+        fixtures._run_case = run_case
+        if test_cases[0]['id'] == 'c1':
+            await executor._fixture_variables(suite_execution_id)
+        return {'passed_cases': len(test_cases)}
+
+    executor._execute_serial = execute_serial
+
+    async def run():
+        shard = {'shardIndex': 0, 'caseIds': ['c1'], 'runMode': 'serial'}
+        await executor.execute_shard('exec-1', 'suite-1', shard, {})
+        assert calls == ['login', 'cleanup']
+        assert not executor.fixtures and not executor.execution_configs
+
+        # 分片中没有用例使用前置变量时，不执行后置用例
+        calls.clear()
+        shard = {'shardIndex': 1, 'caseIds': ['c2'], 'runMode': 'serial'}
+        await executor.execute_shard('exec-1', 'suite-1', shard, {})
+        assert calls == []
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_setup_runs_once_and_refreshes()
+    test_setup_failure_raises()
+    test_shard_worker_tears_down_own_setup()
+    print("✅ 所有测试通过")
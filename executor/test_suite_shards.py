@@ -0,0 +1,169 @@
+"""
+测试套件分片在多个进程间领取与结果合并
+"""
+import asyncio
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+
+import shard_worker
+from database import Database
+from shard_worker import ShardWorker
+
+SHARD_COUNT = 8
+
+
+def _claim_all(db_path: str, owner: str, queue) -> None:
+    """子进程：领取分片直到没有剩余，每个分片记 1 个通过用例"""
+    database = Database(db_path)
+    claimed = []
+    while True:
+        shard = database.claim_suite_shard(owner, 30, 'exec-1')
+        if not shard:
+            break
+        database.finish_suite_shard(shard['id'], owner, 'completed', 1, passed_cases=1, passed_steps=2)
+        claimed.append(shard['shardIndex'])
+    queue.put(claimed)
+
+
+def _temp_database() -> Database:
+    db_path = os.path.join(tempfile.mkdtemp(), 'shards.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        'CREATE TABLE TestSuiteExecution (id TEXT PRIMARY KEY, suiteId TEXT, passedCases INTEGER DEFAULT 0, '
+        'failedCases INTEGER DEFAULT 0, passedSteps INTEGER DEFAULT 0, failedSteps INTEGER DEFAULT 0)'
+    )
+    conn.execute("INSERT INTO TestSuiteExecution (id, suiteId) VALUES ('exec-1', 'suite-1')")
+    conn.commit()
+    conn.close()
+    return Database(db_path)
+
+
+def test_shards_claimed_once_across_processes():
+    """测试多个进程同时领取时每个分片只执行一次，统计原子累加到套件执行记录"""
+    database = _temp_database()
+    database.create_suite_shards(
+        'exec-1', [{'caseIds': [f'case-{i}'], 'predictedDuration': i} for i in range(SHARD_COUNT)]
+    )
+
+    queue = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=_claim_all, args=(database.db_path, f'worker-{i}', queue))
+        for i in range(4)
+    ]
+    for process in processes:
+        process.start()
+    claimed = [index for _ in processes for index in queue.get(timeout=30)]
+    for process in processes:
+        process.join(timeout=30)
+
+    assert sorted(claimed) == list(range(SHARD_COUNT))
+    execution = database.get_suite_execution('exec-1')
+    assert execution['passedCases'] == SHARD_COUNT and execution['passedSteps'] == SHARD_COUNT * 2
+    assert all(shard['status'] == 'completed' for shard in database.get_suite_shards('exec-1'))
+
+
+def test_expired_shard_reclaimed():
+    """测试租约过期的分片可被其他进程重新领取，原领取者的结果不再累加"""
+    database = _temp_database()
+    database.create_suite_shards('exec-1', [{'caseIds': ['case-0'], 'predictedDuration': 0}])
+
+    first = database.claim_suite_shard('dead-worker', -1, 'exec-1')
+    second = database.claim_suite_shard('live-worker', 30, 'exec-1')
+    assert second['id'] == first['id'] and second['attempts'] == 2
+    assert not database.finish_suite_shard(first['id'], 'dead-worker', 'completed', 1, passed_cases=1)
+    assert database.finish_suite_shard(second['id'], 'live-worker', 'completed', 1, passed_cases=1)
+    assert database.get_suite_execution('exec-1')['passedCases'] == 1
+
+
+def test_stop_state_in_database():
+    """测试停止状态写入数据库：未领取的分片直接停止，运行中的分片续期时得知停止"""
+    database = _temp_database()
+    database.create_suite_shards('exec-1', [
+        {'caseIds': ['case-0'], 'predictedDuration': 2},
+        {'caseIds': ['case-1'], 'predictedDuration': 1},
+    ])
+    running = database.claim_suite_shard('worker', 30, 'exec-1')
+    assert database.renew_suite_shard_lease(running['id'], 'worker', 30) == 'running'
+
+    assert database.stop_suite_shards('exec-1') == 1
+    assert database.renew_suite_shard_lease(running['id'], 'worker', 30) == 'stopping'
+    assert database.renew_suite_shard_lease(running['id'], 'other', 30) is None
+    assert database.finish_suite_shard(running['id'], 'worker', 'stopped', 1, passed_cases=1)
+    assert [shard['status'] for shard in database.get_suite_shards('exec-1')] == ['stopped', 'stopped']
+
+
+class _FakeShardExecutor:
+    """模拟分片执行：逐个"执行"用例，检查停止标志"""
+
+    def __init__(self, stop_flags):
+        self.stop_flags = stop_flags
+        self.executed = 0
+        self.cancelled = False
+
+    async def execute_shard(self, suite_execution_id, suite_id, shard, environment_config):
+        try:
+            for _ in range(50):
+                if self.stop_flags.get(suite_execution_id):
+                    break
+                await asyncio.sleep(0.02)
+                self.executed += 1
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return {'passed_cases': self.executed, 'failed_cases': 0, 'total_passed_steps': 0, 'total_failed_steps': 0}
+
+
+def _run_worker_shard(action) -> tuple:
+    """在分片执行期间执行 action(database, shard)，返回 (run_shard 结果, 模拟执行器, 分片记录)"""
+    database = _temp_database()
+    database.create_suite_shards('exec-1', [{'caseIds': ['case-0'], 'predictedDuration': 0}])
+    stop_flags = {}
+    fake = _FakeShardExecutor(stop_flags)
+    worker = ShardWorker(database, stop_flags, owner='remote', suite_executor=fake)
+    shard = database.claim_suite_shard('remote', 30, 'exec-1')
+
+    async def run():
+        task = asyncio.create_task(worker.run_shard(shard))
+        await asyncio.sleep(0.1)
+        action(database, shard)
+        return await task
+
+    original = shard_worker.SHARD_LEASE_SECONDS
+    shard_worker.SHARD_LEASE_SECONDS = 0.15
+    try:
+        merged = asyncio.run(run())
+    finally:
+        shard_worker.SHARD_LEASE_SECONDS = original
+    return merged, fake, database.get_suite_shards('exec-1')[0]
+
+
+def test_remote_worker_observes_stop():
+    """测试其他进程接收的停止请求通过数据库传递给运行中的分片"""
+    merged, fake, shard = _run_worker_shard(lambda database, _: database.stop_suite_shards('exec-1'))
+    assert merged and not fake.cancelled
+    assert fake.executed < 50
+    assert shard['status'] == 'stopped'
+
+
+def test_lost_lease_aborts_shard():
+    """测试租约被接管后中止本进程的分片，结果不写回"""
+    def take_over(database, shard):
+        conn = database.get_connection()
+        conn.execute("UPDATE SuiteShard SET owner = 'other' WHERE id = ?", (shard['id'],))
+        conn.commit()
+        conn.close()
+
+    merged, fake, shard = _run_worker_shard(take_over)
+    assert merged is False and fake.cancelled
+    assert shard['owner'] == 'other' and shard['status'] == 'running'
+
+
+if __name__ == "__main__":
+    test_shards_claimed_once_across_processes()
+    test_expired_shard_reclaimed()
+    test_stop_state_in_database()
+    test_remote_worker_observes_stop()
+    test_lost_lease_aborts_shard()
+    print("✅ 所有测试通过")
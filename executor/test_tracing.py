@@ -0,0 +1,121 @@
+"""
+测试执行时间线追踪与 Chrome Trace 导出（对本地桩服务执行用例）
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from models import TestCase, FlowConfig
+from test_executor import TestExecutor
+from tracing import Tracer, tracer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _node(node_id, node_type='api', **data):
+    return {'id': node_id, 'type': node_type, 'position': {'x': 0, 'y': 0}, 'data': data}
+
+
+def _test_case(name, base_url):
+    status_200 = [{'field': 'status', 'operator': 'equals', 'expected': 200}]
+    return TestCase(
+        name=name,
+        status='active',
+        flowConfig=FlowConfig(
+            nodes=[
+                _node('start', 'start'),
+                _node('get', apiId='a1', name='查询', method='GET', url=f'{base_url}/items', assertions=status_200),
+                _node('wait', 'wait', name='等待', wait={'type': 'time', 'value': 10}),
+                _node('end', 'end'),
+            ],
+            edges=[
+                {'id': 'e1', 'source': 'start', 'target': 'get'},
+                {'id': 'e2', 'source': 'get', 'target': 'wait'},
+                {'id': 'e3', 'source': 'wait', 'target': 'end'},
+            ],
+        )
+    )
+
+
+def test_export_suite_trace():
+    """测试并行执行两个用例后导出套件时间线：每个用例一行，span 按 套件 > 用例 > 节点 > 请求 嵌套"""
+    server = HTTPServer(('127.0.0.1', 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    tracer.clear()
+
+    async def run_case(name):
+        async with TestExecutor() as executor:
+            return await executor.execute_test_case(_test_case(name, base_url))
+
+    async def run_suite():
+        token = tracer.bind('suite-exec-1')
+        try:
+            with tracer.span('套件', 'suite'):
+                return await asyncio.gather(run_case('用例A'), run_case('用例B'))
+        finally:
+            tracer.unbind(token)
+
+    try:
+        results = asyncio.run(run_suite())
+    finally:
+        server.shutdown()
+    assert all(r.success for r in results)
+
+    trace = tracer.export_chrome_trace('suite-exec-1')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'trace.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, ensure_ascii=False)
+        with open(path, encoding='utf-8') as f:
+            trace = json.load(f)
+
+    spans = [e for e in trace['traceEvents'] if e['ph'] == 'X']
+    categories = {e['cat'] for e in spans}
+    assert {'suite', 'case', 'node.api', 'node.wait', 'http', 'assertion', 'wait'} <= categories
+
+    cases = [e for e in spans if e['cat'] == 'case']
+    assert sorted(e['name'] for e in cases) == ['用例A', '用例B']
+    assert cases[0]['tid'] != cases[1]['tid']
+
+    for case in cases:
+        children = [e for e in spans if e['tid'] == case['tid'] and e is not case]
+        assert children and all(
+            case['ts'] <= e['ts'] and e['ts'] + e['dur'] <= case['ts'] + case['dur'] + 1 for e in children
+        )
+    http = next(e for e in spans if e['cat'] == 'http')
+    assert http['name'] == f'GET {base_url}/items' and http['args']['status'] == 200
+
+    assert tracer.export_chrome_trace('unknown') is None
+
+
+def test_disabled_tracer():
+    """测试关闭追踪时不记录 span"""
+    disabled = Tracer(enabled=False)
+    assert disabled.bind('exec-1') is None
+    with disabled.span('x', 'case') as span:
+        span.set(ok=True)
+    disabled.record('x', 'db', 0.0, 0.1)
+    assert disabled.export_chrome_trace('exec-1') is None
+
+
+if __name__ == "__main__":
+    test_export_suite_trace()
+    test_disabled_tracer()
+    print("✅ 所有测试通过")
@@ -0,0 +1,62 @@
+"""
+测试 URL 模板编译（结果需与逐步处理完全一致）
+"""
+from url_template import (
+    apply_base_url, compile_url_template, merge_db_url, replace_path_params
+)
+
+
+def _legacy(node_url, db_url, base_url, path_params, keep_query):
+    """逐步处理：合并数据库URL -> 替换路径参数 -> 去掉查询参数 -> 应用BaseURL"""
+    url = replace_path_params(merge_db_url(node_url, db_url), path_params)
+    return apply_base_url(url, base_url, keep_query)
+
+
+def test_url_template_matches_legacy():
+    """测试模板渲染结果与逐步处理一致"""
+    node_urls = [
+        'http://h/users/{id}',
+        'https://h:8443/users/{id}/orders/{orderId}?x=1#top',
+        '/users/{id}',
+        '{id}/detail',
+        'users/list',
+        'http://h/search?q={id}',
+        'http://h/a/{id}/{id}',
+        'http://h/{{id}}',
+    ]
+    db_urls = [None, 'https://db.example.com:9000/users/1?y=2']
+    base_urls = [None, 'http://base.example.com/', 'https://base.example.com/api']
+    params_list = [
+        {},
+        {'id': 42},
+        {'id': 'a b', 'orderId': 'o-1'},
+        {'id': '/abs'},
+        {'id': 'x?y=1'},
+        {'id': 'a;b'},
+        {'id': 'a;b', 'orderId': 'c;d=1'},
+        {'id': '{orderId}', 'orderId': 7},
+        {'other': 1},
+    ]
+
+    for node_url in node_urls:
+        for db_url in db_urls:
+            for base_url in base_urls:
+                for keep_query in (False, True):
+                    template = compile_url_template(node_url, db_url, base_url, keep_query)
+                    for params in params_list:
+                        expected = _legacy(node_url, db_url, base_url, params, keep_query)
+                        assert template.render(params) == expected, (node_url, db_url, base_url, keep_query, params)
+
+
+def test_url_template_compiled():
+    """测试常见 URL 编译为单次格式化"""
+    template = compile_url_template('http://h/users/{id}?x=1', None, 'https://base/api/')
+    assert template.format == 'https://base/api/users/{0}'
+    assert template.render({'id': 5}) == 'https://base/api/users/5'
+    assert template.render() == 'https://base/api/users/{id}'
+
+
+if __name__ == "__main__":
+    test_url_template_matches_legacy()
+    test_url_template_compiled()
+    print("✅ 所有测试通过")
@@ -2,6 +2,8 @@
 测试变量提取功能
 """
 import sys
+from execution_plan import compile_plan
+from models import FlowConfig
 from variable_manager import VariableManager
 
 
@@ -150,8 +152,75 @@ def test_response_extraction():
     print("="*60)
 
 
+def test_parallel_scopes():
+    """测试并发分支的写时复制作用域与合并规则"""
+    vm = VariableManager({'token': 't0'})
+    vm.set_step_result('step_login', {'response': {'status': 200, 'body': {'id': 1}}})
+    
+    a = vm.fork()
+    b = vm.fork()
+    a.set_variable('p.parallel.a.id', 10)
+    a.set_variable('shared', 'x')
+    b.set_variable('shared', 'y')
+    b.set_variable('token', 't1')
+    
+    # 子作用域能读到父作用域，写入互不可见，父作用域不变
+    assert a.resolve_variable_path('step_login.response.id') == 1
+    assert a.get_variable('token') == 't0' and b.get_variable('token') == 't1'
+    assert vm.get_variable('shared') is None
+    
+    # 按声明顺序合并：冲突时后声明的分支生效（与完成顺序无关）
+    conflicts = vm.merge_scopes([('b', b.scope_changes()), ('a', a)])
+    assert vm.get_variable('shared') == 'x'
+    assert vm.get_variable('token') == 't1'
+    assert vm.get_variable('p.parallel.a.id') == 10
+    assert conflicts == [{'scope': 'variables', 'key': 'shared', 'branches': ['b', 'a'], 'winner': 'a'}]
+    
+    # 快照合并所有作用域层（分支仍能读到合并后的父作用域）
+    restored = VariableManager.from_snapshot(a.to_snapshot())
+    assert restored.get_variable('token') == 't1'
+    assert restored.get_variable('shared') == 'x'
+    assert restored.get_step_result('step_login')['response']['status'] == 200
+
+
+def test_step_result_release():
+    """测试步骤结果在最后一次被引用后释放"""
+    def node(node_id, node_type='api', **data):
+        return {'id': node_id, 'type': node_type, 'position': {'x': 0, 'y': 0}, 'data': data}
+    
+    flow = FlowConfig(
+        nodes=[
+            node('start', 'start'),
+            node('api_1', name='登录'),
+            node('api_12', name='列表', requestConfig={'headers': {
+                'Authorization': {'valueType': 'variable', 'variable': 'api_1.response.body.token'}
+            }}),
+            node('api_2', name='详情'),
+            node('check', 'assertion', name='校验', assertions=[
+                {'field': 'api_1.response.status', 'operator': 'equals', 'expected': '${api_2.response.body.id}'}
+            ]),
+            node('end', 'end'),
+        ],
+        edges=[
+            {'id': f'e{i}', 'source': s, 'target': t}
+            for i, (s, t) in enumerate([('start', 'api_1'), ('api_1', 'api_12'), ('api_12', 'api_2'),
+                                        ('api_2', 'check'), ('check', 'end')])
+        ],
+    )
+    plan = compile_plan(flow)
+    # api_12 只在自身执行完后释放；api_1 / api_2 保留到断言节点之后
+    assert {k: sorted(v) for k, v in plan.release_after.items()} == {1: ['api_12'], 3: ['api_1', 'api_2', 'check']}
+    
+    vm = VariableManager()
+    vm.set_step_result('api_12', {'response': {}})
+    assert vm.release_step_results(plan.release_after[1]) == 1
+    assert vm.get_step_result('api_12') is None
+
+
 if __name__ == '__main__':
     test_response_extraction()
+    test_parallel_scopes()
+    test_step_result_release()
 
 
 
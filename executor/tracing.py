@@ -0,0 +1,196 @@
+"""
+执行时间线追踪 - 套件/用例/节点/HTTP 请求/数据库写入/等待/断言的轻量 span，可导出为 Chrome Trace
+
+- span 记录到进程内的环形缓冲区（最多 TRACE_BUFFER_SIZE 条，写满后覆盖最旧的记录），不产生 I/O
+- 每个 span 归属于当前上下文绑定的执行ID（套件执行绑定套件执行ID，用例执行再追加用例执行ID），
+  并行用例/并行节点的 asyncio 任务继承创建时的上下文
+- 同一个 asyncio 任务内的 span 按调用顺序嵌套，导出时每个任务对应时间线上的一行
+- 关闭追踪（EXECUTION_TRACE=0）时 span() 直接返回共享的空上下文管理器
+
+导出格式为 Chrome Trace Event（JSON），可在 chrome://tracing 或 https://ui.perfetto.dev 打开。
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+# 是否开启追踪
+TRACE_ENABLED = os.getenv("EXECUTION_TRACE", "1") == "1"
+
+# 环形缓冲区容量（span 数）
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200000"))
+
+# 当前上下文绑定的执行ID（外层在前：套件执行ID, 用例执行ID）
+_trace_ids: ContextVar[Tuple[str, ...]] = ContextVar('trace_ids', default=())
+
+
+class _NoopSpan:
+    """关闭追踪时使用的空 span"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def set(self, **args: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _lane() -> int:
+    """当前 asyncio 任务的标识（不在任务中时为 0）"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        return 0
+    return id(task) if task is not None else 0
+
+
+class _Span:
+    """进行中的 span（退出时写入缓冲区）"""
+
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, args: Optional[Dict[str, Any]]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.set(error=f'{exc_type.__name__}: {exc_val}')
+        self.tracer.record(self.name, self.category, self.start, time.perf_counter() - self.start, self.args)
+        return False
+
+    def set(self, **args: Any) -> None:
+        """补充 span 参数（如响应状态码、结果）"""
+        if self.args is None:
+            self.args = args
+        else:
+            self.args.update(args)
+
+
+class Tracer:
+    """span 记录器"""
+
+    def __init__(self, enabled: bool = TRACE_ENABLED, capacity: int = TRACE_BUFFER_SIZE):
+        self.enabled = enabled
+        # (执行ID元组, 名称, 类别, 开始时间, 耗时, 任务标识, 参数)
+        self._buffer: deque = deque(maxlen=capacity)
+        # perf_counter 与墙上时间的换算基准（导出的时间戳使用 epoch 微秒）
+        self._epoch_offset = time.time() - time.perf_counter()
+
+    def bind(self, execution_id: Optional[str]):
+        """
+        把后续 span 归属到执行ID（在当前上下文中追加），返回用于 unbind 的令牌
+
+        关闭追踪或没有执行ID时返回 None。
+        """
+        if not self.enabled or not execution_id:
+            return None
+        return _trace_ids.set(_trace_ids.get() + (execution_id,))
+
+    def unbind(self, token) -> None:
+        if token is not None:
+            _trace_ids.reset(token)
+
+    def span(self, name: str, category: str, **args: Any):
+        """
+        记录一段耗时（with 语句）
+
+        未绑定执行ID的 span 不记录。
+        """
+        if not self.enabled or not _trace_ids.get():
+            return _NOOP_SPAN
+        return _Span(self, name, category, args or None)
+
+    def record(
+        self,
+        name: str,
+        category: str,
+        start: float,
+        duration: float,
+        args: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        直接写入一条已结束的 span（start 为 time.perf_counter() 时间，单位秒）
+
+        未绑定执行ID时忽略。
+        """
+        if not self.enabled:
+            return
+        trace_ids = _trace_ids.get()
+        if trace_ids:
+            self._buffer.append((trace_ids, name, category, start, duration, _lane(), args))
+
+    def spans(self, execution_id: str) -> List[tuple]:
+        """获取归属于执行ID的 span（按开始时间排序）"""
+        return sorted(
+            (span for span in list(self._buffer) if execution_id in span[0]),
+            key=lambda span: span[3]
+        )
+
+    def export_chrome_trace(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """
+        导出执行的 Chrome Trace（JSON 对象格式）
+
+        Returns:
+            {"traceEvents": [...], ...}；缓冲区中没有该执行的 span 时返回 None
+        """
+        spans = self.spans(execution_id)
+        if not spans:
+            return None
+
+        pid = os.getpid()
+        lanes: Dict[int, int] = {}
+        events: List[Dict[str, Any]] = []
+        for trace_ids, name, category, start, duration, lane, args in spans:
+            if lane not in lanes:
+                lanes[lane] = len(lanes) + 1
+                # 以该任务上最早的 span 命名时间线上的一行
+                events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': lanes[lane],
+                    'args': {'name': name},
+                })
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': round((start + self._epoch_offset) * 1_000_000, 1),
+                'dur': round(duration * 1_000_000, 1),
+                'pid': pid,
+                'tid': lanes[lane],
+            }
+            if args:
+                event['args'] = {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)
+                                 for key, value in args.items()}
+            events.append(event)
+
+        events.insert(0, {
+            'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+            'args': {'name': f'executor {execution_id}'},
+        })
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'executionId': execution_id, 'spanCount': len(spans)},
+        }
+
+    def clear(self) -> None:
+        self._buffer.clear()
+
+
+# 全局追踪器（进程内共享）
+tracer = Tracer()
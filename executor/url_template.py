@@ -0,0 +1,130 @@
+"""
+URL 模板 - 每个 API 节点的请求 URL 只解析一次
+
+执行 API 节点时 URL 要经过多步处理：合并数据库 URL 与节点路径、替换路径参数、
+去掉查询参数、替换/拼接平台 BaseURL。这些步骤只依赖节点配置和环境配置，
+因此按 (节点, 环境) 编译为模板，每次请求只需把路径参数填入模板。
+
+路径参数值包含 URL 结构字符（? # ; {）或以 / 开头时，填入后的解析结果可能与
+逐步处理不同，此时回退为逐步处理，保证结果与原逻辑完全一致。
+"""
+import re
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse, urlunparse
+
+# 路径参数占位符，如 {userId}
+_PLACEHOLDER = re.compile(r'\{([^{}]+)\}')
+# 编译时代替占位符的标记（不会出现在正常 URL 中）
+_SLOT = '\x00{}\x00'
+
+
+def merge_db_url(node_url: str, db_url: Optional[str]) -> str:
+    """
+    合并数据库中的 API URL 与节点 URL
+
+    节点路径包含占位符时，使用数据库 URL 的 scheme+netloc 拼接节点的参数化路径；
+    否则直接使用数据库完整 URL
+    """
+    if not db_url:
+        return node_url
+    if '{' in node_url:
+        parsed_db = urlparse(db_url)
+        parsed_node = urlparse(node_url)
+        return urlunparse((parsed_db.scheme, parsed_db.netloc, parsed_node.path, '', '', ''))
+    return db_url
+
+
+def replace_path_params(url: str, path_params: Optional[Dict[str, Any]]) -> str:
+    """替换 URL 中的路径参数（与 VariableManager.replace_url_params 一致）"""
+    for key, value in (path_params or {}).items():
+        url = url.replace(f'{{{key}}}', str(value))
+    return url
+
+
+def apply_base_url(url: str, base_url: Optional[str], keep_query: bool = False) -> str:
+    """
+    处理已替换路径参数的 URL：去掉查询参数并应用平台 BaseURL
+
+    Args:
+        url: URL
+        base_url: 平台 BaseURL（为空时不替换）
+        keep_query: 是否保留 URL 中的查询参数（并发节点保留，普通 API 节点去掉）
+    """
+    if not keep_query:
+        parsed = urlparse(url)
+        url = urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', '', ''))
+
+    if base_url:
+        base_url = base_url.rstrip('/')
+        if url.startswith('http://') or url.startswith('https://'):
+            parsed = urlparse(url)
+            path = parsed.path
+            if keep_query and parsed.query:
+                path = f"{path}?{parsed.query}"
+            url = f"{base_url}{path}"
+        else:
+            url = f"{base_url}/{url.lstrip('/')}"
+    return url
+
+
+class UrlTemplate:
+    """编译后的 URL 模板"""
+
+    def __init__(self, url: str, base_url: Optional[str] = None, keep_query: bool = False):
+        """
+        Args:
+            url: 合并数据库 URL 后、替换路径参数前的 URL
+            base_url: 平台 BaseURL
+            keep_query: 是否保留 URL 中的查询参数
+        """
+        self.url = url
+        self.base_url = base_url
+        self.keep_query = keep_query
+        self.keys: List[str] = []
+        self.format: Optional[str] = None
+
+        keys = list(dict.fromkeys(_PLACEHOLDER.findall(url)))
+        slotted = url
+        for index, key in enumerate(keys):
+            slotted = slotted.replace(f'{{{key}}}', _SLOT.format(index))
+        resolved = apply_base_url(slotted, base_url, keep_query)
+
+        # 标记在处理过程中被改写或丢弃（如位于查询参数中）时，只能逐步处理
+        if '{' in resolved or '}' in resolved:
+            resolved = resolved.replace('{', '{{').replace('}', '}}')
+        for index in range(len(keys)):
+            if resolved.count(_SLOT.format(index)) != slotted.count(_SLOT.format(index)):
+                return
+            resolved = resolved.replace(_SLOT.format(index), f'{{{index}}}')
+        if '\x00' in resolved:
+            return
+        self.keys = keys
+        self.format = resolved
+
+    def render(self, path_params: Optional[Dict[str, Any]] = None) -> str:
+        """填入路径参数，返回最终请求 URL（不含查询参数配置）"""
+        path_params = path_params or {}
+        if self.format is not None:
+            values = []
+            for key in self.keys:
+                if key not in path_params:
+                    values.append(f'{{{key}}}')
+                    continue
+                value = str(path_params[key])
+                if value.startswith('/') or '?' in value or '#' in value or ';' in value or '{' in value:
+                    break
+                values.append(value)
+            else:
+                return self.format.format(*values)
+
+        return apply_base_url(replace_path_params(self.url, path_params), self.base_url, self.keep_query)
+
+
+def compile_url_template(
+    node_url: str,
+    db_url: Optional[str],
+    base_url: Optional[str],
+    keep_query: bool = False
+) -> UrlTemplate:
+    """编译 API 节点的 URL 模板"""
+    return UrlTemplate(merge_db_url(node_url, db_url), base_url, keep_query)
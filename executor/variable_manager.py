@@ -2,7 +2,8 @@
 变量管理器 - 负责变量的存储、提取和替换
 """
 import re
-from typing import Any, Dict, Optional, Union
+from collections import ChainMap
+from typing import Any, Dict, List, Optional, Tuple, Union
 from jsonpath_ng import parse
 from models import ParamValue, ValueType
 from runtime_functions import resolve_value_with_functions
@@ -22,6 +23,87 @@ class VariableManager:
         self.step_results: Dict[str, Dict[str, Any]] = {}
         self.current_step_id: Optional[str] = None  # 当前正在执行的步骤ID
     
+    # ==================== 作用域（并发分支） ====================
+    
+    def fork(self) -> 'VariableManager':
+        """
+        创建子作用域（写时复制）
+        
+        子作用域读取时先查自身、再查父作用域，写入只落在子作用域的本层，
+        不影响父作用域和其他分支；分支结束后通过 merge_scopes 合并回父作用域。
+        注意：复制粒度为变量键，变量值本身（如字典）不会被复制。
+        """
+        child = VariableManager.__new__(VariableManager)
+        child.variables = ChainMap({}, self.variables)
+        child.step_results = ChainMap({}, self.step_results)
+        child.current_step_id = self.current_step_id
+        return child
+    
+    def scope_changes(self) -> Dict[str, Dict[str, Any]]:
+        """子作用域本层写入的变量和步骤结果（普通字典，可序列化后发送到其他进程）"""
+        return {
+            'variables': dict(self.variables.maps[0]) if isinstance(self.variables, ChainMap) else {},
+            'step_results': dict(self.step_results.maps[0]) if isinstance(self.step_results, ChainMap) else {},
+        }
+    
+    def merge_scopes(self, branches: List[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        合并并发分支的写入
+        
+        合并规则（与分支完成顺序无关）：
+        1. 按分支声明顺序依次合并
+        2. 只有一个分支写入的键直接合并；多个分支写入相同的值视为一致
+        3. 多个分支写入不同的值视为冲突：按声明顺序后写入的分支生效，并返回冲突列表
+        
+        Args:
+            branches: [(分支ID, 子作用域 VariableManager 或 scope_changes() 的结果)]，按声明顺序
+            
+        Returns:
+            冲突列表 [{'scope', 'key', 'branches', 'winner'}]
+        """
+        conflicts = []
+        for scope in ('variables', 'step_results'):
+            target = getattr(self, scope)
+            writers: Dict[str, List[Tuple[str, Any]]] = {}
+            for branch_id, branch in branches:
+                changes = branch.scope_changes() if isinstance(branch, VariableManager) else branch
+                for key, value in (changes.get(scope) or {}).items():
+                    writers.setdefault(key, []).append((branch_id, value))
+            
+            for key, writes in writers.items():
+                winner_id, value = writes[-1]
+                if any(other != value for _, other in writes[:-1]):
+                    conflicts.append({
+                        'scope': scope,
+                        'key': key,
+                        'branches': [branch_id for branch_id, _ in writes],
+                        'winner': winner_id,
+                    })
+                target[key] = value
+        
+        for conflict in conflicts:
+            print(f"[变量作用域] ⚠️ 并发分支写入冲突: {conflict['scope']}.{conflict['key']}，"
+                  f"分支 {conflict['branches']}，采用 {conflict['winner']}")
+        return conflicts
+    
+    def to_snapshot(self) -> Dict[str, Any]:
+        """导出为普通字典（合并所有作用域层，可序列化后在其他进程恢复）"""
+        return {
+            'variables': dict(self.variables),
+            'step_results': dict(self.step_results),
+            'current_step_id': self.current_step_id,
+        }
+    
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any]) -> 'VariableManager':
+        """从 to_snapshot() 的结果恢复"""
+        manager = cls(dict(snapshot.get('variables') or {}))
+        manager.step_results = dict(snapshot.get('step_results') or {})
+        manager.current_step_id = snapshot.get('current_step_id')
+        return manager
+    
+    # ==================== 变量读写 ====================
+    
     def set_variable(self, name: str, value: Any) -> None:
         """设置全局变量"""
         self.variables[name] = value
@@ -34,6 +116,15 @@ class VariableManager:
         """保存步骤执行结果"""
         self.step_results[step_id] = result
     
+    def release_step_results(self, step_ids: List[str]) -> int:
+        """
+        释放不再被引用的步骤结果（请求/响应数据）
+        
+        Returns:
+            释放的步骤数
+        """
+        return sum(1 for step_id in step_ids if self.step_results.pop(step_id, None) is not None)
+    
     def get_step_result(self, step_id: str) -> Optional[Dict[str, Any]]:
         """获取步骤执行结果"""
         return self.step_results.get(step_id)
@@ -5,6 +5,7 @@ import asyncio
 from typing import Any, Optional, Dict
 from models import WaitConfig, WaitType
 from variable_manager import VariableManager
+from tracing import tracer
 
 
 class WaitHandler:
@@ -29,14 +30,15 @@ class WaitHandler:
         Returns:
             (是否成功, 错误信息)
         """
-        if config.type == WaitType.TIME:
-            success = await self._wait_time(config.value or 0)
-            return (success, None)
-        
-        elif config.type == WaitType.CONDITION:
-            max_timeout = config.timeout or 30000
-            check_interval = config.checkInterval or 2000
-            return await self._wait_condition(config, max_timeout, check_interval)
+        with tracer.span(f'等待 {getattr(config.type, "value", config.type)}', 'wait'):
+            if config.type == WaitType.TIME:
+                success = await self._wait_time(config.value or 0)
+                return (success, None)
+            
+            elif config.type == WaitType.CONDITION:
+                max_timeout = config.timeout or 30000
+                check_interval = config.checkInterval or 2000
+                return await self._wait_condition(config, max_timeout, check_interval)
         
         return (True, None)
     
@@ -203,17 +205,18 @@ class WaitHandler:
         Returns:
             (是否成功, 错误信息)
         """
-        if config.type == WaitType.TIME:
-            # 复用_wait_time方法，它已经包含了进度输出
-            success = await self._wait_time(config.value or 0)
-            return (success, None)
-        
-        elif config.type == WaitType.CONDITION:
-            max_timeout = config.timeout or 30000
-            check_interval = config.checkInterval or 2000
-            return await self._wait_condition_with_context(
-                config, context, max_timeout, check_interval
-            )
+        with tracer.span(f'等待 {getattr(config.type, "value", config.type)}', 'wait'):
+            if config.type == WaitType.TIME:
+                # 复用_wait_time方法，它已经包含了进度输出
+                success = await self._wait_time(config.value or 0)
+                return (success, None)
+            
+            elif config.type == WaitType.CONDITION:
+                max_timeout = config.timeout or 30000
+                check_interval = config.checkInterval or 2000
+                return await self._wait_condition_with_context(
+                    config, context, max_timeout, check_interval
+                )
         
         return (True, None)
     
@@ -0,0 +1,31 @@
+import { getExecutorUrl } from '@/lib/config';
+
+// 通知执行器的超时时间（毫秒），超时后放弃通知，不阻塞保存 API 的请求
+const INVALIDATE_TIMEOUT_MS = 5000;
+
+/**
+ * 通知执行器使 API 信息缓存失效
+ *
+ * API 库中的 API 被修改或删除后调用，执行器下次执行时重新读取 API 信息。
+ * 失败或超时时只记录日志，不影响主流程（执行器缓存有 TTL 兜底）。
+ *
+ * @param apiIds 失效的 API ID 列表，不提供时清空全部缓存
+ */
+export async function invalidateExecutorApiCache(apiIds?: string[]): Promise<void> {
+  if (apiIds && apiIds.length === 0) return;
+  const controller = new AbortController();
+  const timeoutId = setTimeout(() => controller.abort(), INVALIDATE_TIMEOUT_MS);
+  try {
+    const executorUrl = getExecutorUrl(false); // 服务端调用
+    await fetch(`${executorUrl}/api/cache/apis/invalidate`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ api_ids: apiIds }),
+      signal: controller.signal,
+    });
+  } catch (error) {
+    console.warn('⚠️ 通知执行器刷新API缓存失败:', error);
+  } finally {
+    clearTimeout(timeoutId);
+  }
+}
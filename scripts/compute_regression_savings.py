@@ -9,6 +9,50 @@ def ms_to_minutes(ms: float) -> float:
     return ms / 1000.0 / 60.0
 
 
+def summarize_from_stats(cur: sqlite3.Cursor, days: int, top_suites: int) -> int:
+    """O(suites x days) summary from the materialized SuiteDailyStats table."""
+    cur.execute(
+        """
+        SELECT d.suiteId, s.name AS suiteName,
+               SUM(d.runCount) AS runs,
+               SUM(d.totalDuration) AS wall_ms,
+               SUM(d.caseDurationSum) AS serial_est_ms
+        FROM SuiteDailyStats d
+        LEFT JOIN TestSuite s ON s.id = d.suiteId
+        WHERE d.day >= date('now', 'localtime', ?)
+        GROUP BY d.suiteId
+        HAVING runs > 0
+        ORDER BY runs DESC
+        """,
+        (f"-{max(days, 1) - 1} days",),
+    )
+    suites = cur.fetchall()
+    if not suites:
+        raise SystemExit("No rows in SuiteDailyStats for the requested window.")
+
+    runs = sum(r["runs"] for r in suites)
+    wall = sum(r["wall_ms"] for r in suites)
+    serial = sum(r["serial_est_ms"] for r in suites)
+
+    print(f"SAMPLES\t{runs}")
+    print(f"AVG_WALL_MIN\t{ms_to_minutes(wall / runs):.2f}")
+    print(f"AVG_SERIAL_EST_MIN\t{ms_to_minutes(serial / runs):.2f}")
+    print(f"AVG_SAVINGS_MIN\t{ms_to_minutes((serial - wall) / runs):.2f}")
+    print(f"AVG_SAVINGS_PCT\t{((serial - wall) / serial * 100.0) if serial else 0.0:.1f}")
+
+    print("TOP_SUITES")
+    for r in suites[:top_suites]:
+        save = r["serial_est_ms"] - r["wall_ms"]
+        print(
+            f"{r['suiteName']}\t{r['suiteId']}\tsamples={r['runs']}"
+            f"\tavg_wall_min={ms_to_minutes(r['wall_ms'] / r['runs']):.2f}"
+            f"\tavg_serial_min={ms_to_minutes(r['serial_est_ms'] / r['runs']):.2f}"
+            f"\tavg_save_min={ms_to_minutes(save / r['runs']):.2f}"
+            f"\tavg_save_pct={(save / r['serial_est_ms'] * 100.0) if r['serial_est_ms'] else 0.0:.1f}"
+        )
+    return 0
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
         description=(
@@ -33,6 +77,17 @@ def main() -> int:
         default=10,
         help="How many suites to show in per-suite summary (default: 10)",
     )
+    parser.add_argument(
+        "--from-stats",
+        action="store_true",
+        help="Read the executor-maintained SuiteDailyStats table instead of scanning executions",
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=30,
+        help="How many recent days to aggregate with --from-stats (default: 30)",
+    )
     args = parser.parse_args()
 
     db_path = os.path.abspath(args.db)
@@ -45,6 +100,11 @@ def main() -> int:
 
     cur.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
     tables = {r[0] for r in cur.fetchall()}
+    if args.from_stats:
+        if "SuiteDailyStats" not in tables:
+            raise SystemExit("Missing table: SuiteDailyStats")
+        return summarize_from_stats(cur, args.days, args.top_suites)
+
     for t in ("TestSuiteExecution", "TestCaseExecution", "TestSuite"):
         if t not in tables:
             raise SystemExit(f"Missing table: {t}")